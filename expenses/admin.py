@@ -5,6 +5,7 @@ from django.contrib.auth.models import User
 
 from .models import (
     Account,
+    BackgroundJob,
     Category,
     EmailLog,
     Expense,
@@ -120,6 +121,14 @@ class LedgerPostingFailureAdmin(admin.ModelAdmin):
     ordering = ('-created_at',)
 
 
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'job_type', 'status', 'attempts', 'run_after', 'duration_ms', 'created_at')
+    list_filter = ('job_type', 'status')
+    search_fields = ('job_type', 'error_message')
+    ordering = ('-created_at',)
+
+
 @admin.register(LedgerReconciliationReport)
 class LedgerReconciliationReportAdmin(admin.ModelAdmin):
     list_display = ('as_of_date', 'user', 'account', 'account_balance', 'ledger_balance', 'drift_amount', 'status')
@@ -0,0 +1,263 @@
+import calendar
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Round, TruncMonth
+from django.utils import timezone
+
+from .data_epoch import DataEpochService
+from .ledger_read_service import LedgerReadService
+from .models import Expense, GoalContribution, Income, LoanRepayment, Transfer
+from .utils import get_exchange_rate
+
+MONEY_FIELD = DecimalField(max_digits=15, decimal_places=2)
+RATE_FIELD = DecimalField(max_digits=15, decimal_places=6)
+
+
+def shift_months(value, months):
+    """Moves a date by whole months, clamping the day to the target month length."""
+    month_index = value.month - 1 + months
+    year = value.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+class AccountBalanceHistoryService:
+    """Closing-balance time series built from a running SQL window sum over account movements."""
+
+    RESOLUTIONS = ("daily", "monthly")
+    CACHE_TIMEOUT = 60 * 60
+    DEFAULT_DAILY_POINTS = 31
+    DEFAULT_MONTHLY_POINTS = 13
+    MAX_POINTS = 3700
+
+    @staticmethod
+    def _movement_sources(account):
+        """(queryset, amount field, currency field or None, sign) for every table that moves the balance."""
+        return [
+            (Expense.objects.filter(account=account), "amount", "currency", -1),
+            (Income.objects.filter(account=account), "amount", "currency", 1),
+            (Transfer.objects.filter(from_account=account), "amount", None, -1),
+            (Transfer.objects.filter(to_account=account), "amount", "from_account__currency", 1),
+            (GoalContribution.objects.filter(account=account), "amount", "goal__currency", -1),
+            (LoanRepayment.objects.filter(from_account=account), "amount", "loan__currency", -1),
+        ]
+
+    @staticmethod
+    def _converted_amount(amount_field, currency_field, rates, sign):
+        amount = F(amount_field)
+        if currency_field and rates:
+            amount = Case(
+                *[
+                    When(**{currency_field: currency}, then=Round(F(amount_field) * Value(rate, output_field=RATE_FIELD), 2))
+                    for currency, rate in rates.items()
+                ],
+                default=F(amount_field),
+                output_field=MONEY_FIELD,
+            )
+        return ExpressionWrapper(amount * Value(Decimal(sign), output_field=MONEY_FIELD), output_field=MONEY_FIELD)
+
+    @staticmethod
+    def _to_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value[:10])
+        return value
+
+    @staticmethod
+    def _to_decimal(value):
+        if value is None:
+            return Decimal("0.00")
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+
+    @staticmethod
+    def _period_start(value, resolution):
+        return value.replace(day=1) if resolution == "monthly" else value
+
+    @classmethod
+    def _periods(cls, start, end, resolution):
+        periods = []
+        current = cls._period_start(start, resolution)
+        while current <= end:
+            periods.append(current)
+            current = shift_months(current, 1) if resolution == "monthly" else current + timedelta(days=1)
+        return periods
+
+    @classmethod
+    def _resolve_range(cls, resolution, start, end):
+        if resolution not in cls.RESOLUTIONS:
+            raise ValueError(f"Unsupported resolution: {resolution}")
+        end = end or timezone.now().date()
+        if start is None:
+            if resolution == "monthly":
+                start = shift_months(end.replace(day=1), -(cls.DEFAULT_MONTHLY_POINTS - 1))
+            else:
+                start = end - timedelta(days=cls.DEFAULT_DAILY_POINTS - 1)
+        if start > end:
+            raise ValueError("Series start must not be after its end.")
+        if resolution == "daily" and (end - start).days >= cls.MAX_POINTS:
+            raise ValueError("Requested range is too long for daily resolution.")
+        return cls._period_start(start, resolution), end
+
+    @staticmethod
+    def _fetch_rows(sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    @classmethod
+    def _running_totals(cls, movements):
+        """
+        Returns [(period, running_total)] for a list of querysets exposing
+        ``period``/``delta`` values, using ``SUM() OVER (ORDER BY period)``.
+        """
+        if not movements:
+            return []
+        union_qs = movements[0].union(*movements[1:], all=True)
+        union_sql, params = union_qs.query.sql_with_params()
+        sql = (
+            "SELECT period, SUM(SUM(delta)) OVER (ORDER BY period) "
+            f"FROM ({union_sql}) movements GROUP BY period ORDER BY period"
+        )
+        return [(cls._to_date(period), cls._to_decimal(running)) for period, running in cls._fetch_rows(sql, params)]
+
+    @classmethod
+    def _currency_rates(cls, account):
+        """Resolves the FX rate for each foreign currency that touches the account, once per pair."""
+        currency_queries = [
+            qs.order_by().values_list(currency_field, flat=True).distinct()
+            for qs, _amount, currency_field, _sign in cls._movement_sources(account)
+            if currency_field
+        ]
+        currencies = set(currency_queries[0].union(*currency_queries[1:]))
+        return {
+            currency: get_exchange_rate(currency, account.currency)
+            for currency in currencies
+            if currency and currency != account.currency
+        }
+
+    @classmethod
+    def _account_movements(cls, account, resolution, since):
+        rates = cls._currency_rates(account)
+        period = TruncMonth("date") if resolution == "monthly" else F("date")
+        movements = []
+        for qs, amount_field, currency_field, sign in cls._movement_sources(account):
+            movements.append(
+                qs.filter(date__gte=since)
+                .order_by()
+                .annotate(
+                    period=period,
+                    delta=cls._converted_amount(amount_field, currency_field, rates, sign),
+                )
+                .values("period", "delta")
+            )
+        return movements
+
+    @staticmethod
+    def _closing_series(periods, running_rows, closing_now, later_sign=-1):
+        """
+        Turns running movement totals into closing values anchored on the current value:
+        closing(p) = current + later_sign * (movements after p).
+        """
+        total = running_rows[-1][1] if running_rows else Decimal("0.00")
+        series = []
+        running = Decimal("0.00")
+        row_index = 0
+        for period in periods:
+            while row_index < len(running_rows) and running_rows[row_index][0] <= period:
+                running = running_rows[row_index][1]
+                row_index += 1
+            series.append({"period": period, "balance": closing_now + later_sign * (total - running)})
+        return series
+
+    @staticmethod
+    def _data_version(account):
+        # The data epoch covers edits that net to zero on the balance (such as
+        # moving a transaction to another date); updated_at covers direct
+        # balance edits.
+        updated_at = account.updated_at or timezone.now()
+        return f"{DataEpochService.get(account.user_id)}-{int(updated_at.timestamp() * 1000000)}"
+
+    @classmethod
+    def _cache_key(cls, account, resolution, start, end):
+        return f"balance_series:{account.pk}:{resolution}:{start.isoformat()}:{end.isoformat()}:{cls._data_version(account)}"
+
+    @classmethod
+    def get_account_series(cls, account, resolution="monthly", start=None, end=None):
+        """
+        Closing balance of ``account`` (in account currency) for every day or month in
+        ``[start, end]``. Cached per account, resolution, range and data version.
+        """
+        start, end = cls._resolve_range(resolution, start, end)
+        cache_key = cls._cache_key(account, resolution, start, end)
+        series = cache.get(cache_key)
+        if series is not None:
+            return series
+
+        running_rows = cls._running_totals(cls._account_movements(account, resolution, start))
+        closing_now = LedgerReadService.get_account_balance(account)
+        series = cls._closing_series(cls._periods(start, end, resolution), running_rows, closing_now)
+        cache.set(cache_key, series, cls.CACHE_TIMEOUT)
+        return series
+
+    @classmethod
+    def get_earliest_movement_date(cls, account):
+        cache_key = f"balance_series:{account.pk}:earliest:{cls._data_version(account)}"
+        earliest = cache.get(cache_key)
+        if earliest is not None:
+            return earliest or None
+
+        dates = [qs.order_by().annotate(day=F("date")).values("day") for qs, _amount, _currency, _sign in cls._movement_sources(account)]
+        union_sql, params = dates[0].union(*dates[1:], all=True).query.sql_with_params()
+        rows = cls._fetch_rows(f"SELECT MIN(day) FROM ({union_sql}) movements", params)
+        earliest = cls._to_date(rows[0][0]) if rows and rows[0][0] else None
+        cache.set(cache_key, earliest or "", cls.CACHE_TIMEOUT)
+        return earliest
+
+    @classmethod
+    def get_default_resolution(cls, account, today=None):
+        """Monthly once an account has more than ~3 months of history, daily otherwise."""
+        today = today or timezone.now().date()
+        earliest = cls.get_earliest_movement_date(account) or today
+        return "monthly" if (today - earliest).days > 90 else "daily"
+
+    @classmethod
+    def _liability_series(cls, user, periods, resolution, current_liabilities):
+        movements = [
+            LoanRepayment.objects.filter(loan__user=user, loan__is_active=True, date__gte=periods[0])
+            .order_by()
+            .annotate(
+                period=TruncMonth("date") if resolution == "monthly" else F("date"),
+                delta=ExpressionWrapper(F("principal_portion"), output_field=MONEY_FIELD),
+            )
+            .values("period", "delta")
+        ]
+        # Principal repaid after a period was still owed at its close, so liabilities grow going back.
+        return cls._closing_series(periods, cls._running_totals(movements), current_liabilities, later_sign=1)
+
+    @classmethod
+    def get_net_worth_series(cls, user, resolution="monthly", start=None, end=None, include_liabilities=True):
+        """Sum of the user's active account series in base currency, optionally net of loan principal."""
+        from .services import LoanService
+
+        start, end = cls._resolve_range(resolution, start, end)
+        periods = cls._periods(start, end, resolution)
+        base_currency = user.profile.currency
+        totals = [Decimal("0.00")] * len(periods)
+
+        for account in user.accounts.filter(is_active=True):
+            rate = Decimal("1.0") if account.currency == base_currency else get_exchange_rate(account.currency, base_currency)
+            for index, point in enumerate(cls.get_account_series(account, resolution, start, end)):
+                totals[index] += (point["balance"] * rate).quantize(Decimal("0.01"))
+
+        if include_liabilities:
+            current_liabilities = Decimal(str(LoanService.get_total_liabilities(user))).quantize(Decimal("0.01"))
+            for index, point in enumerate(cls._liability_series(user, periods, resolution, current_liabilities)):
+                totals[index] -= point["balance"]
+
+        return [{"period": period, "balance": total} for period, total in zip(periods, totals, strict=True)]
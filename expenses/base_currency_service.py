@@ -0,0 +1,104 @@
+"""
+Re-normalizes ``base_amount``/``exchange_rate`` after a user changes their base
+currency. Rates are resolved once per currency pair and rows are rewritten
+chunk by chunk with ``bulk_update``, rounded in Python exactly as the models'
+``save()`` rounds them. Account balances and the ledger are in account
+currency, so they are left alone.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .data_epoch import DataEpochService
+from .models import (
+    Expense,
+    Income,
+    RecurringTransaction,
+    TransactionFeedItem,
+    UserProfile,
+)
+from .utils import get_exchange_rate
+
+
+class BaseCurrencyService:
+    # Models whose rows carry their own currency, base_amount and exchange_rate.
+    MODELS = (Expense, Income, RecurringTransaction)
+    # Feed rows mirroring those models; they have a base_amount but no rate.
+    FEED_ITEM_TYPES = ('EXPENSE', 'INCOME')
+
+    @staticmethod
+    def enqueue(user):
+        from .job_queue import JobQueueService
+
+        return JobQueueService.enqueue('renormalize_base_amounts', user_id=user.pk)
+
+    @classmethod
+    def rates_for(cls, user, base_currency):
+        """{currency: rate to ``base_currency``} for every currency the user's rows use."""
+        currencies = set()
+        for model in cls.MODELS:
+            currencies.update(model.objects.filter(user=user).order_by().values_list('currency', flat=True).distinct())
+        return {
+            currency: Decimal('1.0') if currency == base_currency else get_exchange_rate(currency, base_currency)
+            for currency in currencies
+        }
+
+    @staticmethod
+    def _rebase(rows, rates, is_source):
+        """
+        Sets each row's base amount (and rate, for source rows) and returns the
+        rows that changed. A currency first used after the rates were resolved
+        was saved in the new base already, so those rows are left as they are.
+        """
+        changed = []
+        for row in rows:
+            rate = rates.get(row.currency)
+            if rate is None:
+                continue
+            # Same rounding as Expense/Income/RecurringTransaction.save().
+            row.base_amount = (row.amount * rate).quantize(Decimal('0.01'))
+            if is_source:
+                row.exchange_rate = rate
+            changed.append(row)
+        return changed
+
+    @classmethod
+    def renormalize(cls, user, chunk_size=None):
+        """
+        Rewrites the user's base amounts for their current base currency and
+        returns the number of source rows updated. Each chunk commits on its
+        own; if the base currency changes mid-run the remaining chunks are left
+        to the job queued by that change.
+        """
+        chunk_size = max(1, chunk_size or settings.BASE_CURRENCY_CHUNK_SIZE)
+        base_currency = UserProfile.objects.values_list('currency', flat=True).get(user=user)
+        rates = cls.rates_for(user, base_currency)
+        if not rates:
+            return 0
+
+        targets = [(model.objects.filter(user=user), True) for model in cls.MODELS]
+        targets.append((TransactionFeedItem.objects.filter(user=user, item_type__in=cls.FEED_ITEM_TYPES), False))
+
+        updated = 0
+        try:
+            for queryset, is_source in targets:
+                fields = ['base_amount', 'exchange_rate'] if is_source else ['base_amount']
+                last_id = 0
+                while True:
+                    ids = list(queryset.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:chunk_size])
+                    if not ids:
+                        break
+                    last_id = ids[-1]
+                    with transaction.atomic():
+                        current = UserProfile.objects.select_for_update().values_list('currency', flat=True).get(user=user)
+                        if current != base_currency:
+                            return updated
+                        rows = list(queryset.filter(pk__in=ids).select_related(None).only('pk', 'currency', 'amount', *fields))
+                        queryset.model.objects.bulk_update(cls._rebase(rows, rates, is_source), fields)
+                    if is_source:
+                        updated += len(rows)
+        finally:
+            # Bulk updates skip the save signals that normally bump it.
+            DataEpochService.bump(user)
+        return updated
@@ -0,0 +1,203 @@
+"""
+Per-user category prediction from expense history: a multinomial naive Bayes
+model over description tokens, plus an exact-description table for merchants
+the user always files the same way.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CategoryPredictionModel, Expense
+
+FORMAT_VERSION = 1
+_TOKEN_RE = re.compile(r'\w+')
+MAX_DESCRIPTION_KEY = 128
+
+
+def tokenize(description):
+    # Reference numbers and one-letter fragments only bloat the vocabulary.
+    return [
+        token for token in _TOKEN_RE.findall((description or '').lower())
+        if len(token) > 1 and not token.isdigit()
+    ]
+
+
+def description_key(description):
+    return ' '.join((description or '').lower().split())[:MAX_DESCRIPTION_KEY]
+
+
+class CategoryClassifier:
+    """
+    ``data`` is the compact JSON form stored on ``CategoryPredictionModel``:
+    ``docs`` (samples per category), ``tokens`` (token counts per category),
+    ``totals`` (token total per category) and ``exact`` (category counts per
+    normalized description).
+    """
+
+    def __init__(self, data=None, max_descriptions=None):
+        data = data if data and data.get('v') == FORMAT_VERSION else {}
+        self.docs = Counter(data.get('docs', {}))
+        self.tokens = {category: Counter(counts) for category, counts in data.get('tokens', {}).items()}
+        self.totals = Counter(data.get('totals', {}))
+        self.exact = {key: Counter(counts) for key, counts in data.get('exact', {}).items()}
+        self.max_descriptions = (
+            max_descriptions if max_descriptions is not None else settings.CATEGORY_MODEL_MAX_DESCRIPTIONS
+        )
+        self._vocabulary = None
+
+    @property
+    def sample_count(self):
+        return sum(self.docs.values())
+
+    @property
+    def vocabulary_size(self):
+        if self._vocabulary is None:
+            self._vocabulary = len({token for counts in self.tokens.values() for token in counts})
+        return self._vocabulary
+
+    def learn(self, description, category, weight=1):
+        """Adds (or with ``weight=-1`` removes) one labelled description."""
+        category = (category or '').strip()
+        if not category:
+            return
+        self._vocabulary = None
+        self._bump(self.docs, category, weight)
+        counts = self.tokens.setdefault(category, Counter())
+        for token in tokenize(description):
+            self._bump(counts, token, weight)
+            self._bump(self.totals, category, weight)
+        if not counts:
+            del self.tokens[category]
+
+        key = description_key(description)
+        if key and (key in self.exact or (weight > 0 and len(self.exact) < self.max_descriptions)):
+            entry = self.exact.setdefault(key, Counter())
+            self._bump(entry, category, weight)
+            if not entry:
+                del self.exact[key]
+
+    def forget(self, description, category):
+        self.learn(description, category, weight=-1)
+
+    def rename(self, old, new):
+        for table in [self.docs, self.totals, *self.exact.values()]:
+            if old in table:
+                table[new] += table.pop(old)
+        if old in self.tokens:
+            self.tokens.setdefault(new, Counter()).update(self.tokens.pop(old))
+
+    @staticmethod
+    def _bump(counter, key, weight):
+        counter[key] += weight
+        if counter[key] <= 0:
+            del counter[key]
+
+    def predict(self, description):
+        """
+        Returns ``(category, confidence)`` where confidence is the posterior
+        probability of the category, or ``(None, 0.0)`` when the history has
+        nothing to say about the description.
+        """
+        entry = self.exact.get(description_key(description))
+        if entry:
+            category, count = max(entry.items(), key=lambda item: (item[1], item[0]))
+            return category, count / sum(entry.values())
+
+        tokens = [token for token in tokenize(description) if any(token in counts for counts in self.tokens.values())]
+        if not tokens or not self.docs:
+            return None, 0.0
+
+        total_docs = self.sample_count
+        vocabulary = self.vocabulary_size
+        scores = {}
+        for category, docs in self.docs.items():
+            counts = self.tokens.get(category, {})
+            denominator = self.totals.get(category, 0) + vocabulary
+            score = math.log(docs / total_docs)
+            for token in tokens:
+                score += math.log((counts.get(token, 0) + 1) / denominator)
+            scores[category] = score
+
+        best = max(scores, key=lambda category: (scores[category], category))
+        top = scores[best]
+        normalizer = sum(math.exp(score - top) for score in scores.values())
+        return best, 1.0 / normalizer
+
+    def to_dict(self):
+        return {
+            'v': FORMAT_VERSION,
+            'docs': dict(self.docs),
+            'tokens': {category: dict(counts) for category, counts in self.tokens.items()},
+            'totals': dict(self.totals),
+            'exact': {key: dict(counts) for key, counts in self.exact.items()},
+        }
+
+
+class CategoryModelService:
+    """
+    Loads, trains and incrementally updates the stored classifier. The loaded
+    classifier is kept on the user instance, so a request or an import job
+    reads it from the database once.
+    """
+    CACHE_ATTR = '_category_classifier'
+
+    @classmethod
+    def load(cls, user):
+        classifier = getattr(user, cls.CACHE_ATTR, None)
+        if classifier is None:
+            stored = CategoryPredictionModel.objects.filter(user=user).values_list('data', flat=True).first()
+            classifier = CategoryClassifier(stored) if stored is not None else cls.train(user)
+            setattr(user, cls.CACHE_ATTR, classifier)
+        return classifier
+
+    @classmethod
+    def predict(cls, user, description):
+        return cls.load(user).predict(description)
+
+    @classmethod
+    def train(cls, user):
+        """Rebuilds the classifier from the user's full expense history."""
+        classifier = CategoryClassifier()
+        history = Expense.objects.filter(user=user).values_list('description', 'category')
+        for description, category in history.iterator(chunk_size=2000):
+            classifier.learn(description, category)
+        CategoryPredictionModel.objects.update_or_create(
+            user=user,
+            defaults={
+                'data': classifier.to_dict(),
+                'sample_count': classifier.sample_count,
+                'trained_at': timezone.now(),
+            },
+        )
+        setattr(user, cls.CACHE_ATTR, classifier)
+        return classifier
+
+    @classmethod
+    def record(cls, user, added=(), removed=(), renamed=None):
+        """
+        Applies ``(description, category)`` changes to the stored model;
+        ``user`` may be a user or its primary key. Users
+        without a stored model are skipped: their first ``load`` trains from
+        the full history, which already includes these changes.
+        """
+        with transaction.atomic():
+            stored = CategoryPredictionModel.objects.select_for_update().filter(user=user).first()
+            if stored is None:
+                return None
+            classifier = CategoryClassifier(stored.data)
+            for description, category in removed:
+                classifier.forget(description, category)
+            for description, category in added:
+                classifier.learn(description, category)
+            if renamed:
+                classifier.rename(*renamed)
+            stored.data = classifier.to_dict()
+            stored.sample_count = classifier.sample_count
+            stored.save(update_fields=['data', 'sample_count', 'updated_at'])
+        if hasattr(user, cls.CACHE_ATTR):
+            setattr(user, cls.CACHE_ATTR, classifier)
+        return classifier
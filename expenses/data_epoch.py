@@ -0,0 +1,99 @@
+"""
+A per-user data epoch: a counter on ``UserProfile`` that every write to the
+user's financial data bumps once its transaction commits. Caches derived from
+that data key their entries on the current epoch instead of invalidating them
+by hand, so a write simply moves readers on to new keys and the old entries
+expire on their own. The epoch itself is always read from the database, so a
+bump made by any web or worker process is seen by all of them at once.
+"""
+import functools
+import hashlib
+import inspect
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import UserProfile
+
+_MISSING = object()
+
+
+class DataEpochService:
+    DATA_KEY = 'user-data:{user_id}:{epoch}:{name}'
+
+    @classmethod
+    def get(cls, user):
+        user_id = getattr(user, 'pk', user)
+        # One primary-key read; a per-process cached copy would miss other processes' bumps.
+        return UserProfile.objects.filter(user_id=user_id).values_list('data_epoch', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, user):
+        """
+        Schedules one increment for ``user`` when the current transaction
+        commits (immediately outside one). Repeated bumps inside a transaction
+        share the pending increment, so bulk deletes cost a single UPDATE.
+        """
+        user_id = getattr(user, 'pk', user)
+        if user_id is None or cls._pending(user_id):
+            return
+
+        def callback():
+            callback.data_epoch_user_id = None
+            cls._apply(user_id)
+
+        callback.data_epoch_user_id = user_id
+        transaction.on_commit(callback)
+
+    @classmethod
+    def _pending(cls, user_id):
+        # Callbacks from a rolled-back savepoint are already gone from this list,
+        # and a callback that has run clears its marker.
+        return connection.in_atomic_block and any(
+            getattr(entry[1], 'data_epoch_user_id', None) == user_id for entry in connection.run_on_commit
+        )
+
+    @classmethod
+    def _apply(cls, user_id):
+        UserProfile.objects.filter(user_id=user_id).update(data_epoch=F('data_epoch') + 1)
+
+    @classmethod
+    def cache_key(cls, user, name):
+        user_id = getattr(user, 'pk', user)
+        return cls.DATA_KEY.format(user_id=user_id, epoch=cls.get(user_id), name=name)
+
+
+def epoch_cached(timeout=None, user_arg='user'):
+    """
+    Caches a function's result per user and data epoch. ``user_arg`` names the
+    parameter holding the user (or user id); the remaining arguments must have
+    stable ``repr()``s, since they become part of the key.
+
+        @epoch_cached(timeout=600)
+        def monthly_totals(user, year, month): ...
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        name = f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            arguments.pop('cls', None)
+            arguments.pop('self', None)
+            user = arguments.pop(user_arg)
+            digest = hashlib.sha1(repr(sorted(arguments.items())).encode()).hexdigest()
+            key = DataEpochService.cache_key(user, f'{name}:{digest}')
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = func(*args, **kwargs)
+                cache.set(key, result, settings.DATA_EPOCH_CACHE_SECONDS if timeout is None else timeout)
+            return result
+
+        return wrapper
+
+    return decorator
@@ -2,15 +2,19 @@ import logging
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.mail.backends.base import BaseEmailBackend
 from django.core.mail.backends.console import EmailBackend as ConsoleBackend
 
 logger = logging.getLogger(__name__)
 
-class LoggedEmailBackend:
+class LoggedEmailBackend(BaseEmailBackend):
     """
     Wraps the real email backend and logs every sent email to the database.
+    Opening it (or using it as a context manager) keeps the real backend's
+    connection open across several send_messages() calls.
     """
     def __init__(self, *args, **kwargs):
+        super().__init__(fail_silently=kwargs.get('fail_silently', False))
         self._init_args = args
         self._init_kwargs = kwargs
         self._backend = None
@@ -26,6 +30,13 @@ class LoggedEmailBackend:
                 self._backend = BrevoBackend(*self._init_args, **self._init_kwargs)
         return self._backend
 
+    def open(self):
+        return self.backend.open()
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
     def send_messages(self, email_messages):
         if not email_messages:
             return 0
@@ -39,16 +50,18 @@ class LoggedEmailBackend:
             sent_count = 0
             # Even if it fails, we want to log the attempt below if possible
         
-        for message in email_messages:
-            try:
-                # We import here to avoid circular imports if models.py depends on mail
-                from .models import EmailLog
-                
-                # Try to find a user with this email
-                # message.to is a list of emails
-                recipient = message.to[0] if message.to else ""
-                user = User.objects.filter(email=recipient).first() if recipient else None
-                
+        try:
+            # We import here to avoid circular imports if models.py depends on mail
+            from .models import EmailLog
+
+            # message.to is a list of emails; link each log to the oldest user with that address.
+            recipients = {message.to[0] for message in email_messages if message.to}
+            users = {}
+            for user in User.objects.filter(email__in=recipients).order_by('-pk'):
+                users[user.email] = user
+
+            logs = []
+            for message in email_messages:
                 # Collect HTML body if present
                 html_body = ""
                 if hasattr(message, 'alternatives'):
@@ -57,17 +70,18 @@ class LoggedEmailBackend:
                             html_body = alt[0]
                             break
 
-                EmailLog.objects.create(
-                    user=user,
+                logs.append(EmailLog(
+                    user=users.get(message.to[0]) if message.to else None,
                     to_email=", ".join(message.to) if message.to else "No Recipient",
                     subject=message.subject,
                     body=message.body,
                     html_body=html_body,
                     status='SENT' if sent_count > 0 else 'FAILED',
                     error_message=None if sent_count > 0 else "Backend reported 0 sent messages"
-                )
-            except Exception as e:
-                # Logging to DB failed, at least log it to console/file
-                logger.error(f"Failed to log email to database: {e}")
+                ))
+            EmailLog.objects.bulk_create(logs)
+        except Exception as e:
+            # Logging to DB failed, at least log it to console/file
+            logger.error(f"Failed to log email to database: {e}")
                 
         return sent_count
@@ -0,0 +1,195 @@
+"""
+Typed export formats. CSV stays in ``streaming_export``; the formats here keep
+Decimal amounts, dates and booleans as real types so spreadsheets and
+dataframes load them without re-parsing text.
+"""
+import json
+import os
+import tempfile
+import zipfile
+from datetime import UTC, datetime
+from decimal import Decimal
+from itertools import islice
+
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from openpyxl import Workbook
+
+from .streaming_export import EXPORT_CHUNK_SIZE
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# format -> (file extension, content type); "columnar" resolves to Parquet or JSON Lines.
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'jsonl': ('.jsonl', 'application/x-ndjson'),
+}
+EXPORT_FORMATS = ('csv', 'xlsx', 'columnar')
+ZIP_CONTENT_TYPE = 'application/x-zip-compressed'
+
+# Decimal columns are stored exactly; every amount in the app has two decimal places.
+DECIMAL_PRECISION = (18, 2)
+
+
+def arrow_available():
+    return pyarrow is not None
+
+
+def columnar_label():
+    """What the "columnar" choice produces on this install, for labelling it in the UI."""
+    return _('Parquet') if arrow_available() else _('JSON Lines')
+
+
+def resolve_format(export_format):
+    """Maps a requested format to a concrete one, falling back to CSV for unknown values."""
+    if export_format == 'columnar':
+        return 'parquet' if arrow_available() else 'jsonl'
+    if export_format in FORMATS:
+        return export_format
+    return 'csv'
+
+
+def file_name(filename, export_format):
+    return os.path.splitext(filename)[0] + FORMATS[export_format][0]
+
+
+def artifact_name(files, export_format='csv'):
+    """Download name: the single file itself, one workbook for XLSX, otherwise a ZIP."""
+    if len(files) == 1:
+        return file_name(files[0][0], export_format)
+    if export_format == 'xlsx':
+        return 'financial_data_export.xlsx'
+    return 'financial_data_export.zip'
+
+
+def content_type(name):
+    if name.endswith('.zip'):
+        return ZIP_CONTENT_TYPE
+    for extension, mime in FORMATS.values():
+        if name.endswith(extension):
+            return mime
+    return 'application/octet-stream'
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _excel_value(value):
+    # Excel has no time zones; store timestamps as naive UTC.
+    if isinstance(value, datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value, UTC)
+    return value
+
+
+def write_xlsx(files, handle):
+    """
+    One sheet per file, written with openpyxl's ``write_only`` mode so rows are
+    flushed to disk as they are appended instead of held as cell objects.
+    """
+    workbook = Workbook(write_only=True)
+    for filename, header, _types, rows in files:
+        sheet = workbook.create_sheet(title=os.path.splitext(filename)[0][:31])
+        sheet.append(list(header))
+        for row in rows:
+            sheet.append([_excel_value(value) for value in row])
+    workbook.save(handle)
+
+
+def _arrow_type(column_type):
+    return {
+        'string': pyarrow.string(),
+        'decimal': pyarrow.decimal128(*DECIMAL_PRECISION),
+        'date': pyarrow.date32(),
+        'datetime': pyarrow.timestamp('us', tz='UTC'),
+        'int': pyarrow.int64(),
+        'bool': pyarrow.bool_(),
+    }[column_type]
+
+
+def write_parquet(header, types, rows, handle, chunk_size=EXPORT_CHUNK_SIZE):
+    """Writes one row group per chunk, so only ``chunk_size`` rows are in memory."""
+    schema = pyarrow.schema([(str(name), _arrow_type(column_type)) for name, column_type in zip(header, types, strict=True)])
+    with pyarrow.parquet.ParquetWriter(handle, schema, compression='snappy') as writer:
+        for chunk in _chunks(rows, chunk_size):
+            columns = [
+                pyarrow.array(
+                    [_quantize(value) if column_type == 'decimal' else value for value in column],
+                    type=field.type,
+                )
+                for column, column_type, field in zip(zip(*chunk, strict=True), types, schema, strict=True)
+            ]
+            writer.write_table(pyarrow.Table.from_arrays(columns, schema=schema))
+
+
+def _quantize(value):
+    if value is None:
+        return None
+    return Decimal(value).quantize(Decimal(1).scaleb(-DECIMAL_PRECISION[1]))
+
+
+def _json_value(value):
+    if value is None:
+        return 'null'
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (Decimal, int)):
+        # Emitted as a bare number literal, so no precision is lost on the way out.
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return json.dumps(value.isoformat())
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def write_jsonl(header, types, rows, handle):
+    """Pure-Python columnar fallback: one JSON object per row with typed values."""
+    keys = [json.dumps(str(name), ensure_ascii=False) for name in header]
+    for row in rows:
+        line = '{' + ', '.join(f'{key}: {_json_value(value)}' for key, value in zip(keys, row, strict=True)) + '}\n'
+        handle.write(line.encode('utf-8'))
+
+
+def _write_columnar(export_format, header, types, rows, handle):
+    if export_format == 'parquet':
+        write_parquet(header, types, rows, handle)
+    else:
+        write_jsonl(header, types, rows, handle)
+
+
+def write_export(files, export_format, handle):
+    """
+    Writes ``[(filename, header, types, rows)]`` to the binary ``handle`` in a
+    concrete (already resolved) non-CSV format.
+    """
+    if export_format == 'xlsx':
+        write_xlsx(files, handle)
+        return
+    if len(files) == 1:
+        _filename, header, types, rows = files[0]
+        _write_columnar(export_format, header, types, rows, handle)
+        return
+
+    # Parquet is already compressed, so members are stored rather than deflated again.
+    compression = zipfile.ZIP_STORED if export_format == 'parquet' else zipfile.ZIP_DEFLATED
+    with zipfile.ZipFile(handle, 'w', compression) as archive:
+        for filename, header, types, rows in files:
+            with tempfile.TemporaryFile() as member:
+                _write_columnar(export_format, header, types, rows, member)
+                member.seek(0)
+                with archive.open(file_name(filename, export_format), 'w', force_zip64=True) as target:
+                    while True:
+                        data = member.read(1024 * 1024)
+                        if not data:
+                            break
+                        target.write(data)
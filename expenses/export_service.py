@@ -0,0 +1,287 @@
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone, translation
+from django.utils.translation import gettext as _
+
+from . import export_formats
+from .job_queue import JobQueueService
+from .models import (
+    Expense,
+    ExportJob,
+    Income,
+    JournalLine,
+    Loan,
+    LoanRepayment,
+    Notification,
+    RecurringTransaction,
+    SavingsGoal,
+    Transfer,
+)
+from .streaming_export import EXPORT_CHUNK_SIZE, csv_chunks, iter_keyset, zip_stream
+
+logger = logging.getLogger(__name__)
+
+EXPORT_ENTITIES = ('expenses', 'incomes', 'transfers', 'recurring', 'goals', 'loans', 'ledger')
+
+# Column types per file, used by the typed (XLSX/columnar) formats.
+COLUMN_TYPES = {
+    'expenses.csv': ('date', 'string', 'decimal', 'string', 'string', 'string'),
+    'incomes.csv': ('date', 'string', 'decimal', 'string', 'string'),
+    'transfers.csv': ('date', 'string', 'string', 'decimal', 'string'),
+    'recurring_transactions.csv': ('string', 'decimal', 'string', 'string', 'date', 'bool'),
+    'savings_goals.csv': ('string', 'decimal', 'decimal', 'date', 'bool'),
+    'loans.csv': ('string', 'string', 'decimal', 'int', 'date', 'string', 'bool'),
+    'loan_repayments.csv': ('date', 'string', 'decimal', 'decimal', 'decimal', 'string'),
+    'ledger.csv': ('datetime', 'string', 'int', 'string', 'string', 'string', 'decimal', 'string', 'decimal'),
+}
+
+
+class ExportService:
+    """Builds the CSV files behind the data export, for streaming responses and background jobs."""
+
+    @staticmethod
+    def _querysets(user, entity):
+        """(filename, queryset) pairs an entity exports; used for counting and for rows."""
+        if entity == 'expenses':
+            return [('expenses.csv', Expense.objects.filter(user=user))]
+        if entity == 'incomes':
+            return [('incomes.csv', Income.objects.filter(user=user))]
+        if entity == 'transfers':
+            return [('transfers.csv', Transfer.objects.filter(user=user))]
+        if entity == 'recurring':
+            return [('recurring_transactions.csv', RecurringTransaction.objects.filter(user=user))]
+        if entity == 'goals':
+            return [('savings_goals.csv', SavingsGoal.objects.filter(user=user))]
+        if entity == 'loans':
+            return [
+                ('loans.csv', Loan.objects.filter(user=user)),
+                ('loan_repayments.csv', LoanRepayment.objects.filter(loan__user=user)),
+            ]
+        if entity == 'ledger':
+            return [('ledger.csv', JournalLine.objects.filter(journal_entry__user=user))]
+        raise ValueError(f"Unknown export entity: {entity}")
+
+    @staticmethod
+    def _rows(filename, queryset):
+        if filename == 'expenses.csv':
+            # Rows are produced lazily, so translate the label up front.
+            expense_label = _('Expense')
+            rows = iter_keyset(queryset, ('date', 'description', 'amount', 'category', 'account__name'))
+            return (
+                [_('Date'), _('Description'), _('Amount'), _('Category'), _('Account'), _('Type')],
+                (row + (expense_label,) for row in rows),
+            )
+        if filename == 'incomes.csv':
+            return (
+                [_('Date'), _('Source'), _('Amount'), _('Description'), _('Account')],
+                iter_keyset(queryset, ('date', 'source', 'amount', 'description', 'account__name')),
+            )
+        if filename == 'transfers.csv':
+            return (
+                [_('Date'), _('From Account'), _('To Account'), _('Amount'), _('Description')],
+                iter_keyset(queryset, ('date', 'from_account__name', 'to_account__name', 'amount', 'description')),
+            )
+        if filename == 'recurring_transactions.csv':
+            # next_due_date is computed, so these stay model instances.
+            return (
+                [_('Description'), _('Amount'), _('Type'), _('Frequency'), _('Next Due Date'), _('Active')],
+                (
+                    (r.description, r.amount, r.transaction_type, r.frequency, r.next_due_date, r.is_active)
+                    for r in queryset.order_by('start_date', 'pk').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+                ),
+            )
+        if filename == 'savings_goals.csv':
+            return (
+                [_('Name'), _('Target Amount'), _('Current Amount'), _('Target Date'), _('Completed')],
+                queryset.order_by('target_date', 'pk').values_list(
+                    'name', 'target_amount', 'current_amount', 'target_date', 'is_completed'
+                ).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            )
+        if filename == 'loans.csv':
+            return (
+                [_('Name'), _('Loan Type'), _('Principal'), _('Duration (Months)'), _('Start Date'), _('Currency'), _('Active')],
+                queryset.order_by('start_date', 'pk').values_list(
+                    'name', 'loan_type', 'initial_principal', 'duration_months', 'start_date', 'currency', 'is_active'
+                ).iterator(chunk_size=EXPORT_CHUNK_SIZE),
+            )
+        if filename == 'loan_repayments.csv':
+            return (
+                [_('Date'), _('Loan'), _('Amount'), _('Principal'), _('Interest'), _('Account')],
+                iter_keyset(
+                    queryset,
+                    ('date', 'loan__name', 'amount', 'principal_portion', 'interest_portion', 'from_account__name'),
+                ),
+            )
+        if filename == 'ledger.csv':
+            return (
+                [_('Posted At'), _('Source'), _('Source ID'), _('Description'), _('Ledger Account'),
+                 _('Direction'), _('Amount'), _('Currency'), _('Base Amount')],
+                iter_keyset(
+                    queryset,
+                    ('journal_entry__posted_at', 'journal_entry__source_type', 'journal_entry__source_id',
+                     'journal_entry__description', 'ledger_account__name', 'direction', 'amount', 'currency',
+                     'base_amount'),
+                    ordering=('-journal_entry__posted_at', '-pk'),
+                ),
+            )
+        raise ValueError(f"Unknown export file: {filename}")
+
+    @classmethod
+    def build_files(cls, user, entities):
+        """[(filename, header, types, rows)] for the selected entities, in form order."""
+        files = []
+        for entity in entities:
+            for filename, queryset in cls._querysets(user, entity):
+                header, rows = cls._rows(filename, queryset)
+                files.append((filename, header, COLUMN_TYPES[filename], rows))
+        return files
+
+    @classmethod
+    def count_rows(cls, user, entities):
+        return {
+            filename: queryset.count()
+            for entity in entities
+            for filename, queryset in cls._querysets(user, entity)
+        }
+
+    @staticmethod
+    def should_run_async(row_counts):
+        return sum(row_counts.values()) > getattr(settings, 'EXPORT_ASYNC_ROW_THRESHOLD', 20000)
+
+
+class ExportJobService:
+    """Queues exports and generates them outside the request/response cycle."""
+
+    PROGRESS_EVERY = EXPORT_CHUNK_SIZE
+
+    @staticmethod
+    def create_job(user, entities, row_counts=None, export_format='csv'):
+        row_counts = row_counts if row_counts is not None else ExportService.count_rows(user, entities)
+        job = ExportJob.objects.create(
+            user=user,
+            entities=list(entities),
+            export_format=export_format,
+            row_counts=row_counts,
+            total_rows=sum(row_counts.values()),
+        )
+        JobQueueService.enqueue('run_export_jobs')
+        return job
+
+    @staticmethod
+    def claim_next_job(now=None):
+        """
+        Marks the oldest pending job RUNNING, or restarts a RUNNING one whose
+        worker stopped reporting progress; concurrent workers skip rows
+        another worker holds.
+        """
+        now = now or timezone.now()
+        stale_before = now - timedelta(minutes=getattr(settings, 'EXPORT_STALE_MINUTES', 15))
+        with transaction.atomic():
+            job = (
+                ExportJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stale_before))
+                .order_by('created_at', 'pk')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = 'RUNNING'
+            job.started_at = now
+            job.save(update_fields=['status', 'started_at', 'updated_at'])
+            return job
+
+    @staticmethod
+    def artifact_path(job, file_name):
+        return Path(settings.EXPORT_ROOT) / str(job.user_id) / f"{job.pk}-{file_name}"
+
+    @classmethod
+    def _track(cls, job, rows):
+        """Passes rows through while persisting progress every PROGRESS_EVERY rows."""
+        for row in rows:
+            yield row
+            job.processed_rows += 1
+            if job.processed_rows % cls.PROGRESS_EVERY == 0:
+                ExportJob.objects.filter(pk=job.pk).update(processed_rows=job.processed_rows, updated_at=timezone.now())
+
+    @classmethod
+    def run_job(cls, job):
+        profile = getattr(job.user, 'profile', None)
+        try:
+            with translation.override(getattr(profile, 'language', None) or settings.LANGUAGE_CODE):
+                files = ExportService.build_files(job.user, job.entities)
+                export_format = export_formats.resolve_format(job.export_format)
+                file_name = export_formats.artifact_name(files, export_format)
+                path = cls.artifact_path(job, file_name)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_suffix(path.suffix + '.part')
+
+                job.processed_rows = 0
+                tracked = [
+                    (filename, header, types, cls._track(job, rows)) for filename, header, types, rows in files
+                ]
+                with open(tmp_path, 'wb') as handle:
+                    if export_format != 'csv':
+                        export_formats.write_export(tracked, export_format, handle)
+                    else:
+                        if len(tracked) == 1:
+                            _filename, header, _types, rows = tracked[0]
+                            chunks = (chunk.encode('utf-8') for chunk in csv_chunks(header, rows))
+                        else:
+                            chunks = zip_stream(
+                                (filename, csv_chunks(header, rows)) for filename, header, _types, rows in tracked
+                            )
+                        for chunk in chunks:
+                            handle.write(chunk)
+                os.replace(tmp_path, path)
+        except Exception as exc:
+            logger.exception("Export job %s failed.", job.pk)
+            job.status = 'FAILED'
+            job.error_message = str(exc)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error_message', 'finished_at', 'processed_rows', 'updated_at'])
+            return job
+
+        job.status = 'COMPLETED'
+        job.file_path = str(path)
+        job.file_name = file_name
+        job.file_size = path.stat().st_size
+        job.total_rows = max(job.total_rows, job.processed_rows)
+        job.finished_at = timezone.now()
+        job.save(update_fields=[
+            'status', 'file_path', 'file_name', 'file_size', 'processed_rows', 'total_rows', 'finished_at',
+            'updated_at',
+        ])
+        Notification.objects.create(
+            user=job.user,
+            title=_("Your data export is ready"),
+            message=_("%(rows)d rows are ready to download.") % {'rows': job.processed_rows},
+            notification_type='SYSTEM',
+            slug=f"export-job-{job.pk}",
+            link=reverse('export-job-download', args=[job.pk]),
+            metadata={'export_job_id': job.pk},
+        )
+        return job
+
+    @staticmethod
+    def purge_expired(now=None):
+        """Deletes artifacts older than EXPORT_RETENTION_DAYS; returns how many jobs were cleared."""
+        now = now or timezone.now()
+        cutoff = now - timedelta(days=getattr(settings, 'EXPORT_RETENTION_DAYS', 7))
+        purged = 0
+        for job in ExportJob.objects.filter(status='COMPLETED', finished_at__lt=cutoff).exclude(file_path=''):
+            try:
+                Path(job.file_path).unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Could not delete export artifact %s", job.file_path)
+                continue
+            job.file_path = ''
+            job.save(update_fields=['file_path'])
+            purged += 1
+        return purged
@@ -0,0 +1,249 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import (
+    Expense,
+    GoalContribution,
+    Income,
+    LoanRepayment,
+    TransactionFeedItem,
+    Transfer,
+    UserProfile,
+)
+from .utils import get_exchange_rate
+
+FEED_UPDATE_FIELDS = [
+    "user",
+    "date",
+    "parent_id",
+    "description",
+    "category",
+    "account_label",
+    "account",
+    "counter_account",
+    "amount",
+    "base_amount",
+    "currency",
+    "updated_at",
+]
+
+
+class TransactionFeedService:
+    """Keeps ``TransactionFeedItem`` rows in step with the source transaction tables."""
+
+    BATCH_SIZE = 1000
+
+    # item_type -> (model, select_related needed to build an item without extra queries)
+    SOURCES = {
+        "EXPENSE": (Expense, ("account",)),
+        "INCOME": (Income, ("account",)),
+        "TRANSFER": (Transfer, ("from_account", "to_account")),
+        "LOAN": (LoanRepayment, ("loan", "from_account")),
+        "GOAL": (GoalContribution, ("goal", "account")),
+    }
+
+    @staticmethod
+    def item_type_for(instance):
+        for item_type, (model, _related) in TransactionFeedService.SOURCES.items():
+            if isinstance(instance, model):
+                return item_type
+        return None
+
+    @staticmethod
+    def _account_name(account):
+        return account.name if account else ""
+
+    @classmethod
+    def build_item(cls, instance, base_currencies=None):
+        """Unsaved feed row for a source transaction. ``base_currencies`` caches user_id -> currency."""
+        item_type = cls.item_type_for(instance)
+        if item_type == "EXPENSE":
+            return TransactionFeedItem(
+                user_id=instance.user_id,
+                date=instance.date,
+                item_type=item_type,
+                source_id=instance.pk,
+                description=instance.description or "",
+                category=instance.category or "",
+                account_label=cls._account_name(instance.account),
+                account_id=instance.account_id,
+                amount=instance.amount,
+                base_amount=instance.base_amount,
+                currency=instance.currency,
+            )
+        if item_type == "INCOME":
+            return TransactionFeedItem(
+                user_id=instance.user_id,
+                date=instance.date,
+                item_type=item_type,
+                source_id=instance.pk,
+                description=instance.description or "",
+                category=instance.source or "",
+                account_label=cls._account_name(instance.account),
+                account_id=instance.account_id,
+                amount=instance.amount,
+                base_amount=instance.base_amount,
+                currency=instance.currency,
+            )
+        if item_type == "TRANSFER":
+            return TransactionFeedItem(
+                user_id=instance.user_id,
+                date=instance.date,
+                item_type=item_type,
+                source_id=instance.pk,
+                description=instance.description or "",
+                category="Transfer",
+                account_label=f"{instance.from_account.name} → {instance.to_account.name}",
+                account_id=instance.from_account_id,
+                counter_account_id=instance.to_account_id,
+                amount=instance.amount,
+                base_amount=instance.converted_amount,
+                currency=instance.from_account.currency,
+            )
+        if item_type == "LOAN":
+            loan = instance.loan
+            return TransactionFeedItem(
+                user_id=loan.user_id,
+                date=instance.date,
+                item_type=item_type,
+                source_id=instance.pk,
+                parent_id=loan.pk,
+                description=f"Loan repayment - {loan.name}",
+                category=loan.name,
+                account_label=cls._account_name(instance.from_account),
+                account_id=instance.from_account_id,
+                amount=instance.amount,
+                base_amount=instance.base_amount,
+                currency=loan.currency,
+            )
+        if item_type == "GOAL":
+            goal = instance.goal
+            return TransactionFeedItem(
+                user_id=goal.user_id,
+                date=instance.date,
+                item_type=item_type,
+                source_id=instance.pk,
+                parent_id=goal.pk,
+                description=f"Contribution to {goal.name}",
+                category=goal.name,
+                account_label=cls._account_name(instance.account),
+                account_id=instance.account_id,
+                amount=instance.amount,
+                base_amount=cls._goal_base_amount(instance, base_currencies),
+                currency=goal.currency,
+            )
+        raise TypeError(f"{type(instance).__name__} is not a feed source.")
+
+    @staticmethod
+    def _goal_base_amount(contribution, base_currencies=None):
+        # Contributions do not store a base amount, so convert like the other models do on save.
+        goal = contribution.goal
+        if base_currencies is not None and goal.user_id in base_currencies:
+            base_currency = base_currencies[goal.user_id]
+        else:
+            base_currency = goal.user.profile.currency
+        if goal.currency == base_currency:
+            return contribution.amount
+        rate = get_exchange_rate(goal.currency, base_currency)
+        return (contribution.amount * rate).quantize(Decimal("0.01"))
+
+    @classmethod
+    def _upsert(cls, items):
+        if not items:
+            return 0
+        TransactionFeedItem.objects.bulk_create(
+            items,
+            batch_size=cls.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["item_type", "source_id"],
+            update_fields=FEED_UPDATE_FIELDS,
+        )
+        return len(items)
+
+    @classmethod
+    def sync(cls, instance):
+        return cls._upsert([cls.build_item(instance)])
+
+    @classmethod
+    def sync_many(cls, instances, base_currencies=None):
+        """Upserts feed rows for rows written in bulk, which bypass ``save()``."""
+        if not getattr(settings, "TRANSACTION_FEED_ENABLED", True):
+            return 0
+        return cls._upsert([cls.build_item(instance, base_currencies) for instance in instances])
+
+    @staticmethod
+    def remove(instance):
+        item_type = TransactionFeedService.item_type_for(instance)
+        if item_type and instance.pk is not None:
+            TransactionFeedItem.objects.filter(item_type=item_type, source_id=instance.pk).delete()
+
+    @classmethod
+    def source_queryset(cls, item_type, user=None):
+        model, related = cls.SOURCES[item_type]
+        queryset = model.objects.select_related(*related)
+        if user is None:
+            return queryset
+        if item_type == "LOAN":
+            return queryset.filter(loan__user=user)
+        if item_type == "GOAL":
+            return queryset.filter(goal__user=user)
+        return queryset.filter(user=user)
+
+    @classmethod
+    def resync(cls, item_type, queryset, base_currencies=None):
+        """Rewrites feed rows for the given source rows in batches."""
+        count = 0
+        batch = []
+        for instance in queryset.iterator(chunk_size=cls.BATCH_SIZE):
+            batch.append(cls.build_item(instance, base_currencies))
+            if len(batch) >= cls.BATCH_SIZE:
+                count += cls._upsert(batch)
+                batch = []
+        return count + cls._upsert(batch)
+
+    @classmethod
+    def rebuild(cls, user=None):
+        """
+        Recreates the feed from the source tables, for one user or everyone.
+        Returns the number of rows written per item type.
+        """
+        counts = {}
+        with transaction.atomic():
+            stale = TransactionFeedItem.objects.all()
+            if user is not None:
+                stale = stale.filter(user=user)
+            stale.delete()
+
+            profiles = UserProfile.objects.all()
+            if user is not None:
+                profiles = profiles.filter(user=user)
+            base_currencies = dict(profiles.values_list("user_id", "currency"))
+
+            for item_type in cls.SOURCES:
+                counts[item_type] = cls.resync(item_type, cls.source_queryset(item_type, user), base_currencies)
+        return counts
+
+    @classmethod
+    def refresh_for_account(cls, account):
+        """Re-labels feed rows after an account is renamed."""
+        for item_type, filters in (
+            ("EXPENSE", {"account": account}),
+            ("INCOME", {"account": account}),
+            ("TRANSFER", {"from_account": account}),
+            ("TRANSFER", {"to_account": account}),
+            ("LOAN", {"from_account": account}),
+            ("GOAL", {"account": account}),
+        ):
+            cls.resync(item_type, cls.source_queryset(item_type).filter(**filters))
+
+    @classmethod
+    def refresh_for_parent(cls, instance):
+        """Re-labels repayments/contributions after their loan or goal is renamed."""
+        from .models import Loan, SavingsGoal
+
+        if isinstance(instance, Loan):
+            cls.resync("LOAN", cls.source_queryset("LOAN").filter(loan=instance))
+        elif isinstance(instance, SavingsGoal):
+            cls.resync("GOAL", cls.source_queryset("GOAL").filter(goal=instance))
@@ -0,0 +1,637 @@
+import codecs
+import csv
+import io
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import chain, islice
+from pathlib import Path
+
+import openpyxl
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from .data_epoch import DataEpochService
+from .job_queue import JobQueueService
+from .models import (
+    Category,
+    Expense,
+    ImportJob,
+    _build_ledger_version,
+    _expense_ledger_snapshot,
+    _record_category_change,
+    _run_ledger_shadow,
+)
+from .statement_parsers import StatementParseError, detect_format, parse_statement
+from .transaction_writer import BalanceChange, TransactionWriter
+from .utils import get_exchange_rate
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+HEADER_SCAN_ROWS = 20
+MAX_ERROR_DETAILS = 15
+# Expense.amount is DecimalField(max_digits=10, decimal_places=2).
+MAX_AMOUNT = Decimal('100000000')
+# Enough bytes to tell UTF-8 apart from a legacy single-byte encoding.
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+COLUMN_PATTERNS = {
+    'date': ['date', 'time', 'day', 'transaction', 'txn', 'dated'],
+    'amount': ['amount', 'total', 'cost', 'price', 'value', 'debit', 'spent', 'withdraw'],
+    'description': ['description', 'details', 'memo', 'remarks', 'particulars', 'narration', 'payee', 'merchant'],
+    'category': ['category', 'type', 'tag', 'label', 'expense type'],
+}
+
+DATE_FORMATS = [
+    '%d %b %Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%m/%d/%Y',
+    '%d %B %Y', '%d %b', '%d-%b', '%d %B', '%d/%m', '%Y/%m/%d',
+    '%b %d, %Y', '%B %d, %Y', '%b %d', '%B %d',
+]
+
+
+def get_column_mapping(headers):
+    """Intelligently map header names to target fields."""
+    mapping = {}
+    header_l = [str(h).lower().strip() for h in headers if h is not None]
+
+    for field, keywords in COLUMN_PATTERNS.items():
+        for idx, h in enumerate(header_l):
+            if any(kw in h for kw in keywords):
+                mapping[field] = idx
+                break
+    return mapping
+
+
+def parse_robust_date(val):
+    if isinstance(val, (date, datetime)):
+        return val.date() if isinstance(val, datetime) else val
+
+    if not val or not str(val).strip():
+        return None
+
+    date_str = str(val).strip()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(date_str, fmt).date()
+            # If year is not in format, strptime defaults to 1900
+            if parsed.year == 1900:
+                return parsed.replace(year=datetime.now().year)
+            return parsed
+        except ValueError:
+            continue
+    return None
+
+
+def infer_column_mapping(rows):
+    """Try to guess columns based on data types in the first non-empty row."""
+    mapping = {}
+    for row in rows:
+        if not row or not any(row):
+            continue
+
+        # We need at least 2 or 3 columns to guess
+        cols = [str(c).strip() if c is not None else "" for c in row]
+
+        # 1. Identify Date
+        for i, val in enumerate(cols):
+            if parse_robust_date(val):
+                mapping['date'] = i
+                break
+
+        # 2. Identify Amount (looking for numbers in other columns)
+        for i, val in enumerate(cols):
+            if i == mapping.get('date'):
+                continue
+            # Remove symbols and try to parse
+            try:
+                clean_v = re.sub(r'[^\d\.\-]', '', val)
+                if clean_v and float(clean_v):
+                    mapping['amount'] = i
+                    break
+            except (ValueError, TypeError):
+                continue
+
+        # 3. Identify Description (longest remaining non-empty string)
+        best_desc_idx = -1
+        max_len = -1
+        for i, val in enumerate(cols):
+            if i in mapping.values():
+                continue
+            if len(val) > max_len:
+                max_len = len(val)
+                best_desc_idx = i
+
+        if best_desc_idx != -1:
+            mapping['description'] = best_desc_idx
+
+        if len(mapping) >= 2:  # Success if we have at least Date and Amount
+            return mapping
+    return {}
+
+
+def detect_mapping(head):
+    """(mapping, start_index) from the first rows of a sheet; an empty mapping means no usable columns."""
+    for i, row in enumerate(head):
+        if not row or not any(row):
+            continue
+        temp_mapping = get_column_mapping(row)
+        if len(temp_mapping) >= 3:
+            return temp_mapping, i + 1
+    return infer_column_mapping(head), 0
+
+
+def _sheet_rows(rows, is_blank):
+    """Yields (row, mapping, row_number) for one sheet, reading only HEADER_SCAN_ROWS ahead."""
+    rows = iter(rows)
+    head = list(islice(rows, HEADER_SCAN_ROWS))
+    if not head:
+        return
+    mapping, start_idx = detect_mapping(head)
+    if not mapping:
+        return
+    for idx, row in enumerate(chain(head[start_idx:], rows), start=start_idx + 1):
+        if row and not is_blank(row):
+            yield row, mapping, idx
+
+
+def _detect_encoding(handle):
+    sample = handle.read(ENCODING_SAMPLE_BYTES)
+    handle.seek(0)
+    try:
+        # Not final: the sample may end in the middle of a multi-byte character.
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        # latin-1 maps every byte, so it always decodes.
+        return 'latin-1'
+
+
+def iter_csv_rows(uploaded_file):
+    """Decodes the upload incrementally instead of reading the whole file into memory."""
+    handle = uploaded_file.file if hasattr(uploaded_file, 'file') else uploaded_file
+    handle.seek(0)
+    encoding = _detect_encoding(handle)
+    text = io.TextIOWrapper(handle, encoding=encoding, errors='replace', newline='')
+    try:
+        yield from _sheet_rows(csv.reader(text), lambda row: not any(v and str(v).strip() for v in row))
+    finally:
+        # Leave the upload open for its owner to close.
+        if not handle.closed:
+            text.detach()
+
+
+def iter_xlsx_rows(uploaded_file):
+    """Streams worksheets in openpyxl's read-only mode."""
+    uploaded_file.seek(0)
+    workbook = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield from _sheet_rows(
+                sheet.iter_rows(values_only=True), lambda row: all(v is None for v in row)
+            )
+    finally:
+        workbook.close()
+
+
+def iter_statement_rows(uploaded_file, statement_format):
+    """Yields (record, {'format': ...}, ordinal) for a bank statement; records are already typed."""
+    handle = uploaded_file.file if hasattr(uploaded_file, 'file') else uploaded_file
+    handle.seek(0)
+    mapping = {'format': statement_format}
+    for idx, record in enumerate(parse_statement(handle, statement_format), start=1):
+        yield record, mapping, idx
+
+
+def iter_upload_rows(uploaded_file, name=None):
+    name = name or uploaded_file.name
+    statement_format = detect_format(name)
+    if statement_format:
+        return iter_statement_rows(uploaded_file, statement_format)
+    if name.endswith(('.xlsx', '.xls')):
+        return iter_xlsx_rows(uploaded_file)
+    if name.endswith('.csv'):
+        return iter_csv_rows(uploaded_file)
+    return iter(())
+
+
+def new_summary(currency):
+    return {
+        'total_rows': 0,
+        'created_count': 0,
+        'duplicate_count': 0,
+        'skipped_count': 0,  # Statement credits, which are not expenses
+        'error_count': 0,
+        'errors': [],  # Detail log
+        'total_amount': 0,
+        'currency_symbol': currency,
+    }
+
+
+class SkippedRow(Exception):
+    pass
+
+
+def batch_categorizer(user):
+    """
+    Sends rows the rules and history could not categorize to the generative
+    backend, one prompt per chunk, constrained to the user's own categories.
+    """
+    from finance_tracker.categorizers import categorize_descriptions
+
+    categories = None
+
+    def categorize(descriptions):
+        nonlocal categories
+        if categories is None:
+            categories = list(Category.objects.filter(user=user).values_list('name', flat=True))
+        return categorize_descriptions(descriptions, categories=categories)
+
+    return categorize
+
+
+def _expense_key(date_val, amount, currency, description, category, external_id):
+    # Mirrors the two unique constraints on Expense.
+    if external_id:
+        return ('external_id', external_id)
+    return (date_val, amount, currency, description, category)
+
+
+class ExpenseImporter:
+    """
+    Validates uploaded rows and inserts them in chunks. Each chunk is one
+    ``bulk_create(ignore_conflicts=True)`` against the expense unique
+    constraints (bank id for statements, otherwise ``unique_expense``); the
+    exchange rate is looked up once per import, and account balance and feed
+    updates are applied once per chunk instead of once per row.
+    """
+
+    def __init__(
+        self, user, currency, categorize, account=None, chunk_size=IMPORT_CHUNK_SIZE, summary=None,
+        batch_categorize=None,
+    ):
+        self.user = user
+        self.currency = currency
+        self.categorize = categorize
+        # Called once per chunk with the descriptions ``categorize`` had no answer for.
+        self.batch_categorize = batch_categorize
+        self.account = account
+        self.chunk_size = chunk_size
+        self.summary = summary or new_summary(currency)
+        self._category_cache = {}
+        self._rates = {}
+
+    def run(self, rows):
+        """Imports (row, mapping, row_number) tuples and returns the summary."""
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                return self.summary
+            self.import_chunk(chunk)
+
+    def record_error(self, row_idx, reason):
+        if len(self.summary['errors']) < MAX_ERROR_DETAILS:
+            self.summary['errors'].append({'row': row_idx, 'reason': reason})
+        self.summary['error_count'] += 1
+
+    def parse_statement_row(self, record, statement_format):
+        """Statement records carry typed values, so no date or amount guessing is needed."""
+        if isinstance(record, StatementParseError):
+            raise record
+        if record.amount >= 0:
+            raise SkippedRow()
+        amount = (-record.amount).quantize(Decimal('0.01'))
+        if amount >= MAX_AMOUNT:
+            raise ValueError(_("Invalid amount format: ") + str(record.amount))
+        desc = (record.description or '').strip()
+        if not desc:
+            raise ValueError(_("Missing description"))
+        external_id = ''
+        if record.bank_id:
+            account_part = self.account.pk if self.account is not None else '-'
+            external_id = f"{statement_format}:{account_part}:{record.bank_id}"[:255]
+        return record.date, amount, desc, self._category(desc, record.category), external_id
+
+    def _category(self, desc, category_name=None):
+        """The row's category, or None when it is left for ``batch_categorize``."""
+        if category_name and str(category_name).strip():
+            return str(category_name).strip()
+        if desc not in self._category_cache:
+            category = (self.categorize(desc) or '').strip()
+            if not category and self.batch_categorize is None:
+                category = 'Food'
+            self._category_cache[desc] = category or None
+        return self._category_cache[desc]
+
+    def _fill_categories(self, parsed):
+        missing = sorted({fields[2] for _row_idx, fields in parsed if fields[3] is None})
+        if missing:
+            try:
+                answers = self.batch_categorize(missing)
+            except Exception:
+                logger.exception("Batch categorization failed for %d descriptions.", len(missing))
+                answers = {}
+            for desc in missing:
+                self._category_cache[desc] = (answers.get(desc) or 'Food').strip()
+        return [
+            (row_idx, fields if fields[3] is not None else fields[:3] + (self._category_cache[fields[2]],) + fields[4:])
+            for row_idx, fields in parsed
+        ]
+
+    def parse_row(self, row, mapping):
+        if 'format' in mapping:
+            return self.parse_statement_row(row, mapping['format'])
+
+        # Extract and Parse
+        date_idx = mapping.get('date')
+        amount_idx = mapping.get('amount')
+        desc_idx = mapping.get('description')
+
+        if date_idx is None or amount_idx is None or desc_idx is None:
+            raise ValueError(_("Missing required columns in row"))
+
+        date_val = parse_robust_date(row[date_idx])
+        if not date_val:
+            raise ValueError(_("Invalid date format: ") + str(row[date_idx]))
+
+        raw_amount = row[amount_idx]
+        if raw_amount is None:
+            raise ValueError(_("Missing amount"))
+
+        amount_str = str(raw_amount).replace(',', '').strip()
+        # Handle cases like "$ 1,200.00" or "(100.00)"
+        cleaned_amount_str = re.sub(r'[^\d\.\-]', '', amount_str)
+        if not cleaned_amount_str:
+            raise ValueError(_("Invalid amount format: ") + str(raw_amount))
+        try:
+            amount = abs(Decimal(cleaned_amount_str)).quantize(Decimal('0.01'))
+        except InvalidOperation as exc:
+            raise ValueError(_("Invalid amount format: ") + str(raw_amount)) from exc
+        if amount >= MAX_AMOUNT:
+            # Rejected here so one bad row cannot fail the whole chunk's insert.
+            raise ValueError(_("Invalid amount format: ") + str(raw_amount))
+
+        desc = str(row[desc_idx]).strip()
+        if not desc:
+            raise ValueError(_("Missing description"))
+
+        # Category Logic
+        cat_idx = mapping.get('category')
+        category_name = row[cat_idx] if cat_idx is not None else None
+
+        return date_val, amount, desc, self._category(desc, category_name), ''
+
+    def _rate(self, to_currency):
+        if to_currency not in self._rates:
+            if self.currency == to_currency:
+                self._rates[to_currency] = Decimal('1.0')
+            else:
+                self._rates[to_currency] = get_exchange_rate(self.currency, to_currency)
+        return self._rates[to_currency]
+
+    def import_chunk(self, chunk):
+        parsed = []
+        for row, mapping, row_idx in chunk:
+            self.summary['total_rows'] += 1
+            try:
+                parsed.append((row_idx, self.parse_row(row, mapping)))
+            except SkippedRow:
+                self.summary['skipped_count'] = self.summary.get('skipped_count', 0) + 1
+            except Exception as e:
+                self.record_error(row_idx, str(e))
+        if not parsed:
+            return
+        parsed = self._fill_categories(parsed)
+
+        try:
+            exchange_rate = self._rate(self.user.profile.currency)
+        except Exception as e:
+            for row_idx, _fields in parsed:
+                self.record_error(row_idx, str(e))
+            return
+
+        # Rows already stored, or repeated within the file, count as duplicates.
+        seen = self._existing_keys([fields for _row_idx, fields in parsed])
+        pending = {}
+        for row_idx, (date_val, amount, desc, category_name, external_id) in parsed:
+            key = _expense_key(date_val, amount, self.currency, desc, category_name, external_id)
+            if key in seen:
+                self.summary['duplicate_count'] += 1
+                continue
+            seen.add(key)
+            pending[key] = (row_idx, Expense(
+                user=self.user,
+                date=date_val,
+                amount=amount,
+                description=desc,
+                category=category_name,
+                currency=self.currency,
+                exchange_rate=exchange_rate,
+                base_amount=(amount * exchange_rate).quantize(Decimal('0.01')),
+                account=self.account,
+                external_id=external_id,
+            ))
+        if not pending:
+            return
+
+        try:
+            with transaction.atomic():
+                created = self._insert(pending)
+        except Exception as e:
+            for row_idx, _expense in pending.values():
+                self.record_error(row_idx, str(e))
+            return
+
+        self.summary['created_count'] += len(created)
+        # Anything else lost a race with a concurrent insert of the same row.
+        self.summary['duplicate_count'] += len(pending) - len(created)
+        self.summary['total_amount'] += float(sum((expense.amount for expense in created), Decimal('0')))
+
+    def _chunk_filter(self, fields):
+        """Narrows the user's expenses to rows that could collide with ``fields``."""
+        external_ids = {external_id for *_rest, external_id in fields if external_id}
+        plain = [f for f in fields if not f[4]]
+        condition = Q(pk__in=[])
+        if plain:
+            condition |= Q(
+                external_id='',
+                date__in={f[0] for f in plain},
+                description__in={f[2] for f in plain},
+            )
+        if external_ids:
+            condition |= Q(external_id__in=external_ids)
+        return Expense.objects.filter(condition, user=self.user)
+
+    def _existing_keys(self, fields):
+        return {
+            _expense_key(*values)
+            for values in self._chunk_filter(fields).values_list(
+                'date', 'amount', 'currency', 'description', 'category', 'external_id',
+            )
+        }
+
+    def _insert(self, pending):
+        Expense.objects.bulk_create([expense for _row_idx, expense in pending.values()], ignore_conflicts=True)
+        DataEpochService.bump(self.user)
+
+        # ignore_conflicts does not return primary keys, so read back the rows this chunk wrote.
+        fields = [
+            (e.date, e.amount, e.description, e.category, e.external_id) for _row_idx, e in pending.values()
+        ]
+        created = [
+            expense
+            for expense in self._chunk_filter(fields).filter(currency=self.currency).select_related('account')
+            if _expense_key(
+                expense.date, expense.amount, expense.currency, expense.description, expense.category,
+                expense.external_id,
+            ) in pending
+        ]
+        if not created:
+            return created
+
+        from .feed_service import TransactionFeedService
+
+        TransactionFeedService.sync_many(created, {self.user.pk: self.user.profile.currency})
+        _record_category_change(self.user, added=[(expense.description, expense.category) for expense in created])
+        if self.account is not None:
+            self._apply_balance(created)
+            self._post_ledger(created)
+        return created
+
+    def _apply_balance(self, created):
+        TransactionWriter.apply(BalanceChange(self.account.pk, -expense.amount, expense.currency) for expense in created)
+
+    def _post_ledger(self, created):
+        def _post_shadow_entries():
+            from .ledger_service import LedgerPostingService
+
+            LedgerPostingService.shadow_post_expense_creates(user=self.user, expenses=created)
+
+        _run_ledger_shadow(
+            _post_shadow_entries,
+            failures=[
+                ('EXPENSE', expense.pk, 'CREATE', {
+                    'handler': 'expense_create',
+                    'version_token': _build_ledger_version(expense, 'CREATE'),
+                    'expense': _expense_ledger_snapshot(expense),
+                    'previous_expense': None,
+                })
+                for expense in created
+            ],
+        )
+
+
+class ImportJobService:
+    """
+    Background statement imports. The upload is stored on disk and imported
+    one committed chunk at a time; the job row records the offset, so a worker
+    that dies mid-file is resumed without re-reading what was already saved.
+    """
+
+    @staticmethod
+    def create_job(user, uploaded_file, currency, account=None):
+        job = ImportJob.objects.create(
+            user=user,
+            account=account,
+            currency=currency,
+            original_name=os.path.basename(uploaded_file.name),
+        )
+        directory = Path(settings.IMPORT_ROOT) / str(user.pk)
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{job.pk}-{job.original_name}"
+        with open(path, 'wb') as handle:
+            for chunk in uploaded_file.chunks():
+                handle.write(chunk)
+        job.file_path = str(path)
+        job.save(update_fields=['file_path'])
+        JobQueueService.enqueue('run_import_jobs')
+        return job
+
+    @staticmethod
+    def claim_next_job(now=None):
+        """Claims the oldest pending job, or a RUNNING one whose worker stopped heartbeating."""
+        now = now or timezone.now()
+        stale_before = now - timedelta(minutes=getattr(settings, 'IMPORT_STALE_MINUTES', 15))
+        with transaction.atomic():
+            job = (
+                ImportJob.objects.select_for_update(skip_locked=True)
+                .filter(Q(status='PENDING') | Q(status='RUNNING', updated_at__lt=stale_before))
+                .order_by('created_at', 'pk')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = 'RUNNING'
+            job.started_at = job.started_at or now
+            job.save(update_fields=['status', 'started_at', 'updated_at'])
+            return job
+
+    @staticmethod
+    def _store_progress(job, summary, offset):
+        job.offset = offset
+        job.total_rows = summary['total_rows']
+        job.created_count = summary['created_count']
+        job.duplicate_count = summary['duplicate_count']
+        job.skipped_count = summary.get('skipped_count', 0)
+        job.error_count = summary['error_count']
+        job.errors = summary['errors']
+        job.total_amount = Decimal(str(summary['total_amount'])).quantize(Decimal('0.01'))
+        job.save(update_fields=[
+            'offset', 'total_rows', 'created_count', 'duplicate_count', 'skipped_count', 'error_count', 'errors',
+            'total_amount', 'updated_at',
+        ])
+
+    @classmethod
+    def run_job(cls, job, categorize=None, chunk_size=IMPORT_CHUNK_SIZE):
+        if categorize is None:
+            from finance_tracker.ai_utils import predict_category_ai
+
+            def categorize(desc):
+                return predict_category_ai(desc, user=job.user, skip_genai=True)
+
+        summary = job.summary
+        summary['total_amount'] = float(job.total_amount)
+        importer = ExpenseImporter(
+            job.user, job.currency, categorize, account=job.account, chunk_size=chunk_size, summary=summary,
+            batch_categorize=batch_categorizer(job.user),
+        )
+        offset = job.offset
+        try:
+            with open(job.file_path, 'rb') as handle:
+                rows = iter_upload_rows(handle, name=job.original_name)
+                # Rows before the offset were committed by an earlier run.
+                for _skipped in islice(rows, offset):
+                    pass
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    # The chunk's rows and the new offset commit together.
+                    with transaction.atomic():
+                        importer.import_chunk(chunk)
+                        offset += len(chunk)
+                        cls._store_progress(job, importer.summary, offset)
+        except Exception as exc:
+            logger.exception("Import job %s failed.", job.pk)
+            job.status = 'FAILED'
+            job.error_message = str(exc)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error_message', 'finished_at', 'updated_at'])
+            return job
+
+        job.status = 'COMPLETED'
+        job.finished_at = timezone.now()
+        if not job.total_rows:
+            job.error_message = _("Could not detect required columns (Date, Amount, Description). Please check your file.")
+        job.save(update_fields=['status', 'finished_at', 'error_message', 'updated_at'])
+        try:
+            os.remove(job.file_path)
+        except OSError:
+            logger.warning("Could not delete import upload %s", job.file_path)
+        return job
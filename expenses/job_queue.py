@@ -0,0 +1,216 @@
+"""
+Database-backed queue for the management commands that cron endpoints used to
+run inside the HTTP request. ``enqueue`` records a ``BackgroundJob`` and returns
+at once; ``run_worker`` claims jobs under row locks, honours per-type
+concurrency limits, retries failures with exponential backoff and records
+status, output and duration. While a command runs, a side thread refreshes the
+job's heartbeat; a job is only taken over once its heartbeat has gone stale.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F, Min, Q
+from django.utils import timezone
+
+from .models import BackgroundJob, BackgroundJobLock
+
+logger = logging.getLogger(__name__)
+
+# ``concurrency`` caps RUNNING jobs of a type across all workers; a singleton
+# type also has at most one job queued or running at a time.
+JobType = namedtuple('JobType', ['concurrency', 'singleton'], defaults=(1, True))
+
+# Keyed by management command name.
+JOB_TYPES = {
+    'send_notifications': JobType(),
+    'send_lifecycle_emails': JobType(),
+    'send_monthly_report': JobType(),
+    'send_daily_reminders': JobType(),
+    'retry_ledger_shadow_failures': JobType(),
+    'reconcile_ledgers': JobType(),
+    'run_ledger_maintenance': JobType(),
+    # One job per base currency change; reruns for a user are idempotent.
+    'renormalize_base_amounts': JobType(concurrency=4, singleton=False),
+    # Queued with each upload or export request and by their cron endpoints. A run
+    # claims every waiting (or stalled) job up to its limit, so extra runs are no-ops.
+    'run_import_jobs': JobType(concurrency=2, singleton=False),
+    'run_export_jobs': JobType(concurrency=2, singleton=False),
+}
+
+# Only the tail of a command's output is kept on the job.
+OUTPUT_LIMIT = 10000
+
+
+class JobQueueService:
+    @staticmethod
+    def enqueue(job_type, **kwargs):
+        """
+        Queues ``job_type`` (run as ``call_command(job_type, **kwargs)``) and
+        returns ``(job, created)``. For a singleton type the unfinished job
+        already queued is returned instead of adding another.
+        """
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unknown job type: {job_type}")
+        dedupe_key = job_type if JOB_TYPES[job_type].singleton else ''
+        unfinished = BackgroundJob.objects.filter(dedupe_key=dedupe_key, status__in=BackgroundJob.UNFINISHED_STATUSES)
+        while True:
+            if dedupe_key:
+                job = unfinished.first()
+                if job is not None:
+                    return job, False
+            try:
+                with transaction.atomic():
+                    job = BackgroundJob.objects.create(
+                        job_type=job_type,
+                        kwargs=kwargs,
+                        dedupe_key=dedupe_key,
+                        max_attempts=max(1, settings.BACKGROUND_JOB_MAX_ATTEMPTS),
+                    )
+                return job, True
+            except IntegrityError:
+                # A concurrent enqueue won the unique constraint; return its job.
+                continue
+
+    @classmethod
+    def claim_next_job(cls, now=None):
+        """Marks the next due job RUNNING, skipping types at their concurrency limit."""
+        now = now or timezone.now()
+        cls.recover_abandoned(now)
+        job_types = (
+            BackgroundJob.objects.filter(status='PENDING', run_after__lte=now)
+            .values('job_type').annotate(oldest=Min('run_after')).order_by('oldest')
+            .values_list('job_type', flat=True)
+        )
+        for job_type in list(job_types):
+            job = cls._claim(job_type, now)
+            if job is not None:
+                return job
+        return None
+
+    @staticmethod
+    def _claim(job_type, now):
+        concurrency = JOB_TYPES.get(job_type, JobType()).concurrency
+        BackgroundJobLock.objects.get_or_create(job_type=job_type)
+        with transaction.atomic():
+            # Serializes claimers of this type, so the RUNNING count below holds until commit.
+            BackgroundJobLock.objects.select_for_update().get(job_type=job_type)
+            if BackgroundJob.objects.filter(job_type=job_type, status='RUNNING').count() >= concurrency:
+                return None
+            job = (
+                BackgroundJob.objects.select_for_update(skip_locked=True)
+                .filter(job_type=job_type, status='PENDING', run_after__lte=now)
+                .order_by('run_after', 'pk')
+                .first()
+            )
+            if job is None:
+                return None
+            job.status = 'RUNNING'
+            job.attempts += 1
+            job.started_at = now
+            job.heartbeat_at = now
+            job.save(update_fields=['status', 'attempts', 'started_at', 'heartbeat_at', 'updated_at'])
+            return job
+
+    @staticmethod
+    def recover_abandoned(now=None):
+        """
+        Jobs whose heartbeat is older than BACKGROUND_JOB_STALE_MINUTES belong
+        to a worker that died; they are retried, or failed once out of attempts.
+        """
+        now = now or timezone.now()
+        stale_before = now - timedelta(minutes=settings.BACKGROUND_JOB_STALE_MINUTES)
+        abandoned = BackgroundJob.objects.filter(
+            Q(heartbeat_at__lt=stale_before) | Q(heartbeat_at__isnull=True, started_at__lt=stale_before),
+            status='RUNNING',
+        )
+        message = 'Worker stopped before the job finished.'
+        failed = abandoned.filter(attempts__gte=F('max_attempts')).update(
+            status='FAILED', error_message=message, finished_at=now, updated_at=now,
+        )
+        retried = abandoned.update(status='PENDING', error_message=message, run_after=now, updated_at=now)
+        return retried + failed
+
+    @staticmethod
+    def beat(job_id):
+        BackgroundJob.objects.filter(pk=job_id, status='RUNNING').update(heartbeat_at=timezone.now())
+
+    @classmethod
+    def _heartbeat(cls, job_id, stopped):
+        """Beats every BACKGROUND_JOB_HEARTBEAT_SECONDS until ``stopped`` is set; runs on its own connection."""
+        try:
+            while not stopped.wait(settings.BACKGROUND_JOB_HEARTBEAT_SECONDS):
+                try:
+                    cls.beat(job_id)
+                except Exception:
+                    logger.exception("Heartbeat for background job %s failed.", job_id)
+        finally:
+            connections.close_all()
+
+    @staticmethod
+    def retry_delay(attempts):
+        return timedelta(seconds=settings.BACKGROUND_JOB_RETRY_BACKOFF_SECONDS * (2 ** max(0, attempts - 1)))
+
+    @classmethod
+    def run_job(cls, job):
+        output = StringIO()
+        started = time.monotonic()
+        stopped = threading.Event()
+        heartbeat = threading.Thread(target=cls._heartbeat, args=(job.pk, stopped), daemon=True)
+        heartbeat.start()
+        try:
+            if job.job_type not in JOB_TYPES:
+                raise ValueError(f"Unknown job type: {job.job_type}")
+            call_command(job.job_type, stdout=output, stderr=output, **job.kwargs)
+        except Exception as exc:
+            logger.exception("Background job %s (%s) failed.", job.pk, job.job_type)
+            job.error_message = str(exc) or exc.__class__.__name__
+            if job.attempts < job.max_attempts and job.job_type in JOB_TYPES:
+                job.status = 'PENDING'
+                job.run_after = timezone.now() + cls.retry_delay(job.attempts)
+            else:
+                job.status = 'FAILED'
+        else:
+            job.status = 'COMPLETED'
+            job.error_message = ''
+        finally:
+            stopped.set()
+            heartbeat.join()
+
+        job.duration_ms = int((time.monotonic() - started) * 1000)
+        job.output = output.getvalue()[-OUTPUT_LIMIT:]
+        if job.status != 'PENDING':
+            job.finished_at = timezone.now()
+        job.save(update_fields=[
+            'status', 'error_message', 'run_after', 'duration_ms', 'output', 'finished_at', 'updated_at',
+        ])
+        return job
+
+    @staticmethod
+    def describe(job):
+        """JSON-ready job status for the cron status endpoint."""
+        def iso(value):
+            return value.isoformat() if value else None
+
+        return {
+            'id': job.pk,
+            'job_type': job.job_type,
+            'kwargs': job.kwargs,
+            'status': job.status,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'created_at': iso(job.created_at),
+            'started_at': iso(job.started_at),
+            'heartbeat_at': iso(job.heartbeat_at),
+            'finished_at': iso(job.finished_at),
+            'run_after': iso(job.run_after),
+            'duration_ms': job.duration_ms,
+            'error': job.error_message,
+            'output': job.output,
+        }
@@ -15,6 +15,7 @@ from .models import (
     LedgerAccount,
     Loan,
     Transfer,
+    _build_ledger_version,
 )
 from .utils import get_exchange_rate
 
@@ -674,6 +675,240 @@ class LedgerPostingService:
             metadata={"shadow_action": "DELETE_REVERSE", "version": version_token},
         )
 
+    @staticmethod
+    def _posted_keys(keys):
+        return set(JournalEntry.objects.filter(idempotency_key__in=list(keys)).values_list("idempotency_key", flat=True))
+
+    @classmethod
+    def _cached_account_ledger(cls, ledgers, user, account):
+        """``_get_or_create_account_ledger`` resolved once per account for a batch sharing ``ledgers``."""
+        key = ("ASSET", account.pk)
+        if key not in ledgers:
+            ledgers[key] = cls._get_or_create_account_ledger(user, account)
+        return ledgers[key]
+
+    @classmethod
+    def _cached_expense_ledger(cls, ledgers, user, category, currency):
+        key = ("EXPENSE", cls._normalize_code(category or "UNCATEGORIZED"))
+        if key not in ledgers:
+            ledgers[key] = cls._get_or_create_expense_ledger(user, category, currency)
+        return ledgers[key]
+
+    @classmethod
+    def _bulk_create_entries(cls, pending):
+        """Writes ``(JournalEntry, lines)`` pairs with two bulk inserts and returns how many were created."""
+        if not pending:
+            return 0
+        try:
+            with transaction.atomic():
+                entries = JournalEntry.objects.bulk_create([entry for entry, _lines in pending])
+                for entry, (_entry, lines) in zip(entries, pending, strict=True):
+                    for line in lines:
+                        line.journal_entry = entry
+                JournalLine.objects.bulk_create([line for _entry, lines in pending for line in lines])
+        except IntegrityError:
+            # A concurrent writer posted some of these keys; fall back to the idempotent path.
+            return sum(
+                cls._create_entry(
+                    user=entry.user,
+                    source_type=entry.source_type,
+                    source_id=entry.source_id,
+                    idempotency_key=entry.idempotency_key,
+                    description=entry.description,
+                    metadata=entry.metadata,
+                    lines=lines,
+                    status=entry.status,
+                )[1]
+                for entry, lines in pending
+            )
+        return len(pending)
+
+    @classmethod
+    def shadow_post_expense_creates(cls, *, user, expenses):
+        """
+        ``shadow_post_expense_create`` for many of ``user``'s new expenses,
+        written the way ``shadow_post_expense_deletes`` writes reversals.
+        Returns the number of entries created.
+        """
+        expenses = [expense for expense in expenses if expense.account_id is not None]
+        versions = {expense.pk: _build_ledger_version(expense, "CREATE") for expense in expenses}
+        keys = {pk: cls._idempotency_key("EXPENSE", pk, f"{version}-POST") for pk, version in versions.items()}
+        posted = cls._posted_keys(keys.values())
+
+        ledgers = {}
+        pending = []
+        for expense in expenses:
+            if keys[expense.pk] in posted:
+                continue
+            lines = [
+                cls._build_line(
+                    entry=None,
+                    ledger_account=cls._cached_expense_ledger(ledgers, user, expense.category, expense.currency),
+                    direction="DEBIT",
+                    amount=expense.amount,
+                    currency=expense.currency,
+                    user=user,
+                ),
+                cls._build_line(
+                    entry=None,
+                    ledger_account=cls._cached_account_ledger(ledgers, user, expense.account),
+                    direction="CREDIT",
+                    amount=expense.amount,
+                    currency=expense.currency,
+                    user=user,
+                    account_ref=expense.account,
+                ),
+            ]
+            cls._validate_balanced(lines)
+            entry = JournalEntry(
+                user=user,
+                source_type="EXPENSE",
+                source_id=expense.pk,
+                idempotency_key=keys[expense.pk],
+                description=expense.description,
+                metadata={"shadow_action": "CREATE", "version": versions[expense.pk]},
+                status="POSTED",
+            )
+            pending.append((entry, lines))
+        return cls._bulk_create_entries(pending)
+
+    @classmethod
+    def shadow_post_expense_deletes(cls, *, user, expenses):
+        """
+        ``shadow_post_expense_delete`` for many of ``user``'s expenses at once:
+        ledger accounts are resolved once per category and account, entries
+        already posted are skipped with one lookup, and the new entries and
+        their lines are written with two bulk inserts. Returns the number of
+        entries created.
+        """
+        expenses = [expense for expense in expenses if expense.account_id is not None]
+        versions = {expense.pk: _build_ledger_version(expense, "DELETE") for expense in expenses}
+        keys = {pk: cls._idempotency_key("EXPENSE", pk, f"{version}-REV") for pk, version in versions.items()}
+        posted = cls._posted_keys(keys.values())
+
+        ledgers = {}
+        pending = []
+        for expense in expenses:
+            if keys[expense.pk] in posted:
+                continue
+            asset_ledger = cls._cached_account_ledger(ledgers, user, expense.account)
+            expense_ledger = cls._cached_expense_ledger(ledgers, user, expense.category, expense.currency)
+            lines = [
+                cls._build_line(
+                    entry=None,
+                    ledger_account=asset_ledger,
+                    direction="DEBIT",
+                    amount=expense.amount,
+                    currency=expense.currency,
+                    user=user,
+                    account_ref=expense.account,
+                ),
+                cls._build_line(
+                    entry=None,
+                    ledger_account=expense_ledger,
+                    direction="CREDIT",
+                    amount=expense.amount,
+                    currency=expense.currency,
+                    user=user,
+                ),
+            ]
+            cls._validate_balanced(lines)
+            entry = JournalEntry(
+                user=user,
+                source_type="EXPENSE",
+                source_id=expense.pk,
+                idempotency_key=keys[expense.pk],
+                description=f"Reversal: {expense.description}",
+                metadata={"shadow_action": "DELETE_REVERSE", "version": versions[expense.pk]},
+                status="REVERSED",
+            )
+            pending.append((entry, lines))
+        return cls._bulk_create_entries(pending)
+
+    @classmethod
+    def _reclassification_lines(cls, *, user, expense, previous_category, ledgers):
+        """Moves the expense amount from the previous category's ledger account to the current one."""
+        lines = [
+            cls._build_line(
+                entry=None,
+                ledger_account=cls._cached_expense_ledger(ledgers, user, expense.category, expense.currency),
+                direction="DEBIT",
+                amount=expense.amount,
+                currency=expense.currency,
+                user=user,
+            ),
+            cls._build_line(
+                entry=None,
+                ledger_account=cls._cached_expense_ledger(ledgers, user, previous_category, expense.currency),
+                direction="CREDIT",
+                amount=expense.amount,
+                currency=expense.currency,
+                user=user,
+            ),
+        ]
+        cls._validate_balanced(lines)
+        return lines
+
+    @classmethod
+    def _needs_reclassification(cls, expense, previous_category):
+        return cls._has_fk(expense, "account") and (
+            cls._normalize_code(expense.category or "UNCATEGORIZED")
+            != cls._normalize_code(previous_category or "UNCATEGORIZED")
+        )
+
+    @classmethod
+    def shadow_post_expense_reclassify(cls, *, expense, previous_category, version_token):
+        if not cls._needs_reclassification(expense, previous_category):
+            return None, False
+
+        return cls._create_entry(
+            user=expense.user,
+            source_type="EXPENSE",
+            source_id=expense.id,
+            idempotency_key=cls._idempotency_key("EXPENSE", expense.id, f"{version_token}-RECLASS"),
+            description=f"Reclassification: {expense.description}",
+            metadata={"shadow_action": "RECLASSIFY", "version": version_token, "previous_category": previous_category},
+            lines=cls._reclassification_lines(
+                user=expense.user, expense=expense, previous_category=previous_category, ledgers={},
+            ),
+        )
+
+    @classmethod
+    def shadow_post_expense_reclassifications(cls, *, user, changes, version_token):
+        """
+        One reclassification entry per ``(expense, previous_category)`` in
+        ``changes``, posted like ``shadow_post_expense_deletes``. ``expense``
+        already carries its new category. Returns the number of entries created.
+        """
+        changes = [
+            (expense, previous_category) for expense, previous_category in changes
+            if cls._needs_reclassification(expense, previous_category)
+        ]
+        keys = {
+            expense.pk: cls._idempotency_key("EXPENSE", expense.pk, f"{version_token}-RECLASS")
+            for expense, _previous_category in changes
+        }
+        posted = cls._posted_keys(keys.values())
+
+        ledgers = {}
+        pending = []
+        for expense, previous_category in changes:
+            if keys[expense.pk] in posted:
+                continue
+            lines = cls._reclassification_lines(
+                user=user, expense=expense, previous_category=previous_category, ledgers=ledgers,
+            )
+            entry = JournalEntry(
+                user=user,
+                source_type="EXPENSE",
+                source_id=expense.pk,
+                idempotency_key=keys[expense.pk],
+                description=f"Reclassification: {expense.description}",
+                metadata={"shadow_action": "RECLASSIFY", "version": version_token, "previous_category": previous_category},
+            )
+            pending.append((entry, lines))
+        return cls._bulk_create_entries(pending)
+
     @classmethod
     def shadow_post_income_create(cls, *, income, version_token):
         if not cls._has_fk(income, "account"):
@@ -853,6 +1088,14 @@ class LedgerPostingService:
             expense = cls._expense_like(payload["expense"])
             cls.shadow_post_expense_delete(expense=expense, version_token=version_token)
             return
+        if handler == "expense_reclassify":
+            expense = cls._expense_like(payload["expense"])
+            cls.shadow_post_expense_reclassify(
+                expense=expense,
+                previous_category=payload.get("previous_category"),
+                version_token=version_token,
+            )
+            return
 
         if handler == "income_create":
             income = cls._income_like(payload["income"])
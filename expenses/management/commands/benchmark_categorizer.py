@@ -0,0 +1,64 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from finance_tracker.ai_utils import KEYWORD_MAPPING, predict_category_rule_based
+
+FILLER = [
+    'upi', 'ref', 'payment', 'to', 'from', 'via', 'card', 'pos', 'txn', 'online',
+    'monthly', 'order', 'india', 'pvt', 'ltd', 'transfer', 'neft', 'imps',
+]
+
+
+def legacy_rule_based(description):
+    """The previous nested scan over every keyword, kept for comparison."""
+    description = description.lower()
+    words = re.findall(r'\w+', description)
+    for category, keywords in KEYWORD_MAPPING.items():
+        for keyword in keywords:
+            if keyword in words or keyword in description:
+                return category
+    return None
+
+
+def sample_descriptions(count, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [keyword for keywords in KEYWORD_MAPPING.values() for keyword in keywords]
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(2, 6))
+        if rng.random() < 0.7:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary).title())
+        words.append(str(rng.randint(1000, 999999)))
+        yield ' '.join(words)
+
+
+class Command(BaseCommand):
+    help = "Measure rule-based category prediction throughput on synthetic descriptions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1_000_000, help="Number of descriptions to classify")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated descriptions")
+        parser.add_argument("--compare", action="store_true", help="Also time the previous keyword scan")
+
+    def handle(self, *args, **options):
+        descriptions = list(sample_descriptions(options["count"], options["seed"]))
+        runs = [("compiled", predict_category_rule_based)]
+        if options["compare"]:
+            runs.append(("legacy", legacy_rule_based))
+
+        for label, predict in runs:
+            matched = 0
+            started = time.perf_counter()
+            for description in descriptions:
+                if predict(description) is not None:
+                    matched += 1
+            elapsed = time.perf_counter() - started
+            rate = len(descriptions) / elapsed if elapsed else 0
+            self.stdout.write(
+                f"{label}: {len(descriptions)} descriptions in {elapsed:.2f}s "
+                f"({rate:,.0f}/s), matched={matched}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Completed={len(descriptions)}"))
@@ -0,0 +1,22 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.feed_service import TransactionFeedService
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized transaction feed from the source transaction tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", type=int, help="Limit to a single user")
+
+    def handle(self, *args, **options):
+        user = None
+        if options.get("user_id"):
+            user = User.objects.filter(pk=options["user_id"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user_id']} does not exist.")
+
+        counts = TransactionFeedService.rebuild(user=user)
+        summary = ", ".join(f"{item_type}={count}" for item_type, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt feed rows: {summary}"))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.base_currency_service import BaseCurrencyService
+
+
+class Command(BaseCommand):
+    help = "Recompute base amounts and exchange rates for a user's current base currency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", type=int, required=True, help="User whose transactions to re-normalize")
+        parser.add_argument(
+            "--chunk-size", type=int, default=settings.BASE_CURRENCY_CHUNK_SIZE, help="Rows rewritten per UPDATE",
+        )
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(pk=options["user_id"]).first()
+        if user is None:
+            raise CommandError(f"User {options['user_id']} does not exist.")
+
+        updated = BaseCurrencyService.renormalize(user, chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Re-normalized {updated} transactions for user {user.pk}."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from expenses.export_service import ExportJobService
+
+
+class Command(BaseCommand):
+    help = "Generate queued data exports and purge expired export files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Maximum jobs to process")
+
+    def handle(self, *args, **options):
+        completed = 0
+        failed = 0
+
+        for _ in range(options["limit"]):
+            job = ExportJobService.claim_next_job()
+            if job is None:
+                break
+            job = ExportJobService.run_job(job)
+            if job.status == "COMPLETED":
+                completed += 1
+            else:
+                failed += 1
+
+        purged = ExportJobService.purge_expired()
+        self.stdout.write(
+            self.style.SUCCESS(f"Completed={completed}, Failed={failed}, Purged={purged}")
+        )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from expenses.import_service import ImportJobService
+
+
+class Command(BaseCommand):
+    help = "Import queued statement uploads in committed chunks, resuming stalled jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Maximum jobs to process")
+
+    def handle(self, *args, **options):
+        completed = 0
+        failed = 0
+
+        for _ in range(options["limit"]):
+            job = ImportJobService.claim_next_job()
+            if job is None:
+                break
+            job = ImportJobService.run_job(job)
+            if job.status == "COMPLETED":
+                completed += 1
+            else:
+                failed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Completed={completed}, Failed={failed}"))
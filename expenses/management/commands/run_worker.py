@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from expenses.job_queue import JobQueueService
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs, such as the ones cron endpoints enqueue"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10, help="Maximum jobs to process (0 for no limit)")
+        parser.add_argument(
+            "--poll",
+            type=float,
+            default=0,
+            help="Seconds to wait for new jobs when the queue is empty (default: exit once it is empty)",
+        )
+
+    def handle(self, *args, **options):
+        limit = max(0, options["limit"])
+        poll = max(0, options["poll"])
+        completed = 0
+        retrying = 0
+        failed = 0
+
+        processed = 0
+        while not limit or processed < limit:
+            job = JobQueueService.claim_next_job()
+            if job is None:
+                if not poll:
+                    break
+                time.sleep(poll)
+                continue
+
+            job = JobQueueService.run_job(job)
+            processed += 1
+            if job.status == "COMPLETED":
+                completed += 1
+            elif job.status == "PENDING":
+                retrying += 1
+            else:
+                failed += 1
+            self.stdout.write(f"Job {job.pk} ({job.job_type}): {job.status} in {job.duration_ms}ms")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Completed={completed}, Retrying={retrying}, Failed={failed}")
+        )
@@ -5,10 +5,9 @@ from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.templatetags.static import static
 from django.utils import timezone
-from webpush import send_user_notification
-from webpush.models import PushInformation
 
 from expenses.models import UserProfile
+from expenses.push_service import PushDeliveryService, PushMessage
 
 logger = logging.getLogger(__name__)
 
@@ -20,49 +19,30 @@ class Command(BaseCommand):
         self.stdout.write(f"Starting daily reminder run for {today}...")
         
         # Get all profiles with daily_reminder enabled
-        profiles = UserProfile.objects.filter(daily_reminder=True).select_related('user')
-        
-        sent_count = 0
-        no_subscription_count = 0
+        user_ids = UserProfile.objects.filter(daily_reminder=True).values_list('user_id', flat=True)
         
         # Base URL for media assets
         site_url = getattr(settings, 'SITE_URL', 'https://trackmyrupee.com').rstrip('/')
         icon_path = static('img/pwa-icon-512.png')
         absolute_icon_url = f"{site_url}{icon_path}"
         
-        for profile in profiles:
-            user = profile.user
-            
-            # 1. Internal UI Notification
-            title = "Expense Reminder 💸"
-            message = "Don't forget to add your expenses for today to keep your tracker up to date!"
-            
-            # ui_slug = f"daily-expense-reminder-{today}"
-            # if not Notification.objects.filter(user=user, slug=ui_slug).exists():
-            #     Notification.objects.create(
-            #         user=user,
-            #         title=title,
-            #         message=message,
-            #         notification_type='SYSTEM',
-            #         slug=ui_slug,
-            #         link='/expenses/add/'
-            #     )
-            
-            # 2. External Push Notification
-            if PushInformation.objects.filter(user=user).exists():
-                payload = {
-                    "head": title,
-                    "body": message,
-                    "icon": absolute_icon_url,
-                    "url": f"{site_url}/expenses/add/"
-                }
-                
-                try:
-                    send_user_notification(user=user, payload=payload, ttl=3600)
-                    sent_count += 1
-                except Exception as e:
-                    self.stdout.write(self.style.WARNING(f"Failed to send Push to {user.username}: {e}"))
-            else:
-                no_subscription_count += 1
-                
-        self.stdout.write(self.style.SUCCESS(f"Daily reminders sent: {sent_count}, No Subscription: {no_subscription_count}"))
+        # External Push Notification; subscriptions are looked up per batch of users.
+        title = "Expense Reminder 💸"
+        message = "Don't forget to add your expenses for today to keep your tracker up to date!"
+        payload = {
+            "head": title,
+            "body": message,
+            "icon": absolute_icon_url,
+            "url": f"{site_url}/expenses/add/"
+        }
+        result = PushDeliveryService.send(
+            PushMessage(user_id, payload, 3600) for user_id in user_ids.iterator(chunk_size=settings.PUSH_BATCH_SIZE)
+        )
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f"Failed pushes: {result.failed}"))
+        if result.pruned:
+            self.stdout.write(f"Removed {result.pruned} expired subscriptions")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Daily reminders sent: {len(result.users_sent)}, No Subscription: {len(result.users_without_subscription)}"
+        ))
@@ -1,15 +1,26 @@
-
 import logging
 from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.management.base import BaseCommand
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from django.template.loader import render_to_string
 from django.utils import timezone
 
-from expenses.models import Category, Expense, Income
+from expenses.models import Category, EmailLog, Expense, Income, UserProfile
 
 logger = logging.getLogger(__name__)
 
@@ -20,15 +31,30 @@ DRIP_SCHEDULE = [
     (14, 'email/drip_upgrade.html', 'Unlock Your Full Financial Potential 🚀'),
     (30, 'email/drip_summary.html', '🎉 Your First Month in Review'),
 ]
+DRIPS = {day_threshold: (template, subject) for day_threshold, template, subject in DRIP_SCHEDULE}
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('pk')).order_by().values('user').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
 
 
 class Command(BaseCommand):
     help = 'Sends lifecycle drip emails to free-tier users based on their signup date'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.LIFECYCLE_EMAIL_BATCH_SIZE, help='Emails sent per mail connection call')
+
     def handle(self, *args, **kwargs):
         today = timezone.now()
+        batch_size = max(1, kwargs.get('batch_size') or settings.LIFECYCLE_EMAIL_BATCH_SIZE)
         sent_count = 0
-        skipped_count = 0
+        candidate_count = 0
 
         # Only target free-tier users who have an email
         free_users = User.objects.filter(
@@ -38,82 +64,124 @@ class Command(BaseCommand):
             email=''
         ).exclude(
             username='demo'
-        ).select_related('profile')
-
-        self.stdout.write(f"Found {free_users.count()} free-tier users to evaluate...")
+        )
 
-        for user in free_users:
-            profile = user.profile
-            days_since_signup = (today - user.date_joined).days
+        total_users = free_users.count()
+        self.stdout.write(f"Found {total_users} free-tier users to evaluate...")
 
-            # Find the appropriate drip email for this user
-            drip_to_send = None
-            for day_threshold, template, subject in DRIP_SCHEDULE:
-                # User has passed this threshold AND hasn't received this email yet
-                if days_since_signup >= day_threshold and profile.last_drip_email_day < day_threshold:
-                    drip_to_send = (day_threshold, template, subject)
-                    # Don't break — we want the latest applicable one
-                    # (in case the cron was down for a few days)
+        with get_connection() as connection:
+            last_id = 0
+            while True:
+                batch = list(self.candidates(free_users, today).filter(pk__gt=last_id).order_by('pk')[:batch_size])
+                if not batch:
+                    break
+                last_id = batch[-1].pk
+                candidate_count += len(batch)
+                sent_count += self._send_batch(connection, batch)
 
-            if not drip_to_send:
-                skipped_count += 1
-                continue
+        skipped_count = total_users - candidate_count
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nDrip email run complete: {sent_count} sent, {skipped_count} skipped."
+            )
+        )
 
-            day_threshold, template, subject = drip_to_send
+    def candidates(self, users, today):
+        """
+        Users due a drip, annotated with ``due_day``: the latest threshold they
+        have passed. A skipped threshold is not sent late, in case the cron was
+        down for a few days. The Day 30 activity counts are annotated in the
+        same query.
+        """
+        due_day = Case(
+            *[
+                When(date_joined__lte=today - timedelta(days=day_threshold), then=Value(day_threshold))
+                for day_threshold, _template, _subject in reversed(DRIP_SCHEDULE)
+            ],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        subject = Case(
+            *[When(due_day=day_threshold, then=Value(subject)) for day_threshold, _template, subject in DRIP_SCHEDULE],
+            default=Value(''),
+        )
+        one_month_ago = today - timedelta(days=30)
+        return users.annotate(due_day=due_day).filter(
+            due_day__gt=F('profile__last_drip_email_day'),
+        ).annotate(
+            drip_subject=subject,
+            # Sent on an earlier run whose profile update was lost.
+            already_sent=Exists(EmailLog.objects.filter(user=OuterRef('pk'), subject=OuterRef('drip_subject'), status='SENT')),
+            expense_count=_count(Expense.objects.filter(created_at__gte=one_month_ago)),
+            income_count=_count(Income.objects.filter(created_at__gte=one_month_ago)),
+            category_count=_count(Category.objects.all()),
+        ).select_related('profile')
 
+    def _send_batch(self, connection, users):
+        messages = []
+        for user in users:
+            if user.already_sent:
+                continue
             try:
-                # Build context
-                context = {
-                    'user': user,
-                }
-
-                # For Day 14: include monthly price
-                if day_threshold == 14:
-                    from finance_tracker.plans import PLAN_DETAILS
-                    context['monthly_price'] = PLAN_DETAILS['PLUS']['price_monthly']
-
-                # For Day 30: include user stats
-                if day_threshold == 30:
-                    one_month_ago = today - timedelta(days=30)
-                    context['expense_count'] = Expense.objects.filter(
-                        user=user, created_at__gte=one_month_ago
-                    ).count()
-                    context['income_count'] = Income.objects.filter(
-                        user=user, created_at__gte=one_month_ago
-                    ).count()
-                    context['category_count'] = Category.objects.filter(
-                        user=user
-                    ).count()
-
-                html_message = render_to_string(template, context)
-
-                send_mail(
-                    subject=subject,
-                    message="Check out what's new on TrackMyRupee!",  # Plain text fallback
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[user.email],
-                    html_message=html_message,
-                )
-
-                # Update tracking
-                profile.last_drip_email_day = day_threshold
-                profile.save(update_fields=['last_drip_email_day'])
-
-                sent_count += 1
+                messages.append((user, self._build_message(user)))
+            except Exception as e:
+                logger.error(f"Failed to send drip email to {user.email}: {e}")
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Sent Day {day_threshold} email to {user.email}"
-                    )
+                    self.style.ERROR(f"Failed to send email to {user.email}: {e}")
                 )
 
-            except Exception as e:
+        try:
+            if messages:
+                connection.send_messages([message for _user, message in messages])
+        except Exception as e:
+            for user, _message in messages:
                 logger.error(f"Failed to send drip email to {user.email}: {e}")
                 self.stdout.write(
                     self.style.ERROR(f"Failed to send email to {user.email}: {e}")
                 )
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"\nDrip email run complete: {sent_count} sent, {skipped_count} skipped."
+            messages = []
+
+        # Update tracking, including users whose email had already gone out
+        sent_ids = {user.pk for user, _message in messages}
+        by_day = {}
+        for user in users:
+            if user.already_sent or user.pk in sent_ids:
+                by_day.setdefault(user.due_day, []).append(user.pk)
+        for day_threshold, user_ids in by_day.items():
+            UserProfile.objects.filter(user_id__in=user_ids).update(last_drip_email_day=day_threshold)
+
+        for user, _message in messages:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Sent Day {user.due_day} email to {user.email}"
+                )
             )
+        return len(messages)
+
+    def _build_message(self, user):
+        template, subject = DRIPS[user.due_day]
+        # Build context
+        context = {
+            'user': user,
+        }
+
+        # For Day 14: include monthly price
+        if user.due_day == 14:
+            from finance_tracker.plans import PLAN_DETAILS
+            context['monthly_price'] = PLAN_DETAILS['PLUS']['price_monthly']
+
+        # For Day 30: include user stats
+        if user.due_day == 30:
+            context['expense_count'] = user.expense_count
+            context['income_count'] = user.income_count
+            context['category_count'] = user.category_count
+
+        html_message = render_to_string(template, context)
+        message = EmailMultiAlternatives(
+            subject=subject,
+            body="Check out what's new on TrackMyRupee!",  # Plain text fallback
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email],
         )
+        message.attach_alternative(html_message, 'text/html')
+        return message
@@ -1,16 +1,17 @@
-
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import timedelta
 from decimal import Decimal
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.management.base import BaseCommand
+from django.db import connections
 from django.db.models import Sum
 from django.template.loader import render_to_string
 from django.templatetags.static import static
 from django.utils import timezone
-from webpush import send_user_notification
-from webpush.models import PushInformation
 
 from expenses.models import (
     Category,
@@ -20,37 +21,107 @@ from expenses.models import (
     SavingsGoal,
     UserProfile,
 )
+from expenses.push_service import PushDeliveryService, PushMessage
 from finance_tracker.plans import PLAN_DETAILS, get_limit
 
+STAT_KEYS = ('users', 'notifications', 'pushes', 'emails', 'email_failures')
+
+
+def _run_chunk(first_id, last_id, today):
+    """Process-pool entry point: returns the chunk's stats and its captured output."""
+    output = io.StringIO()
+    command = Command(stdout=output)
+    command.today = today
+    stats = command._process_chunk(first_id, last_id)
+    return stats, output.getvalue()
+
 
 class Command(BaseCommand):
     help = 'Sends optimized notifications (Recurring, Milestones, High Spending) with deduplication'
 
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=settings.NOTIFICATION_CHUNK_SIZE, help="Users loaded and processed per chunk")
+        parser.add_argument("--workers", type=int, default=settings.NOTIFICATION_WORKERS, help="Processes working through chunks in parallel")
+
     def handle(self, *args, **kwargs):
         self.today = timezone.now().date()
         self.stdout.write(f"Starting notification run for {self.today}...")
-        
-        # --- Pre-fetch all necessary data to avoid N+1 queries ---
-        
+
+        chunk_size = max(1, kwargs.get('chunk_size') or settings.NOTIFICATION_CHUNK_SIZE)
+        workers = max(1, kwargs.get('workers') or settings.NOTIFICATION_WORKERS)
+        ranges = list(self._user_id_ranges(chunk_size))
+
+        totals = dict.fromkeys(STAT_KEYS, 0)
+        if workers > 1 and len(ranges) > 1:
+            # Forked workers must open their own database connections.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork')) as pool:
+                futures = [pool.submit(_run_chunk, first_id, last_id, self.today) for first_id, last_id in ranges]
+                for future in futures:
+                    stats, output = future.result()
+                    self.stdout.write(output, ending='')
+                    for key in STAT_KEYS:
+                        totals[key] += stats[key]
+        else:
+            for first_id, last_id in ranges:
+                stats = self._process_chunk(first_id, last_id)
+                for key in STAT_KEYS:
+                    totals[key] += stats[key]
+
+        # Cleanup Old Notifications
+        self._cleanup_old_notifications()
+
+        self.stdout.write(self.style.SUCCESS(
+            "Notification run complete! "
+            f"Users={totals['users']}, Notifications={totals['notifications']}, Pushes={totals['pushes']}, "
+            f"Emails={totals['emails']}, EmailFailures={totals['email_failures']}"
+        ))
+
+    def _profiles(self):
+        return UserProfile.objects.exclude(user__username='demo')
+
+    def _user_id_ranges(self, chunk_size):
+        """Yields (first, last) user ids covering ``chunk_size`` profiles each."""
+        last_id = 0
+        while True:
+            chunk = list(
+                self._profiles().filter(user_id__gt=last_id).order_by('user_id')
+                .values_list('user_id', flat=True)[:chunk_size]
+            )
+            if not chunk:
+                return
+            yield chunk[0], chunk[-1]
+            last_id = chunk[-1]
+
+    def _process_chunk(self, first_id, last_id):
+        """
+        Loads what the alerts need for the users in [first_id, last_id], creates
+        their notifications in one bulk insert and then sends pushes and email.
+        """
+        in_chunk = {'user_id__gte': first_id, 'user_id__lte': last_id}
+
+        # --- Pre-fetch this chunk's data to avoid N+1 queries ---
+
         # 1. Pre-fetch Active Savings Goals
         self.active_goals_by_user = {}
-        for goal in SavingsGoal.objects.filter(is_completed=False):
+        for goal in SavingsGoal.objects.filter(is_completed=False, **in_chunk):
             self.active_goals_by_user.setdefault(goal.user_id, []).append(goal)
-            
+
         # 2. Pre-fetch Active Recurring Transactions
         self.active_recurring_by_user = {}
-        for rt in RecurringTransaction.objects.filter(is_active=True):
+        for rt in RecurringTransaction.objects.filter(is_active=True, **in_chunk):
             self.active_recurring_by_user.setdefault(rt.user_id, []).append(rt)
-            
+
         # 3. Pre-fetch Categories with Limits
         self.categories_by_user = {}
-        for cat in Category.objects.filter(limit__gt=0):
+        for cat in Category.objects.filter(limit__gt=0, **in_chunk):
             self.categories_by_user.setdefault(cat.user_id, []).append(cat)
-            
+
         # 4. Pre-fetch Monthly Expenses for Budget checking
         expenses_summary = Expense.objects.filter(
             date__year=self.today.year,
-            date__month=self.today.month
+            date__month=self.today.month,
+            **in_chunk
         ).values('user_id', 'category').annotate(total=Sum('base_amount'))
         self.expense_sums = {}
         for row in expenses_summary:
@@ -60,17 +131,18 @@ class Command(BaseCommand):
         self.sent_notifications_by_user = {}
         for n in Notification.objects.filter(
             created_at__year=self.today.year,
-            created_at__month=self.today.month
+            created_at__month=self.today.month,
+            **in_chunk
         ).values('user_id', 'slug'):
             self.sent_notifications_by_user.setdefault(n['user_id'], set()).add(n['slug'])
-            
-        # 6. Pre-fetch Push Information presence
-        self.users_with_push = set(PushInformation.objects.values_list('user_id', flat=True))
 
-        users = UserProfile.objects.exclude(user__username='demo').select_related('user')
+        self.pending_notifications = []
+        self.pending_pushes = []
+        self.expiry_reminders = []
+        digests = []
+        profiles = self._profiles().filter(**in_chunk).select_related('user').order_by('user_id')
 
-        
-        for profile in users:
+        for profile in profiles:
             user = profile.user
             self.stdout.write(f"Processing notifications for {user.username}...")
             
@@ -88,14 +160,25 @@ class Command(BaseCommand):
             # 4. Check for Subscription Expiries
             self._process_subscription_reminders(profile)
 
-            # 5. Send Consolidated Email
+            # 5. Build Consolidated Email
             if self.current_user_notifications:
-                self._send_consolidated_email(user, self.current_user_notifications)
-            
-        # 6. Cleanup Old Notifications
-        self._cleanup_old_notifications()
-        
-        self.stdout.write(self.style.SUCCESS("Notification run complete!"))
+                message = self._build_consolidated_email(user, self.current_user_notifications)
+                if message is not None:
+                    digests.append((user, message, len(self.current_user_notifications)))
+
+        Notification.objects.bulk_create(self.pending_notifications)
+        if self.expiry_reminders:
+            UserProfile.objects.filter(pk__in=self.expiry_reminders).update(expiry_reminder_sent=True)
+
+        pushes = self._send_pushes(self.pending_pushes)
+        emails, email_failures = self._send_digests(digests)
+        return {
+            'users': len(profiles),
+            'notifications': len(self.pending_notifications),
+            'pushes': pushes,
+            'emails': emails,
+            'email_failures': email_failures,
+        }
 
     def _is_recently_sent(self, user, slug):
         """Deduplication logic: check if this slug was sent in the current calendar month."""
@@ -103,12 +186,14 @@ class Command(BaseCommand):
         return slug in user_sent_slugs
 
     def _create_notification(self, user, title, message, n_type, slug=None, link=None, metadata=None, related_transaction=None):
-        """Helper to create UI and Push notification if not recently sent."""
+        """Queues a UI (and Push) notification for the chunk if not recently sent."""
         if slug and self._is_recently_sent(user, slug):
             return False
+        if slug:
+            self.sent_notifications_by_user.setdefault(user.id, set()).add(slug)
 
-        # 1. Create UI Notification
-        Notification.objects.create(
+        # 1. Queue UI Notification
+        self.pending_notifications.append(Notification(
             user=user,
             title=title,
             message=message,
@@ -117,24 +202,20 @@ class Command(BaseCommand):
             link=link,
             metadata=metadata,
             related_transaction=related_transaction
-        )
+        ))
         
-        # 2. Send Push Notification (WebPush)
-        if user.id in self.users_with_push:
-            site_url = getattr(settings, 'SITE_URL', 'https://trackmyrupee.com').rstrip('/')
-            icon_path = static('img/pwa-icon-512.png')
-            absolute_icon_url = f"{site_url}{icon_path}"
-            
-            payload = {
-                "head": title,
-                "body": message,
-                "icon": absolute_icon_url, 
-                "url": f"{site_url}{link}" if link else f"{site_url}/notifications/"
-            }
-            try:
-                send_user_notification(user=user, payload=payload, ttl=1000)
-            except Exception as e:
-                self.stdout.write(self.style.WARNING(f"Failed to send Push to {user}: {e}"))
+        # 2. Queue Push Notification (WebPush); users without a subscription are skipped at delivery.
+        site_url = getattr(settings, 'SITE_URL', 'https://trackmyrupee.com').rstrip('/')
+        icon_path = static('img/pwa-icon-512.png')
+        absolute_icon_url = f"{site_url}{icon_path}"
+        
+        payload = {
+            "head": title,
+            "body": message,
+            "icon": absolute_icon_url, 
+            "url": f"{site_url}{link}" if link else f"{site_url}/notifications/"
+        }
+        self.pending_pushes.append(PushMessage(user.id, payload, 1000))
             
         # 3. Queue for Email Consolidation
         self.current_user_notifications.append({
@@ -145,16 +226,22 @@ class Command(BaseCommand):
         })
         return True
 
-    def _send_consolidated_email(self, user, notifications):
-        """Sends a single consolidated HTML email only if the user tier allows it."""
+    def _send_pushes(self, pushes):
+        result = PushDeliveryService.send(pushes)
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f"Failed to send {result.failed} pushes"))
+        return result.delivered
+
+    def _build_consolidated_email(self, user, notifications):
+        """Builds a single consolidated HTML email only if the user tier allows it."""
         if not user.email:
-            return
+            return None
 
         profile = user.profile
         tier = profile.active_tier
         if not PLAN_DETAILS.get(tier, {}).get('limits', {}).get('email_notifications', False):
             self.stdout.write(f"Skipping email for {user.username} ({tier.capitalize()} Tier)")
-            return
+            return None
 
         subject = notifications[0]['title'] if len(notifications) == 1 else "Your Daily Financial Digest"
         
@@ -170,18 +257,43 @@ class Command(BaseCommand):
         html_content = render_to_string('email/recurring_reminder.html', context)
         text_content = "\n\n".join([f"{n['title']}: {n['message']}" for n in notifications])
 
+        msg = EmailMultiAlternatives(
+            subject=subject,
+            body=text_content,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[user.email]
+        )
+        msg.attach_alternative(html_content, "text/html")
+        return msg
+
+    def _send_digests(self, digests):
+        """Sends the chunk's digests over one connection, NOTIFICATION_EMAIL_BATCH_SIZE per call."""
+        if not digests:
+            return 0, 0
+        sent = failed = 0
+        batch_size = max(1, settings.NOTIFICATION_EMAIL_BATCH_SIZE)
         try:
-            msg = EmailMultiAlternatives(
-                subject=subject,
-                body=text_content,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=[user.email]
-            )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            self.stdout.write(self.style.SUCCESS(f"Sent consolidated email to {user.email} ({len(notifications)} alerts)"))
+            connection = get_connection()
+            connection.open()
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Failed to send Email to {user.email}: {e}"))
+            self.stdout.write(self.style.ERROR(f"Failed to open email connection: {e}"))
+            return 0, len(digests)
+        try:
+            for start in range(0, len(digests), batch_size):
+                batch = digests[start:start + batch_size]
+                try:
+                    connection.send_messages([message for _user, message, _count in batch])
+                except Exception as e:
+                    failed += len(batch)
+                    for user, _message, _count in batch:
+                        self.stdout.write(self.style.ERROR(f"Failed to send Email to {user.email}: {e}"))
+                    continue
+                sent += len(batch)
+                for user, _message, count in batch:
+                    self.stdout.write(self.style.SUCCESS(f"Sent consolidated email to {user.email} ({count} alerts)"))
+        finally:
+            connection.close()
+        return sent, failed
 
     def _process_recurring_reminders(self, user):
         """Notifies about upcoming recurring transactions (Income, Expense, Transfer) in 3 days."""
@@ -281,7 +393,7 @@ class Command(BaseCommand):
                 link = "/pricing/"
                 if self._create_notification(profile.user, title, message, 'SYSTEM', link=link):
                     profile.expiry_reminder_sent = True
-                    profile.save(update_fields=['expiry_reminder_sent'])
+                    self.expiry_reminders.append(profile.pk)
 
     def _cleanup_old_notifications(self):
         """Cleanup notifications older than 90 days."""
@@ -0,0 +1,31 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from expenses.category_model import CategoryModelService
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-user category prediction models from expense history"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", type=int, help="Retrain a single user")
+        parser.add_argument("--limit", type=int, default=None, help="Maximum users to retrain")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(expense__isnull=False).distinct().order_by("pk")
+        if options.get("user_id"):
+            users = users.filter(pk=options["user_id"])
+        if options["limit"]:
+            users = users[: options["limit"]]
+
+        completed = 0
+        failed = 0
+        for user in users.iterator():
+            try:
+                CategoryModelService.train(user)
+                completed += 1
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"User {user.pk}: {exc}")
+
+        self.stdout.write(self.style.SUCCESS(f"Completed={completed}, Failed={failed}"))
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.27 on 2026-10-19 05:16
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('expenses', '0053_recurringtransaction_loan_type_and_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionFeedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('item_type', models.CharField(choices=[('EXPENSE', 'Expense'), ('INCOME', 'Income'), ('TRANSFER', 'Transfer'), ('LOAN', 'Loan Repayment'), ('GOAL', 'Goal Contribution')], max_length=10)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('parent_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, default='')),
+                ('category', models.CharField(blank=True, default='', max_length=255)),
+                ('account_label', models.CharField(blank=True, default='', max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('base_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('currency', models.CharField(choices=[('₹', 'Indian Rupee (₹)'), ('$', 'US Dollar ($)'), ('€', 'Euro (€)'), ('£', 'Pound Sterling (£)'), ('¥', 'Japanese Yen (¥)'), ('A$', 'Australian Dollar (A$)'), ('C$', 'Canadian Dollar (C$)'), ('CHF', 'Swiss Franc (CHF)'), ('元', 'Chinese Yuan (元)'), ('₩', 'South Korean Won (₩)')], default='₹', max_length=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='expenses.account')),
+                ('counter_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='expenses.account')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='expenses_tr_user_id_5d6b19_idx'), models.Index(fields=['user', 'item_type', 'date'], name='expenses_tr_user_id_cbb003_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='transactionfeeditem',
+            constraint=models.UniqueConstraint(fields=('item_type', 'source_id'), name='unique_feed_item_source'),
+        ),
+    ]
@@ -0,0 +1,126 @@
+import logging
+
+from django.db import DatabaseError, migrations, transaction
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'expenses_transactionfeeditem_fts'
+FEED_TABLE = 'expenses_transactionfeeditem'
+
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        description, category, account_label,
+        content='{FEED_TABLE}', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {FEED_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, description, category, account_label)
+        VALUES (new.id, new.description, new.category, new.account_label);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {FEED_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, account_label)
+        VALUES ('delete', old.id, old.description, old.category, old.account_label);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE ON {FEED_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, category, account_label)
+        VALUES ('delete', old.id, old.description, old.category, old.account_label);
+        INSERT INTO {FTS_TABLE}(rowid, description, category, account_label)
+        VALUES (new.id, new.description, new.category, new.account_label);
+    END
+    """,
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_TRIGRAM_FORWARD = [
+    f"CREATE INDEX IF NOT EXISTS feed_description_trgm ON {FEED_TABLE} USING gin (description gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS feed_category_trgm ON {FEED_TABLE} USING gin (category gin_trgm_ops)",
+    f"CREATE INDEX IF NOT EXISTS feed_account_label_trgm ON {FEED_TABLE} USING gin (account_label gin_trgm_ops)",
+]
+
+POSTGRES_FORWARD = [
+    f"""
+    CREATE INDEX IF NOT EXISTS feed_search_tsv ON {FEED_TABLE} USING gin (
+        to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(category, ''))
+    )
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS feed_description_trgm",
+    "DROP INDEX IF EXISTS feed_category_trgm",
+    "DROP INDEX IF EXISTS feed_account_label_trgm",
+    "DROP INDEX IF EXISTS feed_search_tsv",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def _ensure_pg_trgm(schema_editor):
+    """
+    True once pg_trgm is installed. Creating it needs superuser, or the CREATE
+    privilege on the database for PostgreSQL 13+ (where it is a trusted
+    extension); without either, search keeps unindexed ILIKE matching.
+    """
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        if cursor.fetchone() is not None:
+            return True
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError as exc:
+        logger.warning(
+            "Skipping the trigram search indexes: could not create the pg_trgm extension (%s). "
+            "Run CREATE EXTENSION pg_trgm as a superuser, then the POSTGRES_TRIGRAM_FORWARD statements.",
+            exc,
+        )
+        return False
+    return True
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # The trigram tokenizer needs SQLite 3.34+; older builds keep the icontains fallback.
+        from django.db.backends.sqlite3.base import Database
+        if Database.sqlite_version_info >= (3, 34):
+            _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        if _ensure_pg_trgm(schema_editor):
+            _run(schema_editor, POSTGRES_TRIGRAM_FORWARD)
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_BACKWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0054_transactionfeeditem'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
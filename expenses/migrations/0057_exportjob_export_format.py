@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 05:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0056_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='export_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)'), ('columnar', 'Columnar (Parquet)')], default='csv', max_length=10),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.27 on 2026-10-19 05:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0058_importjob'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expense',
+            name='unique_expense',
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='external_id',
+            field=models.CharField(blank=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='skipped_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id__isnull', True)), fields=('user', 'date', 'amount', 'currency', 'description', 'category'), name='unique_expense'),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id__isnull', False)), fields=('user', 'external_id'), name='unique_expense_external_id'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.27 on 2026-10-19 06:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('expenses', '0059_statement_imports'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPredictionModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.JSONField(default=dict)),
+                ('sample_count', models.PositiveIntegerField(default=0)),
+                ('trained_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='category_prediction_model', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 06:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0060_category_prediction_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='data_epoch',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0063_backgroundjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['status', 'updated_at'], name='expenses_ex_status_3135d0_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0064_exportjob_updated_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='export_format',
+            field=models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)'), ('columnar', 'Parquet (JSON Lines if pyarrow is unavailable)')], default='csv', max_length=10),
+        ),
+    ]
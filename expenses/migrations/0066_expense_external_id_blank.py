@@ -0,0 +1,34 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0065_alter_exportjob_export_format'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='expense',
+            name='unique_expense',
+        ),
+        migrations.RemoveConstraint(
+            model_name='expense',
+            name='unique_expense_external_id',
+        ),
+        migrations.AlterField(
+            model_name='expense',
+            name='external_id',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id', '')), fields=('user', 'date', 'amount', 'currency', 'description', 'category'), name='unique_expense'),
+        ),
+        migrations.AddConstraint(
+            model_name='expense',
+            constraint=models.UniqueConstraint(condition=models.Q(('external_id', ''), _negated=True), fields=('user', 'external_id'), name='unique_expense_external_id'),
+        ),
+    ]
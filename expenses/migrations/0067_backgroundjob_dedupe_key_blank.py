@@ -0,0 +1,26 @@
+# Generated by Django 4.2.27 on 2026-10-19 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0066_expense_external_id_blank'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='backgroundjob',
+            name='unique_unfinished_background_job',
+        ),
+        migrations.AlterField(
+            model_name='backgroundjob',
+            name='dedupe_key',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddConstraint(
+            model_name='backgroundjob',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['PENDING', 'RUNNING']), models.Q(('dedupe_key', ''), _negated=True)), fields=('dedupe_key',), name='unique_unfinished_background_job'),
+        ),
+    ]
@@ -35,25 +35,76 @@ def _build_ledger_version(instance, action):
     return f"{action_prefix}-{int(ts.timestamp() * 1000000)}"
 
 
-def _run_ledger_shadow(posting_fn, source_type=None, source_id=None, action=None, payload=None):
+def _run_ledger_shadow(posting_fn, source_type=None, source_id=None, action=None, payload=None, failures=None):
+    """``failures`` lists the (source_type, source_id, action, payload) retries a batch posting records instead."""
     if not getattr(settings, 'LEDGER_WRITE_ENABLED', False):
         return
     try:
         posting_fn()
     except Exception as exc:
         logger.exception('Ledger shadow posting failed.')
-        LedgerPostingFailure.objects.create(
-            source_type=source_type or 'ADJUSTMENT',
-            source_id=source_id or 0,
-            action=action or 'UNKNOWN',
-            payload=payload or {},
-            error_message=str(exc),
-            status='PENDING',
-            next_retry_at=timezone.now(),
-        )
+        if failures is None:
+            failures = [(source_type, source_id, action, payload)]
+        LedgerPostingFailure.objects.bulk_create([
+            LedgerPostingFailure(
+                source_type=failure_source_type or 'ADJUSTMENT',
+                source_id=failure_source_id or 0,
+                action=failure_action or 'UNKNOWN',
+                payload=failure_payload or {},
+                error_message=str(exc),
+                status='PENDING',
+                next_retry_at=timezone.now(),
+            )
+            for failure_source_type, failure_source_id, failure_action, failure_payload in failures
+        ])
         if getattr(settings, 'LEDGER_ENFORCE_BALANCED_WRITE', False):
             raise ValidationError(_('Unable to save transaction right now. Please try again.'))
 
+
+def _expense_ledger_snapshot(expense):
+    """The fields ``LedgerPostingService._expense_like`` rebuilds an expense from on retry."""
+    return {
+        'user_id': expense.user_id,
+        'amount': str(expense.amount),
+        'currency': expense.currency,
+        'category': expense.category,
+        'description': expense.description,
+        'account_id': expense.account_id,
+        'source_id': expense.id,
+    }
+
+
+def _sync_feed_item(instance):
+    """Upserts the TransactionFeedItem projection of ``instance``; the rebuild command repairs any miss."""
+    if not getattr(settings, 'TRANSACTION_FEED_ENABLED', True):
+        return
+    try:
+        with transaction.atomic():
+            from .feed_service import TransactionFeedService
+
+            TransactionFeedService.sync(instance)
+    except Exception:
+        logger.exception('Transaction feed sync failed for %s %s.', type(instance).__name__, instance.pk)
+
+
+def _apply_balance_changes(*changes):
+    """Applies (account_id, signed amount, currency) changes as net per-account deltas; see ``expenses.transaction_writer``."""
+    from .transaction_writer import BalanceChange, TransactionWriter
+
+    TransactionWriter.apply(BalanceChange(*change) for change in changes)
+
+
+def _record_category_change(user, added=(), removed=()):
+    """Keeps the user's stored category model current; ``train_category_models`` repairs any miss."""
+    from .category_model import CategoryModelService
+
+    try:
+        # record() runs in its own savepoint, so a failure leaves the caller's transaction usable.
+        CategoryModelService.record(user, added=added, removed=removed)
+    except Exception:
+        logger.exception('Category model update failed for user %s.', getattr(user, 'pk', user))
+
+
 class FinanceBaseManager(models.Manager):
     def get_monthly_summary(self, user, year, month):
         return self.filter(
@@ -301,6 +352,8 @@ class Expense(models.Model):
     base_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0.0, verbose_name=_('Amount in Base Currency'))
 
     account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses', verbose_name=_('Account'))
+    # Bank transaction id from an imported statement (OFX FITID, CAMT AcctSvcrRef, ...).
+    external_id = models.CharField(max_length=255, blank=True, default='', editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -310,19 +363,8 @@ class Expense(models.Model):
     def save(self, *args, **kwargs):
         with transaction.atomic():
             old_instance = None
-            # Handle balance reversal for updates
             if self.pk:
                 old_instance = Expense.objects.select_related(None).select_for_update().get(pk=self.pk)
-                if old_instance.account_id:
-                    old_account = Account.objects.select_for_update().get(pk=old_instance.account_id)
-                    # Convert old amount to account currency for reversal
-                    reversal_amount = old_instance.amount
-                    if old_instance.currency != old_account.currency:
-                        rate = get_exchange_rate(old_instance.currency, old_account.currency)
-                        reversal_amount = (old_instance.amount * rate).quantize(Decimal('0.01'))
-                    
-                    old_account.balance += reversal_amount
-                    old_account.save(update_fields=['balance', 'updated_at'])
 
             if self.category:
                 self.category = self.category.strip()
@@ -337,18 +379,21 @@ class Expense(models.Model):
                 self.base_amount = (self.amount * self.exchange_rate).quantize(Decimal('0.01'))
                 
             super().save(*args, **kwargs)
+            _sync_feed_item(self)
+            if old_instance is None:
+                _record_category_change(self.user, added=[(self.description, self.category)])
+            elif (old_instance.description, old_instance.category) != (self.description, self.category):
+                _record_category_change(
+                    self.user,
+                    added=[(self.description, self.category)],
+                    removed=[(old_instance.description, old_instance.category)],
+                )
             
-            # Apply new balance
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert current amount to account currency
-                apply_amount = self.amount
-                if self.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance -= apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            # Reverse the old amount and apply the new one as one net delta per account
+            changes = [(self.account_id, -self.amount, self.currency)]
+            if old_instance is not None:
+                changes.append((old_instance.account_id, old_instance.amount, old_instance.currency))
+            _apply_balance_changes(*changes)
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -374,39 +419,14 @@ class Expense(models.Model):
                 payload={
                     'handler': 'expense_create' if old_instance is None else 'expense_update',
                     'version_token': _build_ledger_version(self, 'CREATE' if old_instance is None else 'UPDATE'),
-                    'expense': {
-                        'user_id': self.user_id,
-                        'amount': str(self.amount),
-                        'currency': self.currency,
-                        'category': self.category,
-                        'description': self.description,
-                        'account_id': self.account_id,
-                        'source_id': self.id,
-                    },
-                    'previous_expense': {
-                        'user_id': old_instance.user_id,
-                        'amount': str(old_instance.amount),
-                        'currency': old_instance.currency,
-                        'category': old_instance.category,
-                        'description': old_instance.description,
-                        'account_id': old_instance.account_id,
-                        'source_id': old_instance.id,
-                    } if old_instance else None,
+                    'expense': _expense_ledger_snapshot(self),
+                    'previous_expense': _expense_ledger_snapshot(old_instance) if old_instance else None,
                 },
             )
 
     def delete(self, *args, **kwargs):
         with transaction.atomic():
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert to account currency for deletion reversal
-                apply_amount = self.amount
-                if self.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance += apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            _apply_balance_changes((self.account_id, self.amount, self.currency))
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -424,15 +444,7 @@ class Expense(models.Model):
                 payload={
                     'handler': 'expense_delete',
                     'version_token': _build_ledger_version(self, 'DELETE'),
-                    'expense': {
-                        'user_id': self.user_id,
-                        'amount': str(self.amount),
-                        'currency': self.currency,
-                        'category': self.category,
-                        'description': self.description,
-                        'account_id': self.account_id,
-                        'source_id': self.id,
-                    },
+                    'expense': _expense_ledger_snapshot(self),
                 },
             )
             super().delete(*args, **kwargs)
@@ -441,8 +453,16 @@ class Expense(models.Model):
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'date', 'amount', 'currency', 'description', 'category'],
+                condition=models.Q(external_id=''),
                 name='unique_expense'
-            )
+            ),
+            # Statement imports are deduplicated on the bank's id instead, so two
+            # genuine identical purchases on one day are both kept.
+            models.UniqueConstraint(
+                fields=['user', 'external_id'],
+                condition=~models.Q(external_id=''),
+                name='unique_expense_external_id'
+            ),
         ]
         indexes = [
             models.Index(fields=['user', 'category']),
@@ -497,19 +517,8 @@ class Income(models.Model):
     def save(self, *args, **kwargs):
         with transaction.atomic():
             old_instance = None
-            # Handle balance reversal for updates
             if self.pk:
                 old_instance = Income.objects.select_related(None).select_for_update().get(pk=self.pk)
-                if old_instance.account_id:
-                    old_account = Account.objects.select_for_update().get(pk=old_instance.account_id)
-                    # Convert to account currency for reversal
-                    reversal_amount = old_instance.amount
-                    if old_instance.currency != old_account.currency:
-                        rate = get_exchange_rate(old_instance.currency, old_account.currency)
-                        reversal_amount = (old_instance.amount * rate).quantize(Decimal('0.01'))
-                    
-                    old_account.balance -= reversal_amount
-                    old_account.save(update_fields=['balance', 'updated_at'])
 
             if self.source:
                 self.source = self.source.strip()
@@ -524,18 +533,13 @@ class Income(models.Model):
                 self.base_amount = (self.amount * self.exchange_rate).quantize(Decimal('0.01'))
 
             super().save(*args, **kwargs)
+            _sync_feed_item(self)
 
-            # Apply new balance
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert to account currency
-                apply_amount = self.amount
-                if self.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                    
-                locked_account.balance += apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            # Reverse the old amount and apply the new one as one net delta per account
+            changes = [(self.account_id, self.amount, self.currency)]
+            if old_instance is not None:
+                changes.append((old_instance.account_id, -old_instance.amount, old_instance.currency))
+            _apply_balance_changes(*changes)
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -584,16 +588,7 @@ class Income(models.Model):
 
     def delete(self, *args, **kwargs):
         with transaction.atomic():
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert to account currency for deletion reversal
-                apply_amount = self.amount
-                if self.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance -= apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            _apply_balance_changes((self.account_id, -self.amount, self.currency))
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -670,23 +665,9 @@ class Transfer(models.Model):
         self.full_clean()
         with transaction.atomic():
             old_instance = None
-            # Revert-and-Apply pattern for updates
             if self.pk:
-                old_instance = Transfer.objects.select_related('from_account', 'to_account').select_for_update().get(pk=self.pk)
-                old_from_account = Account.objects.select_for_update().get(pk=old_instance.from_account_id)
-                old_to_account = Account.objects.select_for_update().get(pk=old_instance.to_account_id)
-                # Revert old
-                old_from_account.balance += old_instance.amount
-                old_from_account.save(update_fields=['balance', 'updated_at'])
-                
-                # Convert from_account's amount to to_account's currency for reversal
-                reversal_to_amount = old_instance.amount
-                if old_instance.from_account.currency != old_instance.to_account.currency:
-                    rate = get_exchange_rate(old_instance.from_account.currency, old_instance.to_account.currency)
-                    reversal_to_amount = (old_instance.amount * rate).quantize(Decimal('0.01'))
-                
-                old_to_account.balance -= reversal_to_amount
-                old_to_account.save(update_fields=['balance', 'updated_at'])
+                # Only the transfer row is locked; balances change through F() deltas below.
+                old_instance = Transfer.objects.select_related('from_account', 'to_account').select_for_update(of=('self',)).get(pk=self.pk)
 
             # Multi-currency normalization (Transfers use the currency of the from_account usually)
             currency = self.from_account.currency
@@ -700,22 +681,20 @@ class Transfer(models.Model):
                 self.converted_amount = (self.amount * self.exchange_rate).quantize(Decimal('0.01'))
 
             super().save(*args, **kwargs)
-
-            # Apply new
-            from_account = Account.objects.select_for_update().get(pk=self.from_account_id)
-            to_account = Account.objects.select_for_update().get(pk=self.to_account_id)
-            
-            from_account.balance -= self.amount # amount is in from_account currency
-            from_account.save(update_fields=['balance', 'updated_at'])
-            
-            # Convert to to_account currency
-            to_apply_amount = self.amount
-            if from_account.currency != to_account.currency:
-                rate = get_exchange_rate(from_account.currency, to_account.currency)
-                to_apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-            to_account.balance += to_apply_amount
-            to_account.save(update_fields=['balance', 'updated_at'])
+            _sync_feed_item(self)
+
+            # Revert the old transfer and apply the new one; amounts are in from_account currency
+            changes = [
+                (self.from_account_id, -self.amount, currency),
+                (self.to_account_id, self.amount, currency),
+            ]
+            if old_instance is not None:
+                old_currency = old_instance.from_account.currency
+                changes += [
+                    (old_instance.from_account_id, old_instance.amount, old_currency),
+                    (old_instance.to_account_id, -old_instance.amount, old_currency),
+                ]
+            _apply_balance_changes(*changes)
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -762,19 +741,11 @@ class Transfer(models.Model):
 
     def delete(self, *args, **kwargs):
         with transaction.atomic():
-            from_account = Account.objects.select_for_update().get(pk=self.from_account_id)
-            to_account = Account.objects.select_for_update().get(pk=self.to_account_id)
-            from_account.balance += self.amount
-            from_account.save(update_fields=['balance', 'updated_at'])
-            
-            # Convert for reversal
-            to_revert_amount = self.amount
-            if from_account.currency != to_account.currency:
-                rate = get_exchange_rate(from_account.currency, to_account.currency)
-                to_revert_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-            to_account.balance -= to_revert_amount
-            to_account.save(update_fields=['balance', 'updated_at'])
+            currency = self.from_account.currency
+            _apply_balance_changes(
+                (self.from_account_id, self.amount, currency),
+                (self.to_account_id, -self.amount, currency),
+            )
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -978,6 +949,21 @@ class UserProfile(models.Model):
     expiry_reminder_sent = models.BooleanField(default=False)
     daily_reminder = models.BooleanField(default=True, verbose_name=_('Daily Expense Reminder'))
 
+    # Bumped after every committed write to the user's financial data (see data_epoch.py).
+    data_epoch = models.PositiveBigIntegerField(default=0, editable=False)
+
+    def __str__(self):
+        return f"{self.user.username}'s Profile ({self.tier})"
+
+    def save(self, *args, **kwargs):
+        # The epoch only moves through DataEpochService; saving a stale instance must not rewind it.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'data_epoch'
+            ]
+        super().save(*args, **kwargs)
+
     @property
     def is_pro(self):
         """Check if user has active Pro access (either lifetime or valid subscription)."""
@@ -1128,9 +1114,6 @@ class UserProfile(models.Model):
         """Check if user is eligible to start a free 7-day Pro trial."""
         return self.tier == 'FREE' and not self.has_used_trial
 
-    def __str__(self):
-        return f"{self.user.username}'s Profile ({self.tier})"
-
 class PaymentHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     order_id = models.CharField(max_length=100)
@@ -1255,34 +1238,20 @@ class GoalContribution(models.Model):
 
     def save(self, *args, **kwargs):
         with transaction.atomic():
+            # Amounts are in goal currency
+            changes = [(self.account_id, -self.amount, self.goal.currency)]
             if self.pk:
                 old_instance = GoalContribution.objects.select_related(None).select_for_update().get(pk=self.pk)
                 # Revert old balance and goal amount
-                if old_instance.account_id:
-                    old_account = Account.objects.select_for_update().get(pk=old_instance.account_id)
-                    # Convert goal currency to account currency for reversal
-                    reversal_amount = old_instance.amount
-                    if old_instance.goal.currency != old_account.currency:
-                        rate = get_exchange_rate(old_instance.goal.currency, old_account.currency)
-                        reversal_amount = (old_instance.amount * rate).quantize(Decimal('0.01'))
-                        
-                    old_account.balance += reversal_amount
-                    old_account.save(update_fields=['balance', 'updated_at'])
+                old_goal = self.goal if old_instance.goal_id == self.goal_id else old_instance.goal
+                changes.append((old_instance.account_id, old_instance.amount, old_goal.currency))
                 self.goal.current_amount -= old_instance.amount
             
             super().save(*args, **kwargs)
+            _sync_feed_item(self)
             
             # Apply new balance and goal amount
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert goal currency to account currency
-                apply_amount = self.amount
-                if self.goal.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.goal.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance -= apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            _apply_balance_changes(*changes)
             
             self.goal.current_amount += self.amount
             self.goal.save()
@@ -1290,16 +1259,7 @@ class GoalContribution(models.Model):
     def delete(self, *args, **kwargs):
         with transaction.atomic():
             # Update account balance and goal's current amount when deleting a contribution
-            if self.account:
-                locked_account = Account.objects.select_for_update().get(pk=self.account_id)
-                # Convert for deletion reversal
-                apply_amount = self.amount
-                if self.goal.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.goal.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                    
-                locked_account.balance += apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            _apply_balance_changes((self.account_id, self.amount, self.goal.currency))
                 
             self.goal.current_amount -= self.amount
             self.goal.save()
@@ -1408,19 +1368,8 @@ class LoanRepayment(models.Model):
         self.full_clean()
         with transaction.atomic():
             old_instance = None
-            # Handle balance reversal for updates
             if self.pk:
                 old_instance = LoanRepayment.objects.select_for_update().get(pk=self.pk)
-                if old_instance.from_account_id:
-                    old_account = Account.objects.select_for_update().get(pk=old_instance.from_account_id)
-                    # Convert old amount to account currency for reversal
-                    reversal_amount = old_instance.amount
-                    if old_instance.loan.currency != old_account.currency:
-                        rate = get_exchange_rate(old_instance.loan.currency, old_account.currency)
-                        reversal_amount = (old_instance.amount * rate).quantize(Decimal('0.01'))
-                    
-                    old_account.balance += reversal_amount
-                    old_account.save(update_fields=['balance', 'updated_at'])
 
             # Multi-currency normalization (amount is in loan currency)
             base_currency = self.loan.user.profile.currency
@@ -1432,18 +1381,14 @@ class LoanRepayment(models.Model):
                 self.base_amount = (self.amount * self.exchange_rate).quantize(Decimal('0.01'))
 
             super().save(*args, **kwargs)
+            _sync_feed_item(self)
 
-            # Apply new balance
-            if self.from_account:
-                locked_account = Account.objects.select_for_update().get(pk=self.from_account_id)
-                # Convert current amount to account currency
-                apply_amount = self.amount
-                if self.loan.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.loan.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance -= apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            # Reverse the old amount and apply the new one (both in loan currency) as net deltas
+            changes = [(self.from_account_id, -self.amount, self.loan.currency)]
+            if old_instance is not None:
+                old_loan = self.loan if old_instance.loan_id == self.loan_id else old_instance.loan
+                changes.append((old_instance.from_account_id, old_instance.amount, old_loan.currency))
+            _apply_balance_changes(*changes)
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -1490,16 +1435,7 @@ class LoanRepayment(models.Model):
 
     def delete(self, *args, **kwargs):
         with transaction.atomic():
-            if self.from_account:
-                locked_account = Account.objects.select_for_update().get(pk=self.from_account_id)
-                # Convert to account currency for deletion reversal
-                apply_amount = self.amount
-                if self.loan.currency != locked_account.currency:
-                    rate = get_exchange_rate(self.loan.currency, locked_account.currency)
-                    apply_amount = (self.amount * rate).quantize(Decimal('0.01'))
-                
-                locked_account.balance += apply_amount
-                locked_account.save(update_fields=['balance', 'updated_at'])
+            _apply_balance_changes((self.from_account_id, self.amount, self.loan.currency))
 
             def _post_shadow_entry():
                 from .ledger_service import LedgerPostingService
@@ -1529,3 +1465,217 @@ class LoanRepayment(models.Model):
             )
             super().delete(*args, **kwargs)
 
+
+class TransactionFeedItem(models.Model):
+    """
+    Denormalized, read-optimized copy of every user-visible money movement.
+    Written by the save/delete paths of the source models; rebuilt with
+    ``manage.py rebuild_transaction_feed``.
+    """
+    ITEM_TYPES = [
+        ('EXPENSE', _('Expense')),
+        ('INCOME', _('Income')),
+        ('TRANSFER', _('Transfer')),
+        ('LOAN', _('Loan Repayment')),
+        ('GOAL', _('Goal Contribution')),
+    ]
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='feed_items')
+    date = models.DateField()
+    item_type = models.CharField(max_length=10, choices=ITEM_TYPES)
+    source_id = models.PositiveBigIntegerField()
+    # Loan id for repayments, goal id for contributions.
+    parent_id = models.PositiveBigIntegerField(null=True, blank=True)
+    description = models.TextField(blank=True, default='')
+    category = models.CharField(max_length=255, blank=True, default='')
+    account_label = models.CharField(max_length=255, blank=True, default='')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    counter_account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    base_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    currency = models.CharField(max_length=5, choices=CURRENCY_CHOICES, default='₹')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['item_type', 'source_id'], name='unique_feed_item_source'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date']),
+            models.Index(fields=['user', 'item_type', 'date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} - {self.item_type} - {self.base_amount}"
+
+
+class ExportJob(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('RUNNING', _('Running')),
+        ('COMPLETED', _('Completed')),
+        ('FAILED', _('Failed')),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', _('CSV')),
+        ('xlsx', _('Excel (XLSX)')),
+        ('columnar', _('Parquet (JSON Lines if pyarrow is unavailable)')),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    entities = models.JSONField(default=list)
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    row_counts = models.JSONField(default=dict, blank=True)
+    file_path = models.CharField(max_length=500, blank=True, default='')
+    file_name = models.CharField(max_length=255, blank=True, default='')
+    file_size = models.PositiveBigIntegerField(default=0)
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Refreshed with every progress write; a RUNNING job that stops updating is reclaimed.
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', 'updated_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Export {self.pk} for {self.user_id} ({self.status})"
+
+    @property
+    def progress_percentage(self):
+        if self.status == 'COMPLETED':
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(99, int(self.processed_rows * 100 / self.total_rows))
+
+
+class ImportJob(models.Model):
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('RUNNING', _('Running')),
+        ('COMPLETED', _('Completed')),
+        ('FAILED', _('Failed')),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='import_jobs')
+    account = models.ForeignKey(Account, on_delete=models.SET_NULL, null=True, blank=True, related_name='import_jobs')
+    currency = models.CharField(max_length=5, choices=CURRENCY_CHOICES, default='₹')
+    original_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # Data rows consumed so far; a resumed job skips this many rows.
+    offset = models.PositiveIntegerField(default=0)
+    total_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    duplicate_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    total_amount = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    error_message = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.pk} for {self.user_id} ({self.status})"
+
+    @property
+    def summary(self):
+        """Same shape as the synchronous upload summary, so the results template can render either."""
+        return {
+            'total_rows': self.total_rows,
+            'created_count': self.created_count,
+            'duplicate_count': self.duplicate_count,
+            'skipped_count': self.skipped_count,
+            'error_count': self.error_count,
+            'errors': self.errors,
+            'total_amount': float(self.total_amount),
+            'currency_symbol': self.currency,
+        }
+
+
+class BackgroundJob(models.Model):
+    """
+    A management command queued for ``run_worker`` (see ``expenses.job_queue``).
+    Singleton job types carry a ``dedupe_key`` while unfinished, so a second
+    enqueue of the same job returns the queued one instead of adding another.
+    A RUNNING job's worker refreshes ``heartbeat_at`` while the command runs.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', _('Pending')),
+        ('RUNNING', _('Running')),
+        ('COMPLETED', _('Completed')),
+        ('FAILED', _('Failed')),
+    ]
+    UNFINISHED_STATUSES = ('PENDING', 'RUNNING')
+
+    job_type = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True)
+    dedupe_key = models.CharField(max_length=100, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    output = models.TextField(blank=True, default='')
+    error_message = models.TextField(blank=True, default='')
+    duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['job_type', 'status']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status__in=['PENDING', 'RUNNING']) & ~models.Q(dedupe_key=''),
+                name='unique_unfinished_background_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} {self.pk} ({self.status})"
+
+
+class BackgroundJobLock(models.Model):
+    """One row per job type; claiming a job locks it so concurrency limits hold across workers."""
+    job_type = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.job_type
+
+
+class CategoryPredictionModel(models.Model):
+    """
+    Serialized per-user category classifier (see ``expenses.category_model``),
+    trained from the user's expense history and updated as expenses change.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='category_prediction_model')
+    data = models.JSONField(default=dict)
+    sample_count = models.PositiveIntegerField(default=0)
+    trained_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Category model for {self.user_id} ({self.sample_count} samples)"
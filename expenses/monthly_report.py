@@ -0,0 +1,154 @@
+"""
+Monthly report data computed for a chunk of users at a time: income, expense,
+category and account figures come from one GROUP BY user_id query each
+instead of several aggregates per user.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models import Q, Sum
+from django.utils.html import mark_safe
+from django.utils.translation import gettext as _
+
+from .models import Account, Expense, Income
+from .templatetags.digit_filters import compact_amount
+from .utils import get_exchange_rate
+
+TOP_CATEGORY_COUNT = 3
+
+
+def report_period(today):
+    """The previous full calendar month: (start_date, end_date, month_name)."""
+    end_date = today.replace(day=1) - timedelta(days=1)
+    return end_date.replace(day=1), end_date, end_date.strftime('%B %Y')
+
+
+class MonthlyReportService:
+    @classmethod
+    def recipients(cls, user_id=None):
+        """Active users with an email address, verified through allauth when it is installed."""
+        users = User.objects.filter(is_active=True, email__isnull=False).exclude(email='').exclude(username='demo')
+        try:
+            from allauth.account.models import EmailAddress
+            users = users.filter(id__in=EmailAddress.objects.filter(verified=True).values('user_id'))
+        except ImportError:
+            pass
+        if user_id:
+            users = users.filter(id=user_id)
+        return users
+
+    @classmethod
+    def iter_chunks(cls, users, chunk_size):
+        """Yields lists of ``chunk_size`` users (profile loaded) in primary key order."""
+        last_id = 0
+        while True:
+            chunk = list(users.filter(id__gt=last_id).select_related('profile').order_by('id')[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_id = chunk[-1].pk
+
+    @classmethod
+    def build(cls, users, start_date, end_date, today, rates=None):
+        """
+        {user_id: report} for ``users`` in four queries. Users without income
+        or expenses in the period get ``{'has_data': False}``. ``rates`` memoizes
+        exchange rates and may be shared across chunks.
+        """
+        rates = {} if rates is None else rates
+        currencies = {user.pk: cls.currency_for(user) for user in users}
+        user_ids = list(currencies)
+        in_month = Q(date__range=[start_date, end_date])
+        since_report = Q(date__gt=end_date, date__lte=today)
+
+        def totals(model):
+            rows = model.objects.filter(user_id__in=user_ids).filter(in_month | since_report).values('user_id').annotate(
+                month=Sum('base_amount', filter=in_month),
+                since=Sum('base_amount', filter=since_report),
+            ).order_by()
+            return {row['user_id']: (row['month'] or Decimal('0'), row['since'] or Decimal('0')) for row in rows}
+
+        incomes = totals(Income)
+        expenses = totals(Expense)
+
+        categories = {}
+        category_rows = (
+            Expense.objects.filter(in_month, user_id__in=user_ids)
+            .values('user_id', 'category').annotate(total=Sum('base_amount')).order_by('user_id', '-total')
+        )
+        for row in category_rows:
+            top = categories.setdefault(row['user_id'], [])
+            if len(top) < TOP_CATEGORY_COUNT:
+                top.append({'category': row['category'], 'total': row['total']})
+
+        net_worth = dict.fromkeys(user_ids, Decimal('0.00'))
+        for user_id, currency, balance in Account.objects.filter(user_id__in=user_ids).values_list('user_id', 'currency', 'balance'):
+            target = currencies[user_id]
+            if currency == target:
+                net_worth[user_id] += balance
+            else:
+                if (currency, target) not in rates:
+                    rates[currency, target] = get_exchange_rate(currency, target)
+                net_worth[user_id] += (balance * rates[currency, target]).quantize(Decimal('0.01'))
+
+        zero = (Decimal('0'), Decimal('0'))
+        return {
+            user_id: cls.report(
+                currencies[user_id], incomes.get(user_id, zero), expenses.get(user_id, zero),
+                categories.get(user_id, []), net_worth[user_id],
+            )
+            for user_id in user_ids
+        }
+
+    @classmethod
+    def report(cls, currency_symbol, income, expense, top_categories, current_nw):
+        """``income`` and ``expense`` are (report month, since the report month) totals."""
+        total_income, income_since_report = income
+        total_expense, expense_since_report = expense
+        if total_income == 0 and total_expense == 0:
+            return {'has_data': False}
+
+        savings = total_income - total_expense
+        savings_rate = round((savings / total_income * 100), 1) if total_income > 0 else 0
+
+        # Net worth at the end of the report month, reconstructed from today's balances.
+        nw_at_end = current_nw - (income_since_report - expense_since_report)
+        nw_at_start = nw_at_end - (total_income - total_expense)
+
+        nw_change = nw_at_end - nw_at_start
+        nw_change_pct = round((nw_change / nw_at_start * 100), 1) if nw_at_start > 0 else 0
+
+        # AI Insight (Highlighted context)
+        ai_insight = None
+        if top_categories:
+            top_cat = top_categories[0]
+            top_pct = round(float(top_cat['total']) / float(total_expense) * 100) if total_expense > 0 else 0
+            potential = float(top_cat['total']) * 0.15 # Suggest 15% saving
+
+            ai_insight = _("You spent <b>{pct}%</b> of your total budget on <b>{cat}</b>. Reducing this by 15% next month could save you <b>{sym}{savings}</b>!").format(
+                cat=top_cat['category'],
+                pct=top_pct,
+                sym=currency_symbol,
+                savings=compact_amount(potential, currency_symbol)
+            )
+
+        return {
+            'has_data': True,
+            'income': total_income,
+            'expense': total_expense,
+            'savings': savings,
+            'savings_rate': savings_rate,
+            'top_categories': top_categories,
+            'nw_at_end': nw_at_end,
+            'nw_change': nw_change,
+            'nw_change_pct': nw_change_pct,
+            'ai_insight': mark_safe(ai_insight) if ai_insight else None
+        }
+
+    @staticmethod
+    def currency_for(user):
+        try:
+            return user.profile.currency
+        except User.profile.RelatedObjectDoesNotExist:
+            return '₹'
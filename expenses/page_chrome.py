@@ -0,0 +1,106 @@
+"""
+Data shown on every authenticated page (navbar notifications, sidebar accounts
+and badges, web-push state). The sidebar is computed in a handful of queries
+and cached per user under the data epoch. Notifications and web-push state are
+written outside the data epoch (by the worker too), so they are read on every
+request instead.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .data_epoch import DataEpochService
+from .models import Account, Loan, Notification, RecurringTransaction, SavingsGoal
+
+NOTIFICATION_LIMIT = 9
+SIDEBAR_ACCOUNT_LIMIT = 5
+UPCOMING_DAYS = 7
+
+
+def _count(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(user=OuterRef('pk')).order_by().values('user').annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+class PageChromeService:
+    # date_joined guards against a reused primary key picking up a deleted user's entry.
+    DATA_KEY = 'page-chrome:{user_id}:{joined}:{epoch}:{day}'
+
+    @classmethod
+    def get(cls, user):
+        today = timezone.localdate()
+        key = cls.DATA_KEY.format(
+            user_id=user.pk,
+            joined=int(user.date_joined.timestamp() * 1_000_000),
+            epoch=DataEpochService.get(user.pk),
+            day=today.isoformat(),
+        )
+        data = cache.get(key)
+        if data is None:
+            data = cls.build(user, today)
+            cache.set(key, data, settings.PAGE_CHROME_CACHE_SECONDS)
+        return {**data, **cls.live(user)}
+
+    @classmethod
+    def live(cls, user):
+        from webpush.models import PushInformation
+
+        notifications = list(
+            Notification.objects.filter(user=user, is_read=False)
+            .order_by('-created_at')
+            .values('pk', 'title', 'message', 'notification_type', 'link', 'is_read', 'created_at')[:NOTIFICATION_LIMIT]
+        )
+        return {
+            'notifications': notifications,
+            'has_unread_notifications': bool(notifications),
+            # Matches the navbar dropdown, which lists at most NOTIFICATION_LIMIT.
+            'unread_notifications_count': len(notifications),
+            'is_webpush_subscribed': PushInformation.objects.filter(user=user).exists(),
+        }
+
+    @classmethod
+    def build(cls, user, today):
+        counts = User.objects.filter(pk=user.pk).annotate(
+            account_count=_count(Account.objects.filter(is_active=True)),
+            goal_count=_count(SavingsGoal.objects.filter(is_completed=False)),
+            loan_count=_count(Loan.objects.filter(is_active=True)),
+            recurring_count=_count(RecurringTransaction.objects.filter(is_active=True)),
+        ).values('account_count', 'goal_count', 'loan_count', 'recurring_count').get()
+
+        accounts = []
+        if counts['account_count']:
+            accounts = list(
+                Account.objects.filter(user=user, is_active=True)
+                .order_by('name')
+                .values('pk', 'name', 'account_type', 'currency')[:SIDEBAR_ACCOUNT_LIMIT]
+            )
+
+        # next_due_date is computed in Python, so only the fields it reads are loaded.
+        upcoming = 0
+        if counts['recurring_count']:
+            next_week = today + timedelta(days=UPCOMING_DAYS)
+            recurring = RecurringTransaction.objects.filter(user=user, is_active=True).only(
+                'start_date', 'last_processed_date', 'frequency',
+            )
+            upcoming = sum(1 for rt in recurring if today <= rt.next_due_date <= next_week)
+
+        return {
+            'sidebar_accounts': accounts,
+            'sidebar_accounts_count': counts['account_count'],
+            'has_more_accounts': counts['account_count'] > SIDEBAR_ACCOUNT_LIMIT,
+            'active_goals_count': counts['goal_count'],
+            'upcoming_subscriptions_count': upcoming,
+            # Subscriptions are the primary scheduled events shown on the calendar.
+            'calendar_this_week_count': upcoming,
+            'active_loans_count': counts['loan_count'],
+        }
@@ -0,0 +1,151 @@
+import base64
+import json
+from datetime import date
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class Cursor:
+    """Position in a (date, type, pk) ordered feed plus the direction to read from it."""
+
+    NEXT = "n"
+    PREVIOUS = "p"
+
+    def __init__(self, date_value, row_type, pk, direction=NEXT, number=1):
+        self.date = date_value
+        self.type = row_type
+        self.pk = pk
+        self.direction = direction
+        self.number = number
+
+    @property
+    def is_forward(self):
+        return self.direction == self.NEXT
+
+    def encode(self):
+        payload = json.dumps(
+            {"d": self.date.isoformat(), "t": self.type, "pk": self.pk, "dir": self.direction, "n": self.number},
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            direction = payload.get("dir", cls.NEXT)
+            if direction not in (cls.NEXT, cls.PREVIOUS):
+                raise InvalidCursor("Unknown cursor direction.")
+            return cls(
+                date.fromisoformat(payload["d"]),
+                str(payload["t"]),
+                int(payload["pk"]),
+                direction,
+                max(int(payload.get("n", 1)), 1),
+            )
+        except (TypeError, KeyError, ValueError, UnicodeDecodeError) as exc:
+            raise InvalidCursor("Malformed pagination cursor.") from exc
+
+
+class KeysetPage:
+    """Quacks like a Django ``Page`` for templates, but links by cursor instead of offset."""
+
+    def __init__(self, object_list, number, has_next, has_previous, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class UnionKeysetPaginator:
+    """
+    Cursor pagination over several querysets that are presented as one feed
+    ordered by ``(date, type, pk)`` descending.
+
+    Each branch is a ``.values()`` queryset of a single row type. Instead of
+    sorting a UNION and skipping OFFSET rows, every branch is seeked past the
+    cursor on its own ``(user, date)`` index and limited to ``per_page + 1``
+    rows; the handful of candidates are merged in Python. Page N therefore
+    costs the same as page 1.
+    """
+
+    def __init__(self, branches, per_page, pk_field="pk"):
+        self.branches = branches
+        self.per_page = per_page
+        self.pk_field = pk_field
+
+    def _seek(self, row_type, cursor):
+        """Filter keeping rows strictly after ``cursor`` in the requested direction."""
+        if cursor.is_forward:
+            same_date = Q(date=cursor.date, **{f"{self.pk_field}__lt": cursor.pk})
+            if row_type < cursor.type:
+                return Q(date__lte=cursor.date)
+            if row_type == cursor.type:
+                return Q(date__lt=cursor.date) | same_date
+            return Q(date__lt=cursor.date)
+
+        same_date = Q(date=cursor.date, **{f"{self.pk_field}__gt": cursor.pk})
+        if row_type > cursor.type:
+            return Q(date__gte=cursor.date)
+        if row_type == cursor.type:
+            return Q(date__gt=cursor.date) | same_date
+        return Q(date__gt=cursor.date)
+
+    def _key(self, row):
+        return (row["date"], row["type"], row[self.pk_field])
+
+    def page(self, cursor=None):
+        forward = cursor is None or cursor.is_forward
+        ordering = ("-date", f"-{self.pk_field}") if forward else ("date", self.pk_field)
+        limit = self.per_page + 1
+
+        rows = []
+        for row_type, queryset in self.branches.items():
+            if cursor is not None:
+                queryset = queryset.filter(self._seek(row_type, cursor))
+            rows.extend(queryset.order_by(*ordering)[:limit])
+
+        rows.sort(key=self._key, reverse=forward)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if cursor is None:
+            number, has_next, has_previous = 1, has_more, False
+        elif forward:
+            number, has_next, has_previous = cursor.number, has_more, True
+        else:
+            number, has_next, has_previous = (cursor.number if has_more else 1), True, has_more
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            last = rows[-1]
+            next_cursor = Cursor(last["date"], last["type"], last[self.pk_field], Cursor.NEXT, number + 1).encode()
+        if rows and has_previous:
+            first = rows[0]
+            previous_cursor = Cursor(first["date"], first["type"], first[self.pk_field], Cursor.PREVIOUS, max(number - 1, 1)).encode()
+
+        return KeysetPage(rows, number, has_next, has_previous, next_cursor, previous_cursor)
@@ -6,89 +6,168 @@ from django.utils import timezone
 
 from finance_tracker.ai_utils import predict_category_ai
 
+AMOUNT_RE = re.compile(r'(?:₹|\$|€|£|¥)?\s*(\d+(?:\.\d+)?)\s*(k|K)?\b')
+# Checked in order; the value is the offset in days from today.
+DATE_KEYWORDS = [
+    (re.compile(r'\byesterday\b', re.IGNORECASE), 1),
+    (re.compile(r'\btoday\b', re.IGNORECASE), 0),
+]
+WHITESPACE_RE = re.compile(r'\s+')
+MAX_BATCH_LINES = 200
 
-def parse_expense_nl(text, user_categories=None, user_accounts=None, user=None):
-    if not text:
+
+class ExpenseTextParser:
+    """
+    Parses quick-entry text such as ``"lunch 450 yesterday hdfc"`` into an
+    expense draft. The account and category matchers are built once per
+    parser, so one instance can parse many lines for the same user.
+    """
+
+    def __init__(self, user_categories=None, user_accounts=None, user=None, today=None):
+        self.user = user
+        self.user_categories = list(user_categories or [])
+        self._category_names = [(cat, cat.lower()) for cat in self.user_categories]
+        self.user_accounts = list(user_accounts or [])
+        self.today = today or timezone.localdate()
+        self._account_patterns = [
+            re.compile(rf'\b{re.escape(acc)}\b', re.IGNORECASE) for acc in self.user_accounts
+        ]
+        self._account_re = None
+        if self.user_accounts:
+            # One scan finds every mentioned account and the earliest listed one wins. The
+            # lookahead reports a match at every position, so "Cash" inside "My Cash" is still seen.
+            self._account_re = re.compile(
+                r'(?=(' + r'|'.join(rf'\b{re.escape(acc)}\b' for acc in self.user_accounts) + r'))',
+                re.IGNORECASE,
+            )
+            self._account_index = {}
+            for index, acc in enumerate(self.user_accounts):
+                self._account_index.setdefault(acc.lower(), index)
+
+    def _match_account(self, text):
+        if self._account_re is None:
+            return None, text
+        indexes = [
+            self._account_index.get(match.group(1).lower())
+            for match in self._account_re.finditer(text)
+        ]
+        indexes = [index for index in indexes if index is not None]
+        if not indexes:
+            return None, text
+        index = min(indexes)
+        return self.user_accounts[index], self._account_patterns[index].sub('', text).strip()
+
+    def _match_category(self, description):
+        desc_lower = description.lower()
+        for cat, cat_lower in self._category_names:
+            if cat_lower in desc_lower:
+                return cat
         return None
 
-    now = timezone.localdate()
-    date = now
-    amount = None
-    category = "Other"
-    account = None
-    is_clue_found = False
-
-    amount_pattern = r'(?:₹|\$|€|£|¥)?\s*(\d+(?:\.\d+)?)\s*(k|K)?\b'
-    amount_match = re.search(amount_pattern, text)
-    
-    text_for_others = text
-    if amount_match:
-        try:
-            val_str = amount_match.group(1)
-            val = float(val_str)
-            suffix = amount_match.group(2)
-            if suffix and suffix.lower() == 'k':
-                val *= 1000
-            amount = Decimal(str(val)).quantize(Decimal('0.01'))
-            is_clue_found = True
-            text_for_others = text[:amount_match.start()] + " " + text[amount_match.end():]
-        except (ValueError, ArithmeticError):
-            pass
-
-    text_for_others = text_for_others.strip()
-
-    date_keywords = {
-        'yesterday': now - timedelta(days=1),
-        'today': now,
-    }
-    
-    for kw, dt in date_keywords.items():
-        if re.search(rf'\b{kw}\b', text_for_others, re.IGNORECASE):
-            date = dt
-            text_for_others = re.sub(rf'\b{kw}\b', '', text_for_others, flags=re.IGNORECASE).strip()
-            is_clue_found = True
-            break
-            
-    # Extract account
-    if user_accounts:
-        for acc in user_accounts:
-            if re.search(rf'\b{re.escape(acc)}\b', text_for_others, re.IGNORECASE):
-                account = acc
-                text_for_others = re.sub(rf'\b{re.escape(acc)}\b', '', text_for_others, flags=re.IGNORECASE).strip()
+    def parse(self, text, skip_genai=False):
+        if not text:
+            return None
+
+        date = self.today
+        amount = None
+        category = "Other"
+        is_clue_found = False
+
+        amount_match = AMOUNT_RE.search(text)
+        text_for_others = text
+        if amount_match:
+            try:
+                val = float(amount_match.group(1))
+                suffix = amount_match.group(2)
+                if suffix and suffix.lower() == 'k':
+                    val *= 1000
+                amount = Decimal(str(val)).quantize(Decimal('0.01'))
                 is_clue_found = True
-                break
+                text_for_others = text[:amount_match.start()] + " " + text[amount_match.end():]
+            except (ValueError, ArithmeticError):
+                pass
 
-    description = re.sub(r'\s+', ' ', text_for_others).strip()
-    
-    category_found = False
-    # 0. Check User Categories First (Explicit Match)
-    if user_categories:
-        desc_lower = description.lower()
-        for cat in user_categories:
-            if cat.lower() in desc_lower:
-                category = cat
-                category_found = True
+        text_for_others = text_for_others.strip()
+
+        for pattern, days_ago in DATE_KEYWORDS:
+            if pattern.search(text_for_others):
+                date = self.today - timedelta(days=days_ago)
+                text_for_others = pattern.sub('', text_for_others).strip()
                 is_clue_found = True
                 break
 
-    # 1. Use AI Prediction for Category (if not found in user_categories)
-    if not category_found:
-        predicted_category = predict_category_ai(description, user=user, categories=user_categories)
-        if predicted_category:
-            category = predicted_category
+        # Extract account
+        account, text_for_others = self._match_account(text_for_others)
+        if account:
             is_clue_found = True
 
-    if not description:
-        description = "Expense"
-    else:
-        description = description[0].upper() + description[1:]
-
-    return {
-        'amount': str(amount) if amount else None,
-        'category': category,
-        'description': description,
-        'account': account,
-        'date': date.isoformat(),
-        'success': amount is not None,
-        'is_clue_found': is_clue_found
-    }
+        description = WHITESPACE_RE.sub(' ', text_for_others).strip()
+
+        # 0. Check User Categories First (Explicit Match)
+        matched = self._match_category(description)
+        if matched:
+            category = matched
+            is_clue_found = True
+        else:
+            # 1. Use AI Prediction for Category (if not found in user_categories)
+            predicted_category = predict_category_ai(
+                description, user=self.user, categories=self.user_categories or None, skip_genai=skip_genai,
+            )
+            if predicted_category:
+                category = predicted_category
+                is_clue_found = True
+
+        if not description:
+            description = "Expense"
+        else:
+            description = description[0].upper() + description[1:]
+
+        return {
+            'amount': str(amount) if amount else None,
+            'category': category,
+            'description': description,
+            'account': account,
+            'date': date.isoformat(),
+            'success': amount is not None,
+            'is_clue_found': is_clue_found
+        }
+
+    def parse_lines(self, lines):
+        """
+        Parses each non-blank line into a draft (with its 1-based ``line``
+        number). Descriptions no rule or history could categorize are sent to
+        the generative backend together, in one batch.
+        """
+        from finance_tracker.categorizers import categorize_descriptions
+
+        drafts = []
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            draft = self.parse(line, skip_genai=True)
+            draft['line'] = number
+            drafts.append(draft)
+            if len(drafts) >= MAX_BATCH_LINES:
+                break
+
+        pending = [draft for draft in drafts if draft['category'] == "Other" and draft['description'] != "Expense"]
+        if pending:
+            answers = categorize_descriptions(
+                [draft['description'] for draft in pending], self.user_categories or None,
+            )
+            for draft in pending:
+                if answers.get(draft['description']):
+                    draft['category'] = answers[draft['description']]
+                    draft['is_clue_found'] = True
+        return drafts
+
+
+def parse_expense_nl(text, user_categories=None, user_accounts=None, user=None):
+    return ExpenseTextParser(user_categories, user_accounts, user).parse(text)
+
+
+def parse_expense_lines(text, user_categories=None, user_accounts=None, user=None):
+    """``text`` is either a block of newline-separated entries or a list of lines."""
+    lines = text.splitlines() if isinstance(text, str) else list(text or [])
+    return ExpenseTextParser(user_categories, user_accounts, user).parse_lines(lines)
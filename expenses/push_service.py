@@ -0,0 +1,160 @@
+"""
+Web-push delivery for batches of users. Subscriptions for a batch are resolved
+in one query, pushes go out through a bounded thread pool with per-request
+timeouts, transient failures are retried and subscriptions the push service
+reports as gone (404/410) are deleted.
+"""
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+import requests
+from django.conf import settings
+from pywebpush import WebPushException, webpush
+from webpush.models import PushInformation, SubscriptionInfo
+
+logger = logging.getLogger(__name__)
+
+PushMessage = namedtuple('PushMessage', ['user_id', 'payload', 'ttl'], defaults=(0,))
+
+GONE_STATUSES = {404, 410}
+
+_sessions = threading.local()
+
+
+class PushResult:
+    def __init__(self):
+        self.delivered = 0
+        self.failed = 0
+        self.pruned = 0
+        # User ids with at least one delivered push, and those without any subscription.
+        self.users_sent = set()
+        self.users_without_subscription = set()
+
+    def __repr__(self):
+        return (
+            f"PushResult(delivered={self.delivered}, failed={self.failed}, pruned={self.pruned}, "
+            f"users_sent={len(self.users_sent)}, users_without_subscription={len(self.users_without_subscription)})"
+        )
+
+
+class PushDeliveryError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def transient(self):
+        return self.status_code is None or self.status_code == 429 or self.status_code >= 500
+
+    @property
+    def gone(self):
+        return self.status_code in GONE_STATUSES
+
+
+def _session():
+    # requests.Session keeps connections to the push service alive; one per thread.
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+
+def webpush_sender(subscription_info, data, ttl, timeout):
+    """Sends one push with pywebpush, signing with the VAPID key when one is configured."""
+    webpush_settings = getattr(settings, 'WEBPUSH_SETTINGS', {})
+    vapid = {}
+    if webpush_settings.get('VAPID_PRIVATE_KEY'):
+        vapid = {
+            'vapid_private_key': webpush_settings['VAPID_PRIVATE_KEY'],
+            'vapid_claims': {'sub': f"mailto:{webpush_settings.get('VAPID_ADMIN_EMAIL')}"},
+        }
+    try:
+        webpush(
+            subscription_info=subscription_info, data=data, ttl=ttl, timeout=timeout,
+            requests_session=_session(), **vapid,
+        )
+    except WebPushException as exc:
+        status = exc.response.status_code if exc.response is not None else None
+        raise PushDeliveryError(str(exc), status_code=status) from exc
+    except requests.RequestException as exc:
+        raise PushDeliveryError(str(exc)) from exc
+
+
+class PushDeliveryService:
+    @classmethod
+    def subscriptions_for(cls, user_ids):
+        """{user_id: [(subscription_id, subscription_info), ...]} in one query."""
+        subscriptions = {}
+        rows = PushInformation.objects.filter(user_id__in=user_ids).values_list(
+            'user_id', 'subscription_id', 'subscription__endpoint', 'subscription__p256dh', 'subscription__auth',
+        )
+        for user_id, subscription_id, endpoint, p256dh, auth in rows:
+            info = {'endpoint': endpoint, 'keys': {'p256dh': p256dh, 'auth': auth}}
+            subscriptions.setdefault(user_id, []).append((subscription_id, info))
+        return subscriptions
+
+    @classmethod
+    def send(cls, messages, sender=None, result=None):
+        """
+        Delivers ``PushMessage``s, PUSH_BATCH_SIZE users at a time, and returns
+        a ``PushResult`` (pass ``result`` to accumulate across calls).
+        """
+        sender = sender or webpush_sender
+        result = result or PushResult()
+        messages = iter(messages)
+        batch_size = max(1, settings.PUSH_BATCH_SIZE)
+        with ThreadPoolExecutor(max_workers=max(1, settings.PUSH_WORKERS)) as pool:
+            while batch := list(islice(messages, batch_size)):
+                cls._send_batch(pool, batch, sender, result)
+        return result
+
+    @classmethod
+    def _send_batch(cls, pool, messages, sender, result):
+        subscriptions = cls.subscriptions_for({message.user_id for message in messages})
+        jobs = []
+        for message in messages:
+            user_subscriptions = subscriptions.get(message.user_id)
+            if not user_subscriptions:
+                result.users_without_subscription.add(message.user_id)
+                continue
+            data = json.dumps(message.payload)
+            for subscription_id, info in user_subscriptions:
+                jobs.append((message.user_id, subscription_id, pool.submit(cls._deliver, sender, info, data, message.ttl)))
+
+        gone = set()
+        for user_id, subscription_id, future in jobs:
+            outcome = future.result()
+            if outcome == 'delivered':
+                result.delivered += 1
+                result.users_sent.add(user_id)
+            elif outcome == 'gone':
+                gone.add(subscription_id)
+            else:
+                result.failed += 1
+        if gone:
+            # Cascades to PushInformation, whose delete signal refreshes the page chrome.
+            SubscriptionInfo.objects.filter(pk__in=gone).delete()
+            result.pruned += len(gone)
+
+    @classmethod
+    def _deliver(cls, sender, info, data, ttl):
+        attempts = max(0, settings.PUSH_RETRIES) + 1
+        for attempt in range(attempts):
+            try:
+                sender(info, data, ttl, settings.PUSH_TIMEOUT_SECONDS)
+                return 'delivered'
+            except PushDeliveryError as exc:
+                if exc.gone:
+                    return 'gone'
+                if not exc.transient or attempt == attempts - 1:
+                    logger.warning('Push to %s failed: %s', info['endpoint'], exc)
+                    return 'failed'
+            except Exception:
+                logger.exception('Push to %s failed.', info['endpoint'])
+                return 'failed'
+            time.sleep(settings.PUSH_RETRY_BACKOFF_SECONDS * (2 ** attempt))
+        return 'failed'
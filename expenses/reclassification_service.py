@@ -0,0 +1,91 @@
+"""
+Bulk reclassification of expenses. Rows are changed with one UPDATE, and the
+work ``Expense.save`` would do per row happens once per batch: the feed
+projection and the category model are updated in bulk, amounts move between
+expense ledger accounts with one batch of reclassification entries, and the
+data epoch is bumped once.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .data_epoch import DataEpochService
+from .models import (
+    Expense,
+    TransactionFeedItem,
+    _build_ledger_version,
+    _expense_ledger_snapshot,
+    _record_category_change,
+    _run_ledger_shadow,
+)
+
+
+class ExpenseReclassificationService:
+    @staticmethod
+    def reclassify(user, expense_ids, category=None, payment_method=None):
+        """
+        Sets ``category`` and/or ``payment_method`` on ``user``'s expenses
+        among ``expense_ids`` and returns how many were updated.
+        """
+        values = {}
+        if category:
+            # Expense.save strips categories; a bulk update must store the same value.
+            values['category'] = category = category.strip()
+        if payment_method:
+            values['payment_method'] = payment_method
+        if not values:
+            return 0
+
+        with transaction.atomic():
+            expenses = list(
+                Expense.objects.select_for_update(of=('self',)).filter(user=user, pk__in=expense_ids).order_by('pk')
+            )
+            if not expenses:
+                return 0
+
+            now = timezone.now()
+            changes = []
+            for expense in expenses:
+                if category and expense.category != category:
+                    changes.append((expense, expense.category))
+                for field, value in values.items():
+                    setattr(expense, field, value)
+                # Later edits and deletes take their ledger version from updated_at.
+                expense.updated_at = now
+            Expense.objects.filter(pk__in=[expense.pk for expense in expenses]).update(updated_at=now, **values)
+
+            if changes:
+                changed_ids = [expense.pk for expense, _previous in changes]
+                TransactionFeedItem.objects.filter(
+                    user=user, item_type='EXPENSE', source_id__in=changed_ids,
+                ).update(category=category)
+                _record_category_change(
+                    user,
+                    added=[(expense.description, category) for expense, _previous in changes],
+                    removed=[(expense.description, previous) for expense, previous in changes],
+                )
+
+                version_token = _build_ledger_version(expenses[0], 'RECLASSIFY')
+
+                def _post_shadow_entries():
+                    from .ledger_service import LedgerPostingService
+
+                    LedgerPostingService.shadow_post_expense_reclassifications(
+                        user=user, changes=changes, version_token=version_token,
+                    )
+
+                _run_ledger_shadow(
+                    _post_shadow_entries,
+                    failures=[
+                        ('EXPENSE', expense.pk, 'RECLASSIFY', {
+                            'handler': 'expense_reclassify',
+                            'version_token': version_token,
+                            'expense': _expense_ledger_snapshot(expense),
+                            'previous_category': previous,
+                        })
+                        for expense, previous in changes
+                    ],
+                )
+
+            # Queryset updates send no save signals.
+            DataEpochService.bump(user)
+        return len(expenses)
@@ -0,0 +1,121 @@
+import logging
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import TransactionFeedItem
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "expenses_transactionfeeditem_fts"
+DEFAULT_COLUMNS = ("description", "category")
+
+# item_type -> (source model lookups for the fallback, matching feed columns)
+SEARCH_FIELDS = {
+    "EXPENSE": (("description", "category"), ("description", "category")),
+    "INCOME": (("description", "source"), ("description", "category")),
+    "TRANSFER": (("description",), ("description",)),
+    "LOAN": (("loan__name",), ("category",)),
+    "GOAL": (("goal__name",), ("category",)),
+}
+
+
+class IcontainsSearchBackend:
+    """
+    ``icontains`` over the source model's own fields. Used when the feed is not
+    backfilled yet, or when the database has no full-text support.
+    """
+
+    def filter(self, queryset, query, item_type, fields=None, columns=None, user=None):
+        if not query:
+            return queryset
+        fields = fields or SEARCH_FIELDS[item_type][0]
+        if queryset.model is TransactionFeedItem:
+            fields = columns or SEARCH_FIELDS[item_type][1]
+        return queryset.filter(reduce(or_, [Q(**{f"{field}__icontains": query}) for field in fields]))
+
+
+class FeedIndexSearchBackend(IcontainsSearchBackend):
+    """
+    Matches against the ``TransactionFeedItem`` projection and narrows the source
+    queryset with ``pk__in (SELECT source_id ...)``, so every view shares one index.
+    """
+
+    def match(self, query, columns):
+        return reduce(or_, [Q(**{f"{column}__icontains": query}) for column in columns])
+
+    def filter(self, queryset, query, item_type, fields=None, columns=None, user=None):
+        if not query:
+            return queryset
+        columns = columns or SEARCH_FIELDS[item_type][1]
+        if queryset.model is TransactionFeedItem:
+            return queryset.filter(self.match(query, columns))
+        matches = TransactionFeedItem.objects.filter(item_type=item_type)
+        if user is not None:
+            matches = matches.filter(user=user)
+        return queryset.filter(pk__in=matches.filter(self.match(query, columns)).values("source_id"))
+
+
+class SQLiteFTS5SearchBackend(FeedIndexSearchBackend):
+    """FTS5 with the trigram tokenizer, which gives case-insensitive substring matches like ``icontains``."""
+
+    MIN_QUERY_LENGTH = 3
+
+    def match(self, query, columns):
+        # Trigrams cannot match fewer than three characters.
+        if len(query) < self.MIN_QUERY_LENGTH:
+            return super().match(query, columns)
+        phrase = '"' + query.replace('"', '""') + '"'
+        expression = '{' + ' '.join(columns) + '} : ' + phrase
+        return Q(id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression]))
+
+
+class PostgresSearchBackend(FeedIndexSearchBackend):
+    """
+    ``ILIKE`` served by ``pg_trgm`` GIN indexes for substrings, plus a ``tsvector``
+    GIN index for whole-word matches across description and category. Where the
+    migration could not create ``pg_trgm``, the ``ILIKE`` half runs unindexed.
+    """
+
+    TSVECTOR_SQL = "to_tsvector('simple', coalesce(description, '') || ' ' || coalesce(category, ''))"
+
+    def match(self, query, columns):
+        condition = super().match(query, columns)
+        if set(columns) >= set(DEFAULT_COLUMNS):
+            condition |= Q(RawSQL(
+                f"{self.TSVECTOR_SQL} @@ websearch_to_tsquery('simple', %s)",
+                [query],
+                output_field=BooleanField(),
+            ))
+        return condition
+
+
+_fts_available = None
+
+
+def _sqlite_fts_available():
+    global _fts_available
+    if _fts_available is None:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                _fts_available = cursor.fetchone() is not None
+        except Exception:
+            logger.exception("Could not inspect the SQLite search index.")
+            _fts_available = False
+    return _fts_available
+
+
+def get_search_backend():
+    # The index is built over the feed, so it is only trusted once feed reads are on.
+    if not getattr(settings, "TRANSACTION_FEED_READ_ENABLED", False):
+        return IcontainsSearchBackend()
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend()
+    if connection.vendor == "sqlite" and _sqlite_fts_available():
+        return SQLiteFTS5SearchBackend()
+    return FeedIndexSearchBackend()
@@ -154,29 +154,6 @@ class FinancialService:
             'total_months': len(history)
         }
 
-    @staticmethod
-    def get_cumulative_net_worth_history(user, current_net_worth, months=6):
-        """
-        Returns a list of cumulative net worth values for the last N months.
-        Uses a 'burn-back' approach from the current net worth.
-        """
-        history = FinancialService.get_monthly_history(user, months)
-        # Reverse to burn back from newest to oldest
-        history.reverse()
-        
-        cumulative_history = []
-        running_nw = float(current_net_worth)
-        
-        # history[0] is the current month
-        for i, m in enumerate(history):
-            cumulative_history.append(running_nw)
-            # To get previous month's value, subtract current month's savings
-            running_nw -= m['savings']
-            
-        # Reverse back so it's oldest to newest
-        cumulative_history.reverse()
-        return cumulative_history
-
 class LoanService:
     @staticmethod
     def calculate_emi(principal, annual_rate, months):
@@ -1,10 +1,27 @@
 import logging
 
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import Category, UserProfile
+from .data_epoch import DataEpochService
+from .models import (
+    Account,
+    Category,
+    Expense,
+    GoalContribution,
+    Income,
+    Loan,
+    LoanInterestRate,
+    LoanRepayment,
+    RecurringTransaction,
+    SavingsGoal,
+    TransactionFeedItem,
+    Transfer,
+    UserProfile,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -54,3 +71,139 @@ def handle_user_post_save(sender, instance, created, **kwargs):
         else:
             UserProfile.objects.get_or_create(user=instance)
 
+
+def _feed_enabled():
+    return getattr(settings, 'TRANSACTION_FEED_ENABLED', True)
+
+
+def _name_may_have_changed(update_fields):
+    return update_fields is None or 'name' in update_fields
+
+
+def _done_by_bulk_delete(sender):
+    """TransactionWriter.delete_expenses removes feed rows and category history for the whole batch itself."""
+    from .transaction_writer import TransactionWriter
+
+    return sender is Expense and TransactionWriter.deleting_expenses_in_bulk()
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Transfer)
+@receiver(post_delete, sender=LoanRepayment)
+@receiver(post_delete, sender=GoalContribution)
+def remove_feed_item(sender, instance, **kwargs):
+    """Runs for cascaded deletes too, which bypass the models' delete()."""
+    if not _feed_enabled() or _done_by_bulk_delete(sender):
+        return
+    from .feed_service import TransactionFeedService
+
+    TransactionFeedService.remove(instance)
+
+
+@receiver(post_save, sender=Account)
+@receiver(post_delete, sender=Account)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Income)
+@receiver(post_delete, sender=Income)
+@receiver(post_save, sender=Transfer)
+@receiver(post_delete, sender=Transfer)
+@receiver(post_save, sender=RecurringTransaction)
+@receiver(post_delete, sender=RecurringTransaction)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=SavingsGoal)
+@receiver(post_save, sender=Loan)
+@receiver(post_delete, sender=Loan)
+def bump_data_epoch(sender, instance, **kwargs):
+    """Queryset .update() and bulk_create() send no signals; their callers bump the epoch themselves."""
+    DataEpochService.bump(instance.user_id)
+
+
+_EPOCH_PARENTS = {
+    GoalContribution: ('goal', SavingsGoal),
+    LoanRepayment: ('loan', Loan),
+    LoanInterestRate: ('loan', Loan),
+}
+
+
+@receiver(post_save, sender=GoalContribution)
+@receiver(post_delete, sender=GoalContribution)
+@receiver(post_save, sender=LoanRepayment)
+@receiver(post_delete, sender=LoanRepayment)
+@receiver(post_save, sender=LoanInterestRate)
+@receiver(post_delete, sender=LoanInterestRate)
+def bump_data_epoch_for_child(sender, instance, **kwargs):
+    name, parent_model = _EPOCH_PARENTS[sender]
+    field = sender._meta.get_field(name)
+    if field.is_cached(instance):
+        user_id = getattr(instance, name).user_id
+    else:
+        # Cascaded deletes arrive without the parent loaded. A missing parent was
+        # deleted in the same operation and bumped the epoch itself.
+        user_id = parent_model.objects.filter(pk=getattr(instance, field.attname)).values_list('user_id', flat=True).first()
+    DataEpochService.bump(user_id)
+
+
+@receiver(post_delete, sender=Expense)
+def forget_expense_category(sender, instance, **kwargs):
+    if _done_by_bulk_delete(sender):
+        return
+    from .models import _record_category_change
+
+    _record_category_change(instance.user_id, removed=[(instance.description, instance.category)])
+
+
+@receiver(post_save, sender=Account)
+def refresh_feed_account_labels(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _feed_enabled() or not _name_may_have_changed(update_fields):
+        return
+    name = instance.name
+    stale = TransactionFeedItem.objects.filter(
+        (Q(account=instance) & ~Q(item_type='TRANSFER') & ~Q(account_label=name))
+        | (Q(item_type='TRANSFER', account=instance) & ~Q(account_label__startswith=f"{name} → "))
+        | (Q(item_type='TRANSFER', counter_account=instance) & ~Q(account_label__endswith=f" → {name}"))
+    )
+    if stale.exists():
+        from .feed_service import TransactionFeedService
+
+        TransactionFeedService.refresh_for_account(instance)
+
+
+@receiver(pre_delete, sender=Account)
+def remember_feed_items_for_account(sender, instance, **kwargs):
+    if _feed_enabled():
+        instance._feed_sources = list(
+            TransactionFeedItem.objects.filter(Q(account=instance) | Q(counter_account=instance))
+            .values_list('item_type', 'source_id')
+        )
+
+
+@receiver(post_delete, sender=Account)
+def refresh_feed_after_account_delete(sender, instance, **kwargs):
+    """Rows that survive the delete (SET_NULL) lose their account label."""
+    sources = getattr(instance, '_feed_sources', None)
+    if not sources:
+        return
+    from .feed_service import TransactionFeedService
+
+    by_type = {}
+    for item_type, source_id in sources:
+        by_type.setdefault(item_type, []).append(source_id)
+    for item_type, source_ids in by_type.items():
+        TransactionFeedService.resync(item_type, TransactionFeedService.source_queryset(item_type).filter(pk__in=source_ids))
+
+
+@receiver(post_save, sender=Loan)
+@receiver(post_save, sender=SavingsGoal)
+def refresh_feed_parent_labels(sender, instance, created, update_fields=None, **kwargs):
+    if created or not _feed_enabled() or not _name_may_have_changed(update_fields):
+        return
+    item_type = 'LOAN' if sender is Loan else 'GOAL'
+    stale = TransactionFeedItem.objects.filter(item_type=item_type, parent_id=instance.pk).exclude(category=instance.name)
+    if stale.exists():
+        from .feed_service import TransactionFeedService
+
+        TransactionFeedService.refresh_for_parent(instance)
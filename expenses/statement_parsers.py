@@ -0,0 +1,358 @@
+"""
+Streaming parsers for bank statement formats. Each parser reads a binary file
+handle incrementally and yields ``StatementTransaction`` records with typed
+dates, signed Decimal amounts and, where the format has one, the bank's own
+transaction id.
+"""
+import codecs
+import os
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from xml.etree.ElementTree import iterparse
+
+# amount is signed: negative for money leaving the account.
+StatementTransaction = namedtuple(
+    'StatementTransaction', ['date', 'amount', 'description', 'bank_id', 'category', 'currency'],
+    defaults=(None, None),
+)
+
+READ_SIZE = 64 * 1024
+
+STATEMENT_EXTENSIONS = {
+    '.ofx': 'ofx',
+    '.qfx': 'ofx',
+    '.qif': 'qif',
+    '.xml': 'camt',
+    '.camt': 'camt',
+    '.053': 'camt',
+    '.sta': 'mt940',
+    '.mt940': 'mt940',
+    '.940': 'mt940',
+}
+
+
+class StatementParseError(ValueError):
+    pass
+
+
+def _record(builder, *args):
+    """
+    A malformed record is yielded as its ``StatementParseError`` rather than
+    raised, so one bad entry does not end the generator for the rest of the file.
+    """
+    try:
+        return builder(*args)
+    except StatementParseError as exc:
+        return exc
+
+
+def detect_format(name):
+    return STATEMENT_EXTENSIONS.get(os.path.splitext(name or '')[1].lower())
+
+
+def _text_lines(handle, encoding='utf-8'):
+    """Decodes ``handle`` chunk by chunk and yields lines without their endings."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    pending = ''
+    while True:
+        data = handle.read(READ_SIZE)
+        pending += decoder.decode(data, final=not data)
+        lines = pending.splitlines(keepends=True)
+        # An unterminated last line may continue in the next read.
+        if data and lines and not lines[-1].endswith(('\n', '\r')):
+            pending = lines.pop()
+        else:
+            pending = ''
+        for line in lines:
+            yield line.rstrip('\r\n')
+        if not data:
+            return
+
+
+def _decimal(value):
+    """Parses ``-1,234.56`` as well as decimal-comma amounts like ``-12,50``."""
+    value = (value or '').strip().replace(' ', '')
+    whole, _sep, fraction = value.rpartition(',')
+    if _sep and '.' not in value and len(fraction) <= 2 and ',' not in whole:
+        value = f"{whole}.{fraction}"
+    try:
+        return Decimal(value.replace(',', ''))
+    except InvalidOperation as exc:
+        raise StatementParseError(f"Invalid amount: {value}") from exc
+
+
+# --- OFX / QFX -------------------------------------------------------------
+
+_OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def _ofx_date(value):
+    # YYYYMMDD[HHMMSS[.XXX]][[-5:EST]]; only the date part matters here.
+    try:
+        return datetime.strptime(value.strip()[:8], '%Y%m%d').date()
+    except ValueError as exc:
+        raise StatementParseError(f"Invalid OFX date: {value}") from exc
+
+
+def parse_ofx(handle):
+    """
+    Handles both SGML (OFX 1.x, unclosed leaf tags) and XML (OFX 2.x) bodies by
+    scanning tags as the file is read; only one transaction is held at a time.
+    """
+    currency = None
+    current = None
+    buffer = ''
+    decoder = codecs.getincrementaldecoder('latin-1')()
+    while True:
+        data = handle.read(READ_SIZE)
+        buffer += decoder.decode(data, final=not data)
+        # Keep a trailing partial tag for the next read.
+        cut = buffer.rfind('<') if data else len(buffer)
+        scan, buffer = buffer[:cut], buffer[cut:]
+        for closing, tag, text in _OFX_TAG.findall(scan):
+            tag = tag.upper()
+            text = text.strip()
+            if tag == 'CURDEF' and not closing:
+                currency = text
+            elif tag == 'STMTTRN':
+                if closing and current is not None:
+                    yield _record(_ofx_transaction, current, currency)
+                    current = None
+                elif not closing:
+                    current = {}
+            elif current is not None and not closing and text:
+                current[tag] = text
+        if not data:
+            if current:
+                yield _record(_ofx_transaction, current, currency)
+            return
+
+
+def _ofx_transaction(fields, currency):
+    if 'DTPOSTED' not in fields or 'TRNAMT' not in fields:
+        raise StatementParseError("OFX transaction without DTPOSTED/TRNAMT")
+    name = fields.get('NAME') or fields.get('PAYEE') or ''
+    memo = fields.get('MEMO') or ''
+    description = name if not memo or memo == name else (f"{name} - {memo}" if name else memo)
+    return StatementTransaction(
+        date=_ofx_date(fields['DTPOSTED']),
+        amount=_decimal(fields['TRNAMT']),
+        description=description.strip(),
+        bank_id=fields.get('FITID'),
+        currency=fields.get('CURRENCY') or currency,
+    )
+
+
+# --- QIF ---------------------------------------------------------------------
+
+QIF_DATE_FORMATS = ['%m/%d/%Y', '%m/%d/%y', "%m/%d'%Y", "%m/%d'%y", '%d/%m/%Y', '%Y-%m-%d', '%d.%m.%Y']
+
+
+def _qif_date(value):
+    value = value.strip().replace(' ', '')
+    # Quicken writes years after 2000 as 1/2'05.
+    if "'" in value:
+        month_day, year = value.split("'", 1)
+        try:
+            value = f"{month_day}/{2000 + int(year) if len(year) <= 2 else year}"
+        except ValueError as exc:
+            raise StatementParseError(f"Invalid QIF date: {value}") from exc
+    for fmt in QIF_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise StatementParseError(f"Invalid QIF date: {value}")
+
+
+def parse_qif(handle):
+    """
+    QIF carries no transaction id (``N`` is a free-form check number), so these
+    records fall back to the importer's usual duplicate check.
+    """
+    fields = {}
+    for line in _text_lines(handle, 'latin-1'):
+        if not line or line.startswith('!'):
+            continue
+        code, value = line[0], line[1:].strip()
+        if code == '^':
+            if fields:
+                yield _record(_qif_transaction, fields)
+            fields = {}
+        elif code in 'DTUPML' and code not in fields:
+            fields[code] = value
+    if fields:
+        yield _record(_qif_transaction, fields)
+
+
+def _qif_transaction(fields):
+    if 'D' not in fields or not (fields.get('T') or fields.get('U')):
+        raise StatementParseError("QIF transaction without date or amount")
+    payee = fields.get('P', '')
+    memo = fields.get('M', '')
+    category = fields.get('L') or None
+    if category and category.startswith('['):
+        # [Account] is a transfer, not a category.
+        category = None
+    return StatementTransaction(
+        date=_qif_date(fields['D']),
+        amount=_decimal(fields.get('T') or fields['U']),
+        description=(payee or memo).strip(),
+        bank_id=None,
+        category=category.split(':')[0].strip() if category else None,
+    )
+
+
+# --- CAMT.053 (ISO 20022) ------------------------------------------------------
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _find(element, *path):
+    """First descendant matching the namespace-agnostic ``path``."""
+    nodes = [element]
+    for name in path:
+        nodes = [child for node in nodes for child in node if _local(child.tag) == name]
+        if not nodes:
+            return None
+    return nodes[0]
+
+
+def _find_text(element, *path):
+    node = _find(element, *path)
+    return node.text.strip() if node is not None and node.text else None
+
+
+def parse_camt053(handle):
+    """``iterparse`` over ``Ntry`` elements, clearing each one once it has been read."""
+    for _event, element in iterparse(handle, events=('end',)):
+        if _local(element.tag) != 'Ntry':
+            continue
+        yield _record(_camt_transaction, element)
+        element.clear()
+
+
+def _camt_transaction(element):
+    amount_node = _find(element, 'Amt')
+    if amount_node is None or not amount_node.text:
+        raise StatementParseError("CAMT entry without Amt")
+    amount = _decimal(amount_node.text)
+    if _find_text(element, 'CdtDbtInd') == 'DBIT':
+        amount = -amount
+
+    booked = _find_text(element, 'BookgDt', 'Dt') or (_find_text(element, 'BookgDt', 'DtTm') or '')[:10]
+    booked = booked or _find_text(element, 'ValDt', 'Dt')
+    try:
+        booking_date = date.fromisoformat(booked)
+    except (TypeError, ValueError) as exc:
+        raise StatementParseError(f"Invalid CAMT booking date: {booked}") from exc
+
+    description = (
+        _find_text(element, 'NtryDtls', 'TxDtls', 'RmtInf', 'Ustrd')
+        or _find_text(element, 'AddtlNtryInf')
+        or _find_text(element, 'NtryDtls', 'TxDtls', 'RltdPties', 'Cdtr', 'Nm')
+        or ''
+    )
+    # Only the servicer's reference identifies an entry; NtryRef and EndToEndId
+    # are set by the account owner or counterparty and repeat across entries.
+    bank_id = (
+        _find_text(element, 'AcctSvcrRef')
+        or _find_text(element, 'NtryDtls', 'TxDtls', 'Refs', 'AcctSvcrRef')
+    )
+    if bank_id == 'NOTPROVIDED':
+        bank_id = None
+    return StatementTransaction(
+        date=booking_date,
+        amount=amount,
+        description=description,
+        bank_id=bank_id,
+        currency=amount_node.get('Ccy'),
+    )
+
+
+# --- MT940 (SWIFT) -------------------------------------------------------------
+
+# :61:YYMMDD[MMDD](C|D|RC|RD)[funds code]amount(N|F|S)XXX reference[//bank reference]
+_MT940_LINE = re.compile(
+    r'^(?P<value_date>\d{6})(?P<entry_date>\d{4})?(?P<mark>RC|RD|C|D)[A-Z]?'
+    r'(?P<amount>\d+,\d*)[NFS][A-Z0-9]{3}(?P<reference>[^/\n]*)(?://(?P<bank_reference>[^\n]*))?'
+)
+
+
+def parse_mt940(handle):
+    currency = None
+    pending = None
+    details = []
+    tag = None
+
+    def flush():
+        if pending is None or isinstance(pending, StatementParseError):
+            return pending
+        description = ' '.join(part.strip() for part in details if part.strip())
+        return pending._replace(description=description or pending.description, currency=currency)
+
+    for line in _text_lines(handle, 'latin-1'):
+        if line.startswith(':') and line.count(':') >= 2:
+            tag, _sep, value = line[1:].partition(':')
+            if tag == '61':
+                transaction = flush()
+                if transaction is not None:
+                    yield transaction
+                pending = _record(_mt940_transaction, value)
+                details = []
+            elif tag in ('60F', '60M') and len(value) >= 10:
+                currency = value[7:10]
+            elif tag == '86' and pending is not None:
+                details = [value]
+            elif tag.startswith('62'):
+                transaction = flush()
+                if transaction is not None:
+                    yield transaction
+                pending = None
+                details = []
+        elif line.startswith('-'):
+            continue
+        elif tag == '86' and pending is not None:
+            details.append(line)
+    transaction = flush()
+    if transaction is not None:
+        yield transaction
+
+
+def _mt940_transaction(value):
+    match = _MT940_LINE.match(value)
+    if not match:
+        raise StatementParseError(f"Invalid MT940 statement line: {value}")
+    try:
+        value_date = datetime.strptime(match['value_date'], '%y%m%d').date()
+    except ValueError as exc:
+        raise StatementParseError(f"Invalid MT940 date: {match['value_date']}") from exc
+    amount = Decimal(match['amount'].replace(',', '.').rstrip('.') or '0')
+    if match['mark'] in ('D', 'RC'):
+        amount = -amount
+    reference = (match['reference'] or '').strip()
+    bank_reference = (match['bank_reference'] or '').strip()
+    if reference == 'NONREF':
+        reference = ''
+    return StatementTransaction(
+        date=value_date,
+        amount=amount,
+        description=reference,
+        # The owner's reference is free text; only the bank's is unique.
+        bank_id=bank_reference or None,
+    )
+
+
+PARSERS = {
+    'ofx': parse_ofx,
+    'qif': parse_qif,
+    'camt': parse_camt053,
+    'mt940': parse_mt940,
+}
+
+
+def parse_statement(handle, statement_format):
+    return PARSERS[statement_format](handle)
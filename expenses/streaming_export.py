@@ -0,0 +1,106 @@
+import csv
+import zipfile
+
+from django.db.models import Q
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the value back, so ``csv.writer`` can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+class _ZipBuffer:
+    """
+    Unseekable sink for ``zipfile``. Compressed bytes accumulate here only until
+    the generator driving the archive drains them with ``take()``.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_keyset(queryset, fields, ordering=("-date", "-pk"), chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields ``values_list(*fields)`` tuples in ``ordering`` one chunk at a time.
+    Each chunk seeks past the last row seen instead of using OFFSET, and only
+    ``chunk_size`` rows are held in memory. ``ordering`` must end in a unique key.
+    """
+    keys = [name.lstrip("-") for name in ordering]
+    selected = list(fields) + [key for key in keys if key not in fields]
+    positions = [selected.index(key) for key in keys]
+    queryset = queryset.order_by(*ordering).values_list(*selected)
+
+    last = None
+    while True:
+        chunk_qs = queryset
+        if last is not None:
+            chunk_qs = chunk_qs.filter(_after(ordering, last))
+        rows = list(chunk_qs[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row[: len(fields)]
+        if len(rows) < chunk_size:
+            return
+        last = [rows[-1][position] for position in positions]
+
+
+def _after(ordering, values):
+    """Lexicographic "strictly after" filter for a multi-column ordering."""
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values, strict=True):
+        field = name.lstrip("-")
+        lookup = "lt" if name.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{field}__{lookup}": value})
+        equal &= Q(**{field: value})
+    return condition
+
+
+def csv_chunks(header, rows):
+    """Yields CSV-encoded lines for a header row followed by ``rows``."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def zip_stream(files):
+    """
+    Builds a ZIP archive on the fly from ``(filename, iterable of str)`` pairs
+    and yields the compressed bytes as they are produced.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for filename, chunks in files:
+            with archive.open(filename, "w", force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk.encode("utf-8"))
+                    data = buffer.take()
+                    if data:
+                        yield data
+            data = buffer.take()
+            if data:
+                yield data
+    yield buffer.take()
@@ -0,0 +1,49 @@
+import io
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from finance_tracker.ai_utils import (
+    build_keyword_index,
+    match_user_category,
+    predict_category_ai,
+    predict_category_rule_based,
+)
+
+
+class RuleBasedCategoryTest(SimpleTestCase):
+    def test_keywords_match_whole_words_only(self):
+        self.assertEqual(predict_category_rule_based("Ola ride to airport"), "Transport")
+        # "ola" inside "chocolate" and "rd" inside "card" used to match as substrings.
+        self.assertIsNone(predict_category_rule_based("Chocolate"))
+        self.assertIsNone(predict_category_rule_based("Card payment 1234"))
+
+    def test_plurals_and_phrases(self):
+        self.assertEqual(predict_category_rule_based("Two movies"), "Entertainment")
+        self.assertEqual(predict_category_rule_based("Mutual  Funds top-up"), "Investment")
+        self.assertIsNone(predict_category_rule_based("Mutual agreement"))
+
+    def test_first_listed_category_wins(self):
+        # "taxi" is listed under Transport and Cab; "dinner" belongs to Dining Out, listed before Transport.
+        self.assertEqual(predict_category_rule_based("Taxi"), "Transport")
+        self.assertEqual(predict_category_rule_based("taxi home after dinner"), "Dining Out")
+
+    def test_custom_index(self):
+        index = build_keyword_index({"Pets": ["vet", "dog food"], "Food": ["food"]})
+        self.assertEqual(predict_category_rule_based("Dog food", index=index), "Pets")
+        self.assertEqual(predict_category_rule_based("food court", index=index), "Food")
+
+    def test_rule_category_is_mapped_onto_user_categories(self):
+        categories = ["Bills", "Food & Dining", "Travel"]
+        self.assertEqual(match_user_category(tuple(categories), "Dining Out"), "Food & Dining")
+        self.assertIsNone(match_user_category(tuple(categories), "Health"))
+        self.assertEqual(predict_category_ai("Pizza night", categories=categories, skip_genai=True), "Food & Dining")
+        self.assertEqual(predict_category_ai("Yoga class", categories=categories, skip_genai=True), "Health")
+
+
+class BenchmarkCategorizerCommandTest(SimpleTestCase):
+    def test_reports_throughput(self):
+        out = io.StringIO()
+        call_command("benchmark_categorizer", "--count", "200", "--compare", stdout=out)
+        self.assertIn("compiled: 200 descriptions", out.getvalue())
+        self.assertIn("legacy: 200 descriptions", out.getvalue())
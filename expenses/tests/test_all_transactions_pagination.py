@@ -0,0 +1,97 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from expenses.models import Expense, Income
+from expenses.pagination import Cursor, InvalidCursor
+
+
+class AllTransactionsKeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="feed", password="pass")
+        self.client.force_login(self.user)
+        self.start = date(2024, 3, 1)
+        # Several rows share each date so ties are broken by type and pk.
+        for i in range(30):
+            Expense.objects.create(
+                user=self.user, date=self.start + timedelta(days=i // 3),
+                amount=Decimal("10.00") + i, description=f"Expense {i}", category="Food",
+            )
+        for i in range(12):
+            Income.objects.create(
+                user=self.user, date=self.start + timedelta(days=i),
+                amount=Decimal("100.00") + i, source="Salary", description=f"Income {i}",
+            )
+        self.url = reverse("all-transactions")
+        self.params = {"year": "2024", "month": "3"}
+
+    def _keys(self, response):
+        return [(row["date"], row["type"], row["pk"]) for row in response.context["transactions"]]
+
+    def test_walks_every_row_once_in_order(self):
+        seen = []
+        params = dict(self.params)
+        pages = 0
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            pages += 1
+            self.assertEqual(response.context["page_obj"].number, pages)
+            seen.extend(self._keys(response))
+            page = response.context["page_obj"]
+            if not page.has_next():
+                break
+            params = dict(self.params, cursor=page.next_cursor)
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(len(seen), 42)
+        self.assertEqual(len(set(seen)), 42)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_previous_cursor_returns_the_same_page(self):
+        first = self.client.get(self.url, self.params)
+        second = self.client.get(self.url, dict(self.params, cursor=first.context["page_obj"].next_cursor))
+        back = self.client.get(self.url, dict(self.params, cursor=second.context["page_obj"].previous_cursor))
+
+        self.assertEqual(self._keys(back), self._keys(first))
+        self.assertFalse(back.context["page_obj"].has_previous())
+        self.assertEqual(back.context["page_obj"].number, 1)
+
+    def test_type_filter_and_links_keep_query(self):
+        response = self.client.get(self.url, dict(self.params, type="INCOME"))
+        self.assertEqual({row["type"] for row in response.context["transactions"]}, {"INCOME"})
+        self.assertFalse(response.context["page_obj"].has_next())
+
+        response = self.client.get(self.url, self.params)
+        self.assertNotIn("cursor", response.context["pagination_query"])
+        self.assertContains(response, "cursor=" + response.context["page_obj"].next_cursor)
+
+    def test_cursor_pages_reuse_cached_totals(self):
+        first = self.client.get(self.url, self.params)
+        self.assertEqual(first.context["filtered_count"], 42)
+        self.assertFalse(first.context["totals_are_approximate"])
+
+        second = self.client.get(self.url, dict(self.params, cursor=first.context["page_obj"].next_cursor))
+        self.assertEqual(second.context["filtered_count"], 42)
+        self.assertTrue(second.context["totals_are_approximate"])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        first = self.client.get(self.url, self.params)
+        response = self.client.get(self.url, dict(self.params, cursor="not-a-cursor"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._keys(response), self._keys(first))
+
+    def test_cursor_round_trip(self):
+        cursor = Cursor(date(2024, 3, 5), "EXPENSE", 7, Cursor.PREVIOUS, 3)
+        decoded = Cursor.decode(cursor.encode())
+        self.assertEqual(
+            (decoded.date, decoded.type, decoded.pk, decoded.direction, decoded.number),
+            (date(2024, 3, 5), "EXPENSE", 7, Cursor.PREVIOUS, 3),
+        )
+        with self.assertRaises(InvalidCursor):
+            Cursor.decode("e30")
@@ -0,0 +1,195 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from expenses.balance_history_service import AccountBalanceHistoryService, shift_months
+from expenses.models import Account, Expense, Income, Transfer
+
+
+class AccountBalanceHistoryServiceTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="history", password="pass")
+        self.account = Account.objects.create(
+            user=self.user,
+            name="Bank",
+            account_type="BANK",
+            balance=Decimal("1000.00"),
+            currency="₹",
+        )
+        self.today = date.today()
+        self.month_start = self.today.replace(day=1)
+
+    def _expense(self, when, amount, **kwargs):
+        return Expense.objects.create(
+            user=self.user,
+            date=when,
+            amount=Decimal(amount),
+            description=kwargs.pop("description", f"Spend {amount}"),
+            category="Food",
+            account=self.account,
+            currency=kwargs.pop("currency", "₹"),
+            **kwargs,
+        )
+
+    def test_monthly_series_walks_back_from_current_balance(self):
+        two_months_ago = shift_months(self.month_start, -2)
+        last_month = shift_months(self.month_start, -1)
+        self._expense(two_months_ago, "100.00")
+        Income.objects.create(
+            user=self.user, date=last_month, amount=Decimal("500.00"),
+            source="Salary", account=self.account, currency="₹",
+        )
+        self._expense(self.month_start, "50.00")
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("1350.00"))
+
+        series = AccountBalanceHistoryService.get_account_series(
+            self.account, resolution="monthly", start=shift_months(self.month_start, -3)
+        )
+
+        self.assertEqual([p["period"] for p in series], [shift_months(self.month_start, -i) for i in range(3, -1, -1)])
+        self.assertEqual(
+            [p["balance"] for p in series],
+            [Decimal("1000.00"), Decimal("900.00"), Decimal("1400.00"), Decimal("1350.00")],
+        )
+
+    def test_daily_series_includes_transfers_both_ways(self):
+        savings = Account.objects.create(
+            user=self.user, name="Savings", account_type="BANK", balance=Decimal("0.00"), currency="₹",
+        )
+        Transfer.objects.create(
+            user=self.user, from_account=self.account, to_account=savings,
+            amount=Decimal("200.00"), date=self.today - timedelta(days=2),
+        )
+        Transfer.objects.create(
+            user=self.user, from_account=savings, to_account=self.account,
+            amount=Decimal("50.00"), date=self.today - timedelta(days=1),
+        )
+        self.account.refresh_from_db()
+
+        series = AccountBalanceHistoryService.get_account_series(
+            self.account, resolution="daily", start=self.today - timedelta(days=3)
+        )
+
+        self.assertEqual(
+            [p["balance"] for p in series],
+            [Decimal("1000.00"), Decimal("800.00"), Decimal("850.00"), Decimal("850.00")],
+        )
+
+    def test_foreign_currency_movements_are_converted_once_per_pair(self):
+        with patch("expenses.models.get_exchange_rate", return_value=Decimal("80.0")), \
+                patch("expenses.transaction_writer.get_exchange_rate", return_value=Decimal("80.0")), \
+                patch("expenses.ledger_service.get_exchange_rate", return_value=Decimal("80.0")):
+            self._expense(self.today - timedelta(days=1), "10.00", currency="$")
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("200.00"))
+
+        with patch("expenses.balance_history_service.get_exchange_rate", return_value=Decimal("80.0")) as rate, \
+                patch("expenses.ledger_read_service.get_exchange_rate", return_value=Decimal("80.0")):
+            series = AccountBalanceHistoryService.get_account_series(
+                self.account, resolution="daily", start=self.today - timedelta(days=2)
+            )
+
+        rate.assert_called_once_with("$", "₹")
+        self.assertEqual([p["balance"] for p in series], [Decimal("1000.00"), Decimal("200.00"), Decimal("200.00")])
+
+    def test_series_is_cached_until_account_changes(self):
+        self._expense(self.today, "10.00")
+        self.account.refresh_from_db()
+        AccountBalanceHistoryService.get_account_series(self.account, resolution="daily")
+
+        # Only the data epoch is read.
+        with self.assertNumQueries(1):
+            AccountBalanceHistoryService.get_account_series(self.account, resolution="daily")
+
+        self._expense(self.today, "15.00")
+        self.account.refresh_from_db()
+        series = AccountBalanceHistoryService.get_account_series(self.account, resolution="daily")
+        self.assertEqual(series[-1]["balance"], Decimal("975.00"))
+        self.assertEqual(series[-2]["balance"], Decimal("1000.00"))
+
+    def test_moving_an_expense_to_another_day_refreshes_the_series(self):
+        # A fresh user: setUp's writes leave an epoch bump pending that TestCase never commits.
+        user = User.objects.create_user(username="mover", password="pass")
+        start = self.today - timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            account = Account.objects.create(user=user, name="Bank", balance=Decimal("1000.00"), currency="₹")
+        with self.captureOnCommitCallbacks(execute=True):
+            expense = Expense.objects.create(
+                user=user, date=self.today - timedelta(days=1), amount=Decimal("100.00"), description="Rent",
+                category="Home", account=account, currency="₹",
+            )
+        account.refresh_from_db()
+        series = AccountBalanceHistoryService.get_account_series(account, resolution="daily", start=start)
+        self.assertEqual([p["balance"] for p in series], [Decimal("1000.00"), Decimal("1000.00"), Decimal("900.00"), Decimal("900.00")])
+
+        # Same account and amount: the balance nets to zero and updated_at is untouched.
+        expense.date = start
+        with self.captureOnCommitCallbacks(execute=True):
+            expense.save()
+        account.refresh_from_db()
+        series = AccountBalanceHistoryService.get_account_series(account, resolution="daily", start=start)
+        self.assertEqual([p["balance"] for p in series], [Decimal("900.00")] * 4)
+
+    def test_default_resolution_depends_on_history_length(self):
+        self.assertEqual(AccountBalanceHistoryService.get_default_resolution(self.account), "daily")
+        self._expense(self.today - timedelta(days=200), "10.00")
+        self.account.refresh_from_db()
+        self.assertEqual(AccountBalanceHistoryService.get_default_resolution(self.account), "monthly")
+
+    def test_net_worth_series_sums_accounts(self):
+        Account.objects.create(
+            user=self.user, name="Wallet", account_type="CASH", balance=Decimal("250.00"), currency="₹",
+        )
+        self._expense(shift_months(self.month_start, -1), "100.00")
+
+        series = AccountBalanceHistoryService.get_net_worth_series(
+            self.user, resolution="monthly", start=shift_months(self.month_start, -2)
+        )
+
+        self.assertEqual(
+            [p["balance"] for p in series],
+            [Decimal("1250.00"), Decimal("1150.00"), Decimal("1150.00")],
+        )
+
+
+class AccountBalanceHistoryViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="historyapi", password="pass")
+        self.client.force_login(self.user)
+        self.account = Account.objects.create(
+            user=self.user, name="Bank", account_type="BANK", balance=Decimal("100.00"), currency="₹",
+        )
+
+    def test_returns_requested_range(self):
+        today = date.today()
+        url = reverse("account-balance-history", args=[self.account.pk])
+        response = self.client.get(url, {
+            "resolution": "daily",
+            "start": (today - timedelta(days=6)).isoformat(),
+            "end": today.isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual(payload["resolution"], "daily")
+        self.assertEqual(len(payload["points"]), 7)
+        self.assertEqual(payload["points"][-1], {"period": today.isoformat(), "balance": "100.00"})
+
+    def test_rejects_invalid_resolution(self):
+        url = reverse("account-balance-history", args=[self.account.pk])
+        response = self.client.get(url, {"resolution": "hourly"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_account_is_not_found(self):
+        other = User.objects.create_user(username="other", password="pass")
+        account = Account.objects.create(user=other, name="Theirs", balance=Decimal("1.00"))
+        response = self.client.get(reverse("account-balance-history", args=[account.pk]))
+        self.assertEqual(response.status_code, 404)
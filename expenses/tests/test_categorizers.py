@@ -0,0 +1,117 @@
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from expenses.import_service import ExpenseImporter, batch_categorizer, iter_upload_rows
+from expenses.models import Category, Expense
+from expenses.tests.test_import_service import csv_upload
+from finance_tracker import categorizers
+from finance_tracker.ai_utils import predict_category_ai
+from finance_tracker.categorizers import (
+    CircuitBreaker,
+    GeminiCategorizerBackend,
+    StubCategorizerBackend,
+    categorize_descriptions,
+    parse_batch_response,
+)
+
+
+class CategorizerTestMixin:
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        categorizers._breakers.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(categorizers._breakers.clear)
+
+
+@override_settings(GENAI_BATCH_SIZE=2, GENAI_BREAKER_FAILURES=2, GENAI_BREAKER_COOLDOWN_SECONDS=60)
+class CategorizeDescriptionsTest(CategorizerTestMixin, SimpleTestCase):
+    def test_batches_and_caches_by_normalized_description(self):
+        backend = StubCategorizerBackend({"acme corp": "Office", "zeta": "Gifts"}, default="Other")
+        result = categorize_descriptions(["ACME  Corp", "acme corp", "Zeta", "Unknown shop"], ["Office", "Gifts"], backend)
+        self.assertEqual(result, {"ACME  Corp": "Office", "acme corp": "Office", "Zeta": "Gifts", "Unknown shop": "Shopping"})
+        self.assertEqual(backend.calls, [["acme corp", "zeta"], ["unknown shop"]])
+
+        categorize_descriptions(["Acme Corp", "zeta"], ["Gifts", "Office"], backend)
+        self.assertEqual(len(backend.calls), 2)
+        # A different category set is a different question.
+        categorize_descriptions(["Acme Corp"], ["Work"], backend)
+        self.assertEqual(len(backend.calls), 3)
+
+    def test_breaker_stops_calls_after_failures(self):
+        backend = StubCategorizerBackend(error=TimeoutError("deadline exceeded"))
+        with self.assertLogs("finance_tracker.categorizers", "WARNING"):
+            result = categorize_descriptions([f"shop {i}" for i in range(8)], None, backend)
+        self.assertEqual(result, {})
+        # Two failed batches open the circuit; the remaining two are not sent.
+        self.assertEqual(len(backend.calls), 2)
+
+    def test_no_backend_without_api_key(self):
+        with override_settings(GEMINI_API_KEY="", GENAI_CATEGORIZER_BACKEND="gemini"):
+            self.assertIsNone(categorizers.get_categorizer_backend())
+            self.assertEqual(categorize_descriptions(["anything"]), {})
+        with override_settings(GENAI_CATEGORIZER_BACKEND="stub"):
+            self.assertIsInstance(categorizers.get_categorizer_backend(), StubCategorizerBackend)
+
+
+class CircuitBreakerTest(SimpleTestCase):
+    def test_half_open_after_cooldown(self):
+        now = [0.0]
+        breaker = CircuitBreaker(2, 30, clock=lambda: now[0])
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        now[0] = 31
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        now[0] = 62
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+
+class GeminiBackendTest(SimpleTestCase):
+    def test_one_prompt_per_batch_with_timeout(self):
+        backend = GeminiCategorizerBackend("key", timeout=3)
+        backend._model = MagicMock()
+        backend._model.generate_content.return_value.text = '```json\n["food", "Travel"]\n```'
+        result = backend.classify(["pizza hut", "irctc"], ("Food", "Travel"))
+        self.assertEqual(result, {"pizza hut": "Food", "irctc": "Travel"})
+        self.assertEqual(backend._model.generate_content.call_count, 1)
+        self.assertEqual(backend._model.generate_content.call_args.kwargs["request_options"], {"timeout": 3})
+
+    def test_numbered_fallback(self):
+        self.assertEqual(parse_batch_response('1. Food\n2) "Bills"', 3), ["Food", "Bills", None])
+
+
+@override_settings(GENAI_CATEGORIZER_BACKEND="stub", CATEGORY_MODEL_MIN_CONFIDENCE=0.99)
+class GenerativeFallbackIntegrationTest(CategorizerTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username="genai", password="pass")
+
+    def test_predict_category_ai_falls_back_to_backend(self):
+        backend = StubCategorizerBackend({"xyz widgets": "Bills"})
+        with patch("finance_tracker.categorizers.get_categorizer_backend", return_value=backend):
+            self.assertEqual(predict_category_ai("XYZ Widgets", categories=["Bills"]), "Bills")
+            self.assertIsNone(predict_category_ai("XYZ Widgets", categories=["Bills"], skip_genai=True))
+
+    def test_import_sends_one_batch_per_chunk(self):
+        Category.objects.create(user=self.user, name="Hardware")
+        backend = StubCategorizerBackend(default="Hardware")
+        rows = [["Date", "Description", "Amount"]] + [[f"2025-01-{i + 1:02d}", f"Vendor {i}", "5"] for i in range(6)]
+        with patch("finance_tracker.categorizers.get_categorizer_backend", return_value=backend):
+            importer = ExpenseImporter(
+                self.user, "₹", categorize=lambda desc: None, chunk_size=3,
+                batch_categorize=batch_categorizer(self.user),
+            )
+            summary = importer.run(iter_upload_rows(csv_upload(rows)))
+        self.assertEqual(summary["created_count"], 6)
+        self.assertEqual([len(batch) for batch in backend.calls], [3, 3])
+        self.assertEqual(set(Expense.objects.values_list("category", flat=True)), {"Hardware"})
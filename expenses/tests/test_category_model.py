@@ -0,0 +1,114 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from expenses.category_model import CategoryClassifier, CategoryModelService
+from expenses.models import Category, CategoryPredictionModel, Expense
+from finance_tracker.ai_utils import predict_category_ai
+
+
+def add_expense(user, description, category, day=1):
+    return Expense.objects.create(
+        user=user, date=date(2025, 1, day), amount=Decimal("10.00"), description=description, category=category,
+    )
+
+
+class CategoryClassifierTest(TestCase):
+    def test_tokens_beat_first_word_prefix(self):
+        history = [
+            ("Uber trip to office", "Transport"),
+            ("Uber trip home", "Transport"),
+            ("Uber airport ride", "Transport"),
+            ("Uber eats pizza", "Food"),
+            ("Swiggy burger", "Food"),
+        ]
+        classifier = CategoryClassifier(max_descriptions=100)
+        for description, category in history:
+            classifier.learn(description, category)
+
+        # Most "Uber..." rows are Transport, which is what first-word prefix matching returned.
+        category, confidence = classifier.predict("Uber eats burger")
+        self.assertEqual(category, "Food")
+        self.assertGreater(confidence, 0.5)
+        self.assertEqual(classifier.predict("uber  TRIP home"), ("Transport", 1.0))
+        self.assertEqual(classifier.predict("12345 unknown"), (None, 0.0))
+
+    def test_forget_and_round_trip(self):
+        classifier = CategoryClassifier(max_descriptions=100)
+        classifier.learn("Netflix", "Bills")
+        classifier.learn("Netflix", "Entertainment")
+        classifier.forget("Netflix", "Bills")
+        restored = CategoryClassifier(classifier.to_dict())
+        self.assertEqual(restored.predict("netflix"), ("Entertainment", 1.0))
+        self.assertEqual(restored.sample_count, 1)
+        self.assertNotIn("Bills", restored.tokens)
+
+    def test_exact_table_is_capped(self):
+        classifier = CategoryClassifier(max_descriptions=1)
+        classifier.learn("Rent March", "Housing")
+        classifier.learn("Rent April", "Housing")
+        self.assertEqual(list(classifier.exact), ["rent march"])
+        self.assertEqual(classifier.predict("Rent April")[0], "Housing")
+
+
+class CategoryModelServiceTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="modeluser", password="pass")
+        add_expense(self.user, "Blue Tokai coffee", "Cafe")
+        add_expense(self.user, "Third Wave coffee", "Cafe", day=2)
+
+    def _stored(self):
+        return CategoryModelService.load(User.objects.get(pk=self.user.pk))
+
+    def test_first_load_trains_then_reads_one_row(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(CategoryModelService.predict(user, "Coffee beans")[0], "Cafe")
+        self.assertEqual(CategoryPredictionModel.objects.get(user=self.user).sample_count, 2)
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            for description in ["coffee", "blue tokai coffee", "something else"]:
+                CategoryModelService.predict(user, description)
+
+    def test_saves_and_deletes_update_the_stored_model(self):
+        CategoryModelService.train(self.user)
+        expense = add_expense(self.user, "Corner bakery", "Snacks", day=3)
+        self.assertEqual(self._stored().predict("corner bakery")[0], "Snacks")
+
+        expense.category = "Groceries"
+        expense.save()
+        stored = self._stored()
+        self.assertEqual(stored.predict("corner bakery"), ("Groceries", 1.0))
+        self.assertNotIn("Snacks", stored.docs)
+
+        expense.delete()
+        self.assertEqual(self._stored().sample_count, 2)
+
+    def test_category_rename_and_bulk_edit(self):
+        CategoryModelService.train(self.user)
+        category = Category.objects.create(user=self.user, name="Cafe")
+        self.client.force_login(self.user)
+        self.client.post(reverse("category-edit", args=[category.pk]), {"name": "Coffee", "icon": ""})
+        self.assertEqual(self._stored().docs, {"Coffee": 2})
+
+        ids = list(Expense.objects.filter(user=self.user).values_list("pk", flat=True))
+        self.client.post(reverse("expense-bulk-edit"), {"expense_ids": ids, "bulk_category": "Treats"})
+        self.assertEqual(self._stored().docs, {"Treats": 2})
+
+    @override_settings(CATEGORY_MODEL_MIN_CONFIDENCE=0.6)
+    def test_predict_category_ai_uses_the_model(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(predict_category_ai("Blue Tokai coffee", user=user, skip_genai=True), "Cafe")
+        # Nothing learned about "taxi", so the keyword rules answer.
+        self.assertEqual(predict_category_ai("Taxi to station", user=user, skip_genai=True), "Transport")
+
+    def test_train_command(self):
+        out = io.StringIO()
+        call_command("train_category_models", stdout=out)
+        self.assertIn("Completed=1, Failed=0", out.getvalue())
+        self.assertEqual(CategoryPredictionModel.objects.get(user=self.user).sample_count, 2)
@@ -1,9 +1,14 @@
 from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
 
 from django.contrib.auth.models import User
 from django.core import mail
+from django.core.mail import get_connection
 from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from expenses.models import Notification, RecurringTransaction, UserProfile
@@ -96,3 +101,42 @@ class SendNotificationsCommandTest(TestCase):
         call_command('send_notifications')
         
         self.assertFalse(Notification.objects.filter(pk=n.pk).exists())
+
+    def _plus_user(self, username):
+        user = User.objects.create_user(username=username, password='password', email=f'{username}@example.com')
+        UserProfile.objects.filter(user=user).update(tier='PLUS', subscription_end_date=timezone.now() + timedelta(days=30))
+        RecurringTransaction.objects.create(
+            user=user, transaction_type='EXPENSE', amount=100, description='Rent', frequency='MONTHLY',
+            start_date=self.due_date, is_active=True,
+        )
+        return user
+
+    def test_chunks_share_bulk_writes_and_one_mail_connection(self):
+        for i in range(3):
+            self._plus_user(f'chunked{i}')
+        mail.outbox.clear()
+
+        with CaptureQueriesContext(connection) as small:
+            call_command('send_notifications', chunk_size=10, stdout=StringIO())
+        Notification.objects.all().delete()
+        for i in range(3, 9):
+            self._plus_user(f'chunked{i}')
+        mail.outbox.clear()
+
+        with patch('expenses.management.commands.send_notifications.get_connection', wraps=get_connection) as opened, \
+                CaptureQueriesContext(connection) as large:
+            call_command('send_notifications', chunk_size=10, stdout=StringIO())
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 9)
+        self.assertEqual(Notification.objects.count(), 10)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_small_chunks_cover_every_user(self):
+        for i in range(4):
+            self._plus_user(f'paged{i}')
+        mail.outbox.clear()
+        out = StringIO()
+        call_command('send_notifications', chunk_size=2, stdout=out)
+        self.assertEqual(Notification.objects.count(), 5)
+        self.assertEqual(len(mail.outbox), 4)
+        self.assertIn('Users=5, Notifications=5, Pushes=0, Emails=4', out.getvalue())
@@ -1,5 +1,6 @@
 from datetime import date
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import MagicMock, patch
 
 import requests
@@ -161,42 +162,82 @@ class CurrencyConversionTest(TestCase):
             # New base_amount should be 10.00
             self.assertEqual(expense.base_amount, Decimal('10.00'))
 
-class CurrencySettingsCollisionTest(TestCase):
+class CurrencySettingsRenormalizeTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(username='collisionuser', password='password')
         self.profile, _ = UserProfile.objects.get_or_create(user=self.user, defaults={'currency': '₹'})
         self.client = Client()
         self.client.login(username='collisionuser', password='password')
 
-    @patch('expenses.models.get_exchange_rate')
-    def test_currency_change_collision_handling(self, mock_get_rate):
-        """Verify that CurrencyUpdateView handles IntegrityError during re-normalization."""
-        from unittest.mock import patch
-
-        from django.db import IntegrityError
+    @patch('expenses.models.get_exchange_rate', return_value=Decimal('90'))
+    @patch('expenses.base_currency_service.get_exchange_rate')
+    def test_currency_change_renormalizes_in_background(self, mock_get_rate, _model_rate):
+        """The view queues a set-based job instead of re-saving every transaction."""
+        from django.core.management import call_command
         from django.urls import reverse
 
-        # Mock exchange rate to return something different
-        mock_get_rate.return_value = Decimal('80.0')
+        from expenses.models import (
+            Account,
+            BackgroundJob,
+            RecurringTransaction,
+            TransactionFeedItem,
+        )
 
-        # Create two expenses that WOULD collide if their fields were identical
-        # Case: User manually created two very similar transactions (maybe with different currencies or before constraints)
-        # We'll mock the save() method to raise IntegrityError for the second record
-        e1 = Expense.objects.create(
-            user=self.user, date='2024-01-01', amount=100, currency='₹', description='D', category='C'
+        mock_get_rate.side_effect = lambda from_curr, to_curr: {'₹': Decimal('0.012'), '€': Decimal('1.1')}[from_curr]
+        account = Account.objects.create(user=self.user, name='Bank', balance=Decimal('1000.00'), currency='₹')
+        rupees = Expense.objects.create(
+            user=self.user, date='2024-01-01', amount=100, currency='₹', description='D', category='C', account=account,
         )
-        e2 = Expense.objects.create(
-            user=self.user, date='2024-01-02', amount=100, currency='₹', description='D', category='C'
+        euros = Income.objects.create(user=self.user, date='2024-01-02', amount=Decimal('50'), currency='€', source='Gift')
+        dollars = RecurringTransaction.objects.create(
+            user=self.user, transaction_type='EXPENSE', amount=Decimal('9.99'), currency='$', description='Sub',
+            frequency='MONTHLY', start_date=date(2024, 1, 1),
         )
+        balance = Account.objects.get(pk=account.pk).balance
 
         with patch.object(Expense, 'save') as mock_save:
-            # First call succeeds, second raises IntegrityError
-            mock_save.side_effect = [None, IntegrityError("Duplicate")]
-            
-            url = reverse('currency-settings')
-            response = self.client.post(url, {'currency': '$'})
-            
-            self.assertEqual(response.status_code, 302)
-            # Verify that messages.warning was called (via checking response or similar)
-            # However, simpler check: did it crash? No.
-            self.assertEqual(mock_save.call_count, 2)
+            response = self.client.post(reverse('currency-settings'), {'currency': '$'})
+        self.assertEqual(response.status_code, 302)
+        mock_save.assert_not_called()
+        job = BackgroundJob.objects.get()
+        self.assertEqual((job.job_type, job.kwargs), ('renormalize_base_amounts', {'user_id': self.user.pk}))
+
+        call_command('run_worker', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'COMPLETED')
+        self.assertIn('Re-normalized 3 transactions', job.output)
+        # One rate lookup per foreign currency, not per row.
+        self.assertEqual(mock_get_rate.call_count, 2)
+        rupees.refresh_from_db()
+        euros.refresh_from_db()
+        dollars.refresh_from_db()
+        self.assertEqual((rupees.base_amount, rupees.exchange_rate), (Decimal('1.20'), Decimal('0.012')))
+        self.assertEqual((euros.base_amount, euros.exchange_rate), (Decimal('55.00'), Decimal('1.1')))
+        self.assertEqual((dollars.base_amount, dollars.exchange_rate), (Decimal('9.99'), Decimal('1')))
+        self.assertEqual(
+            TransactionFeedItem.objects.get(item_type='EXPENSE', source_id=rupees.pk).base_amount, Decimal('1.20'),
+        )
+        self.assertEqual(Account.objects.get(pk=account.pk).balance, balance)
+
+    @patch('expenses.models.get_exchange_rate', return_value=Decimal('0.5'))
+    @patch('expenses.base_currency_service.get_exchange_rate', return_value=Decimal('0.5'))
+    def test_renormalize_rounds_like_save(self, _service_rate, _model_rate):
+        """Half-cent results round half-even, as ``Decimal.quantize`` does in save()."""
+        from expenses.base_currency_service import BaseCurrencyService
+
+        expenses = [
+            Expense.objects.create(
+                user=self.user, date='2024-01-01', amount=amount, currency='€', description=f'E{amount}', category='C',
+            )
+            for amount in (Decimal('1.25'), Decimal('1.35'), Decimal('0.01'))
+        ]
+        self.profile.currency = '$'
+        self.profile.save()
+
+        self.assertEqual(BaseCurrencyService.renormalize(self.user), 3)
+        renormalized = [Expense.objects.get(pk=expense.pk).base_amount for expense in expenses]
+        for expense in expenses:
+            expense.save()
+        self.assertEqual(renormalized, [Expense.objects.get(pk=expense.pk).base_amount for expense in expenses])
+        self.assertEqual(renormalized, [Decimal('0.62'), Decimal('0.68'), Decimal('0.00')])
@@ -0,0 +1,115 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.test import TestCase
+from django.urls import reverse
+
+from expenses.data_epoch import DataEpochService, epoch_cached
+from expenses.models import Expense, Income, Loan, LoanInterestRate, UserProfile
+
+calls = []
+
+
+@epoch_cached(timeout=60)
+def expense_total(user, category):
+    calls.append(category)
+    return sum(Expense.objects.filter(user=user, category=category).values_list("amount", flat=True))
+
+
+class DataEpochTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        calls.clear()
+        self.user = User.objects.create_user(username="epoch", password="pass")
+
+    def _expense(self, **kwargs):
+        fields = {"user": self.user, "date": date(2025, 1, 5), "amount": Decimal("10.00"), "currency": "₹",
+                  "description": "Lunch", "category": "Food"}
+        fields.update(kwargs)
+        return Expense.objects.create(**fields)
+
+    def _stored_epoch(self):
+        return UserProfile.objects.get(user=self.user).data_epoch
+
+    def test_one_increment_per_transaction_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                self._expense()
+                self._expense(description="Dinner")
+                Income.objects.create(user=self.user, date=date(2025, 1, 5), amount=Decimal("5"), currency="₹", source="Gift")
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self._stored_epoch(), 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(DataEpochService.get(self.user), 1)
+
+    def test_rolled_back_writes_do_not_bump(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self._expense()
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self._stored_epoch(), 0)
+
+        # The discarded callback no longer blocks the next write's bump.
+        with self.captureOnCommitCallbacks(execute=True):
+            self._expense()
+        self.assertEqual(self._stored_epoch(), 1)
+
+    def test_bulk_update_and_child_rows_bump(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            expense = self._expense()
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("expense-bulk-edit"), {"expense_ids": [expense.pk], "bulk_category": "Bills"})
+        self.assertEqual(self._stored_epoch(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            loan = Loan.objects.create(user=self.user, name="Car", initial_principal=Decimal("1000.00"), duration_months=12)
+        # Child rows reach the owning user through their loan, loaded or not.
+        with self.captureOnCommitCallbacks(execute=True):
+            LoanInterestRate.objects.create(loan_id=loan.pk, interest_rate=Decimal("9"))
+        with self.captureOnCommitCallbacks(execute=True):
+            LoanInterestRate.objects.filter(loan=loan).delete()
+        self.assertEqual(self._stored_epoch(), 5)
+
+    def test_stale_profile_save_does_not_rewind(self):
+        profile = UserProfile.objects.get(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._expense()
+        profile.daily_reminder = False
+        profile.save()
+        profile.refresh_from_db()
+        self.assertEqual((profile.data_epoch, profile.daily_reminder), (1, False))
+
+    def test_epoch_cached_until_the_next_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._expense()
+        self.assertEqual(expense_total(self.user, "Food"), Decimal("10.00"))
+        self.assertEqual(expense_total(user=self.user.pk, category="Food"), Decimal("10.00"))
+        self.assertEqual(expense_total(self.user, "Bills"), 0)
+        self.assertEqual(calls, ["Food", "Bills"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self._expense(amount=Decimal("2.50"))
+        self.assertEqual(expense_total(self.user, "Food"), Decimal("12.50"))
+        self.assertEqual(calls, ["Food", "Bills", "Food"])
+
+    def test_bumps_from_another_process_are_seen(self):
+        self.assertEqual(expense_total(self.user, "Food"), 0)
+        # A worker process writes and bumps; its cache is not this process's cache.
+        Expense.objects.bulk_create([Expense(
+            user=self.user, date=date(2025, 1, 5), amount=Decimal("7.00"), currency="₹",
+            description="Import", category="Food", base_amount=Decimal("7.00"),
+        )])
+        UserProfile.objects.filter(user=self.user).update(data_epoch=F("data_epoch") + 1)
+
+        self.assertEqual(DataEpochService.get(self.user), 1)
+        self.assertEqual(expense_total(self.user, "Food"), Decimal("7.00"))
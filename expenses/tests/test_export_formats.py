@@ -0,0 +1,114 @@
+import io
+import json
+import shutil
+import tempfile
+import unittest
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from openpyxl import load_workbook
+
+from expenses import export_formats
+from expenses.export_service import ExportJobService
+from expenses.models import Account, Expense, Income
+
+
+class ExportFormatTestBase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="typedexport", password="pass")
+        self.user.profile.tier = "PLUS"
+        self.user.profile.is_lifetime = True
+        self.user.profile.save()
+        self.client.force_login(self.user)
+        self.account = Account.objects.create(user=self.user, name="Bank", balance=Decimal("100.00"))
+        Expense.objects.create(
+            user=self.user, date=date(2024, 5, 1), amount=Decimal("12.34"),
+            description="Lunch", category="Food", account=self.account,
+        )
+        Income.objects.create(user=self.user, date=date(2024, 5, 2), amount=Decimal("99.99"), source="Refund")
+
+
+class XlsxExportTest(ExportFormatTestBase):
+    def test_single_entity_keeps_types(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"], "format": "xlsx"})
+        self.assertEqual(response["Content-Type"], export_formats.FORMATS["xlsx"][1])
+        self.assertIn('filename="expenses.xlsx"', response["Content-Disposition"])
+
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = list(workbook["expenses"].iter_rows(values_only=True))
+        self.assertEqual(rows[0][:3], ("Date", "Description", "Amount"))
+        self.assertEqual(rows[1][0], datetime(2024, 5, 1))
+        self.assertAlmostEqual(rows[1][2], 12.34)
+
+    def test_multiple_entities_become_sheets(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses", "incomes"], "format": "xlsx"})
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ["expenses", "incomes"])
+
+    def test_filtered_expense_export(self):
+        response = self.client.get(reverse("export-expenses"), {"format": "xlsx", "year": "2024"})
+        workbook = load_workbook(io.BytesIO(b"".join(response.streaming_content)), read_only=True)
+        rows = list(workbook.worksheets[0].iter_rows(values_only=True))
+        self.assertEqual(rows[1][1], "Lunch")
+
+    def test_background_job_honours_format(self):
+        export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, export_root, ignore_errors=True)
+        with override_settings(EXPORT_ROOT=export_root):
+            job = ExportJobService.create_job(self.user, ["expenses", "incomes"], export_format="xlsx")
+            job = ExportJobService.run_job(job)
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.file_name, "financial_data_export.xlsx")
+        self.assertEqual(load_workbook(job.file_path, read_only=True).sheetnames, ["expenses", "incomes"])
+
+
+class ColumnarExportTest(ExportFormatTestBase):
+    @unittest.skipIf(export_formats.arrow_available(), "pyarrow is installed; Parquet is used instead")
+    def test_fallback_writes_typed_json_lines(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"], "format": "columnar"})
+        self.assertIn('filename="expenses.jsonl"', response["Content-Disposition"])
+        records = [
+            json.loads(line, parse_float=Decimal)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(records[0]["Amount"], Decimal("12.34"))
+        self.assertEqual(records[0]["Date"], "2024-05-01")
+        self.assertEqual(records[0]["Account"], "Bank")
+
+    @unittest.skipIf(export_formats.arrow_available(), "pyarrow is installed; Parquet is used instead")
+    def test_fallback_zips_multiple_entities(self):
+        response = self.client.post(
+            reverse("export-data"), {"entities": ["expenses", "incomes"], "format": "columnar"}
+        )
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ["expenses.jsonl", "incomes.jsonl"])
+
+    @unittest.skipUnless(export_formats.arrow_available(), "pyarrow is not installed")
+    def test_parquet_keeps_decimal_and_date_types(self):
+        import pyarrow.parquet
+
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"], "format": "columnar"})
+        table = pyarrow.parquet.read_table(io.BytesIO(b"".join(response.streaming_content)))
+        row = table.to_pylist()[0]
+        self.assertEqual(row["Amount"], Decimal("12.34"))
+        self.assertEqual(row["Date"], date(2024, 5, 1))
+
+    def test_format_choice_is_labelled_with_what_it_writes(self):
+        with patch.object(export_formats, "pyarrow", None):
+            response = self.client.get(reverse("export-data"))
+            self.assertContains(response, "JSON Lines")
+            self.assertNotContains(response, "Parquet")
+            response = self.client.get(reverse("expense-list"))
+            self.assertContains(response, "JSON Lines")
+
+        with patch.object(export_formats, "pyarrow", object()):
+            self.assertContains(self.client.get(reverse("export-data")), "Parquet")
+
+    def test_unknown_format_falls_back_to_csv(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"], "format": "pdf"})
+        self.assertEqual(response["Content-Type"], "text/csv")
@@ -0,0 +1,180 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.export_service import ExportJobService, ExportService
+from expenses.models import (
+    Account,
+    Expense,
+    ExportJob,
+    Income,
+    Loan,
+    LoanRepayment,
+    Notification,
+)
+
+
+class ExportJobTestBase(TestCase):
+    def setUp(self):
+        self.export_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.export_root, ignore_errors=True)
+        overrides = override_settings(EXPORT_ROOT=self.export_root, EXPORT_ASYNC_ROW_THRESHOLD=3)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.user = User.objects.create_user(username="bulkexporter", password="pass")
+        self.user.profile.tier = "PLUS"
+        self.user.profile.is_lifetime = True
+        self.user.profile.save()
+        self.account = Account.objects.create(user=self.user, name="Bank", balance=Decimal("1000.00"))
+        for i in range(4):
+            Expense.objects.create(
+                user=self.user, date=date(2024, 3, 1) + timedelta(days=i), amount=Decimal("10.00"),
+                description=f"Groceries {i}", category="Food", account=self.account,
+            )
+        Income.objects.create(user=self.user, date=date(2024, 3, 5), amount=Decimal("500.00"), source="Salary")
+
+
+class ExportJobServiceTest(ExportJobTestBase):
+    def test_count_rows_per_file(self):
+        counts = ExportService.count_rows(self.user, ["expenses", "incomes", "loans"])
+        self.assertEqual(counts, {"expenses.csv": 4, "incomes.csv": 1, "loans.csv": 0, "loan_repayments.csv": 0})
+        self.assertTrue(ExportService.should_run_async(counts))
+
+    def test_worker_writes_zip_and_notifies(self):
+        loan = Loan.objects.create(
+            user=self.user, name="Car", initial_principal=Decimal("1000.00"), duration_months=12,
+        )
+        LoanRepayment.objects.create(
+            loan=loan, from_account=self.account, amount=Decimal("100.00"),
+            principal_portion=Decimal("90.00"), interest_portion=Decimal("10.00"), date=date(2024, 3, 10),
+        )
+        job = ExportJobService.create_job(self.user, ["expenses", "incomes", "loans"])
+        self.assertEqual(job.total_rows, 7)
+
+        call_command("run_worker", stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.processed_rows, 7)
+        self.assertEqual(job.progress_percentage, 100)
+        self.assertTrue(job.file_path.startswith(os.path.join(self.export_root, str(self.user.pk))))
+        with zipfile.ZipFile(job.file_path) as archive:
+            self.assertEqual(
+                archive.namelist(), ["expenses.csv", "incomes.csv", "loans.csv", "loan_repayments.csv"]
+            )
+            self.assertEqual(len(archive.read("expenses.csv").decode().splitlines()), 5)
+            self.assertIn("Car", archive.read("loan_repayments.csv").decode())
+
+        notification = Notification.objects.get(user=self.user, slug=f"export-job-{job.pk}")
+        self.assertEqual(notification.link, reverse("export-job-download", args=[job.pk]))
+
+    def test_claimed_jobs_are_not_claimed_twice(self):
+        job = ExportJobService.create_job(self.user, ["expenses"])
+        self.assertEqual(ExportJobService.claim_next_job().pk, job.pk)
+        self.assertIsNone(ExportJobService.claim_next_job())
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = ExportJobService.create_job(self.user, ["expenses"])
+        ExportJob.objects.filter(pk=job.pk).update(status="RUNNING")
+        self.assertIsNone(ExportJobService.claim_next_job())
+
+        later = timezone.now() + timedelta(minutes=30)
+        self.assertEqual(ExportJobService.claim_next_job(now=later).pk, job.pk)
+        job = ExportJobService.run_job(ExportJob.objects.get(pk=job.pk))
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.processed_rows, 4)
+
+    def test_failure_is_recorded(self):
+        job = ExportJobService.create_job(self.user, ["unknown"], row_counts={})
+        with self.assertLogs("expenses.export_service", "ERROR"):
+            job = ExportJobService.run_job(ExportJobService.claim_next_job())
+        self.assertEqual(job.status, "FAILED")
+        self.assertIn("unknown", job.error_message)
+
+    def test_purge_removes_expired_artifacts(self):
+        job = ExportJobService.run_job(ExportJobService.create_job(self.user, ["expenses"]))
+        self.assertTrue(os.path.exists(job.file_path))
+        ExportJob.objects.filter(pk=job.pk).update(finished_at=timezone.now() - timedelta(days=30))
+        path = job.file_path
+
+        self.assertEqual(ExportJobService.purge_expired(), 1)
+        self.assertFalse(os.path.exists(path))
+        job.refresh_from_db()
+        self.assertEqual(job.file_path, "")
+
+
+class ExportJobViewTest(ExportJobTestBase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_large_export_is_queued(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"]})
+        job = ExportJob.objects.get(user=self.user)
+        self.assertRedirects(response, f"{reverse('export-data')}?job={job.pk}")
+        self.assertEqual(job.status, "PENDING")
+        self.assertEqual(job.entities, ["expenses"])
+
+        status = self.client.get(reverse("export-job-status", args=[job.pk])).json()
+        self.assertEqual(status["status"], "PENDING")
+        self.assertEqual(status["total_rows"], 4)
+        self.assertIsNone(status["download_url"])
+
+    def test_small_export_still_streams(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["incomes"]})
+        self.assertTrue(response.streaming)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def test_download_supports_ranges(self):
+        job = ExportJobService.run_job(ExportJobService.create_job(self.user, ["expenses"]))
+        with open(job.file_path, "rb") as handle:
+            content = handle.read()
+        url = reverse("export-job-download", args=[job.pk])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertEqual(b"".join(response.streaming_content), content)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=5-14")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b"".join(response.streaming_content), content[5:15])
+        self.assertEqual(response["Content-Range"], f"bytes 5-14/{len(content)}")
+        self.assertEqual(response["Content-Length"], "10")
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(response.streaming_content), content[-4:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={len(content)}-")
+        self.assertEqual(response.status_code, 416)
+
+    @patch("expenses.views.export.RANGE_BLOCK_SIZE", 16)
+    def test_ranges_are_streamed_in_blocks(self):
+        job = ExportJobService.run_job(ExportJobService.create_job(self.user, ["expenses"]))
+        with open(job.file_path, "rb") as handle:
+            content = handle.read()
+
+        response = self.client.get(reverse("export-job-download", args=[job.pk]), HTTP_RANGE="bytes=3-")
+        blocks = list(response.streaming_content)
+        self.assertGreater(len(blocks), 1)
+        self.assertTrue(all(len(block) <= 16 for block in blocks))
+        self.assertEqual(b"".join(blocks), content[3:])
+
+    def test_jobs_are_private(self):
+        job = ExportJobService.run_job(ExportJobService.create_job(self.user, ["expenses"]))
+        other = User.objects.create_user(username="snoop", password="pass")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse("export-job-download", args=[job.pk])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("export-job-status", args=[job.pk])).status_code, 404)
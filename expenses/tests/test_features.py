@@ -67,7 +67,7 @@ class FeatureViewTest(BaseFeatureTest):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response['Content-Type'], 'text/csv')
-        content = response.content.decode('utf-8')
+        content = b''.join(response.streaming_content).decode('utf-8')
         self.assertIn('Food', content)
         self.assertIn('100', content)
 
@@ -0,0 +1,135 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.import_service import ExpenseImporter, ImportJobService
+from expenses.models import BackgroundJob, Expense, ImportJob
+
+
+def statement(count, name="big.csv"):
+    content = io.StringIO()
+    writer = csv.writer(content)
+    writer.writerow(["Date", "Description", "Amount", "Category"])
+    for i in range(count):
+        writer.writerow([f"2025-01-{i % 28 + 1:02d}", f"Purchase {i}", i + 1, "Shopping"])
+    writer.writerow(["not a date", "Broken", "1", "Shopping"])
+    return SimpleUploadedFile(name, content.getvalue().encode())
+
+
+class ImportJobTestBase(TestCase):
+    def setUp(self):
+        self.import_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.import_root, ignore_errors=True)
+        overrides = override_settings(IMPORT_ROOT=self.import_root, IMPORT_ASYNC_BYTES=100)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.user = User.objects.create_user(username="bigupload", password="pass")
+
+
+class ImportJobServiceTest(ImportJobTestBase):
+    def test_job_imports_in_chunks_and_cleans_up(self):
+        job = ImportJobService.create_job(self.user, statement(12), "₹")
+        self.assertTrue(os.path.exists(job.file_path))
+
+        job = ImportJobService.run_job(ImportJobService.claim_next_job(), categorize=lambda d: "Misc", chunk_size=5)
+
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.offset, 13)
+        self.assertEqual(job.summary["created_count"], 12)
+        self.assertEqual(job.summary["error_count"], 1)
+        self.assertEqual(job.errors[0]["row"], 14)
+        self.assertEqual(job.total_amount, Decimal("78.00"))
+        self.assertFalse(os.path.exists(job.file_path))
+
+    def test_interrupted_job_resumes_from_offset(self):
+        job = ImportJobService.create_job(self.user, statement(10), "₹")
+        original = ExpenseImporter.import_chunk
+        calls = []
+
+        def crash_on_second_chunk(importer, chunk):
+            calls.append(len(chunk))
+            if len(calls) == 2:
+                raise RuntimeError("worker killed")
+            return original(importer, chunk)
+
+        with patch.object(ExpenseImporter, "import_chunk", crash_on_second_chunk), \
+                self.assertLogs("expenses.import_service", "ERROR"):
+            job = ImportJobService.run_job(ImportJobService.claim_next_job(), categorize=lambda d: "Misc", chunk_size=4)
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.offset, 4)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 4)
+
+        # A stalled RUNNING job is picked up again; here the failed one is re-queued.
+        ImportJob.objects.filter(pk=job.pk).update(status="PENDING")
+        job = ImportJobService.run_job(ImportJobService.claim_next_job(), categorize=lambda d: "Misc", chunk_size=4)
+        self.assertEqual(job.status, "COMPLETED")
+        self.assertEqual(job.created_count, 10)
+        self.assertEqual(job.duplicate_count, 0)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 10)
+
+    def test_stale_running_jobs_are_reclaimed(self):
+        job = ImportJobService.create_job(self.user, statement(2), "₹")
+        ImportJob.objects.filter(pk=job.pk).update(status="RUNNING")
+        self.assertIsNone(ImportJobService.claim_next_job())
+
+        later = timezone.now() + timedelta(minutes=30)
+        self.assertEqual(ImportJobService.claim_next_job(now=later).pk, job.pk)
+
+    @patch("finance_tracker.ai_utils.predict_category_ai", return_value="Food")
+    def test_worker_processes_queued_upload(self, _mock_ai):
+        ImportJobService.create_job(self.user, statement(3), "₹")
+        self.assertEqual(BackgroundJob.objects.get().job_type, "run_import_jobs")
+
+        call_command("run_worker", stdout=io.StringIO())
+
+        self.assertEqual(BackgroundJob.objects.get().status, "COMPLETED")
+        self.assertEqual(ImportJob.objects.get().status, "COMPLETED")
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+
+class ImportJobViewTest(ImportJobTestBase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_large_upload_is_queued_and_reports_progress(self):
+        response = self.client.post(reverse("upload"), {"currency": "₹", "file": statement(20)})
+        job = ImportJob.objects.get(user=self.user)
+        self.assertRedirects(response, f"{reverse('upload')}?job={job.pk}")
+        self.assertFalse(Expense.objects.exists())
+
+        progress = self.client.get(reverse("import-job-status", args=[job.pk])).json()
+        self.assertEqual(progress["status"], "PENDING")
+        self.assertEqual(progress["created"], 0)
+
+        ImportJobService.run_job(ImportJobService.claim_next_job(), categorize=lambda d: "Misc")
+        progress = self.client.get(reverse("import-job-status", args=[job.pk])).json()
+        self.assertEqual(progress["status"], "COMPLETED")
+        self.assertEqual((progress["rows_parsed"], progress["created"], progress["errors"]), (21, 20, 1))
+
+        response = self.client.get(reverse("upload"), {"job": job.pk})
+        self.assertEqual(response.context["results"]["created_count"], 20)
+
+    def test_small_upload_stays_synchronous(self):
+        with override_settings(IMPORT_ASYNC_BYTES=10 * 1024 * 1024):
+            response = self.client.post(reverse("upload"), {"currency": "₹", "file": statement(2)})
+        self.assertEqual(response.context["results"]["created_count"], 2)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_jobs_are_private(self):
+        job = ImportJobService.create_job(self.user, statement(1), "₹")
+        other = User.objects.create_user(username="peeker", password="pass")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(reverse("import-job-status", args=[job.pk])).status_code, 404)
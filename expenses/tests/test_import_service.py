@@ -0,0 +1,144 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+import openpyxl
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from expenses.import_service import ExpenseImporter, iter_upload_rows
+from expenses.models import (
+    Account,
+    Expense,
+    JournalEntry,
+    JournalLine,
+    TransactionFeedItem,
+)
+
+
+def csv_upload(rows, name="statement.csv", encoding="utf-8"):
+    content = io.StringIO()
+    csv.writer(content).writerows(rows)
+    return SimpleUploadedFile(name, content.getvalue().encode(encoding))
+
+
+class ExpenseImporterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="importer", password="pass")
+        self.account = Account.objects.create(user=self.user, name="Bank", balance=Decimal("1000.00"))
+
+    def _import(self, upload, chunk_size=1000, **kwargs):
+        importer = ExpenseImporter(
+            self.user, "₹", categorize=lambda desc: "Shopping", chunk_size=chunk_size, **kwargs
+        )
+        return importer.run(iter_upload_rows(upload))
+
+    def test_rows_are_inserted_in_chunks(self):
+        rows = [["Date", "Description", "Amount", "Category"]]
+        rows += [[f"2025-01-{i % 28 + 1:02d}", f"Item {i}", i + 1, "Food"] for i in range(25)]
+        # Per chunk: existing-key lookup, bulk insert, read-back, feed upsert, category model
+        # lookup (plus two savepoints).
+        with self.assertNumQueries(5 * 3 + 6 * 2):
+            summary = self._import(csv_upload(rows), chunk_size=10)
+        self.assertEqual(summary["created_count"], 25)
+        self.assertEqual(summary["total_rows"], 25)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 25)
+        self.assertEqual(TransactionFeedItem.objects.filter(user=self.user, item_type="EXPENSE").count(), 25)
+
+    def test_duplicates_in_file_and_database(self):
+        Expense.objects.create(
+            user=self.user, date=date(2025, 1, 1), amount=Decimal("500.00"), description="Rent", category="Housing",
+        )
+        upload = csv_upload([
+            ["Date", "Description", "Amount", "Category"],
+            ["2025-01-01", "Rent", "500", "Housing"],
+            ["2025-01-02", "Coffee", "3.5", "Food"],
+            ["2025-01-02", "Coffee", "3.50", "Food"],
+        ])
+        summary = self._import(upload)
+        self.assertEqual(summary["created_count"], 1)
+        self.assertEqual(summary["duplicate_count"], 2)
+        self.assertEqual(summary["total_amount"], 3.5)
+
+    def test_invalid_rows_are_reported_without_failing_the_chunk(self):
+        upload = csv_upload([
+            ["Date", "Description", "Amount"],
+            ["2025-01-01", "Valid", "100"],
+            ["2025-01-02", "Huge", "999999999999"],
+            ["nope", "Bad date", "1"],
+        ])
+        summary = self._import(upload)
+        self.assertEqual(summary["created_count"], 1)
+        self.assertEqual([error["row"] for error in summary["errors"]], [3, 4])
+
+    @override_settings(LEDGER_WRITE_ENABLED=True)
+    def test_account_balance_applied_once_per_chunk(self):
+        upload = csv_upload([["Date", "Description", "Amount"]] + [["2025-02-01", f"Fuel {i}", "10"] for i in range(6)])
+        summary = self._import(upload, chunk_size=4, account=self.account)
+        self.assertEqual(summary["created_count"], 6)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("940.00"))
+        self.assertEqual(JournalEntry.objects.filter(user=self.user, source_type="EXPENSE").count(), 6)
+
+    @override_settings(LEDGER_WRITE_ENABLED=True)
+    def test_ledger_entries_are_posted_once_per_chunk(self):
+        def statements(count, prefix):
+            upload = csv_upload([["Date", "Description", "Amount"]] + [["2025-02-01", f"{prefix} {i}", "10"] for i in range(count)])
+            with CaptureQueriesContext(connection) as queries:
+                summary = self._import(upload, account=self.account)
+            self.assertEqual(summary["created_count"], count)
+            return len(queries)
+
+        # The second import reuses the ledger accounts the first one created.
+        statements(1, "Warmup")
+        self.assertEqual(statements(4, "Fuel"), statements(12, "Toll"))
+        entries = JournalEntry.objects.filter(user=self.user, source_type="EXPENSE", metadata__shadow_action="CREATE")
+        self.assertEqual(entries.count(), 1 + 4 + 12)
+        self.assertEqual(JournalLine.objects.filter(journal_entry__in=entries).count(), 2 * (1 + 4 + 12))
+
+    @patch("expenses.import_service.get_exchange_rate", return_value=Decimal("80.0"))
+    def test_foreign_currency_rate_is_looked_up_once(self, mock_rate):
+        upload = csv_upload([["Date", "Description", "Amount"], ["2025-03-01", "Hotel", "10"], ["2025-03-02", "Taxi", "5"]])
+        importer = ExpenseImporter(self.user, "$", categorize=lambda desc: "Travel")
+        importer.run(iter_upload_rows(upload))
+        self.assertEqual(mock_rate.call_count, 1)
+        self.assertEqual(Expense.objects.get(description="Hotel").base_amount, Decimal("800.00"))
+
+    def test_latin1_csv_is_detected(self):
+        summary = self._import(csv_upload([["Date", "Amount", "Description"], ["2025-01-01", 100, "Café"]], encoding="latin-1"))
+        self.assertEqual(summary["created_count"], 1)
+        self.assertTrue(Expense.objects.filter(description="Café").exists())
+
+    def test_xlsx_is_read_in_read_only_mode(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(["Txn Date", "Details", "Spent"])
+        sheet.append([date(2025, 4, 1), "Groceries", 42])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        upload = SimpleUploadedFile("statement.xlsx", buffer.getvalue())
+
+        with patch("expenses.import_service.openpyxl.load_workbook", wraps=openpyxl.load_workbook) as load:
+            summary = self._import(upload)
+        self.assertTrue(load.call_args.kwargs["read_only"])
+        self.assertEqual(summary["created_count"], 1)
+        self.assertEqual(Expense.objects.get(description="Groceries").amount, Decimal("42.00"))
+
+
+class UploadViewAccountTest(TestCase):
+    def test_upload_can_target_an_account(self):
+        user = User.objects.create_user(username="uploader", password="pass")
+        account = Account.objects.create(user=user, name="Wallet", balance=Decimal("100.00"))
+        self.client.force_login(user)
+        upload = csv_upload([["Date", "Description", "Amount", "Category"], ["2025-01-05", "Snacks", "20", "Food"]])
+        response = self.client.post(reverse("upload"), {"currency": "₹", "account": account.pk, "file": upload})
+        self.assertEqual(response.context["results"]["created_count"], 1)
+        account.refresh_from_db()
+        self.assertEqual(account.balance, Decimal("80.00"))
+        self.assertEqual(Expense.objects.get(description="Snacks").account, account)
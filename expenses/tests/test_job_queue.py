@@ -0,0 +1,107 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import ANY, patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from expenses.job_queue import JOB_TYPES, JobQueueService, JobType
+from expenses.models import BackgroundJob
+
+
+@override_settings(CRON_SECRET='test-secret', BACKGROUND_JOB_MAX_ATTEMPTS=2, BACKGROUND_JOB_RETRY_BACKOFF_SECONDS=60)
+class JobQueueTest(TestCase):
+    def test_overlapping_cron_hits_share_one_job(self):
+        first = self.client.get(reverse('cron-send-notifications'), {'secret': 'test-secret'})
+        second = self.client.get(reverse('cron-send-notifications'), {'secret': 'test-secret'})
+
+        self.assertEqual(first.status_code, 202)
+        self.assertTrue(first.json()['created'])
+        self.assertFalse(second.json()['created'])
+        self.assertEqual(first.json()['job_id'], second.json()['job_id'])
+        self.assertEqual(BackgroundJob.objects.count(), 1)
+
+        job = BackgroundJob.objects.get()
+        job.status = 'COMPLETED'
+        job.save()
+        _job, created = JobQueueService.enqueue('send_notifications')
+        self.assertTrue(created)
+
+    def test_import_and_export_sweeps_are_queued_per_request(self):
+        for name, job_type in (('cron-import-jobs', 'run_import_jobs'), ('cron-export-jobs', 'run_export_jobs')):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 403)
+            first = self.client.get(reverse(name), {'secret': 'test-secret', 'limit': '5'}).json()
+            second = self.client.get(reverse(name), {'secret': 'test-secret'}).json()
+            # Not singletons: a request arriving while a sweep runs must still get its own run.
+            self.assertTrue(second['created'])
+            self.assertEqual(
+                list(BackgroundJob.objects.filter(pk__in=[first['job_id'], second['job_id']]).values_list('job_type', 'kwargs')),
+                [(job_type, {'limit': 5}), (job_type, {'limit': 10})],
+            )
+
+    def test_concurrency_limit_holds_back_second_job(self):
+        with patch.dict(JOB_TYPES, {'reconcile_ledgers': JobType(concurrency=1, singleton=False)}):
+            JobQueueService.enqueue('reconcile_ledgers', threshold='0.01')
+            JobQueueService.enqueue('reconcile_ledgers', threshold='0.05')
+            JobQueueService.enqueue('send_daily_reminders')
+
+            running = JobQueueService.claim_next_job()
+            self.assertEqual((running.job_type, running.kwargs), ('reconcile_ledgers', {'threshold': '0.01'}))
+            # The second reconcile waits; other types still run.
+            self.assertEqual(JobQueueService.claim_next_job().job_type, 'send_daily_reminders')
+            self.assertIsNone(JobQueueService.claim_next_job())
+
+    @patch('expenses.job_queue.call_command')
+    def test_failures_retry_with_backoff_then_fail(self, mock_call_command):
+        mock_call_command.side_effect = CommandError('SMTP down')
+        job, _created = JobQueueService.enqueue('send_monthly_report')
+
+        with self.assertLogs('expenses.job_queue', 'ERROR'):
+            job = JobQueueService.run_job(JobQueueService.claim_next_job())
+        self.assertEqual((job.status, job.attempts, job.error_message), ('PENDING', 1, 'SMTP down'))
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=55))
+        self.assertIsNone(JobQueueService.claim_next_job())
+
+        with self.assertLogs('expenses.job_queue', 'ERROR'):
+            job = JobQueueService.run_job(JobQueueService.claim_next_job(now=job.run_after))
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    @override_settings(BACKGROUND_JOB_STALE_MINUTES=5)
+    def test_job_is_reclaimed_only_once_its_heartbeat_is_stale(self):
+        job, _created = JobQueueService.enqueue('send_lifecycle_emails')
+        JobQueueService.claim_next_job()
+
+        # A long job keeps beating, so it is never run twice however long it takes.
+        BackgroundJob.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=6))
+        JobQueueService.beat(job.pk)
+        self.assertIsNone(JobQueueService.claim_next_job(now=timezone.now() + timedelta(minutes=4)))
+
+        reclaimed = JobQueueService.claim_next_job(now=timezone.now() + timedelta(minutes=6))
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        self.assertEqual(reclaimed.error_message, 'Worker stopped before the job finished.')
+
+    @patch('expenses.job_queue.call_command')
+    def test_worker_runs_queued_jobs_and_status_reports_them(self, mock_call_command):
+        mock_call_command.side_effect = lambda name, stdout, **kwargs: stdout.write(f"{name} ran")
+        job_id = self.client.get(
+            reverse('cron-ledger-reconcile'), {'secret': 'test-secret', 'threshold': '0.05'},
+        ).json()['job_id']
+
+        out = StringIO()
+        call_command('run_worker', stdout=out)
+
+        self.assertIn('Completed=1, Retrying=0, Failed=0', out.getvalue())
+        mock_call_command.assert_called_once_with('reconcile_ledgers', stdout=ANY, stderr=ANY, threshold='0.05')
+        status = self.client.get(reverse('cron-job-status', args=[job_id]), {'secret': 'test-secret'}).json()
+        self.assertEqual(status['status'], 'COMPLETED')
+        self.assertEqual(status['output'], 'reconcile_ledgers ran')
+        self.assertIsNotNone(status['duration_ms'])
+
+        self.assertEqual(self.client.get(reverse('cron-job-status', args=[job_id])).status_code, 403)
+        self.assertEqual(
+            self.client.get(reverse('cron-job-status', args=[job_id + 1]), {'secret': 'test-secret'}).status_code, 404,
+        )
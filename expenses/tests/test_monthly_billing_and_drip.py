@@ -8,7 +8,7 @@ from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
-from expenses.models import SubscriptionPlan, UserProfile
+from expenses.models import EmailLog, Expense, SubscriptionPlan, UserProfile
 
 
 class LifecycleEmailTest(TestCase):
@@ -119,6 +119,42 @@ class LifecycleEmailTest(TestCase):
         self.assertEqual(self.profile.last_drip_email_day, 30)
         self.assertEqual(len(mail.outbox), 1)
 
+    def test_batch_selected_in_constant_queries(self):
+        """Due users, their drip day and Day 30 stats come from one query per batch."""
+        users = [self.user]
+        for i in range(4):
+            users.append(User.objects.create_user(username=f'drip{i}', password='password', email=f'drip{i}@example.com'))
+        for user, days in zip(users, [3, 6, 31, 31, 1], strict=True):
+            User.objects.filter(pk=user.pk).update(date_joined=timezone.now() - timedelta(days=days))
+        Expense.objects.create(user=users[2], date=timezone.now().date(), amount=10, description='Tea', category='Food')
+        mail.outbox.clear()
+
+        out = StringIO()
+        # Count, candidate batch, empty batch, one profile update per drip day.
+        with self.assertNumQueries(6):
+            call_command('send_lifecycle_emails', batch_size=10, stdout=out)
+
+        self.assertIn('4 sent, 1 skipped', out.getvalue())
+        self.assertEqual(
+            dict(UserProfile.objects.filter(user__in=users).values_list('user__username', 'last_drip_email_day')),
+            {'dripuser': 2, 'drip0': 5, 'drip1': 30, 'drip2': 30, 'drip3': 0},
+        )
+        summary = next(m for m in mail.outbox if m.to == ['drip1@example.com'])
+        self.assertIn('Month in Review', summary.subject)
+
+    def test_logged_drip_is_not_resent(self):
+        """A drip recorded in the email log only advances the profile."""
+        self.user.date_joined = timezone.now() - timedelta(days=2)
+        self.user.save()
+        EmailLog.objects.create(user=self.user, to_email=self.user.email, subject='3 Tips to Master Your Finances 💡', body='')
+
+        out = StringIO()
+        call_command('send_lifecycle_emails', stdout=out)
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.last_drip_email_day, 2)
+
 
 class MonthlyBillingPaymentTest(TestCase):
     def setUp(self):
@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from allauth.account.models import EmailAddress
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from expenses.models import Account, Expense, Income
+from expenses.monthly_report import MonthlyReportService, report_period
+
+
+class MonthlyReportTest(TestCase):
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.start, self.end, self.month_name = report_period(self.today)
+        self.alice = self._user("alice")
+        self.bob = self._user("bob")
+        self.idle = self._user("idle")
+        mail.outbox.clear()
+
+        for category, amount in [("Food", 50), ("Rent", 400), ("Fuel", 30), ("Fun", 20)]:
+            Expense.objects.create(user=self.alice, date=self.start, amount=Decimal(amount), description=category,
+                                   category=category, currency="₹")
+        Income.objects.create(user=self.alice, date=self.end, amount=Decimal("1000"), source="Salary", currency="₹")
+        # After the report month: moves today's net worth but not the report figures.
+        Expense.objects.create(user=self.alice, date=self.today, amount=Decimal("100"), description="Later",
+                               category="Food", currency="₹")
+        Account.objects.create(user=self.alice, name="Bank", balance=Decimal("2000"), currency="₹")
+        Account.objects.create(user=self.alice, name="Travel", balance=Decimal("10"), currency="$")
+
+        Expense.objects.create(user=self.bob, date=self.end, amount=Decimal("75"), description="Books",
+                               category="Education", currency="₹")
+
+    def _user(self, username):
+        user = User.objects.create_user(username=username, password="pass", email=f"{username}@example.com")
+        EmailAddress.objects.create(user=user, email=user.email, verified=True, primary=True)
+        return user
+
+    @patch("expenses.monthly_report.get_exchange_rate", return_value=Decimal("80"))
+    def test_reports_for_a_chunk_in_four_queries(self, _rate):
+        users = list(User.objects.filter(pk__in=[self.alice.pk, self.bob.pk, self.idle.pk]).select_related("profile"))
+        with self.assertNumQueries(4):
+            reports = MonthlyReportService.build(users, self.start, self.end, self.today)
+
+        alice = reports[self.alice.pk]
+        self.assertEqual((alice["income"], alice["expense"], alice["savings"]), (Decimal("1000"), Decimal("500"), Decimal("500")))
+        self.assertEqual(alice["savings_rate"], Decimal("50.0"))
+        self.assertEqual([c["category"] for c in alice["top_categories"]], ["Rent", "Food", "Fuel"])
+        # 2000 + 10 * 80 today, plus the 100 spent since the report month.
+        self.assertEqual(alice["nw_at_end"], Decimal("2900.00"))
+        self.assertEqual(alice["nw_change"], Decimal("500"))
+        self.assertIn("<b>Rent</b>", alice["ai_insight"])
+
+        self.assertEqual(reports[self.bob.pk]["expense"], Decimal("75"))
+        self.assertEqual(reports[self.idle.pk], {"has_data": False})
+
+    @patch("expenses.monthly_report.get_exchange_rate", return_value=Decimal("80"))
+    def test_dry_run_writes_jsonl(self, _rate):
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command("send_monthly_report", dry_run=True, output=path, chunk_size=1, stdout=StringIO())
+
+        with open(path, encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle]
+        self.assertEqual([row["email"] for row in rows], ["alice@example.com", "bob@example.com"])
+        self.assertEqual(Decimal(rows[0]["expense"]), Decimal("500"))
+        self.assertEqual(rows[0]["month"], self.month_name)
+        self.assertEqual(mail.outbox, [])
+
+    @patch("expenses.monthly_report.get_exchange_rate", return_value=Decimal("80"))
+    def test_sends_reports_across_workers(self, _rate):
+        out = StringIO()
+        call_command("send_monthly_report", workers=2, stdout=out)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["alice@example.com", "bob@example.com"])
+        self.assertIn("Greetings, alice!", next(m for m in mail.outbox if m.to == ["alice@example.com"]).alternatives[0][0])
+        self.assertIn("Sent 2 reports.", out.getvalue())
@@ -0,0 +1,133 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from webpush.models import PushInformation, SubscriptionInfo
+
+from expenses.context_processors import page_chrome
+from expenses.models import (
+    Account,
+    Loan,
+    Notification,
+    RecurringTransaction,
+    SavingsGoal,
+)
+
+
+class PageChromeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username="chrome", password="pass")
+        self.factory = RequestFactory()
+
+    def _chrome(self):
+        request = self.factory.get("/")
+        request.user = User.objects.select_related("profile").get(pk=self.user.pk)
+        return page_chrome(request)
+
+    def test_counts_and_cached_reads(self):
+        for i in range(12):
+            Notification.objects.create(user=self.user, title=f"N{i}", message="hello")
+        for name in ["B", "A", "C", "D", "E", "F"]:
+            Account.objects.create(user=self.user, name=name)
+        SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("100"))
+        Loan.objects.create(user=self.user, name="Car", initial_principal=Decimal("1000.00"), duration_months=12)
+        RecurringTransaction.objects.create(
+            user=self.user, transaction_type="EXPENSE", amount=Decimal("9"), description="Music",
+            category="Bills", frequency="MONTHLY", start_date=timezone.localdate() + timedelta(days=2),
+        )
+        RecurringTransaction.objects.create(
+            user=self.user, transaction_type="EXPENSE", amount=Decimal("9"), description="Later",
+            category="Bills", frequency="MONTHLY", start_date=timezone.localdate() + timedelta(days=20),
+        )
+
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+        # The data epoch, the counts, accounts and recurring queries, plus the live
+        # notifications and web-push reads.
+        with self.assertNumQueries(6):
+            context = self._chrome_for(user)
+        self.assertEqual(context["unread_notifications_count"], 9)
+        self.assertEqual(context["notifications"][0]["title"], "N11")
+        self.assertEqual([a["name"] for a in context["sidebar_accounts"]], ["A", "B", "C", "D", "E"])
+        self.assertTrue(context["has_more_accounts"])
+        self.assertEqual(context["active_goals_count"], 1)
+        self.assertEqual(context["active_loans_count"], 1)
+        self.assertEqual(context["upcoming_subscriptions_count"], 1)
+        self.assertFalse(context["is_webpush_subscribed"])
+
+        # Only the data epoch, notifications and web-push state are read.
+        with self.assertNumQueries(3):
+            self.assertEqual(self._chrome_for(user), context)
+
+    def _chrome_for(self, user):
+        request = self.factory.get("/")
+        request.user = user
+        return page_chrome(request)
+
+    def test_writes_invalidate(self):
+        self.assertFalse(self._chrome()["has_unread_notifications"])
+        notification = Notification.objects.create(user=self.user, title="Hi", message="there")
+        self.assertTrue(self._chrome()["has_unread_notifications"])
+
+        notification.is_read = True
+        notification.save()
+        self.assertFalse(self._chrome()["has_unread_notifications"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            goal = SavingsGoal.objects.create(user=self.user, name="Bike", target_amount=Decimal("50"))
+        self.assertEqual(self._chrome()["active_goals_count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            goal.delete()
+        self.assertEqual(self._chrome()["active_goals_count"], 0)
+
+        info = SubscriptionInfo.objects.create(browser="firefox", endpoint="https://push.example/1", auth="a", p256dh="b")
+        PushInformation.objects.create(user=self.user, subscription=info)
+        self.assertTrue(self._chrome()["is_webpush_subscribed"])
+
+    def test_notification_and_push_writes_without_signals_show_at_once(self):
+        # The worker bulk-creates notifications and web-push prunes subscriptions
+        # in other processes, with no signal reaching this one.
+        self.assertFalse(self._chrome()["has_unread_notifications"])
+        Notification.objects.bulk_create([Notification(user=self.user, title="Due", message="soon")])
+        self.assertEqual(self._chrome()["unread_notifications_count"], 1)
+        Notification.objects.filter(user=self.user).update(is_read=True)
+        self.assertFalse(self._chrome()["has_unread_notifications"])
+
+        info = SubscriptionInfo.objects.create(browser="firefox", endpoint="https://push.example/2", auth="a", p256dh="b")
+        PushInformation.objects.bulk_create([PushInformation(user=self.user, subscription=info)])
+        self.assertTrue(self._chrome()["is_webpush_subscribed"])
+        PushInformation.objects.filter(user=self.user).delete()
+        self.assertFalse(self._chrome()["is_webpush_subscribed"])
+
+    def test_financial_writes_apply_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            account = Account.objects.create(user=self.user, name="Wallet")
+        self.assertEqual(self._chrome()["sidebar_accounts"][0]["name"], "Wallet")
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            account.name = "Purse"
+            account.save()
+        # Until the write commits, readers keep the entry for the old epoch.
+        self.assertEqual(self._chrome()["sidebar_accounts"][0]["name"], "Wallet")
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self._chrome()["sidebar_accounts"][0]["name"], "Purse")
+
+    def test_mark_all_read_invalidates(self):
+        Notification.objects.create(user=self.user, title="One", message="x")
+        self.assertTrue(self._chrome()["has_unread_notifications"])
+        self.client.force_login(self.user)
+        self.client.post(reverse("mark-all-read"))
+        self.assertFalse(self._chrome()["has_unread_notifications"])
+
+    def test_anonymous(self):
+        request = self.factory.get("/")
+        request.user = AnonymousUser()
+        context = page_chrome(request)
+        self.assertEqual(context["notifications"], [])
+        self.assertEqual(context["currency_symbol"], "₹")
@@ -1,9 +1,17 @@
+import json
 from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 from django.utils import timezone
 
-from expenses.parser import parse_expense_nl
+from expenses.models import Account
+from expenses.parser import ExpenseTextParser, parse_expense_lines, parse_expense_nl
+from finance_tracker.categorizers import StubCategorizerBackend
 
 
 class ExpenseParserTest(TestCase):
@@ -55,3 +63,73 @@ class ExpenseParserTest(TestCase):
         self.assertFalse(result['success'])
         self.assertIsNone(result['amount'])
         self.assertEqual(result['category'], "Other")
+
+
+class ExpenseBatchParserTest(TestCase):
+    def test_lines_share_one_parser(self):
+        text = "lunch 450\n\nHDFC card 1.2k fuel yesterday\nWork books 300\ngizmo thing 99"
+        drafts = parse_expense_lines(text, user_categories=["Work"], user_accounts=["Cash", "HDFC card"])
+        self.assertEqual([draft['line'] for draft in drafts], [1, 3, 4, 5])
+        self.assertEqual(drafts[0]['category'], "Dining Out")
+        self.assertEqual(drafts[1]['account'], "HDFC card")
+        self.assertEqual(drafts[1]['amount'], "1200.00")
+        self.assertEqual(drafts[1]['date'], (timezone.localdate() - timedelta(days=1)).isoformat())
+        self.assertEqual(drafts[2]['category'], "Work")
+        self.assertEqual(drafts[3]['category'], "Other")
+
+    def test_earliest_listed_account_wins(self):
+        parser = ExpenseTextParser(user_accounts=["Savings", "Wallet"])
+        result = parser.parse("wallet top-up from savings 200")
+        self.assertEqual(result['account'], "Savings")
+        self.assertEqual(result['description'], "Wallet top-up from")
+
+    def test_account_named_inside_another_keeps_list_order(self):
+        parser = ExpenseTextParser(user_accounts=["Cash", "My Cash"])
+        result = parser.parse("lunch 120 my cash")
+        self.assertEqual(result['account'], "Cash")
+        self.assertEqual(result['description'], "Lunch my")
+
+        parser = ExpenseTextParser(user_accounts=["My Cash", "Cash"])
+        self.assertEqual(parser.parse("lunch 120 my cash")['account'], "My Cash")
+
+    @override_settings(GENAI_CATEGORIZER_BACKEND="stub")
+    def test_unmatched_lines_are_categorized_in_one_batch(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        backend = StubCategorizerBackend({"gizmo thing": "Gadgets", "doohickey": "Gadgets"})
+        with patch("finance_tracker.categorizers.get_categorizer_backend", return_value=backend):
+            drafts = parse_expense_lines(["gizmo thing 99", "doohickey 10", "coffee 50"], user_categories=["Gadgets"])
+        self.assertEqual([draft['category'] for draft in drafts], ["Gadgets", "Gadgets", "Dining Out"])
+        self.assertEqual(backend.calls, [["gizmo thing", "doohickey"]])
+
+
+class ParseExpenseBatchViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="quickentry", password="pass")
+        Account.objects.create(user=self.user, name="Wallet", balance=Decimal("0"))
+        self.client.force_login(self.user)
+
+    def _post(self, payload):
+        return self.client.post(reverse("parse-expense-batch"), json.dumps(payload), content_type="application/json")
+
+    def test_returns_a_draft_per_line(self):
+        response = self._post({"text": "coffee 80 wallet\ntaxi 250 today"}).json()
+        self.assertTrue(response["success"])
+        self.assertEqual([draft["amount"] for draft in response["data"]], ["80.00", "250.00"])
+        self.assertEqual(response["data"][0]["account"], "Wallet")
+        self.assertEqual(response["data"][1]["payment_method"], "Cash")
+        self.assertFalse(response["truncated"])
+
+    def test_truncated_only_when_lines_were_dropped(self):
+        with patch("expenses.parser.MAX_BATCH_LINES", 2), patch("expenses.views.expenses.MAX_BATCH_LINES", 2):
+            response = self._post({"text": "tea 20\n\nsnack 30\n"}).json()
+            self.assertEqual(len(response["data"]), 2)
+            self.assertFalse(response["truncated"])
+
+            response = self._post({"text": "tea 20\nsnack 30\ncoffee 40"}).json()
+            self.assertEqual(len(response["data"]), 2)
+            self.assertTrue(response["truncated"])
+
+    def test_accepts_a_list_and_rejects_empty_input(self):
+        self.assertEqual(len(self._post({"lines": ["tea 20", "snack 30"]}).json()["data"]), 2)
+        self.assertFalse(self._post({"lines": ["  "]}).json()["success"])
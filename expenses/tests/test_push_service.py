@@ -0,0 +1,103 @@
+import base64
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from webpush.models import PushInformation, SubscriptionInfo
+
+from expenses.push_service import PushDeliveryService, PushMessage
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+class FakePushService(BaseHTTPRequestHandler):
+    """Answers by path: /ok, /gone (410), /flaky (503 once, then 201) and /down (500)."""
+    hits = {}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            count = self.hits[self.path] = self.hits.get(self.path, 0) + 1
+        status = {"/ok": 201, "/gone": 410, "/down": 500}.get(self.path)
+        if self.path == "/flaky":
+            status = 503 if count == 1 else 201
+        self.send_response(status or 404)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(PUSH_RETRY_BACKOFF_SECONDS=0, PUSH_WORKERS=4, PUSH_RETRIES=2, PUSH_TIMEOUT_SECONDS=5)
+class PushDeliveryServiceTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FakePushService)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        FakePushService.hits = {}
+
+    def _subscribe(self, user, path):
+        key = ec.generate_private_key(ec.SECP256R1()).public_key().public_bytes(
+            serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint,
+        )
+        info = SubscriptionInfo.objects.create(
+            browser="firefox", endpoint=f"{self.base_url}{path}", p256dh=_b64(key), auth=_b64(os.urandom(16)),
+        )
+        PushInformation.objects.create(user=user, subscription=info)
+        return info
+
+    def test_delivers_retries_and_prunes(self):
+        users = [User.objects.create_user(username=f"push{i}", password="pass") for i in range(5)]
+        self._subscribe(users[0], "/ok")
+        self._subscribe(users[0], "/gone")
+        self._subscribe(users[1], "/flaky")
+        self._subscribe(users[2], "/down")
+        gone = SubscriptionInfo.objects.get(endpoint__endswith="/gone")
+
+        with self.assertLogs("expenses.push_service", "WARNING"):
+            result = PushDeliveryService.send(PushMessage(user.pk, {"head": "Hi"}, 60) for user in users[:4])
+
+        self.assertEqual(result.users_sent, {users[0].pk, users[1].pk})
+        self.assertEqual(result.users_without_subscription, {users[3].pk})
+        self.assertEqual((result.delivered, result.failed, result.pruned), (2, 1, 1))
+        self.assertEqual(FakePushService.hits, {"/ok": 1, "/gone": 1, "/flaky": 2, "/down": 3})
+        self.assertFalse(SubscriptionInfo.objects.filter(pk=gone.pk).exists())
+        self.assertEqual(PushInformation.objects.filter(user=users[0]).count(), 1)
+
+    @override_settings(PUSH_BATCH_SIZE=2)
+    def test_one_subscription_query_per_batch(self):
+        users = [User.objects.create_user(username=f"batch{i}", password="pass") for i in range(4)]
+        for user in users:
+            self._subscribe(user, "/ok")
+        with self.assertNumQueries(2):
+            result = PushDeliveryService.send(PushMessage(user.pk, {"head": "Hi"}) for user in users)
+        self.assertEqual(result.delivered, 4)
+
+    def test_daily_reminders_use_one_lookup(self):
+        subscribed = User.objects.create_user(username="subscribed", password="pass")
+        User.objects.create_user(username="unsubscribed", password="pass")
+        self._subscribe(subscribed, "/ok")
+        out = StringIO()
+        with self.assertNumQueries(2):
+            call_command("send_daily_reminders", stdout=out)
+        self.assertIn("Daily reminders sent: 1, No Subscription: 1", out.getvalue())
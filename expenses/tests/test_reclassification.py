@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Case, F, Sum, When
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from expenses.ledger_service import LedgerPostingService
+from expenses.models import (
+    Account,
+    Expense,
+    JournalEntry,
+    JournalLine,
+    LedgerPostingFailure,
+    TransactionFeedItem,
+)
+from expenses.reclassification_service import ExpenseReclassificationService
+
+
+@override_settings(LEDGER_WRITE_ENABLED=True)
+class ExpenseReclassificationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="reclass", password="pass")
+        self.bank = Account.objects.create(user=self.user, name="Bank", balance=Decimal("1000.00"), currency="₹")
+
+    def make_expenses(self, count, category="Food"):
+        return [
+            Expense.objects.create(
+                user=self.user, date=date(2024, 1, 1 + i), amount=Decimal("10.00") + i, description=f"Item {i}",
+                category=category, account=self.bank if i % 4 else None, currency="₹",
+            )
+            for i in range(count)
+        ]
+
+    def category_balances(self):
+        signed = Case(When(direction="DEBIT", then=F("base_amount")), default=-F("base_amount"))
+        rows = (
+            JournalLine.objects.filter(journal_entry__user=self.user, ledger_account__account_type="EXPENSE")
+            .values_list("ledger_account__name").annotate(total=Sum(signed))
+        )
+        return {name: total for name, total in rows if total}
+
+    def test_moves_ledger_amounts_and_derived_data(self):
+        expenses = self.make_expenses(6)
+        # Every fourth expense has no account and is not in the ledger.
+        self.assertEqual(self.category_balances(), {"Expense - Food": Decimal("51.00")})
+
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("expense-bulk-edit"), {
+            "expense_ids": [expense.pk for expense in expenses[:5]],
+            "bulk_category": " Travel ",
+            "bulk_payment_method": "UPI",
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.category_balances(), {"Expense - Food": Decimal("15.00"), "Expense - Travel": Decimal("36.00")})
+        self.assertEqual(
+            set(Expense.objects.filter(user=self.user).values_list("category", "payment_method")),
+            {("Travel", "UPI"), ("Food", "Cash")},
+        )
+        self.assertEqual(TransactionFeedItem.objects.filter(user=self.user, category="Travel").count(), 5)
+        self.assertGreater(Expense.objects.get(pk=expenses[1].pk).updated_at, expenses[1].updated_at)
+
+        # Deleting a reclassified expense reverses it out of its new category.
+        Expense.objects.get(pk=expenses[1].pk).delete()
+        self.assertEqual(self.category_balances(), {"Expense - Food": Decimal("15.00"), "Expense - Travel": Decimal("25.00")})
+
+    def test_statement_count_does_not_grow_with_selection(self):
+        def statements(count, category):
+            expenses = self.make_expenses(count, category)
+            with CaptureQueriesContext(connection) as queries:
+                updated = ExpenseReclassificationService.reclassify(
+                    self.user, [expense.pk for expense in expenses], category=f"{category} moved",
+                )
+            self.assertEqual(updated, count)
+            return len(queries)
+
+        self.assertEqual(statements(4, "Food"), statements(12, "Rent"))
+        self.assertEqual(JournalEntry.objects.filter(metadata__shadow_action="RECLASSIFY").count(), 3 + 9)
+
+    def test_payment_method_only_posts_nothing(self):
+        expenses = self.make_expenses(3)
+        entries = JournalEntry.objects.count()
+
+        updated = ExpenseReclassificationService.reclassify(
+            self.user, [expense.pk for expense in expenses], category="Food", payment_method="UPI",
+        )
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(JournalEntry.objects.count(), entries)
+        self.assertEqual(Expense.objects.filter(payment_method="UPI").count(), 3)
+
+    def test_failed_posting_is_retried_per_expense(self):
+        expenses = self.make_expenses(3)
+
+        with patch.object(LedgerPostingService, "shadow_post_expense_reclassifications", side_effect=RuntimeError("down")):
+            with self.assertLogs("expenses.models", "ERROR"):
+                ExpenseReclassificationService.reclassify(self.user, [expense.pk for expense in expenses], category="Travel")
+
+        failures = LedgerPostingFailure.objects.order_by("source_id")
+        self.assertEqual([failure.source_id for failure in failures], [expense.pk for expense in expenses])
+        for failure in failures:
+            LedgerPostingService.retry_shadow_failure(failure)
+        self.assertEqual(self.category_balances(), {"Expense - Travel": Decimal("23.00")})
@@ -0,0 +1,135 @@
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from unittest.mock import MagicMock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import ProgrammingError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from expenses.models import Account, Expense, Income, Transfer
+from expenses.search import (
+    IcontainsSearchBackend,
+    SQLiteFTS5SearchBackend,
+    get_search_backend,
+)
+
+
+@override_settings(TRANSACTION_FEED_READ_ENABLED=True)
+class FeedSearchBackendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="searcher", password="pass")
+        self.other = User.objects.create_user(username="someone", password="pass")
+        self.account = Account.objects.create(user=self.user, name="Bank", balance=Decimal("500.00"))
+        self.coffee = Expense.objects.create(
+            user=self.user, date=date(2024, 4, 1), amount=Decimal("4.50"),
+            description="Morning Cappuccino", category="Food", account=self.account,
+        )
+        self.fuel = Expense.objects.create(
+            user=self.user, date=date(2024, 4, 2), amount=Decimal("40.00"),
+            description="Fuel top-up", category="Transport", account=self.account,
+        )
+        Expense.objects.create(
+            user=self.other, date=date(2024, 4, 1), amount=Decimal("3.00"),
+            description="Cappuccino", category="Food",
+        )
+
+    def _search(self, query, item_type="EXPENSE", queryset=None, **kwargs):
+        queryset = queryset if queryset is not None else Expense.objects.filter(user=self.user)
+        return set(get_search_backend().filter(queryset, query, item_type, user=self.user, **kwargs).values_list("pk", flat=True))
+
+    def test_sqlite_uses_fts5_index(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTS5SearchBackend)
+
+    def test_substring_matches_are_case_insensitive(self):
+        self.assertEqual(self._search("cappucc"), {self.coffee.pk})
+        self.assertEqual(self._search("TRANSPORT"), {self.fuel.pk})
+
+    def test_short_queries_fall_back_to_icontains(self):
+        self.assertEqual(self._search("up"), {self.fuel.pk})
+        self.assertEqual(self._search("in"), {self.coffee.pk})
+
+    def test_index_follows_updates_and_deletes(self):
+        self.coffee.description = "Evening latte"
+        self.coffee.save()
+        self.assertEqual(self._search("cappuccino"), set())
+        self.assertEqual(self._search("latte"), {self.coffee.pk})
+
+        self.coffee.delete()
+        self.assertEqual(self._search("latte"), set())
+
+    def test_columns_limit_the_match(self):
+        self.assertEqual(self._search("Food", fields=("description",), columns=("description",)), set())
+
+    def test_other_types_and_quotes(self):
+        income = Income.objects.create(
+            user=self.user, date=date(2024, 4, 3), amount=Decimal("10.00"), source='Refund "store"',
+        )
+        results = self._search('"store"', item_type="INCOME", queryset=Income.objects.filter(user=self.user))
+        self.assertEqual(results, {income.pk})
+
+    def test_views_route_search_through_index(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("all-transactions"), {"search": "cappucc"})
+        self.assertEqual([row["pk"] for row in response.context["transactions"]], [self.coffee.pk])
+
+        savings = Account.objects.create(user=self.user, name="Savings", balance=Decimal("0.00"))
+        Transfer.objects.create(
+            user=self.user, from_account=self.account, to_account=savings,
+            amount=Decimal("5.00"), date=date(2024, 4, 5), description="Cappuccino fund",
+        )
+        response = self.client.get(reverse("account-detail", args=[self.account.pk]), {"q": "cappuccino"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {(row.transaction_type, row.pk) for row in response.context["ledger"]},
+            {("EXPENSE", self.coffee.pk), ("TRANSFER_OUT", Transfer.objects.get().pk)},
+        )
+
+
+class FallbackSearchBackendTest(TestCase):
+    def test_feed_reads_disabled_uses_icontains(self):
+        self.assertIsInstance(get_search_backend(), IcontainsSearchBackend)
+        self.assertNotIsInstance(get_search_backend(), SQLiteFTS5SearchBackend)
+
+    def test_icontains_uses_source_fields(self):
+        user = User.objects.create_user(username="plain", password="pass")
+        income = Income.objects.create(user=user, date=date(2024, 4, 3), amount=Decimal("10.00"), source="Bonus")
+        queryset = Income.objects.filter(user=user)
+        self.assertEqual(list(get_search_backend().filter(queryset, "bon", "INCOME")), [income])
+
+
+class PostgresSearchIndexMigrationTest(TestCase):
+    migration = import_module("expenses.migrations.0055_transactionfeeditem_search_index")
+
+    def _schema_editor(self, has_extension, can_create):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = (1,) if has_extension else None
+        editor = MagicMock()
+        editor.connection.vendor = "postgresql"
+        editor.connection.alias = "default"
+        editor.connection.cursor.return_value.__enter__.return_value = cursor
+
+        def execute(statement):
+            if "CREATE EXTENSION" in statement and not can_create:
+                raise ProgrammingError("permission denied to create extension")
+
+        editor.execute.side_effect = execute
+        return editor
+
+    def _indexes(self, editor):
+        return [call.args[0].split(" ON ")[0].split()[-1] for call in editor.execute.call_args_list if "INDEX" in call.args[0]]
+
+    def test_existing_extension_is_not_recreated(self):
+        editor = self._schema_editor(has_extension=True, can_create=False)
+        self.migration.create_search_index(None, editor)
+        self.assertFalse(any("EXTENSION" in call.args[0] for call in editor.execute.call_args_list))
+        self.assertIn("feed_description_trgm", self._indexes(editor))
+
+    def test_missing_privilege_skips_trigram_indexes(self):
+        editor = self._schema_editor(has_extension=False, can_create=False)
+        with self.assertLogs(self.migration.__name__, "WARNING"):
+            self.migration.create_search_index(None, editor)
+        self.assertEqual(self._indexes(editor), ["feed_search_tsv"])
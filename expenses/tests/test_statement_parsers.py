@@ -0,0 +1,195 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from expenses.import_service import ExpenseImporter, iter_upload_rows
+from expenses.models import Account, Expense
+from expenses.statement_parsers import (
+    StatementParseError,
+    detect_format,
+    parse_camt053,
+    parse_mt940,
+    parse_ofx,
+    parse_qif,
+)
+
+OFX = b"""OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><CURDEF>EUR
+<BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250301120000[-5:EST]<TRNAMT>-4.50<FITID>A1<NAME>Coffee Shop<MEMO>Card 1234</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250301<TRNAMT>-4.50<FITID>A2<NAME>Coffee Shop<MEMO>Card 1234</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250302<TRNAMT>1500.00<FITID>A3<NAME>Salary</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>notadate<TRNAMT>-1.00<FITID>A4<NAME>Broken</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20250303<TRNAMT>-60.00<FITID>A5<NAME>Groceries</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+QIF = b"""!Type:Bank
+D03/04/2025
+T-12.30
+PBakery
+LFood:Bread
+^
+D03/05'25
+T-40.00
+PFuel Station
+^
+D03/06/2025
+T250.00
+PRefund
+^
+"""
+
+CAMT = b"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+<BkToCstmrStmt><Stmt>
+<Ntry><Amt Ccy="EUR">19.99</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2025-03-07</Dt></BookgDt>
+<AcctSvcrRef>REF-1</AcctSvcrRef>
+<NtryDtls><TxDtls><RmtInf><Ustrd>Streaming subscription</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+<Ntry><Amt Ccy="EUR">100.00</Amt><CdtDbtInd>CRDT</CdtDbtInd><BookgDt><Dt>2025-03-08</Dt></BookgDt>
+<AcctSvcrRef>REF-2</AcctSvcrRef><AddtlNtryInf>Transfer in</AddtlNtryInf></Ntry>
+<Ntry><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>2025-03-09</Dt></BookgDt></Ntry>
+</Stmt></BkToCstmrStmt></Document>
+"""
+
+CAMT_NTRY_REF = """<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+<BkToCstmrStmt><Stmt>
+<Ntry><NtryRef>1</NtryRef><Amt Ccy="EUR">{amount}</Amt><CdtDbtInd>DBIT</CdtDbtInd><BookgDt><Dt>{day}</Dt></BookgDt>
+<NtryDtls><TxDtls><Refs><EndToEndId>E2E-1</EndToEndId></Refs>
+<RmtInf><Ustrd>{description}</Ustrd></RmtInf></TxDtls></NtryDtls></Ntry>
+</Stmt></BkToCstmrStmt></Document>
+"""
+
+MT940 = b""":20:STATEMENT1
+:25:NL91ABNA0417164300
+:28C:1/1
+:60F:C250301EUR1000,00
+:61:2503100310D25,00NTRFNONREF//B1
+:86:Electricity bill
+March
+:61:2503110311C500,00NTRFNONREF//B2
+:86:Salary
+:62F:C250311EUR1475,00
+-
+"""
+
+
+class StatementParserTest(TestCase):
+    def test_detect_format(self):
+        self.assertEqual(detect_format("export.QFX"), "ofx")
+        self.assertEqual(detect_format("camt053.xml"), "camt")
+        self.assertEqual(detect_format("bank.sta"), "mt940")
+        self.assertIsNone(detect_format("statement.csv"))
+
+    def test_ofx_records_and_bad_entry(self):
+        records = list(parse_ofx(io.BytesIO(OFX)))
+        self.assertEqual(len(records), 5)
+        first = records[0]
+        self.assertEqual((first.date, first.amount, first.bank_id), (date(2025, 3, 1), Decimal("-4.50"), "A1"))
+        self.assertEqual(first.description, "Coffee Shop - Card 1234")
+        self.assertEqual(first.currency, "EUR")
+        self.assertIsInstance(records[3], StatementParseError)
+        self.assertEqual(records[4].description, "Groceries")
+
+    def test_ofx_tags_split_across_reads(self):
+        class Trickle(io.BytesIO):
+            def read(self, size=-1):
+                return super().read(7)
+
+        self.assertEqual([r.bank_id for r in parse_ofx(Trickle(OFX)) if not isinstance(r, Exception)],
+                         ["A1", "A2", "A3", "A5"])
+
+    def test_qif(self):
+        records = list(parse_qif(io.BytesIO(QIF)))
+        self.assertEqual(records[0].category, "Food")
+        self.assertEqual(records[1].date, date(2025, 3, 5))
+        self.assertEqual(records[2].amount, Decimal("250.00"))
+        self.assertTrue(all(r.bank_id is None for r in records))
+
+    def test_qif_bad_short_year_is_a_row_error(self):
+        records = list(parse_qif(io.BytesIO(b"D1/2'xx\nT-1.00\n^\n" + QIF)))
+        self.assertIsInstance(records[0], StatementParseError)
+        self.assertEqual(records[1].description, "Bakery")
+
+    def test_camt053(self):
+        records = list(parse_camt053(io.BytesIO(CAMT)))
+        self.assertEqual(records[0].amount, Decimal("-19.99"))
+        self.assertEqual(records[0].description, "Streaming subscription")
+        self.assertEqual(records[0].bank_id, "REF-1")
+        self.assertEqual(records[1].amount, Decimal("100.00"))
+        self.assertIsInstance(records[2], StatementParseError)
+
+    def test_mt940(self):
+        records = list(parse_mt940(io.BytesIO(MT940)))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0].amount, Decimal("-25.00"))
+        self.assertEqual(records[0].description, "Electricity bill March")
+        self.assertEqual((records[0].bank_id, records[0].currency), ("B1", "EUR"))
+        self.assertEqual(records[1].amount, Decimal("500.00"))
+
+    def test_owner_references_are_not_bank_ids(self):
+        camt = CAMT_NTRY_REF.format(amount="5.00", day="2025-03-07", description="Bakery").encode()
+        self.assertIsNone(next(parse_camt053(io.BytesIO(camt))).bank_id)
+        mt940 = b":20:S\n:61:2503100310D25,00NTRFINVOICE-7\n:86:Rent\n-\n"
+        record = next(parse_mt940(io.BytesIO(mt940)))
+        self.assertIsNone(record.bank_id)
+
+
+class StatementImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="statements", password="pass")
+        self.account = Account.objects.create(user=self.user, name="Current", balance=Decimal("0.00"))
+
+    def _import(self, content, name, **kwargs):
+        importer = ExpenseImporter(self.user, "₹", categorize=lambda desc: "Misc", **kwargs)
+        return importer.run(iter_upload_rows(SimpleUploadedFile(name, content)))
+
+    def test_ofx_import_dedups_by_bank_id(self):
+        summary = self._import(OFX, "march.ofx", account=self.account)
+        # Two identical coffees on the same day have distinct FITIDs and are both kept.
+        self.assertEqual(summary["created_count"], 3)
+        self.assertEqual(summary["skipped_count"], 1)
+        self.assertEqual(summary["error_count"], 1)
+        self.assertEqual(summary["errors"][0]["row"], 4)
+        self.assertEqual(Expense.objects.filter(user=self.user, description="Coffee Shop - Card 1234").count(), 2)
+        self.assertEqual(
+            Expense.objects.get(description="Groceries").external_id, f"ofx:{self.account.pk}:A5",
+        )
+
+        again = self._import(OFX, "march-overlap.qfx", account=self.account)
+        self.assertEqual((again["created_count"], again["duplicate_count"]), (0, 3))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal("-69.00"))
+
+    def test_qif_uses_categories_and_row_dedup(self):
+        summary = self._import(QIF, "export.qif")
+        self.assertEqual((summary["created_count"], summary["skipped_count"]), (2, 1))
+        self.assertEqual(Expense.objects.get(description="Bakery").category, "Food")
+        self.assertEqual(Expense.objects.get(description="Fuel Station").category, "Misc")
+        self.assertEqual(Expense.objects.get(description="Bakery").external_id, "")
+        self.assertEqual(self._import(QIF, "export.qif")["duplicate_count"], 2)
+
+    def test_camt_and_mt940_imports(self):
+        self.assertEqual(self._import(CAMT, "camt.xml")["created_count"], 1)
+        summary = self._import(MT940, "statement.sta")
+        self.assertEqual(summary["created_count"], 1)
+        self.assertEqual(Expense.objects.get(external_id="mt940:-:B1").amount, Decimal("25.00"))
+
+    def test_camt_statements_reusing_entry_refs_keep_both_rows(self):
+        # Banks number NtryRef per statement, so consecutive statements repeat it.
+        first = CAMT_NTRY_REF.format(amount="5.00", day="2025-03-07", description="Bakery").encode()
+        second = CAMT_NTRY_REF.format(amount="42.00", day="2025-04-07", description="Pharmacy").encode()
+        self.assertEqual(self._import(first, "march.xml", account=self.account)["created_count"], 1)
+        self.assertEqual(self._import(second, "april.xml", account=self.account)["created_count"], 1)
+        self.assertEqual(
+            sorted(Expense.objects.filter(user=self.user).values_list("description", flat=True)),
+            ["Bakery", "Pharmacy"],
+        )
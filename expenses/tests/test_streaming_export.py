@@ -0,0 +1,86 @@
+import csv
+import io
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from expenses.models import Account, Expense, Income, Transfer
+from expenses.streaming_export import csv_chunks, iter_keyset, zip_stream
+
+
+class StreamingExportHelpersTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exporter", password="pass")
+        self.account = Account.objects.create(user=self.user, name="Bank", balance=Decimal("0.00"))
+        for i in range(11):
+            Expense.objects.create(
+                user=self.user, date=date(2024, 1, 1) + timedelta(days=i // 4), amount=Decimal(i + 1),
+                description=f"Item {i}", category="Misc", account=self.account if i % 2 else None,
+            )
+
+    def test_keyset_chunks_cover_ties_without_duplicates(self):
+        queryset = Expense.objects.filter(user=self.user)
+        rows = list(iter_keyset(queryset, ("description", "account__name"), chunk_size=3))
+        expected = list(queryset.order_by("-date", "-pk").values_list("description", "account__name"))
+        self.assertEqual(rows, expected)
+
+    def test_chunks_are_fetched_with_one_query_each(self):
+        queryset = Expense.objects.filter(user=self.user)
+        # 11 rows in chunks of 4 -> 3 queries, none per row for the account name.
+        with self.assertNumQueries(3):
+            list(iter_keyset(queryset, ("description", "account__name"), chunk_size=4))
+
+    def test_zip_stream_produces_a_valid_archive(self):
+        payload = b"".join(zip_stream([
+            ("a.csv", csv_chunks(["h"], ([i] for i in range(1000)))),
+            ("b.csv", csv_chunks(["x", "y"], [(1, 2)])),
+        ]))
+        with zipfile.ZipFile(io.BytesIO(payload)) as archive:
+            self.assertEqual(archive.namelist(), ["a.csv", "b.csv"])
+            self.assertEqual(len(archive.read("a.csv").decode().splitlines()), 1001)
+            self.assertEqual(archive.read("b.csv").decode().splitlines(), ["x,y", "1,2"])
+
+
+class StreamingExportViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="exportview", password="pass")
+        self.user.profile.tier = "PLUS"
+        self.user.profile.is_lifetime = True
+        self.user.profile.save()
+        self.client.force_login(self.user)
+        self.bank = Account.objects.create(user=self.user, name="Bank", balance=Decimal("100.00"))
+        self.cash = Account.objects.create(user=self.user, name="Cash", balance=Decimal("100.00"))
+        Expense.objects.create(
+            user=self.user, date=date(2024, 2, 1), amount=Decimal("5.00"),
+            description="Tea", category="Food", account=self.bank,
+        )
+        Income.objects.create(user=self.user, date=date(2024, 2, 2), amount=Decimal("50.00"), source="Gift")
+        Transfer.objects.create(
+            user=self.user, from_account=self.bank, to_account=self.cash, amount=Decimal("10.00"), date=date(2024, 2, 3),
+        )
+
+    def test_single_entity_streams_csv(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses"]})
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[1], ["2024-02-01", "Tea", "5.00", "Food", "Bank", "Expense"])
+
+    def test_multiple_entities_stream_zip(self):
+        response = self.client.post(reverse("export-data"), {"entities": ["expenses", "incomes", "transfers", "goals"]})
+        self.assertTrue(response.streaming)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertEqual(
+                archive.namelist(), ["expenses.csv", "incomes.csv", "transfers.csv", "savings_goals.csv"]
+            )
+            transfers = archive.read("transfers.csv").decode().splitlines()
+            self.assertEqual(transfers[1], "2024-02-03,Bank,Cash,10.00,")
+
+    def test_filtered_expense_export_streams(self):
+        response = self.client.get(reverse("export-expenses"), {"year": "2024"})
+        self.assertTrue(response.streaming)
+        content = b"".join(response.streaming_content).decode()
+        self.assertIn("Tea", content)
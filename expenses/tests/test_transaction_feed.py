@@ -0,0 +1,144 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from expenses.models import (
+    Account,
+    Expense,
+    GoalContribution,
+    Income,
+    Loan,
+    LoanRepayment,
+    SavingsGoal,
+    TransactionFeedItem,
+    Transfer,
+)
+
+
+class TransactionFeedSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="feeduser", password="pass")
+        self.bank = Account.objects.create(user=self.user, name="Bank", balance=Decimal("5000.00"), currency="₹")
+        self.cash = Account.objects.create(user=self.user, name="Cash", balance=Decimal("100.00"), currency="₹")
+
+    def _item(self, item_type, source_id):
+        return TransactionFeedItem.objects.get(item_type=item_type, source_id=source_id)
+
+    def test_expense_create_update_delete(self):
+        expense = Expense.objects.create(
+            user=self.user, date=date(2024, 5, 1), amount=Decimal("25.00"),
+            description="Lunch", category="Food", account=self.bank,
+        )
+        item = self._item("EXPENSE", expense.pk)
+        self.assertEqual(
+            (item.user_id, item.date, item.category, item.account_label, item.base_amount),
+            (self.user.pk, date(2024, 5, 1), "Food", "Bank", Decimal("25.00")),
+        )
+
+        expense.amount = Decimal("30.00")
+        expense.category = "Dining"
+        expense.save()
+        item = self._item("EXPENSE", expense.pk)
+        self.assertEqual((item.category, item.base_amount), ("Dining", Decimal("30.00")))
+        self.assertEqual(TransactionFeedItem.objects.count(), 1)
+
+        expense.delete()
+        self.assertFalse(TransactionFeedItem.objects.exists())
+
+    def test_transfer_and_income_labels(self):
+        transfer = Transfer.objects.create(
+            user=self.user, from_account=self.bank, to_account=self.cash,
+            amount=Decimal("200.00"), date=date(2024, 5, 2),
+        )
+        income = Income.objects.create(
+            user=self.user, date=date(2024, 5, 3), amount=Decimal("900.00"),
+            source="Salary", account=self.bank,
+        )
+
+        item = self._item("TRANSFER", transfer.pk)
+        self.assertEqual(item.account_label, "Bank → Cash")
+        self.assertEqual(item.counter_account_id, self.cash.pk)
+        self.assertEqual(self._item("INCOME", income.pk).category, "Salary")
+
+    def test_account_rename_relabels_rows(self):
+        expense = Expense.objects.create(
+            user=self.user, date=date(2024, 5, 1), amount=Decimal("10.00"),
+            description="Tea", category="Food", account=self.bank,
+        )
+        transfer = Transfer.objects.create(
+            user=self.user, from_account=self.cash, to_account=self.bank,
+            amount=Decimal("20.00"), date=date(2024, 5, 2),
+        )
+
+        self.bank.refresh_from_db()
+        self.bank.name = "Savings"
+        self.bank.save()
+
+        self.assertEqual(self._item("EXPENSE", expense.pk).account_label, "Savings")
+        self.assertEqual(self._item("TRANSFER", transfer.pk).account_label, "Cash → Savings")
+
+    def test_loan_repayment_and_cascaded_goal_delete(self):
+        loan = Loan.objects.create(
+            user=self.user, name="Car", loan_type="CAR", initial_principal=Decimal("10000.00"),
+            duration_months=12, start_date=date(2024, 1, 1), currency="₹",
+        )
+        repayment = LoanRepayment.objects.create(
+            loan=loan, from_account=self.bank, amount=Decimal("900.00"),
+            principal_portion=Decimal("800.00"), interest_portion=Decimal("100.00"), date=date(2024, 2, 1),
+        )
+        item = self._item("LOAN", repayment.pk)
+        self.assertEqual((item.parent_id, item.category, item.description), (loan.pk, "Car", "Loan repayment - Car"))
+
+        goal = SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("1000.00"))
+        contribution = GoalContribution.objects.create(goal=goal, account=self.bank, amount=Decimal("50.00"))
+        self.assertEqual(self._item("GOAL", contribution.pk).base_amount, Decimal("50.00"))
+
+        goal.delete()
+        self.assertFalse(TransactionFeedItem.objects.filter(item_type="GOAL").exists())
+
+    def test_rebuild_command_restores_missing_rows(self):
+        Expense.objects.create(
+            user=self.user, date=date(2024, 5, 1), amount=Decimal("10.00"),
+            description="Tea", category="Food", account=self.bank,
+        )
+        Transfer.objects.create(
+            user=self.user, from_account=self.bank, to_account=self.cash,
+            amount=Decimal("20.00"), date=date(2024, 5, 2),
+        )
+        TransactionFeedItem.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_transaction_feed", "--user-id", str(self.user.pk), stdout=out)
+
+        self.assertIn("EXPENSE=1", out.getvalue())
+        self.assertEqual(TransactionFeedItem.objects.count(), 2)
+
+
+@override_settings(TRANSACTION_FEED_READ_ENABLED=True)
+class AllTransactionsFeedReadTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="feedreader", password="pass")
+        self.client.force_login(self.user)
+        self.bank = Account.objects.create(user=self.user, name="Bank", balance=Decimal("1000.00"), currency="₹")
+
+    def test_list_reads_source_ids_from_feed(self):
+        expense = Expense.objects.create(
+            user=self.user, date=date(2024, 6, 1), amount=Decimal("12.00"),
+            description="Snacks", category="Food", account=self.bank,
+        )
+        Income.objects.create(user=self.user, date=date(2024, 6, 2), amount=Decimal("50.00"), source="Gift")
+
+        response = self.client.get(reverse("all-transactions"), {"year": "2024", "month": "6"})
+
+        rows = response.context["transactions"]
+        self.assertEqual([row["type"] for row in rows], ["INCOME", "EXPENSE"])
+        self.assertEqual(rows[1]["pk"], expense.pk)
+        self.assertEqual(rows[1]["acc"], "Bank")
+        self.assertEqual(response.context["filtered_count"], 2)
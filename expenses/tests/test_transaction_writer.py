@@ -0,0 +1,152 @@
+from datetime import date
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from expenses.models import (
+    Account,
+    Expense,
+    GoalContribution,
+    Income,
+    JournalEntry,
+    JournalLine,
+    SavingsGoal,
+    TransactionFeedItem,
+    Transfer,
+)
+from expenses.transaction_writer import BalanceChange, TransactionWriter
+
+
+class TransactionWriterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="writer", password="pass")
+        self.bank = Account.objects.create(user=self.user, name="Bank", balance=Decimal("1000.00"), currency="₹")
+        self.wallet = Account.objects.create(user=self.user, name="Wallet", balance=Decimal("100.00"), currency="$")
+
+    def balances(self):
+        return dict(Account.objects.filter(user=self.user).values_list("name", "balance"))
+
+    @patch("expenses.transaction_writer.get_exchange_rate", return_value=Decimal("0.012"))
+    def test_batch_nets_one_update_per_account(self, rate):
+        changes = [
+            BalanceChange(self.bank.pk, Decimal("-50.00"), "₹"),
+            BalanceChange(self.bank.pk, Decimal("50.00"), "₹"),
+            BalanceChange(self.wallet.pk, Decimal("-500.00"), "₹"),
+            BalanceChange(self.wallet.pk, Decimal("-250.00"), "₹"),
+            BalanceChange(None, Decimal("10.00"), "₹"),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            deltas = TransactionWriter.apply(changes)
+
+        self.assertEqual(deltas, {self.wallet.pk: Decimal("-9.00")})
+        # One currency lookup and a single UPDATE; the bank nets to zero and is not touched.
+        self.assertEqual(len(queries), 2)
+        self.assertIn("UPDATE", queries[1]["sql"])
+        rate.assert_called_once_with("₹", "$")
+        self.assertEqual(self.balances(), {"Bank": Decimal("1000.00"), "Wallet": Decimal("91.00")})
+
+    def test_expense_edit_applies_net_delta(self):
+        expense = Expense.objects.create(
+            user=self.user, date=date(2024, 1, 1), amount=Decimal("40.00"), description="Lunch", category="Food",
+            account=self.bank, currency="₹",
+        )
+        expense.amount = Decimal("60.00")
+        with CaptureQueriesContext(connection) as queries:
+            expense.save()
+        account_writes = [q["sql"] for q in queries if q["sql"].startswith("UPDATE") and "expenses_account" in q["sql"]]
+        self.assertEqual(len(account_writes), 1)
+        self.assertEqual(self.balances()["Bank"], Decimal("940.00"))
+
+        income = Income.objects.create(
+            user=self.user, date=date(2024, 1, 2), amount=Decimal("25.00"), source="Refund", account=self.bank,
+            currency="₹",
+        )
+        income.account = None
+        income.save()
+        expense.delete()
+        self.assertEqual(self.balances()["Bank"], Decimal("1000.00"))
+
+    @patch("expenses.transaction_writer.get_exchange_rate", return_value=Decimal("0.012"))
+    @patch("expenses.models.get_exchange_rate", return_value=Decimal("0.012"))
+    def test_cross_currency_transfer_and_contribution(self, _model_rate, _writer_rate):
+        transfer = Transfer.objects.create(
+            user=self.user, from_account=self.bank, to_account=self.wallet, amount=Decimal("500.00"), date=date(2024, 1, 1),
+        )
+        self.assertEqual(self.balances(), {"Bank": Decimal("500.00"), "Wallet": Decimal("106.00")})
+
+        transfer.amount = Decimal("250.00")
+        transfer.save()
+        self.assertEqual(self.balances(), {"Bank": Decimal("750.00"), "Wallet": Decimal("103.00")})
+
+        transfer.delete()
+        self.assertEqual(self.balances(), {"Bank": Decimal("1000.00"), "Wallet": Decimal("100.00")})
+
+        goal = SavingsGoal.objects.create(user=self.user, name="Trip", target_amount=Decimal("5000"), currency="₹")
+        contribution = GoalContribution.objects.create(goal=goal, account=self.wallet, amount=Decimal("1000.00"))
+        self.assertEqual(self.balances()["Wallet"], Decimal("88.00"))
+        contribution.delete()
+        self.assertEqual(self.balances()["Wallet"], Decimal("100.00"))
+
+
+@override_settings(LEDGER_WRITE_ENABLED=True)
+@patch("expenses.ledger_service.get_exchange_rate", return_value=Decimal("83.00"))
+@patch("expenses.transaction_writer.get_exchange_rate", return_value=Decimal("83.00"))
+@patch("expenses.models.get_exchange_rate", return_value=Decimal("83.00"))
+class BulkExpenseDeleteTest(TestCase):
+    def make_user(self, username, count):
+        user = User.objects.create_user(username=username, password="pass")
+        bank = Account.objects.create(user=user, name="Bank", balance=Decimal("1000.00"), currency="₹")
+        card = Account.objects.create(user=user, name="Card", balance=Decimal("50.00"), currency="$")
+        expenses = []
+        for i in range(count):
+            expenses.append(Expense.objects.create(
+                user=user, date=date(2024, 1, 1 + i), amount=Decimal("10.25") + i, description=f"Item {i}",
+                category="Food" if i % 2 else "Travel", currency="$" if i % 3 == 0 else "₹",
+                account=(bank, card, None)[i % 3],
+            ))
+        return user, expenses
+
+    def snapshot(self, user):
+        balances = dict(Account.objects.filter(user=user).values_list("name", "balance"))
+        reversals = sorted(
+            JournalLine.objects.filter(journal_entry__user=user, journal_entry__status="REVERSED")
+            .values_list("journal_entry__description", "direction", "amount", "base_amount", "ledger_account__name")
+        )
+        return balances, reversals
+
+    def test_matches_deleting_one_by_one(self, *_rates):
+        single_user, single_expenses = self.make_user("single", 6)
+        bulk_user, bulk_expenses = self.make_user("bulk", 6)
+
+        for expense in single_expenses[:5]:
+            expense.delete()
+        deleted = TransactionWriter.delete_expenses(bulk_user, [expense.pk for expense in bulk_expenses[:5]])
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(TransactionWriter.deleting_expenses_in_bulk())
+        self.assertEqual(self.snapshot(bulk_user), self.snapshot(single_user))
+        self.assertEqual(list(Expense.objects.filter(user=bulk_user)), [bulk_expenses[5]])
+        self.assertEqual(
+            list(TransactionFeedItem.objects.filter(user=bulk_user).values_list("source_id", flat=True)),
+            [bulk_expenses[5].pk],
+        )
+        # Rerunning for ids that are gone (or belong to someone else) does nothing.
+        self.assertEqual(TransactionWriter.delete_expenses(bulk_user, [single_expenses[5].pk, bulk_expenses[0].pk]), 0)
+        self.assertTrue(Expense.objects.filter(pk=single_expenses[5].pk).exists())
+
+    def test_statement_count_does_not_grow_with_selection(self, *_rates):
+        def statements(count):
+            user, expenses = self.make_user(f"user{count}", count)
+            with CaptureQueriesContext(connection) as queries:
+                TransactionWriter.delete_expenses(user, [expense.pk for expense in expenses])
+            deletes = [q["sql"] for q in queries if q["sql"].startswith('DELETE FROM "expenses_expense"')]
+            self.assertEqual(len(deletes), 1)
+            return len(queries)
+
+        self.assertEqual(statements(4), statements(12))
+        # Every third expense has no account and posts no reversal.
+        self.assertEqual(JournalEntry.objects.filter(status="REVERSED").count(), 3 + 8)
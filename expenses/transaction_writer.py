@@ -0,0 +1,127 @@
+"""
+Account balance changes for transaction writes. A write, or a batch of them,
+is reduced to one net delta per account in that account's currency, and each
+delta is applied with a single ``UPDATE ... SET balance = balance + delta`` in
+primary key order. Balances are never read-modify-written, so concurrent
+writes only hold the account row for that one statement and always lock
+accounts in the same order.
+
+``delete_expenses`` is the set-based form of ``Expense.delete`` for bulk
+deletes: one reversal batch, bulk ledger postings and a queryset delete whose
+per-row ``post_delete`` receivers leave their work to those bulk steps.
+"""
+import threading
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .data_epoch import DataEpochService
+from .models import (
+    Account,
+    Expense,
+    TransactionFeedItem,
+    _build_ledger_version,
+    _expense_ledger_snapshot,
+    _record_category_change,
+    _run_ledger_shadow,
+)
+from .utils import get_exchange_rate
+
+# ``amount`` is signed (negative debits the account) and in ``currency``.
+BalanceChange = namedtuple('BalanceChange', ['account_id', 'amount', 'currency'])
+
+_bulk_delete = threading.local()
+
+
+class TransactionWriter:
+    @staticmethod
+    def deleting_expenses_in_bulk():
+        """True while ``delete_expenses`` deletes its rows; see ``expenses.signals``."""
+        return getattr(_bulk_delete, 'active', False)
+
+    @staticmethod
+    def account_currencies(account_ids):
+        return dict(Account.objects.filter(pk__in=account_ids).values_list('pk', 'currency'))
+
+    @classmethod
+    def deltas(cls, changes):
+        """{account_id: net delta in account currency}; accounts that net to zero are left out."""
+        changes = [change for change in changes if change.account_id and change.amount]
+        if not changes:
+            return {}
+        currencies = cls.account_currencies({change.account_id for change in changes})
+        rates = {}
+        deltas = {}
+        for change in changes:
+            account_currency = currencies.get(change.account_id)
+            if account_currency is None:
+                continue
+            amount = change.amount
+            if change.currency != account_currency:
+                pair = (change.currency, account_currency)
+                if pair not in rates:
+                    rates[pair] = get_exchange_rate(*pair)
+                amount = (amount * rates[pair]).quantize(Decimal('0.01'))
+            deltas[change.account_id] = deltas.get(change.account_id, Decimal('0')) + amount
+        return {account_id: delta for account_id, delta in deltas.items() if delta}
+
+    @classmethod
+    def apply(cls, changes):
+        """Applies ``BalanceChange``s and returns the deltas written. Call inside the write's transaction."""
+        deltas = cls.deltas(changes)
+        now = timezone.now()
+        for account_id in sorted(deltas):
+            Account.objects.filter(pk=account_id).update(balance=F('balance') + deltas[account_id], updated_at=now)
+        return deltas
+
+    @classmethod
+    def delete_expenses(cls, user, expense_ids):
+        """
+        Deletes ``user``'s expenses among ``expense_ids`` and returns how many
+        were deleted. Balances, ledger reversals, feed rows and the category
+        model end up as if each expense had been deleted on its own, but the
+        statement count does not grow with the selection (beyond Django's
+        100-row DELETE batches): the per-row ``post_delete`` receivers skip
+        the work that is done here in one bulk step each.
+        """
+        with transaction.atomic():
+            expenses = list(
+                Expense.objects.select_for_update(of=('self',)).filter(user=user, pk__in=expense_ids).order_by('pk')
+            )
+            if not expenses:
+                return 0
+            ids = [expense.pk for expense in expenses]
+
+            cls.apply(BalanceChange(expense.account_id, expense.amount, expense.currency) for expense in expenses)
+
+            def _post_shadow_entries():
+                from .ledger_service import LedgerPostingService
+
+                LedgerPostingService.shadow_post_expense_deletes(user=user, expenses=expenses)
+
+            _run_ledger_shadow(
+                _post_shadow_entries,
+                failures=[
+                    ('EXPENSE', expense.pk, 'DELETE', {
+                        'handler': 'expense_delete',
+                        'version_token': _build_ledger_version(expense, 'DELETE'),
+                        'expense': _expense_ledger_snapshot(expense),
+                    })
+                    for expense in expenses
+                ],
+            )
+
+            _bulk_delete.active = True
+            try:
+                deleted = Expense.objects.filter(pk__in=ids).delete()[1].get(Expense._meta.label, 0)
+            finally:
+                _bulk_delete.active = False
+            if getattr(settings, 'TRANSACTION_FEED_ENABLED', True):
+                TransactionFeedItem.objects.filter(item_type='EXPENSE', source_id__in=ids).delete()
+            _record_category_change(user, removed=[(expense.description, expense.category) for expense in expenses])
+            DataEpochService.bump(user)
+        return deleted
@@ -17,6 +17,7 @@ urlpatterns = [
     path('demo/', views.demo_login, name='demo_login'),
     path('demo-signup/', views.demo_signup, name='demo_signup'),
     path('upload/', views.upload_view, name='upload'),
+    path('upload/jobs/<int:pk>/', views.ImportJobStatusView.as_view(), name='import-job-status'),
     path('export/', views.export_expenses, name='export-expenses'),
     path('transactions/', views.AllTransactionsListView.as_view(), name='all-transactions'),
     path('expenses/', views.ExpenseListView.as_view(), name='expense-list'),
@@ -44,6 +45,7 @@ urlpatterns = [
     path('accounts/<int:pk>/delete/', views.AccountDeleteView.as_view(), name='account-delete'),
     path('accounts/<int:pk>/restore/', views.AccountRestoreView.as_view(), name='account-restore'),
     path('accounts/<int:pk>/', views.AccountDetailView.as_view(), name='account-detail'),
+    path('api/accounts/<int:pk>/balance-history/', views.AccountBalanceHistoryView.as_view(), name='account-balance-history'),
     path('accounts/quick-add/', views.AccountQuickCreateView.as_view(), name='account-quick-create'),
     
     # Transfers
@@ -67,6 +69,8 @@ urlpatterns = [
     path('settings/language/', views.LanguageUpdateView.as_view(), name='language-settings'),
     path('settings/profile/', views.ProfileUpdateView.as_view(), name='profile-settings'),
     path('settings/export/', views.DataExportView.as_view(), name='export-data'),
+    path('settings/export/jobs/<int:pk>/', views.ExportJobStatusView.as_view(), name='export-job-status'),
+    path('settings/export/jobs/<int:pk>/download/', views.ExportJobDownloadView.as_view(), name='export-job-download'),
     path('settings/', views.SettingsHomeView.as_view(), name='settings-home'), # Settings Home
     path('account/delete/', views.UserDeleteView.as_view(), name='user-delete'),
     path('tutorial/complete/', views.complete_tutorial, name='complete-tutorial'),
@@ -101,6 +105,7 @@ urlpatterns = [
     path('api/resend-verification/', views.resend_verification_email, name='resend-verification'),
     path('api/predict-category/', views.predict_category_view, name='predict-category'),
     path('api/parse-expense/', views.parse_expense_view, name='parse-expense'),
+    path('api/parse-expenses/', views.parse_expense_batch_view, name='parse-expense-batch'),
     path('api/start-trial/', views_payment.start_trial, name='start-trial'),
     
     # Notification URLs
@@ -115,6 +120,9 @@ urlpatterns = [
     path('api/cron/ledger/retry-failures/', views.trigger_ledger_retry_view, name='cron-ledger-retry-failures'),
     path('api/cron/ledger/reconcile/', views.trigger_ledger_reconcile_view, name='cron-ledger-reconcile'),
     path('api/cron/ledger/maintenance/', views.trigger_ledger_maintenance_view, name='cron-ledger-maintenance'),
+    path('api/cron/imports/', views.trigger_import_jobs_view, name='cron-import-jobs'),
+    path('api/cron/exports/', views.trigger_export_jobs_view, name='cron-export-jobs'),
+    path('api/cron/jobs/<int:pk>/', views.cron_job_status_view, name='cron-job-status'),
 
     # Loans
     path('loans/', views.LoanListView.as_view(), name='loan-list'),
@@ -1,5 +1,4 @@
-from collections import defaultdict
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
 from itertools import chain
 
@@ -8,7 +7,6 @@ from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from django.db.models import Q
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
@@ -17,9 +15,10 @@ from django.views.generic import CreateView, DeleteView, ListView, UpdateView, V
 
 from finance_tracker.plans import get_limit
 
+from ..balance_history_service import AccountBalanceHistoryService
 from ..forms import AccountForm, TransferForm
-from ..ledger_read_service import LedgerReadService
 from ..models import Account, Expense, GoalContribution, Income, LoanRepayment, Transfer, _run_ledger_shadow
+from ..search import get_search_backend
 from ..utils import get_exchange_rate
 from .mixins import RecurringTransactionMixin
 
@@ -311,12 +310,13 @@ class AccountDetailView(LoginRequiredMixin, View):
         loan_repayments = LoanRepayment.objects.filter(loan__user=request.user, from_account=account).select_related('loan')
 
         if query:
-            expenses = expenses.filter(Q(description__icontains=query) | Q(category__icontains=query))
-            incomes = incomes.filter(Q(description__icontains=query) | Q(source__icontains=query))
-            transfers_from = transfers_from.filter(Q(description__icontains=query))
-            transfers_to = transfers_to.filter(Q(description__icontains=query))
-            contributions = contributions.filter(Q(goal__name__icontains=query))
-            loan_repayments = loan_repayments.filter(Q(loan__name__icontains=query))
+            search = get_search_backend()
+            expenses = search.filter(expenses, query, 'EXPENSE', user=request.user)
+            incomes = search.filter(incomes, query, 'INCOME', user=request.user)
+            transfers_from = search.filter(transfers_from, query, 'TRANSFER', user=request.user)
+            transfers_to = search.filter(transfers_to, query, 'TRANSFER', user=request.user)
+            contributions = search.filter(contributions, query, 'GOAL', user=request.user)
+            loan_repayments = search.filter(loan_repayments, query, 'LOAN', user=request.user)
 
         expenses = expenses.order_by('-date')
         incomes = incomes.order_by('-date')
@@ -448,144 +448,38 @@ class AccountDetailView(LoginRequiredMixin, View):
         return render(request, self.template_name, context)
 
     def get_trend_data(self, account, user):
-        
-        today = date.today()
-        
-        # Determine range and frequency
-        first_tx = self.get_all_transactions(account, user).order_by('date').first()
-        earliest_date = first_tx['date'] if first_tx else today
-        
-        use_monthly = (today - earliest_date).days > 90
-        
-        if use_monthly:
-            # Monthly for last 12 months
-            labels = []
-            values = []
-            
-            # Get all transactions for last 13 months (to get starting balance of 12th month)
-            start_date = (today.replace(day=1) - timedelta(days=365)).replace(day=1)
-            transactions = self.get_all_transactions(account, user, start_date)
-            
-            # Group by month
-            monthly_diffs = defaultdict(Decimal)
-            for tx in transactions:
-                # Month key: '2026-04'
-                key = tx['date'].strftime('%Y-%m')
-                monthly_diffs[key] += tx['net_amount']
-                
-            current_bal = LedgerReadService.get_account_balance(account)
-            check_date = today
-            
-            for i in range(13): # 12 months + start point
-                labels.append(check_date.strftime('%b %y'))
-                values.append(float(current_bal))
-                
-                key = check_date.strftime('%Y-%m')
-                current_bal -= monthly_diffs[key]
-                
-                # Previous month
-                check_date = (check_date.replace(day=1) - timedelta(days=1))
-                
-            labels.reverse()
-            values.reverse()
-            return {'labels': labels, 'values': values, 'type': 'monthly'}
-        else:
-            # Daily for last 30 days
-            labels = []
-            values = []
-            
-            start_date = today - timedelta(days=30)
-            transactions = self.get_all_transactions(account, user, start_date)
-            
-            # Group by date
-            daily_diffs = defaultdict(Decimal)
-            for tx in transactions:
-                daily_diffs[tx['date']] += tx['net_amount']
-                
-            current_bal = LedgerReadService.get_account_balance(account)
-            
-            for i in range(31): # 30 days + start point
-                d = today - timedelta(days=i)
-                labels.append(d.strftime('%d %b'))
-                values.append(float(current_bal))
-                
-                current_bal -= daily_diffs.get(d, Decimal('0.00'))
-                
-            labels.reverse()
-            values.reverse()
-            return {'labels': labels, 'values': values, 'type': 'daily'}
+        resolution = AccountBalanceHistoryService.get_default_resolution(account)
+        series = AccountBalanceHistoryService.get_account_series(account, resolution=resolution)
+        label_format = '%b %y' if resolution == 'monthly' else '%d %b'
+        return {
+            'labels': [point['period'].strftime(label_format) for point in series],
+            'values': [float(point['balance']) for point in series],
+            'type': resolution,
+        }
 
-    def get_all_transactions(self, account, user, start_date=None):
-        """Returns a combined queryset-like of all transactions affecting account balance."""
-        
-        expenses = Expense.objects.filter(user=user, account=account)
-        incomes = Income.objects.filter(user=user, account=account)
-        transfers_out = Transfer.objects.filter(user=user, from_account=account)
-        transfers_in = Transfer.objects.filter(user=user, to_account=account).select_related('from_account')
-        contributions = GoalContribution.objects.filter(goal__user=user, account=account).select_related('goal')
-        loan_repayments = LoanRepayment.objects.filter(loan__user=user, from_account=account).select_related('loan')
-        
-        if start_date:
-            expenses = expenses.filter(date__gte=start_date)
-            incomes = incomes.filter(date__gte=start_date)
-            transfers_out = transfers_out.filter(date__gte=start_date)
-            transfers_in = transfers_in.filter(date__gte=start_date)
-            contributions = contributions.filter(date__gte=start_date)
-            loan_repayments = loan_repayments.filter(date__gte=start_date)
-            
-        # For simplicity, we'll manually handle the currency conversion logic in Python 
-        # because doing it in SQL with exchange rates is complex and might be slow for few records.
-        # But we'll collect them all.
-        
-        all_tx = []
-        for e in expenses.values('date', 'amount', 'currency'):
-            amt = e['amount']
-            if e['currency'] != account.currency:
-                rate = get_exchange_rate(e['currency'], account.currency)
-                amt = (amt * rate).quantize(Decimal('0.01'))
-            all_tx.append({'date': e['date'], 'net_amount': -amt})
-            
-        for i in incomes.values('date', 'amount', 'currency'):
-            amt = i['amount']
-            if i['currency'] != account.currency:
-                rate = get_exchange_rate(i['currency'], account.currency)
-                amt = (amt * rate).quantize(Decimal('0.01'))
-            all_tx.append({'date': i['date'], 'net_amount': amt})
-            
-        for t in transfers_out.values('date', 'amount'):
-            all_tx.append({'date': t['date'], 'net_amount': -t['amount']})
-            
-        for t in transfers_in:
-            amt = t.amount
-            if t.from_account.currency != account.currency:
-                rate = get_exchange_rate(t.from_account.currency, account.currency)
-                amt = (amt * rate).quantize(Decimal('0.01'))
-            all_tx.append({'date': t.date, 'net_amount': amt})
-            
-        for c in contributions:
-            amt = c.amount
-            if c.goal.currency != account.currency:
-                rate = get_exchange_rate(c.goal.currency, account.currency)
-                amt = (amt * rate).quantize(Decimal('0.01'))
-            all_tx.append({'date': c.date, 'net_amount': -amt})
 
-        for lr in loan_repayments:
-            amt = lr.amount
-            if lr.loan.currency != account.currency:
-                rate = get_exchange_rate(lr.loan.currency, account.currency)
-                amt = (amt * rate).quantize(Decimal('0.01'))
-            all_tx.append({'date': lr.date, 'net_amount': -amt})
-            
-        # Return as a simple list of dicts
-        # Sort it if needed, but the grouping logic handles it
-        
-        # Wrap in a way that allows .order_by('date').first() if no start_date
-        class PseudoQS(list):
-            def order_by(self, field):
-                rev = field.startswith('-')
-                f = field.lstrip('-')
-                return PseudoQS(sorted(self, key=lambda x: x[f], reverse=rev))
-            def first(self):
-                return self[0] if self else None
-                
-        return PseudoQS(all_tx)
+class AccountBalanceHistoryView(LoginRequiredMixin, View):
+    """JSON closing-balance series for an account (``resolution``, ``start``, ``end`` query params)."""
+
+    def get(self, request, pk):
+        account = get_object_or_404(Account, pk=pk, user=request.user)
+        if request.user.profile.is_account_locked(account):
+            return JsonResponse({'error': _("This account is locked.")}, status=403)
+
+        resolution = request.GET.get('resolution') or AccountBalanceHistoryService.get_default_resolution(account)
+        try:
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+            series = AccountBalanceHistoryService.get_account_series(account, resolution=resolution, start=start, end=end)
+        except ValueError as exc:
+            return JsonResponse({'error': str(exc)}, status=400)
+
+        return JsonResponse({
+            'account': account.pk,
+            'currency': account.currency,
+            'resolution': resolution,
+            'points': [
+                {'period': point['period'].isoformat(), 'balance': str(point['balance'])}
+                for point in series
+            ],
+        })
@@ -1,13 +1,18 @@
 import calendar
+import hashlib
 from datetime import datetime
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import CharField, F, Q, Sum, Value
+from django.core.cache import cache
+from django.db.models import CharField, F, Sum, Value
 from django.db.models.functions import Cast
 from django.db.models.functions import Concat
 from django.views.generic import ListView
 
-from ..models import Expense, Income, LoanRepayment, Transfer
+from ..models import Expense, Income, LoanRepayment, TransactionFeedItem, Transfer
+from ..pagination import Cursor, InvalidCursor, UnionKeysetPaginator
+from ..search import get_search_backend
 
 
 class AllTransactionsListView(LoginRequiredMixin, ListView):
@@ -15,183 +20,207 @@ class AllTransactionsListView(LoginRequiredMixin, ListView):
     context_object_name = 'transactions'
     paginate_by = 25
 
-    def get_queryset(self):
+    # Cursor pages reuse the totals computed for page 1 of the same filters.
+    totals_cache_timeout = 300
+
+    def _get_filters(self):
+        search_query = self.request.GET.get('search')
+        start_date = self.request.GET.get('start_date')
+        end_date = self.request.GET.get('end_date')
+        selected_years = self.request.GET.getlist('year')
+        selected_months = self.request.GET.getlist('month')
+        selected_types = self.request.GET.getlist('type')
+
+        if not (start_date or end_date or selected_years or selected_months or search_query):
+            selected_years = [str(datetime.now().year)]
+            selected_months = [str(datetime.now().month)]
+
+        return {
+            'search_query': search_query,
+            'start_date': start_date,
+            'end_date': end_date,
+            'selected_years': selected_years,
+            'selected_months': selected_months,
+            'selected_types': selected_types,
+        }
+
+    @staticmethod
+    def _use_feed():
+        return getattr(settings, 'TRANSACTION_FEED_READ_ENABLED', False)
+
+    def _filtered_querysets(self, filters):
+        """Per-type querysets (feed rows or source models) with the search and date filters applied."""
         user = self.request.user
-        loan_pk_field = Value(None, output_field=CharField())
-        
-        # 1. Normalize Expenses
-        expenses = Expense.objects.filter(user=user).annotate(
-            type=Value('EXPENSE', output_field=CharField()),
-            cat=F('category'),
-            acc=F('account__name'),
-            unified_amount=F('base_amount'),
-            tx_description=F('description'),
-            loan_pk=loan_pk_field,
-        ).values('pk', 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
+        if self._use_feed():
+            feed = TransactionFeedItem.objects.filter(user=user)
+            querysets = {row_type: feed.filter(item_type=row_type) for row_type in ('EXPENSE', 'INCOME', 'TRANSFER', 'LOAN')}
+        else:
+            querysets = {
+                'EXPENSE': Expense.objects.filter(user=user),
+                'INCOME': Income.objects.filter(user=user),
+                'TRANSFER': Transfer.objects.filter(user=user),
+                'LOAN': LoanRepayment.objects.filter(loan__user=user),
+            }
 
-        # 2. Normalize Incomes
-        incomes = Income.objects.filter(user=user).annotate(
-            type=Value('INCOME', output_field=CharField()),
-            cat=F('source'),
-            acc=F('account__name'),
-            unified_amount=F('base_amount'),
-            tx_description=F('description'),
-            loan_pk=loan_pk_field,
-        ).values('pk', 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
+        search_query = filters['search_query']
+        if search_query:
+            backend = get_search_backend()
+            querysets = {
+                row_type: backend.filter(qs, search_query, row_type, user=user)
+                for row_type, qs in querysets.items()
+            }
 
-        # 3. Normalize Transfers
-        transfers = Transfer.objects.filter(user=user).annotate(
-            type=Value('TRANSFER', output_field=CharField()),
-            cat=Value('Transfer', output_field=CharField()),
-            acc=Concat(F('from_account__name'), Value(' → '), F('to_account__name'), output_field=CharField()),
-            unified_amount=F('converted_amount'),
-            tx_description=F('description'),
-            loan_pk=loan_pk_field,
-        ).values('pk', 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
+        date_filters = {}
+        if filters['start_date']:
+            date_filters['date__gte'] = filters['start_date']
+        if filters['end_date']:
+            date_filters['date__lte'] = filters['end_date']
+        if not (filters['start_date'] or filters['end_date']):
+            if filters['selected_years']:
+                date_filters['date__year__in'] = filters['selected_years']
+            if filters['selected_months']:
+                date_filters['date__month__in'] = filters['selected_months']
 
-        # 4. Normalize Loan Repayments
-        loan_repayments = LoanRepayment.objects.filter(loan__user=user).annotate(
+        if date_filters:
+            querysets = {row_type: qs.filter(**date_filters) for row_type, qs in querysets.items()}
+        return querysets
+
+    @staticmethod
+    def _normalize(row_type, queryset):
+        loan_pk_field = Value(None, output_field=CharField())
+        if queryset.model is TransactionFeedItem:
+            # Feed rows already carry the labels, so no joins are needed.
+            return queryset.annotate(
+                type=F('item_type'),
+                cat=F('category'),
+                acc=F('account_label'),
+                unified_amount=F('base_amount'),
+                tx_description=F('description'),
+                loan_pk=Cast(F('parent_id'), output_field=CharField()),
+            )
+        if row_type == 'EXPENSE':
+            return queryset.annotate(
+                type=Value('EXPENSE', output_field=CharField()),
+                cat=F('category'),
+                acc=F('account__name'),
+                unified_amount=F('base_amount'),
+                tx_description=F('description'),
+                loan_pk=loan_pk_field,
+            )
+        if row_type == 'INCOME':
+            return queryset.annotate(
+                type=Value('INCOME', output_field=CharField()),
+                cat=F('source'),
+                acc=F('account__name'),
+                unified_amount=F('base_amount'),
+                tx_description=F('description'),
+                loan_pk=loan_pk_field,
+            )
+        if row_type == 'TRANSFER':
+            return queryset.annotate(
+                type=Value('TRANSFER', output_field=CharField()),
+                cat=Value('Transfer', output_field=CharField()),
+                acc=Concat(F('from_account__name'), Value(' → '), F('to_account__name'), output_field=CharField()),
+                unified_amount=F('converted_amount'),
+                tx_description=F('description'),
+                loan_pk=loan_pk_field,
+            )
+        return queryset.annotate(
             type=Value('LOAN', output_field=CharField()),
             cat=F('loan__name'),
             acc=F('from_account__name'),
             unified_amount=F('base_amount'),
             tx_description=Concat(Value('Loan repayment - '), F('loan__name'), output_field=CharField()),
             loan_pk=Cast(F('loan_id'), output_field=CharField()),
-        ).values('pk', 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
+        )
 
-        # Handle filtering
-        search_query = self.request.GET.get('search')
-        start_date = self.request.GET.get('start_date')
-        end_date = self.request.GET.get('end_date')
-        selected_years = self.request.GET.getlist('year')
-        selected_months = self.request.GET.getlist('month')
-        selected_types = self.request.GET.getlist('type')
+    def get_queryset(self):
+        """
+        One normalized ``.values()`` queryset per selected transaction type.
+        They are merged page by page in ``paginate_queryset`` rather than
+        UNIONed, so each type can seek on its own (user, date) index.
+        """
+        filters = self._get_filters()
+        selected_types = filters['selected_types']
+        fields = (self._pk_field(), 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
 
-        # Filter querysets individually before union if possible, or filter the union
-        # Filtering individual querysets is more efficient
-        if search_query:
-            expenses = expenses.filter(Q(description__icontains=search_query) | Q(category__icontains=search_query))
-            incomes = incomes.filter(Q(description__icontains=search_query) | Q(source__icontains=search_query))
-            transfers = transfers.filter(description__icontains=search_query)
-            loan_repayments = loan_repayments.filter(loan__name__icontains=search_query)
+        return {
+            row_type: self._normalize(row_type, queryset).values(*fields)
+            for row_type, queryset in self._filtered_querysets(filters).items()
+            if not selected_types or row_type in selected_types
+        }
 
-        if start_date:
-            expenses = expenses.filter(date__gte=start_date)
-            incomes = incomes.filter(date__gte=start_date)
-            transfers = transfers.filter(date__gte=start_date)
-            loan_repayments = loan_repayments.filter(date__gte=start_date)
-        if end_date:
-            expenses = expenses.filter(date__lte=end_date)
-            incomes = incomes.filter(date__lte=end_date)
-            transfers = transfers.filter(date__lte=end_date)
-            loan_repayments = loan_repayments.filter(date__lte=end_date)
+    def _pk_field(self):
+        # Feed rows are keyed and linked by the id of the source transaction.
+        return 'source_id' if self._use_feed() else 'pk'
 
-        if not (start_date or end_date):
-            if not (selected_years or selected_months or search_query):
-                selected_years = [str(datetime.now().year)]
-                selected_months = [str(datetime.now().month)]
-            
-            if selected_years:
-                expenses = expenses.filter(date__year__in=selected_years)
-                incomes = incomes.filter(date__year__in=selected_years)
-                transfers = transfers.filter(date__year__in=selected_years)
-                loan_repayments = loan_repayments.filter(date__year__in=selected_years)
-            if selected_months:
-                expenses = expenses.filter(date__month__in=selected_months)
-                incomes = incomes.filter(date__month__in=selected_months)
-                transfers = transfers.filter(date__month__in=selected_months)
-                loan_repayments = loan_repayments.filter(date__month__in=selected_months)
+    def paginate_queryset(self, queryset, page_size):
+        cursor = None
+        token = self.request.GET.get('cursor')
+        if token:
+            try:
+                cursor = Cursor.decode(token)
+            except InvalidCursor:
+                cursor = None
+        pk_field = self._pk_field()
+        page = UnionKeysetPaginator(queryset, page_size, pk_field=pk_field).page(cursor)
+        if pk_field != 'pk':
+            for row in page.object_list:
+                row['pk'] = row.pop(pk_field)
+        return (None, page, page.object_list, page.has_other_pages())
 
-        # Filter by Transaction Type
-        active_qs = []
-        if not selected_types:
-            active_qs = [expenses, incomes, transfers, loan_repayments]
-        else:
-            if 'EXPENSE' in selected_types: active_qs.append(expenses)
-            if 'INCOME' in selected_types: active_qs.append(incomes)
-            if 'TRANSFER' in selected_types: active_qs.append(transfers)
-            if 'LOAN' in selected_types: active_qs.append(loan_repayments)
+    def _get_totals(self, querysets):
+        """
+        Exact per-type counts and amount on the first page; cursor pages read
+        them back from cache, so they may lag concurrent edits slightly.
+        """
+        params = sorted((key, value) for key, values in self.request.GET.lists() if key != 'cursor' for value in values)
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        cache_key = f"all_tx_totals:{self.request.user.pk}:{digest}"
 
-        if not active_qs:
-            return Expense.objects.none()
+        if self.request.GET.get('cursor'):
+            totals = cache.get(cache_key)
+            if totals is not None:
+                return totals, True
 
-        # Combine using Union
-        # Django union() requires all querysets to have exactly the same fields in the same order.
-        # Let's ensure the fields list in values() is identical.
-        fields = ('pk', 'date', 'tx_description', 'type', 'cat', 'acc', 'unified_amount', 'loan_pk')
-        
-        # Re-apply values to ensure order and fields match perfectly
-        # SQLite disallows ORDER BY inside UNION subqueries, so clear ordering first.
-        normalized_qs = [qs.values(*fields).order_by() for qs in active_qs]
-        
-        queryset = normalized_qs[0].union(*normalized_qs[1:]).order_by('-date')
-        
-        return queryset
+        transfer_amount_field = 'base_amount' if self._use_feed() else 'converted_amount'
+        totals = {
+            'expense_count': querysets['EXPENSE'].count(),
+            'income_count': querysets['INCOME'].count(),
+            'transfer_count': querysets['TRANSFER'].count(),
+            'loan_count': querysets['LOAN'].count(),
+            # Total amount (Base Currency)
+            'filtered_amount': (
+                (querysets['EXPENSE'].aggregate(Sum('base_amount'))['base_amount__sum'] or 0) +
+                (querysets['INCOME'].aggregate(Sum('base_amount'))['base_amount__sum'] or 0) +
+                (querysets['TRANSFER'].aggregate(total=Sum(transfer_amount_field))['total'] or 0) +
+                (querysets['LOAN'].aggregate(Sum('base_amount'))['base_amount__sum'] or 0)
+            ),
+        }
+        totals['filtered_count'] = totals['expense_count'] + totals['income_count'] + totals['transfer_count'] + totals['loan_count']
+        cache.set(cache_key, totals, self.totals_cache_timeout)
+        return totals, False
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         user = self.request.user
-        
-        # We need the filtered querysets to calculate individual counts
-        # (This is slightly redundant with get_queryset but ensures accuracy)
-        search_query = self.request.GET.get('search')
-        start_date = self.request.GET.get('start_date')
-        end_date = self.request.GET.get('end_date')
-        selected_years = self.request.GET.getlist('year')
-        selected_months = self.request.GET.getlist('month')
-        selected_types = self.request.GET.getlist('type')
 
-        expenses = Expense.objects.filter(user=user)
-        incomes = Income.objects.filter(user=user)
-        transfers = Transfer.objects.filter(user=user)
-        loan_repayments = LoanRepayment.objects.filter(loan__user=user)
+        filters = self._get_filters()
+        search_query = filters['search_query']
+        start_date = filters['start_date']
+        end_date = filters['end_date']
+        selected_years = filters['selected_years']
+        selected_months = filters['selected_months']
+        selected_types = filters['selected_types']
 
-        if search_query:
-            expenses = expenses.filter(Q(description__icontains=search_query) | Q(category__icontains=search_query))
-            incomes = incomes.filter(Q(description__icontains=search_query) | Q(source__icontains=search_query))
-            transfers = transfers.filter(description__icontains=search_query)
-            loan_repayments = loan_repayments.filter(loan__name__icontains=search_query)
-
-        if start_date:
-            expenses = expenses.filter(date__gte=start_date)
-            incomes = incomes.filter(date__gte=start_date)
-            transfers = transfers.filter(date__gte=start_date)
-            loan_repayments = loan_repayments.filter(date__gte=start_date)
-        if end_date:
-            expenses = expenses.filter(date__lte=end_date)
-            incomes = incomes.filter(date__lte=end_date)
-            transfers = transfers.filter(date__lte=end_date)
-            loan_repayments = loan_repayments.filter(date__lte=end_date)
-
-        if not (start_date or end_date):
-            if not (selected_years or selected_months or search_query):
-                selected_years = [str(datetime.now().year)]
-                selected_months = [str(datetime.now().month)]
-            
-            if selected_years:
-                expenses = expenses.filter(date__year__in=selected_years)
-                incomes = incomes.filter(date__year__in=selected_years)
-                transfers = transfers.filter(date__year__in=selected_years)
-                loan_repayments = loan_repayments.filter(date__year__in=selected_years)
-            if selected_months:
-                expenses = expenses.filter(date__month__in=selected_months)
-                incomes = incomes.filter(date__month__in=selected_months)
-                transfers = transfers.filter(date__month__in=selected_months)
-                loan_repayments = loan_repayments.filter(date__month__in=selected_months)
-
-        context['expense_count'] = expenses.count()
-        context['income_count'] = incomes.count()
-        context['transfer_count'] = transfers.count()
-        context['loan_count'] = loan_repayments.count()
-        context['filtered_count'] = context['expense_count'] + context['income_count'] + context['transfer_count'] + context['loan_count']
+        totals, approximate = self._get_totals(self._filtered_querysets(filters))
+        context.update(totals)
+        context['totals_are_approximate'] = approximate
 
-        # Total amount (Base Currency)
-        context['filtered_amount'] = (
-            (expenses.aggregate(Sum('base_amount'))['base_amount__sum'] or 0) +
-            (incomes.aggregate(Sum('base_amount'))['base_amount__sum'] or 0) +
-            (transfers.aggregate(Sum('converted_amount'))['converted_amount__sum'] or 0) +
-            (loan_repayments.aggregate(Sum('base_amount'))['base_amount__sum'] or 0)
-        )
+        pagination_query = self.request.GET.copy()
+        pagination_query.pop('cursor', None)
+        pagination_query.pop('page', None)
+        context['pagination_query'] = pagination_query.urlencode()
 
         # Filter options
         expense_years = {d.year for d in Expense.objects.filter(user=user).dates('date', 'year', order='DESC')}
@@ -7,6 +7,7 @@ from django.urls import reverse_lazy
 from django.utils.translation import gettext as _
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
+from ..data_epoch import DataEpochService
 from ..forms import CategoryForm
 from ..models import Category
 
@@ -157,8 +158,12 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
             new_name = self.object.name
             
             if old_name != new_name:
-                from ..models import Expense
+                from ..models import Expense, TransactionFeedItem
                 Expense.objects.filter(user=self.request.user, category=old_name).update(category=new_name)
+                DataEpochService.bump(self.request.user)
+                TransactionFeedItem.objects.filter(user=self.request.user, item_type='EXPENSE', category=old_name).update(category=new_name)
+                from ..category_model import CategoryModelService
+                CategoryModelService.record(self.request.user, renamed=(old_name, new_name))
                 
             return response
         except IntegrityError:
@@ -16,6 +16,7 @@ from django.utils.html import escape, format_html, format_html_join, mark_safe
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
 
+from ..balance_history_service import AccountBalanceHistoryService, shift_months
 from ..ledger_read_service import LedgerReadService
 from ..models import (
     Account,
@@ -1588,11 +1589,15 @@ def home_view(request):
         # This is not quite right for a loop. Let's use a cleaner date logic.
         
     # --- NET WORTH TREND (Sparkline and Chart) ---
-    net_worth_trend = FinancialService.get_cumulative_net_worth_history(request.user, net_worth, 6)
-    
+    net_worth_series = AccountBalanceHistoryService.get_net_worth_series(
+        request.user,
+        resolution='monthly',
+        start=shift_months(timezone.now().date().replace(day=1), -5),
+    )
+    net_worth_trend = [float(point['balance']) for point in net_worth_series]
+
     # For the main chart context
-    net_worth_history_formatted = FinancialService.get_monthly_history(request.user, 6)
-    net_worth_labels = [date_format(m['month'], 'M Y') for m in net_worth_history_formatted]
+    net_worth_labels = [date_format(point['period'], 'M Y') for point in net_worth_series]
     net_worth_data = net_worth_trend # Use the cumulative values for the trend
 
     # Calculate Sparkline points (normalize to 100x40 SVG)
@@ -6,7 +6,7 @@ from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError
 from django.db.models import Count, Sum
 from django.forms import modelformset_factory
 from django.http import JsonResponse
@@ -16,9 +16,13 @@ from django.utils.translation import gettext as _
 from django.views.decorators.http import require_POST
 from django.views.generic import DeleteView, ListView, UpdateView, View
 
+from .. import export_formats
 from ..forms import ExpenseForm
 from ..models import Account, Category, Expense
-from ..parser import parse_expense_nl
+from ..parser import MAX_BATCH_LINES, parse_expense_lines, parse_expense_nl
+from ..reclassification_service import ExpenseReclassificationService
+from ..search import get_search_backend
+from ..transaction_writer import TransactionWriter
 from .mixins import RecurringTransactionMixin, process_user_recurring_transactions
 
 
@@ -85,7 +89,10 @@ class ExpenseListView(LoginRequiredMixin, RecurringTransactionMixin, ListView):
 
 
         if search_query:
-            queryset = queryset.filter(description__icontains=search_query)
+            queryset = get_search_backend().filter(
+                queryset, search_query, 'EXPENSE',
+                fields=('description',), columns=('description',), user=self.request.user,
+            )
             
         # Sorting
         sort_by = self.request.GET.get('sort')
@@ -118,6 +125,7 @@ class ExpenseListView(LoginRequiredMixin, RecurringTransactionMixin, ListView):
         
         context['years'] = years
         context['categories'] = categories
+        context['columnar_format_label'] = export_formats.columnar_label()
         context['months_list'] = [(i, calendar.month_name[i]) for i in range(1, 13)]
         
         # Determine selected filters for UI
@@ -388,15 +396,10 @@ class ExpenseBulkDeleteView(LoginRequiredMixin, View):
             messages.error(request, 'No expenses selected for deletion.')
             return redirect('expense-list')
             
-        # Filter by IDs and ensuring they belong to the current user for security
-        expenses_to_delete = Expense.objects.filter(id__in=expense_ids, user=request.user)
-        deleted_count = expenses_to_delete.count()
-        
+        # Only the current user's expenses are deleted; balances are restored in one batch.
+        deleted_count = TransactionWriter.delete_expenses(request.user, expense_ids)
+
         if deleted_count > 0:
-            with transaction.atomic():
-                for expense in expenses_to_delete.select_related('account'):
-                    # Call model delete to ensure account balances are restored.
-                    expense.delete()
             messages.success(request, _('%(count)d expenses deleted successfully.') % {'count': deleted_count})
         else:
             messages.warning(request, _('No valid expenses found to delete.'))
@@ -430,18 +433,47 @@ class ExpenseBulkUpdateView(LoginRequiredMixin, View):
             messages.warning(request, _('No fields selected to update.'))
             return redirect('expense-list')
             
-        # Filter by IDs and ensure they belong to the current user
-        expenses_to_update = Expense.objects.filter(id__in=expense_ids, user=request.user)
-        updated_count = expenses_to_update.count()
-        
+        # Only the current user's expenses are updated; the ledger and derived data follow in one batch.
+        updated_count = ExpenseReclassificationService.reclassify(request.user, expense_ids, **update_data)
+
         if updated_count > 0:
-            expenses_to_update.update(**update_data)
             messages.success(request, _('%(count)d expenses updated successfully.') % {'count': updated_count})
         else:
             messages.warning(request, _('No valid expenses found to update.'))
             
         return redirect('expense-list')
 
+
+def _parse_context(user):
+    """Categories, accounts and defaults shared by the single and batch parse endpoints."""
+    # Get user's categories for better matching
+    user_categories = list(Category.objects.filter(user=user).values_list('name', flat=True))
+
+    # Also get most frequent category names from expenses
+    frequent_categories = list(Expense.objects.filter(user=user).values_list('category', flat=True).distinct()[:10])
+    combined_categories = list(set(user_categories + frequent_categories))
+
+    # Get last used account and payment method as defaults
+    last_expense = Expense.objects.filter(user=user).select_related('account').order_by('-created_at').first()
+    default_account = last_expense.account.name if last_expense and last_expense.account else None
+    default_payment_method = last_expense.payment_method if last_expense else 'Cash' # sensible default
+
+    # Get user's accounts for matching
+    user_accounts = list(Account.objects.filter(user=user, is_active=True).values_list('name', flat=True))
+    return combined_categories, user_accounts, default_account, default_payment_method
+
+
+def _apply_parse_defaults(result, default_account, default_payment_method):
+    # Apply defaults if not parsed
+    if not result.get('account'):
+        result['account'] = default_account
+
+    result['payment_method'] = default_payment_method
+    # Note: We aren't currently parsing payment method from text,
+    # but we can add it later if needed. For now just returning default
+    return result
+
+
 @require_POST
 @login_required
 def parse_expense_view(request):
@@ -451,33 +483,43 @@ def parse_expense_view(request):
     try:
         data = json.loads(request.body)
         text = data.get('text', '')
-        
-        # Get user's categories for better matching
-        user_categories = list(Category.objects.filter(user=request.user).values_list('name', flat=True))
-        
-        # Also get most frequent category names from expenses
-        frequent_categories = list(Expense.objects.filter(user=request.user).values_list('category', flat=True).distinct()[:10])
-        combined_categories = list(set(user_categories + frequent_categories))
-        
-        # Get last used account and payment method as defaults
-        last_expense = Expense.objects.filter(user=request.user).order_by('-created_at').first()
-        default_account = last_expense.account.name if last_expense and last_expense.account else None
-        default_payment_method = last_expense.payment_method if last_expense else 'Cash' # sensible default
-        
-        # Get user's accounts for matching
-        user_accounts = list(Account.objects.filter(user=request.user, is_active=True).values_list('name', flat=True))
-        
-        result = parse_expense_nl(text, user_categories=combined_categories, user_accounts=user_accounts, user=request.user)
+
+        categories, accounts, default_account, default_payment_method = _parse_context(request.user)
+        result = parse_expense_nl(text, user_categories=categories, user_accounts=accounts, user=request.user)
         if result:
-            # Apply defaults if not parsed
-            if not result.get('account'):
-                result['account'] = default_account
-            
-            result['payment_method'] = default_payment_method
-            # Note: We aren't currently parsing payment method from text, 
-            # but we can add it later if needed. For now just returning default
-            
+            _apply_parse_defaults(result, default_account, default_payment_method)
             return JsonResponse({'success': True, 'data': result})
         return JsonResponse({'success': False, 'error': 'No input text provided.'})
     except Exception as e:
         return JsonResponse({'success': False, 'error': _('Unable to parse expense right now.')}, status=400)
+
+
+@require_POST
+@login_required
+def parse_expense_batch_view(request):
+    """
+    Parses many quick-entry lines (``text`` with one entry per line, or a
+    ``lines`` list) in one request and returns a draft per line, in the same
+    shape as ``parse_expense_view``, ready for bulk creation.
+    """
+    try:
+        data = json.loads(request.body)
+        lines = data.get('lines') or data.get('text', '')
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+        if not isinstance(lines, list) or not any(isinstance(line, str) and line.strip() for line in lines):
+            return JsonResponse({'success': False, 'error': 'No input text provided.'})
+        lines = [line for line in lines if isinstance(line, str)]
+
+        categories, accounts, default_account, default_payment_method = _parse_context(request.user)
+        drafts = parse_expense_lines(lines, user_categories=categories, user_accounts=accounts, user=request.user)
+        for draft in drafts:
+            _apply_parse_defaults(draft, default_account, default_payment_method)
+        return JsonResponse({
+            'success': True,
+            'data': drafts,
+            # Blank lines are skipped, so only non-blank ones count towards the limit.
+            'truncated': sum(1 for line in lines if line.strip()) > MAX_BATCH_LINES,
+        })
+    except Exception:
+        return JsonResponse({'success': False, 'error': _('Unable to parse expenses right now.')}, status=400)
@@ -1,18 +1,31 @@
-import csv
-import io
-import zipfile
+import os
+import tempfile
 from datetime import datetime
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Q
-from django.http import HttpResponse
-from django.shortcuts import redirect
+from django.http import (
+    FileResponse,
+    Http404,
+    HttpResponse,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404, redirect
+from django.urls import reverse
 from django.utils.translation import gettext as _
+from django.views import View
 from django.views.generic import TemplateView
 
-from ..models import Expense, Income, RecurringTransaction, SavingsGoal, Transfer
+from .. import export_formats
+from ..export_service import EXPORT_ENTITIES, ExportJobService, ExportService
+from ..models import Expense, ExportJob
+from ..search import get_search_backend
+from ..streaming_export import csv_chunks, iter_keyset, zip_stream
+
+# Ranged downloads of export artifacts are streamed in blocks of this size.
+RANGE_BLOCK_SIZE = 8192
 
 
 class DataExportView(LoginRequiredMixin, TemplateView):
@@ -21,6 +34,8 @@ class DataExportView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['can_export'] = self.request.user.profile.can_export_csv
+        context['columnar_format_label'] = export_formats.columnar_label()
+        context['export_jobs'] = ExportJob.objects.filter(user=self.request.user).order_by('-created_at')[:5]
         return context
 
     def post(self, request, *args, **kwargs):
@@ -28,73 +43,153 @@ class DataExportView(LoginRequiredMixin, TemplateView):
             messages.error(request, _("Exporting is a paid feature. Please upgrade."))
             return redirect('pricing')
 
-        selected_entities = request.POST.getlist('entities')
+        posted = request.POST.getlist('entities')
+        selected_entities = [entity for entity in EXPORT_ENTITIES if entity in posted]
         if not selected_entities:
             messages.warning(request, _("Please select at least one data type to export."))
             return redirect('export-data')
 
-        files_to_zip = {}
-
-        # 1. Expenses
-        if 'expenses' in selected_entities:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([_('Date'), _('Description'), _('Amount'), _('Category'), _('Account'), _('Type')])
-            for e in Expense.objects.filter(user=request.user).order_by('-date'):
-                writer.writerow([e.date, e.description, e.amount, e.category, e.account.name if e.account else '', _('Expense')])
-            files_to_zip['expenses.csv'] = output.getvalue()
-
-        # 2. Incomes
-        if 'incomes' in selected_entities:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([_('Date'), _('Source'), _('Amount'), _('Description'), _('Account')])
-            for i in Income.objects.filter(user=request.user).order_by('-date'):
-                writer.writerow([i.date, i.source, i.amount, i.description, i.account.name if i.account else ''])
-            files_to_zip['incomes.csv'] = output.getvalue()
-
-        # 3. Transfers
-        if 'transfers' in selected_entities:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([_('Date'), _('From Account'), _('To Account'), _('Amount'), _('Description')])
-            for t in Transfer.objects.filter(user=request.user).order_by('-date'):
-                writer.writerow([t.date, t.from_account.name, t.to_account.name, t.amount, t.description])
-            files_to_zip['transfers.csv'] = output.getvalue()
-
-        # 4. Recurring Transactions
-        if 'recurring' in selected_entities:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([_('Description'), _('Amount'), _('Type'), _('Frequency'), _('Next Due Date'), _('Active')])
-            for r in RecurringTransaction.objects.filter(user=request.user).order_by('start_date'):
-                writer.writerow([r.description, r.amount, r.transaction_type, r.frequency, r.next_due_date, r.is_active])
-            files_to_zip['recurring_transactions.csv'] = output.getvalue()
-
-        # 5. Savings Goals
-        if 'goals' in selected_entities:
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow([_('Name'), _('Target Amount'), _('Current Amount'), _('Target Date'), _('Completed')])
-            for g in SavingsGoal.objects.filter(user=request.user).order_by('target_date'):
-                writer.writerow([g.name, g.target_amount, g.current_amount, g.target_date, g.is_completed])
-            files_to_zip['savings_goals.csv'] = output.getvalue()
-
-        # Handle output
-        if len(files_to_zip) == 1:
-            filename, content = list(files_to_zip.items())[0]
-            response = HttpResponse(content, content_type='text/csv')
+        requested_format = request.POST.get('format', 'csv')
+        if requested_format not in export_formats.EXPORT_FORMATS:
+            requested_format = 'csv'
+
+        # Large exports are generated by the export worker instead of tying up this request.
+        row_counts = ExportService.count_rows(request.user, selected_entities)
+        if ExportService.should_run_async(row_counts):
+            job = ExportJobService.create_job(request.user, selected_entities, row_counts, requested_format)
+            messages.info(
+                request,
+                _("Your export is being prepared. We'll notify you when it is ready to download."),
+            )
+            return redirect(f"{reverse('export-data')}?job={job.pk}")
+
+        exports = ExportService.build_files(request.user, selected_entities)
+        export_format = export_formats.resolve_format(requested_format)
+        if export_format != 'csv':
+            return _typed_export_response(exports, export_format)
+
+        # Handle output: rows are streamed straight from the database to the client.
+        if len(exports) == 1:
+            filename, header, _types, rows = exports[0]
+            response = StreamingHttpResponse(csv_chunks(header, rows), content_type='text/csv')
             response['Content-Disposition'] = f'attachment; filename="{filename}"'
             return response
+
+        response = StreamingHttpResponse(
+            zip_stream((filename, csv_chunks(header, rows)) for filename, header, _types, rows in exports),
+            content_type=export_formats.ZIP_CONTENT_TYPE,
+        )
+        response['Content-Disposition'] = f'attachment; filename="{export_formats.artifact_name(exports)}"'
+        return response
+
+
+def _typed_export_response(files, export_format, name=None):
+    """
+    XLSX and columnar files need a seekable target, so they are written to a
+    temporary file (deleted when the response closes) rather than buffered in memory.
+    """
+    name = name or export_formats.artifact_name(files, export_format)
+    handle = tempfile.TemporaryFile()
+    try:
+        export_formats.write_export(files, export_format, handle)
+    except Exception:
+        handle.close()
+        raise
+    handle.seek(0)
+    return FileResponse(
+        handle, as_attachment=True, filename=name, content_type=export_formats.content_type(name),
+    )
+
+
+class ExportJobStatusView(LoginRequiredMixin, View):
+    """JSON progress for a background export, polled by the export page."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, user=request.user)
+        payload = {
+            'id': job.pk,
+            'status': job.status,
+            'processed_rows': job.processed_rows,
+            'total_rows': job.total_rows,
+            'progress': job.progress_percentage,
+            'error': job.error_message or None,
+            'download_url': None,
+        }
+        if job.status == 'COMPLETED' and job.file_path:
+            payload['download_url'] = reverse('export-job-download', args=[job.pk])
+        return JsonResponse(payload)
+
+
+class ExportJobDownloadView(LoginRequiredMixin, View):
+    """
+    Serves a finished export artifact. A single ``bytes=start-end`` Range is
+    honoured so interrupted downloads of large archives can resume.
+    """
+
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, user=request.user, status='COMPLETED')
+        if not job.file_path or not os.path.exists(job.file_path):
+            raise Http404(_("This export has expired. Please request a new one."))
+
+        size = os.path.getsize(job.file_path)
+        content_type = export_formats.content_type(job.file_name)
+        disposition = f'attachment; filename="{job.file_name}"'
+
+        range_header = request.headers.get('Range')
+        if range_header:
+            byte_range = _parse_range(range_header, size)
+            if byte_range is None:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _read_range(job.file_path, start, end), status=206, content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
         else:
-            zip_buffer = io.BytesIO()
-            with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for filename, content in files_to_zip.items():
-                    zip_file.writestr(filename, content)
-            
-            response = HttpResponse(zip_buffer.getvalue(), content_type='application/x-zip-compressed')
-            response['Content-Disposition'] = 'attachment; filename="financial_data_export.zip"'
-            return response
+            response = FileResponse(open(job.file_path, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(size)
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = disposition
+        return response
+
+
+def _read_range(path, start, end):
+    """Yields bytes ``start``-``end`` (inclusive) of ``path`` at most RANGE_BLOCK_SIZE at a time."""
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = handle.read(min(RANGE_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _parse_range(header, size):
+    """(start, end) for a single satisfiable ``bytes=`` range, otherwise None."""
+    unit, _sep, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec or '-' not in spec:
+        return None
+    first, _sep, last = spec.strip().partition('-')
+    try:
+        if first == '':
+            # Suffix range: the final N bytes.
+            length = int(last)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
 
 @login_required
 def export_expenses(request):
@@ -111,7 +206,7 @@ def export_expenses(request):
 
     search_query = request.GET.get('search')
     if search_query:
-        queryset = queryset.filter(Q(description__icontains=search_query) | Q(category__icontains=search_query))
+        queryset = get_search_backend().filter(queryset, search_query, 'EXPENSE', user=request.user)
 
     start_date = request.GET.get('start_date')
     if start_date:
@@ -133,15 +228,18 @@ def export_expenses(request):
     if months:
         queryset = queryset.filter(date__month__in=months)
 
-    # Standard CSV Export
-    response = HttpResponse(content_type='text/csv')
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    header = [_('Date'), _('Description'), _('Amount'), _('Category'), _('Account')]
+    rows = iter_keyset(queryset, ('date', 'description', 'amount', 'category', 'account__name'))
+
+    export_format = export_formats.resolve_format(request.GET.get('format', 'csv'))
+    if export_format != 'csv':
+        filename = f'expenses_filtered_{timestamp}.csv'
+        types = ('date', 'string', 'decimal', 'string', 'string')
+        files = [(filename, header, types, rows)]
+        return _typed_export_response(files, export_format)
+
+    # Standard CSV Export
+    response = StreamingHttpResponse(csv_chunks(header, rows), content_type='text/csv')
     response['Content-Disposition'] = f'attachment; filename="expenses_filtered_{timestamp}.csv"'
-    
-    writer = csv.writer(response)
-    writer.writerow([_('Date'), _('Description'), _('Amount'), _('Category'), _('Account')])
-    
-    for e in queryset.order_by('-date'):
-        writer.writerow([e.date, e.description, e.amount, e.category, e.account.name if e.account else ''])
-    
     return response
@@ -1,32 +1,37 @@
 import calendar
-import csv
-import io
-import re
 import traceback
 from datetime import date, datetime
-from decimal import Decimal
 
-import openpyxl
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.cache import cache
-from django.db import IntegrityError, transaction
 from django.db.models import Count, Q, Sum
 from django.http import JsonResponse
-from django.shortcuts import redirect, render
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils.formats import date_format
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView, View
 
 from ..forms import ContactForm
+from ..import_service import (
+    ExpenseImporter,
+    ImportJobService,
+    batch_categorizer,
+    iter_upload_rows,
+)
 from ..models import (
     CURRENCY_CHOICES,
+    Account,
     Expense,
+    ImportJob,
     Income,
     RecurringTransaction,
     Transfer,
 )
+from ..search import get_search_backend
 
 
 class CalendarView(LoginRequiredMixin, TemplateView):
@@ -67,30 +72,30 @@ class CalendarView(LoginRequiredMixin, TemplateView):
         # Base filters
         expense_filters = Q(user=self.request.user, date__year=year, date__month=month)
         income_filters = Q(user=self.request.user, date__year=year, date__month=month)
-        
-        if search_query:
-            # Filter expenses by description or category
-            expense_filters &= (Q(description__icontains=search_query) | Q(category__icontains=search_query))
-            # Filter income by source or description
-            income_filters &= (Q(source__icontains=search_query) | Q(description__icontains=search_query))
+        search = get_search_backend()
 
         # Get Expense and Income Data for the month
-        expenses = Expense.objects.filter(expense_filters).values('date').annotate(
+        expenses = search.filter(
+            Expense.objects.filter(expense_filters), search_query, 'EXPENSE', user=self.request.user
+        ).values('date').annotate(
             total=Sum('base_amount'),
             count=Count('id')
         )
         
-        incomes = Income.objects.filter(income_filters).values('date').annotate(
+        incomes = search.filter(
+            Income.objects.filter(income_filters), search_query, 'INCOME', user=self.request.user
+        ).values('date').annotate(
             total=Sum('base_amount'),
             count=Count('id')
         )
 
         # Get investment data (Transfers to investment/FD accounts)
         investment_filters = Q(user=self.request.user, date__year=year, date__month=month, to_account__account_type__in=['INVESTMENT', 'FIXED_DEPOSIT'])
-        if search_query:
-            investment_filters &= (Q(description__icontains=search_query) | Q(to_account__name__icontains=search_query))
-        
-        investments = Transfer.objects.filter(investment_filters).values('date').annotate(
+        investments = search.filter(
+            Transfer.objects.filter(investment_filters), search_query, 'TRANSFER',
+            fields=('description', 'to_account__name'), columns=('description', 'account_label'),
+            user=self.request.user,
+        ).values('date').annotate(
             total=Sum('converted_amount'),
             count=Count('id')
         )
@@ -203,237 +208,40 @@ class CalendarView(LoginRequiredMixin, TemplateView):
 @login_required
 def upload_view(request):
     """
-    Robust expense upload view supporting Excel and CSV.
+    Robust expense upload view supporting Excel, CSV and bank statement files (OFX, QIF, CAMT.053, MT940).
+    Rows are streamed from the file and inserted in chunks by ExpenseImporter.
     """
     results = None
-    
+
     if request.method == 'POST' and request.FILES.get('file'):
         uploaded_file = request.FILES['file']
         selected_currency = request.POST.get('currency', request.user.profile.currency)
-        
+        account = None
+        if request.POST.get('account'):
+            account = Account.objects.filter(user=request.user, pk=request.POST['account']).first()
+
+        # Big statements are imported by the worker; the page polls the job for progress.
+        if uploaded_file.size > settings.IMPORT_ASYNC_BYTES:
+            job = ImportJobService.create_job(request.user, uploaded_file, selected_currency, account)
+            messages.info(request, _("Your file is being imported in the background. Progress is shown below."))
+            return redirect(f"{reverse('upload')}?job={job.pk}")
+
         from . import predict_category_ai
 
-        summary = {
-            'total_rows': 0,
-            'created_count': 0,
-            'duplicate_count': 0,
-            'error_count': 0,
-            'errors': [], # Detail log
-            'total_amount': 0,
-            'currency_symbol': selected_currency
-        }
-
-        def get_column_mapping(headers):
-            """Intelligently map header names to target fields."""
-            patterns = {
-                'date': ['date', 'time', 'day', 'transaction', 'txn', 'dated'],
-                'amount': ['amount', 'total', 'cost', 'price', 'value', 'debit', 'spent', 'withdraw'],
-                'description': ['description', 'details', 'memo', 'remarks', 'particulars', 'narration', 'payee', 'merchant'],
-                'category': ['category', 'type', 'tag', 'label', 'expense type']
-            }
-            mapping = {}
-            header_l = [str(h).lower().strip() for h in headers if h is not None]
-            
-            for field, keywords in patterns.items():
-                for idx, h in enumerate(header_l):
-                    if any(kw in h for kw in keywords):
-                        mapping[field] = idx
-                        break
-            return mapping
-
-        def parse_robust_date(val):
-            if isinstance(val, (date, datetime)):
-                return val.date() if isinstance(val, datetime) else val
-            
-            if not val or not str(val).strip():
-                return None
-            
-            date_str = str(val).strip()
-            formats = [
-                '%d %b %Y', '%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%m/%d/%Y', 
-                '%d %B %Y', '%d %b', '%d-%b', '%d %B', '%d/%m', '%Y/%m/%d',
-                '%b %d, %Y', '%B %d, %Y', '%b %d', '%B %d'
-            ]
-            for fmt in formats:
-                try:
-                    parsed = datetime.strptime(date_str, fmt).date()
-                    # If year is not in format, strptime defaults to 1900
-                    if parsed.year == 1900:
-                        return parsed.replace(year=datetime.now().year)
-                    return parsed
-                except ValueError:
-                    continue
-            return None
-
-        def infer_column_mapping(rows):
-            """Try to guess columns based on data types in the first non-empty row."""
-            mapping = {}
-            for row in rows:
-                if not row or not any(row): continue
-                
-                # We need at least 2 or 3 columns to guess
-                cols = [str(c).strip() if c is not None else "" for c in row]
-                
-                # 1. Identify Date
-                for i, val in enumerate(cols):
-                    if parse_robust_date(val):
-                        mapping['date'] = i
-                        break
-                
-                # 2. Identify Amount (looking for numbers in other columns)
-                for i, val in enumerate(cols):
-                    if i == mapping.get('date'): continue
-                    # Remove symbols and try to parse
-                    try:
-                        clean_v = re.sub(r'[^\d\.\-]', '', val)
-                        if clean_v and float(clean_v):
-                            mapping['amount'] = i
-                            break
-                    except (ValueError, TypeError): continue
-                
-                # 3. Identify Description (longest remaining non-empty string)
-                best_desc_idx = -1
-                max_len = -1
-                for i, val in enumerate(cols):
-                    if i in mapping.values(): continue
-                    if len(val) > max_len:
-                        max_len = len(val)
-                        best_desc_idx = i
-                
-                if best_desc_idx != -1:
-                    mapping['description'] = best_desc_idx
-                
-                if len(mapping) >= 2: # Success if we have at least Date and Amount
-                    return mapping
-            return {}
+        importer = ExpenseImporter(
+            request.user,
+            selected_currency,
+            categorize=lambda desc: predict_category_ai(desc, user=request.user, skip_genai=True),
+            account=account,
+            batch_categorize=batch_categorizer(request.user),
+        )
 
         try:
-            data_rows = []
-            if uploaded_file.name.endswith(('.xlsx', '.xls')):
-                uploaded_file.seek(0)
-                wb = openpyxl.load_workbook(uploaded_file, data_only=True)
-                for sheet in wb.worksheets:
-                    rows = list(sheet.iter_rows(values_only=True))
-                    if not rows: continue
-                    
-                    mapping = {}
-                    start_idx = 0
-                    for i, row in enumerate(rows[:20]):
-                        if not row or not any(row): continue
-                        temp_mapping = get_column_mapping(row)
-                        if len(temp_mapping) >= 3:
-                            mapping = temp_mapping
-                            start_idx = i + 1
-                            break
-                    
-                    if not mapping:
-                        mapping = infer_column_mapping(rows[:20])
-                        start_idx = 0
-                    
-                    if mapping:
-                        for idx, row in enumerate(rows[start_idx:], start=start_idx + 1):
-                            if row and any(v is not None for v in row):
-                                data_rows.append((row, mapping, idx))
-
-            elif uploaded_file.name.endswith('.csv'):
-                uploaded_file.seek(0)
-                content = uploaded_file.read()
-                decoded = None
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        decoded = content.decode(encoding)
-                        break
-                    except UnicodeDecodeError: continue
-                
-                if decoded:
-                    reader = csv.reader(io.StringIO(decoded))
-                    rows = list(reader)
-                    if rows:
-                        mapping = {}
-                        start_idx = 0
-                        for i, row in enumerate(rows[:20]):
-                            if not row or not any(row): continue
-                            temp_mapping = get_column_mapping(row)
-                            if len(temp_mapping) >= 3:
-                                mapping = temp_mapping
-                                start_idx = i + 1
-                                break
-                        if not mapping:
-                            mapping = infer_column_mapping(rows[:20])
-                            start_idx = 0
-
-                        if mapping:
-                            for idx, row in enumerate(rows[start_idx:], start=start_idx + 1):
-                                if row and any(v and str(v).strip() for v in row):
-                                    data_rows.append((row, mapping, idx))
-
-            if not data_rows:
+            summary = importer.run(iter_upload_rows(uploaded_file))
+
+            if not summary['total_rows']:
                 messages.warning(request, _("Could not detect required columns (Date, Amount, Description). Please check your file."))
             else:
-                for row, mapping, row_idx in data_rows:
-                    summary['total_rows'] += 1
-                    try:
-                        # Extract and Parse
-                        date_idx = mapping.get('date')
-                        amount_idx = mapping.get('amount')
-                        desc_idx = mapping.get('description')
-                        
-                        if date_idx is None or amount_idx is None or desc_idx is None:
-                            raise ValueError(_("Missing required columns in row"))
-
-                        date_val = parse_robust_date(row[date_idx])
-                        if not date_val:
-                            raise ValueError(_("Invalid date format: ") + str(row[date_idx]))
-
-                        raw_amount = row[amount_idx]
-                        if raw_amount is None:
-                            raise ValueError(_("Missing amount"))
-                        
-                        amount_str = str(raw_amount).replace(',', '').strip()
-                        # Handle cases like "$ 1,200.00" or "(100.00)"
-                        cleaned_amount_str = re.sub(r'[^\d\.\-]', '', amount_str)
-                        if not cleaned_amount_str:
-                            raise ValueError(_("Invalid amount format: ") + str(raw_amount))
-                        amount = abs(Decimal(cleaned_amount_str))
-                        
-                        desc = str(row[desc_idx]).strip()
-                        if not desc:
-                            raise ValueError(_("Missing description"))
-
-                        # Category Logic
-                        category_name = None
-                        cat_idx = mapping.get('category')
-                        if cat_idx is not None and row[cat_idx]:
-                            category_name = str(row[cat_idx]).strip()
-                        
-                        if not category_name:
-                            category_name = predict_category_ai(desc, user=request.user, skip_genai=True) or 'Food'
-
-                        # Create with Dedup check
-                        try:
-                            with transaction.atomic():
-                                Expense.objects.create(
-                                    user=request.user,
-                                    date=date_val,
-                                    amount=amount,
-                                    description=desc,
-                                    category=category_name,
-                                    currency=selected_currency
-                                )
-                                summary['created_count'] += 1
-                                summary['total_amount'] += float(amount)
-                        except IntegrityError:
-                            summary['duplicate_count'] += 1
-                        except Exception as e:
-                            if len(summary['errors']) < 15:
-                                summary['errors'].append({'row': row_idx, 'reason': str(e)})
-                            summary['error_count'] += 1
-
-                    except Exception as e:
-                        if len(summary['errors']) < 15:
-                            summary['errors'].append({'row': row_idx, 'reason': str(e)})
-                        summary['error_count'] += 1
-
                 results = summary
                 if summary['created_count'] > 0:
                     messages.success(request, _("Processing complete! See summary below."))
@@ -444,13 +252,39 @@ def upload_view(request):
             traceback.print_exc()
             messages.error(request, f"Error processing file: {e}")
 
+    import_job = None
+    if request.GET.get('job', '').isdigit():
+        import_job = ImportJob.objects.filter(user=request.user, pk=request.GET['job']).first()
+        if import_job is not None and import_job.status == 'COMPLETED' and import_job.total_rows:
+            results = import_job.summary
+
     return render(request, 'upload.html', {
+        'import_job': import_job,
         'results': results,
         'currencies': CURRENCY_CHOICES,
-        'default_currency': request.user.profile.currency
+        'default_currency': request.user.profile.currency,
+        'accounts': Account.objects.filter(user=request.user).order_by('name'),
     })
 
 
+class ImportJobStatusView(LoginRequiredMixin, View):
+    """JSON progress for a background statement import."""
+
+    def get(self, request, pk):
+        job = get_object_or_404(ImportJob, pk=pk, user=request.user)
+        return JsonResponse({
+            'id': job.pk,
+            'status': job.status,
+            'rows_parsed': job.total_rows,
+            'created': job.created_count,
+            'duplicates': job.duplicate_count,
+            'skipped': job.skipped_count,
+            'errors': job.error_count,
+            'error_details': job.errors,
+            'error_message': job.error_message or None,
+        })
+
+
 def ping(request):
     return JsonResponse({'status': 'ok'})
 
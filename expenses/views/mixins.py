@@ -3,6 +3,7 @@ from datetime import date
 from decimal import Decimal, ROUND_HALF_UP
 
 from ..models import Expense, Income, LoanRepayment, RecurringTransaction, Transfer, UserProfile
+from ..data_epoch import DataEpochService
 from ..services import LoanService
 from ..utils import get_exchange_rate
 
@@ -183,3 +184,4 @@ def process_user_recurring_transactions(user):
 
     if updates_needed:
         RecurringTransaction.objects.bulk_update(updates_needed, ['last_processed_date'])
+        DataEpochService.bump(user.pk)
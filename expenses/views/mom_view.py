@@ -1,13 +1,13 @@
 import calendar
 import json
-from datetime import date, timedelta
-from decimal import Decimal
+from datetime import date
 
 from django.contrib.auth.decorators import login_required
 from django.db.models import Sum
 from django.shortcuts import render
 from django.utils import timezone
 
+from ..balance_history_service import AccountBalanceHistoryService
 from ..ledger_read_service import LedgerReadService
 from ..models import Expense, Income, Transfer
 
@@ -69,45 +69,16 @@ def mom_analysis_view(request):
     mo_inv_map = {(item['m'].year, item['m'].month): float(item['total']) for item in batch_inv}
 
 
-    # 2. Net Worth Calculation (Backwards reconstruction)
+    # 2. Net Worth at the END of each selected month (running window sum over account movements)
     current_net_worth, _ = LedgerReadService.get_net_worth(user)
-
-    # Helper: get net cashflow for a month from pre-fetched maps
-    def get_net_cashflow_cached(year, month):
-        inc = mo_inc_map.get((year, month), 0)
-        exp = mo_exp_map.get((year, month), 0)
-        return Decimal(str(inc)) - Decimal(str(exp))
-
-
-    # We want Net Worth at the END of each selected month.
-    nw_data = []
-    running_nw = current_net_worth
-    
-    # NW at end of current month (today)
-    nw_data.append(float(running_nw))
-    
-    # Current month start
-    curr_month_start = date.today().replace(day=1)
-    
-    if num_months > 1:
-        # Subtract current month's cashflow to get NW at end of previous month
-        # Since the pre-fetched maps use TruncMonth, they already contain data up to 'today' for the current month.
-        running_nw -= get_net_cashflow_cached(date.today().year, date.today().month)
-
-        nw_data.append(float(running_nw))
-        
-        # Subtract previous months' cashflows
-        temp_date = curr_month_start
-        for i in range(num_months - 2):
-            p_end = temp_date - timedelta(days=1)
-            p_start = p_end.replace(day=1)
-            
-            running_nw -= get_net_cashflow_cached(p_start.year, p_start.month)
-
-            nw_data.append(float(running_nw))
-            temp_date = p_start
-        
-    nw_data.reverse() # Oldest to Newest
+    nw_series = AccountBalanceHistoryService.get_net_worth_series(
+        user,
+        resolution='monthly',
+        start=history_start,
+        end=curr_date,
+        include_liabilities=False,
+    )
+    nw_data = [float(point['balance']) for point in nw_series]
 
     # 3. Income, Expense, Savings for each month
     labels = []
@@ -2,13 +2,14 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.management import call_command
 from django.http import JsonResponse
 from django.shortcuts import redirect
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import ListView
 
-from ..models import Notification
+from ..job_queue import JobQueueService
+from ..models import BackgroundJob, Notification
 
 
 def _cron_authorized(request):
@@ -84,65 +85,69 @@ def notification_redirect(request, pk):
         messages.error(request, "Notification not found.")
         return redirect('notification-list')
 
+def _enqueue_response(job_type, message, **kwargs):
+    """Queues ``job_type`` for run_worker and answers 202 with the job to poll."""
+    try:
+        job, created = JobQueueService.enqueue(job_type, **kwargs)
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return JsonResponse(
+        {
+            'success': True,
+            'message': message,
+            # A singleton job already queued is returned with its own arguments.
+            **job.kwargs,
+            'job_id': job.pk,
+            'status': job.status,
+            'created': created,
+            'status_url': reverse('cron-job-status', args=[job.pk]),
+        },
+        status=202,
+    )
+
+
 @csrf_exempt
 def trigger_notifications(request):
     """
     HTTP endpoint to trigger notifications via external cron service.
     """
-    secret = request.GET.get('secret')
-    if not secret or secret != settings.CRON_SECRET:
+    if not _cron_authorized(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
-        
-    try:
-        call_command('send_notifications')
-        return JsonResponse({'success': True, 'message': 'Notifications triggered successfully'})
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+
+    return _enqueue_response('send_notifications', 'Notifications queued successfully')
+
 
 @csrf_exempt
 def trigger_lifecycle_emails(request):
     """
     HTTP endpoint to trigger lifecycle drip emails via external cron service.
     """
-    secret = request.GET.get('secret')
-    if not secret or secret != settings.CRON_SECRET:
+    if not _cron_authorized(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    try:
-        call_command('send_lifecycle_emails')
-        return JsonResponse({'success': True, 'message': 'Lifecycle emails triggered successfully'})
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response('send_lifecycle_emails', 'Lifecycle emails queued successfully')
+
 
 @csrf_exempt
 def trigger_monthly_reports_view(request):
     """
     HTTP endpoint to trigger monthly financial reports via external cron service.
     """
-    secret = request.GET.get('secret')
-    if not secret or secret != settings.CRON_SECRET:
+    if not _cron_authorized(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    try:
-        call_command('send_monthly_report')
-        return JsonResponse({'success': True, 'message': 'Monthly reports triggered successfully'})
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response('send_monthly_report', 'Monthly reports queued successfully')
+
 
 @csrf_exempt
 def trigger_daily_reminders_view(request):
     """
     HTTP endpoint to trigger daily expense reminders via external cron service.
     """
-    secret = request.GET.get('secret')
-    if not secret or secret != settings.CRON_SECRET:
+    if not _cron_authorized(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
-    try:
-        call_command('send_daily_reminders')
-        return JsonResponse({'success': True, 'message': 'Daily reminders triggered successfully'})
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response('send_daily_reminders', 'Daily reminders queued successfully')
 
 
 @csrf_exempt
@@ -156,17 +161,7 @@ def trigger_ledger_retry_view(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
     limit = _get_int_query_param(request, 'limit', 200)
-    try:
-        call_command('retry_ledger_shadow_failures', limit=limit)
-        return JsonResponse(
-            {
-                'success': True,
-                'message': 'Ledger retry triggered successfully',
-                'limit': limit,
-            }
-        )
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response('retry_ledger_shadow_failures', 'Ledger retry queued successfully', limit=limit)
 
 
 @csrf_exempt
@@ -180,17 +175,7 @@ def trigger_ledger_reconcile_view(request):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
 
     threshold = _get_threshold_query_param(request, '0.01')
-    try:
-        call_command('reconcile_ledgers', threshold=threshold)
-        return JsonResponse(
-            {
-                'success': True,
-                'message': 'Ledger reconciliation triggered successfully',
-                'threshold': threshold,
-            }
-        )
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response('reconcile_ledgers', 'Ledger reconciliation queued successfully', threshold=threshold)
 
 
 @csrf_exempt
@@ -206,20 +191,51 @@ def trigger_ledger_maintenance_view(request):
 
     retry_limit = _get_int_query_param(request, 'retry_limit', 200)
     threshold = _get_threshold_query_param(request, '0.01')
-    try:
-        call_command(
-            'run_ledger_maintenance',
-            retry_limit=retry_limit,
-            reconcile=True,
-            threshold=threshold,
-        )
-        return JsonResponse(
-            {
-                'success': True,
-                'message': 'Ledger maintenance triggered successfully',
-                'retry_limit': retry_limit,
-                'threshold': threshold,
-            }
-        )
-    except Exception as e:
-        return JsonResponse({'success': False, 'error': str(e)}, status=500)
+    return _enqueue_response(
+        'run_ledger_maintenance',
+        'Ledger maintenance queued successfully',
+        retry_limit=retry_limit,
+        reconcile=True,
+        threshold=threshold,
+    )
+
+
+@csrf_exempt
+def trigger_import_jobs_view(request):
+    """
+    HTTP endpoint to sweep background statement imports via external cron service,
+    resuming any whose worker stopped. Optional query param: limit (default: 10).
+    """
+    if not _cron_authorized(request):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    limit = _get_int_query_param(request, 'limit', 10)
+    return _enqueue_response('run_import_jobs', 'Import jobs queued successfully', limit=limit)
+
+
+@csrf_exempt
+def trigger_export_jobs_view(request):
+    """
+    HTTP endpoint to sweep background data exports via external cron service,
+    restarting any whose worker stopped and purging expired files.
+    Optional query param: limit (default: 10).
+    """
+    if not _cron_authorized(request):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    limit = _get_int_query_param(request, 'limit', 10)
+    return _enqueue_response('run_export_jobs', 'Export jobs queued successfully', limit=limit)
+
+
+@csrf_exempt
+def cron_job_status_view(request, pk):
+    """
+    HTTP endpoint for polling a job queued by one of the cron endpoints.
+    """
+    if not _cron_authorized(request):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    job = BackgroundJob.objects.filter(pk=pk).first()
+    if job is None:
+        return JsonResponse({'error': 'Not found'}, status=404)
+    return JsonResponse(JobQueueService.describe(job))
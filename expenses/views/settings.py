@@ -3,15 +3,15 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import logout
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db import IntegrityError
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone, translation
 from django.utils.translation import gettext as _
 from django.views.generic import DeleteView, TemplateView, UpdateView
 
+from ..base_currency_service import BaseCurrencyService
 from ..forms import LanguageUpdateForm, ProfileUpdateForm
-from ..models import Expense, Income, RecurringTransaction, UserProfile
+from ..models import Expense, Income, UserProfile
 
 
 class SettingsHomeView(LoginRequiredMixin, TemplateView):
@@ -49,24 +49,12 @@ class CurrencyUpdateView(LoginRequiredMixin, UpdateView):
         response = super().form_valid(form)
         
         if old_currency != new_currency:
-            user = self.request.user
-            skipped_count = 0
-            for model in [Expense, Income, RecurringTransaction]:
-                transactions = model.objects.filter(user=user)
-                for tx in transactions:
-                    try:
-                        tx.save() 
-                    except IntegrityError:
-                        skipped_count += 1
-                        continue
-            
-            if skipped_count > 0:
-                messages.warning(self.request, _('Currency preference updated. %(count)d transactions were skipped due to potential duplication.') % {'count': skipped_count})
-            else:
-                messages.success(self.request, _('Currency preference updated successfully.'))
+            # Account balances and the ledger stay in account currency; only base amounts change.
+            BaseCurrencyService.enqueue(self.request.user)
+            messages.success(self.request, _('Currency preference updated. Your transactions are being converted in the background.'))
         else:
             messages.success(self.request, _('Currency preference updated successfully.'))
-            
+
         return response
 
 class LanguageUpdateView(LoginRequiredMixin, UpdateView):
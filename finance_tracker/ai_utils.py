@@ -1,6 +1,6 @@
 
-import os
 import re
+from functools import lru_cache
 
 # Simple Rule-Based Keyword Mapping
 KEYWORD_MAPPING = {
@@ -18,30 +18,99 @@ KEYWORD_MAPPING = {
     'Cab': ['cab', 'taxi', 'ola', 'uber', 'auto', 'rental', 'car', 'rapido'],
 }
 
-def predict_category_rule_based(description):
+_WORD_RE = re.compile(r'\w+')
+PLURAL_SUFFIXES = ('s', 'es')
+
+
+def _word_forms(word):
+    return (word, *(word + suffix for suffix in PLURAL_SUFFIXES))
+
+
+def build_keyword_index(mapping):
+    """
+    Compiles a keyword mapping into word-token lookups so a description is
+    matched in one pass over its words. Keywords only match whole words (or
+    their plural); when several categories match, the one listed first in
+    ``mapping`` wins. Returns ``(categories, tokens, phrases)`` where
+    ``tokens`` maps a word to its category priority and ``phrases`` maps the
+    first word of a multi-word keyword to ``(remaining words, priority)`` pairs.
+    """
+    categories = list(mapping)
+    tokens = {}
+    phrases = {}
+    for priority, keywords in enumerate(mapping.values()):
+        for keyword in keywords:
+            words = _WORD_RE.findall(keyword.lower())
+            if not words:
+                continue
+            if len(words) == 1:
+                for form in _word_forms(words[0]):
+                    tokens.setdefault(form, priority)
+                continue
+            for last in _word_forms(words[-1]):
+                phrases.setdefault(words[0], []).append((tuple(words[1:-1]) + (last,), priority))
+    return categories, tokens, phrases
+
+
+_KEYWORD_INDEX = build_keyword_index(KEYWORD_MAPPING)
+
+
+def predict_category_rule_based(description, index=None):
     """
     Predicts category based on keywords in the description.
     Returns the probable category or None.
     """
-    description = description.lower()
-    
-    # Normalize description
-    words = re.findall(r'\w+', description)
-    
-    # direct match
-    for category, keywords in KEYWORD_MAPPING.items():
-        for keyword in keywords:
-            if keyword in words or keyword in description:
-                # Check for exact word match or substring if useful
-                return category
+    categories, tokens, phrases = index or _KEYWORD_INDEX
+    words = _WORD_RE.findall(description.lower())
+
+    best = None
+    for position, word in enumerate(words):
+        priority = tokens.get(word)
+        for tail, phrase_priority in phrases.get(word, ()):
+            if (priority is None or phrase_priority < priority) and \
+                    tuple(words[position + 1:position + 1 + len(tail)]) == tail:
+                priority = phrase_priority
+        if priority is not None and (best is None or priority < best):
+            best = priority
+            if best == 0:
+                break
+    return categories[best] if best is not None else None
+
+
+@lru_cache(maxsize=512)
+def _category_index(categories):
+    """Lower-cased names and significant words (longer than 2 letters) of a user's categories."""
+    index = []
+    for name in categories:
+        lowered = name.lower()
+        index.append((name, lowered, frozenset(w for w in _WORD_RE.findall(lowered) if len(w) > 2)))
+    return tuple(index)
+
+
+@lru_cache(maxsize=4096)
+def match_user_category(categories, category):
+    """
+    Maps a rule-based category onto one of the user's own ``categories``
+    (a tuple), or returns None. Results are memoized per category list.
+    """
+    cat_lower = category.lower()
+    cat_words = frozenset(w for w in _WORD_RE.findall(cat_lower) if len(w) > 2)
+    for name, lowered, words in _category_index(categories):
+        # 1. Exact or substring match
+        if lowered == cat_lower or lowered in cat_lower or cat_lower in lowered:
+            return name
+        # 2. Word overlap match (excluding tiny words like 'and', 'the', '&')
+        if cat_words & words:
+            return name
     return None
 
+
 def predict_category_ai(description, user=None, categories=None, skip_genai=False):
     """
     Predicts category using:
-    1. Historical Data (User-specific Custom Categories)
+    1. Historical Data (the user's category model, when confident enough)
     2. Rule-Based Keywords (General)
-    3. Generative AI (Gemini) - Fallback
+    3. Generative AI (Gemini) - Fallback, through the cached categorizer backend
     """
     description = description.strip()
     
@@ -49,23 +118,13 @@ def predict_category_ai(description, user=None, categories=None, skip_genai=Fals
     if user:
         try:
             # Avoid circular import
-            from django.db.models import Count
-
-            from expenses.models import Expense
-            
-            # 1. Exact match (case insensitive)
-            exact_match = Expense.objects.filter(user=user, description__iexact=description).values('category').annotate(count=Count('category')).order_by('-count').first()
-            if exact_match:
-                return exact_match['category']
-                
-            # 2. Starts With matches from history
-            words = description.split()
-            if len(words) >= 1:
-                first_word = words[0]
-                if len(first_word) > 3:
-                     similar = Expense.objects.filter(user=user, description__istartswith=first_word).values('category').annotate(count=Count('category')).order_by('-count').first()
-                     if similar:
-                          return similar['category']
+            from django.conf import settings
+
+            from expenses.category_model import CategoryModelService
+
+            category, confidence = CategoryModelService.predict(user, description)
+            if category and confidence >= settings.CATEGORY_MODEL_MIN_CONFIDENCE:
+                return category
 
         except Exception as e:
             print(f"Historical Prediction Error: {e}")
@@ -76,48 +135,13 @@ def predict_category_ai(description, user=None, categories=None, skip_genai=Fals
     if category:
         # If we have a specific list of user categories, check if the rule-based one matches any
         if categories:
-            cat_lower = category.lower()
-            cat_words = set(re.findall(r'\w+', cat_lower))
-            for uc in categories:
-                uc_lower = uc.lower()
-                # 1. Exact or substring match
-                if uc_lower == cat_lower or uc_lower in cat_lower or cat_lower in uc_lower:
-                    return uc
-                # 2. Word overlap match (excluding tiny words like 'and', 'the', '&')
-                uc_words = set(re.findall(r'\w+', uc_lower))
-                significant_overlap = [w for w in cat_words.intersection(uc_words) if len(w) > 2]
-                if significant_overlap:
-                    return uc
+            return match_user_category(tuple(categories), category) or category
         return category
 
-    # 2. Try Gemini AI (if configured)
-    api_key = os.getenv('GEMINI_API_KEY')
-    if api_key and not skip_genai:
-        try:
-            # Lazy import to avoid import errors if library not installed
-            import google.generativeai as genai
-            
-            genai.configure(api_key=api_key)
-            model = genai.GenerativeModel('gemini-1.5-flash') # Use Flash for speed/cost
-            
-            # Use user's categories if available, otherwise fallback to defaults
-            category_list = ", ".join(categories) if categories else "Food, Groceries, Transport, Shopping, Bills, Health, Education, Entertainment, Rent, Investment, Other"
-            
-            prompt = f"""
-            Classify the following expense description into one of these categories: 
-            {category_list}
-            
-            Description: "{description}"
-            
-            Return ONLY the category name. If none fit perfectly, pick the closest one.
-            """
-            
-            response = model.generate_content(prompt)
-            if response.text:
-                return response.text.strip()
-                
-        except Exception as e:
-            print(f"Gemini API Error: {e}")
-            pass
-            
+    # 2. Try Generative AI (cached, batched backend; see categorizers.py)
+    if not skip_genai:
+        from .categorizers import categorize_descriptions
+
+        return categorize_descriptions([description], categories).get(description)
+
     return None
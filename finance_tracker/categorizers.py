@@ -0,0 +1,255 @@
+"""
+Generative-AI category backends used when keyword rules and the user's history
+have no answer. Descriptions are classified in batches (one prompt per batch),
+answers are cached by normalized description and category set, and a circuit
+breaker stops calling the provider after repeated failures.
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = (
+    'Food', 'Groceries', 'Transport', 'Shopping', 'Bills', 'Health', 'Education',
+    'Entertainment', 'Rent', 'Investment', 'Other',
+)
+CACHE_PREFIX = 'genai-category'
+
+
+def normalize_description(description):
+    return ' '.join((description or '').lower().split())[:200]
+
+
+def _cache_key(normalized, categories):
+    category_set = '\x1f'.join(sorted({c.lower() for c in categories}))
+    digest = hashlib.sha1(f"{normalized}\x1e{category_set}".encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{digest}"
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failures and rejects calls
+    for ``cooldown`` seconds; the first call after that is a trial.
+    """
+
+    def __init__(self, failure_threshold, cooldown, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at >= self.cooldown:
+                # Half-open: let one call through; a failure re-opens immediately.
+                self.opened_at = None
+                self.failures = self.failure_threshold - 1
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class CategorizerBackend:
+    """``classify`` maps each normalized description in ``descriptions`` to a category name."""
+
+    def classify(self, descriptions, categories):
+        raise NotImplementedError
+
+
+class StubCategorizerBackend(CategorizerBackend):
+    """
+    Offline backend for tests and local development: answers from ``responses``
+    (keyed by normalized description), then the keyword rules, then ``default``.
+    Every batch it receives is recorded in ``calls``.
+    """
+
+    def __init__(self, responses=None, default=None, error=None):
+        self.responses = {normalize_description(k): v for k, v in (responses or {}).items()}
+        self.default = default
+        self.error = error
+        self.calls = []
+
+    def classify(self, descriptions, categories):
+        from .ai_utils import predict_category_rule_based
+
+        self.calls.append(list(descriptions))
+        if self.error is not None:
+            raise self.error
+        return {
+            description: self.responses.get(description) or predict_category_rule_based(description) or self.default
+            for description in descriptions
+        }
+
+
+class GeminiCategorizerBackend(CategorizerBackend):
+    PROMPT = (
+        "Classify each numbered expense description into one of these categories:\n"
+        "{categories}\n\n{lines}\n\n"
+        "Return ONLY a JSON array with one category name per description, in the same order. "
+        "If none fit perfectly, pick the closest one."
+    )
+
+    def __init__(self, api_key, model_name='gemini-1.5-flash', timeout=None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout if timeout is not None else settings.GENAI_TIMEOUT_SECONDS
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            # Lazy import to avoid import errors if library not installed
+            import google.generativeai as genai
+
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def classify(self, descriptions, categories):
+        lines = '\n'.join(f'{number}. {json.dumps(text)}' for number, text in enumerate(descriptions, start=1))
+        prompt = self.PROMPT.format(categories=', '.join(categories), lines=lines)
+        response = self.model.generate_content(prompt, request_options={'timeout': self.timeout})
+        answers = parse_batch_response(response.text or '', len(descriptions))
+        return {
+            description: match_category(answer, categories)
+            for description, answer in zip(descriptions, answers, strict=True)
+            if answer
+        }
+
+
+def parse_batch_response(text, expected):
+    """Reads a JSON array answer, falling back to numbered ``1. Category`` lines."""
+    start, end = text.find('['), text.rfind(']')
+    if start != -1 and end > start:
+        try:
+            values = json.loads(text[start:end + 1])
+            if isinstance(values, list) and len(values) == expected:
+                return [str(value).strip() if value else None for value in values]
+        except ValueError:
+            pass
+    answers = [None] * expected
+    for match in re.finditer(r'^\s*(\d+)[.):]\s*"?([^"\n]+)"?\s*$', text, re.MULTILINE):
+        index = int(match.group(1)) - 1
+        if 0 <= index < expected:
+            answers[index] = match.group(2).strip()
+    return answers
+
+
+def match_category(answer, categories):
+    """Returns the user's spelling of ``answer`` when it names one of ``categories``."""
+    answer = answer.strip().strip('."\'')[:255]
+    for category in categories:
+        if category.lower() == answer.lower():
+            return category
+    return answer or None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                settings.GENAI_BREAKER_FAILURES, settings.GENAI_BREAKER_COOLDOWN_SECONDS,
+            )
+        return _breakers[name]
+
+
+_backend = None
+
+
+def get_categorizer_backend():
+    """The configured backend, or None when generative categorization is off."""
+    global _backend
+    name = settings.GENAI_CATEGORIZER_BACKEND
+    api_key = settings.GEMINI_API_KEY
+    if name == 'stub':
+        return StubCategorizerBackend()
+    if name == 'none' or not api_key:
+        return None
+    if _backend is None or _backend.api_key != api_key:
+        _backend = GeminiCategorizerBackend(api_key)
+    return _backend
+
+
+def categorize_descriptions(descriptions, categories=None, backend=None):
+    """
+    Returns ``{description: category}`` for the descriptions the backend could
+    classify. Cached answers cost nothing; the rest are sent in batches of
+    ``GENAI_BATCH_SIZE``, and nothing is sent while the breaker is open.
+    """
+    backend = backend or get_categorizer_backend()
+    if backend is None:
+        return {}
+    categories = tuple(categories) if categories else DEFAULT_CATEGORIES
+
+    by_normalized = {}
+    for description in descriptions:
+        normalized = normalize_description(description)
+        if normalized:
+            by_normalized.setdefault(normalized, []).append(description)
+    keys = {normalized: _cache_key(normalized, categories) for normalized in by_normalized}
+    cached = cache.get_many(list(keys.values()))
+
+    answers = {}
+    pending = []
+    for normalized, key in keys.items():
+        if key in cached:
+            answers[normalized] = cached[key] or None
+        else:
+            pending.append(normalized)
+
+    breaker = get_breaker(type(backend).__name__)
+    for batch in _batches(pending, settings.GENAI_BATCH_SIZE):
+        if not breaker.allow():
+            logger.warning("Skipping %d descriptions: categorizer circuit is open.", len(batch))
+            break
+        try:
+            result = backend.classify(batch, categories)
+        except Exception:
+            breaker.record_failure()
+            logger.exception("Categorizer batch of %d descriptions failed.", len(batch))
+            continue
+        breaker.record_success()
+        # Unanswered descriptions are cached too, so they are not asked again.
+        cache.set_many(
+            {keys[normalized]: result.get(normalized) or '' for normalized in batch},
+            settings.GENAI_CACHE_SECONDS,
+        )
+        for normalized in batch:
+            answers[normalized] = result.get(normalized)
+
+    return {
+        description: answers[normalized]
+        for normalized, originals in by_normalized.items()
+        if answers.get(normalized)
+        for description in originals
+    }
@@ -123,11 +123,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
-                'expenses.context_processors.currency_symbol',
-                'expenses.context_processors.notifications',
-                'expenses.context_processors.user_accounts',
-                'expenses.context_processors.webpush_vapid_key',
-                'expenses.context_processors.sidebar_badges',
+                'expenses.context_processors.page_chrome',
                 'expenses.context_processors.personalization',
                 'finance_tracker.context_processors.google_analytics',
                 'finance_tracker.context_processors.plan_details',
@@ -357,4 +353,99 @@ LEDGER_READ_COMPARE_ENABLED = _env_bool('LEDGER_READ_COMPARE_ENABLED', True)
 LEDGER_READ_COMPARE_SAMPLE_RATE = float(os.environ.get('LEDGER_READ_COMPARE_SAMPLE_RATE', '1.0'))
 LEDGER_READ_COHORT_PERCENT = max(0, min(100, _env_int('LEDGER_READ_COHORT_PERCENT', 100)))
 LEDGER_READ_COHORT_USER_IDS = _env_int_set('LEDGER_READ_COHORT_USER_IDS')
-LEDGER_READ_EXCLUDE_USER_IDS = _env_int_set('LEDGER_READ_EXCLUDE_USER_IDS')
\ No newline at end of file
+LEDGER_READ_EXCLUDE_USER_IDS = _env_int_set('LEDGER_READ_EXCLUDE_USER_IDS')
+
+# Denormalized transaction feed: writes are kept in sync on save/delete; reads
+# switch over once `manage.py rebuild_transaction_feed` has backfilled it.
+TRANSACTION_FEED_ENABLED = _env_bool('TRANSACTION_FEED_ENABLED', True)
+TRANSACTION_FEED_READ_ENABLED = _env_bool('TRANSACTION_FEED_READ_ENABLED', False)
+
+# Data exports above this many rows are generated by a queued `run_export_jobs`
+# run (see BACKGROUND_JOB_* below) into EXPORT_ROOT instead of being streamed
+# from the web worker. RUNNING exports that report no progress for
+# EXPORT_STALE_MINUTES are assumed dead and restarted by the next run (the
+# /api/cron/exports/ endpoint queues one).
+EXPORT_ROOT = Path(os.environ.get('EXPORT_ROOT', BASE_DIR / 'exports'))
+EXPORT_ASYNC_ROW_THRESHOLD = _env_int('EXPORT_ASYNC_ROW_THRESHOLD', 20000)
+EXPORT_RETENTION_DAYS = _env_int('EXPORT_RETENTION_DAYS', 7)
+EXPORT_STALE_MINUTES = _env_int('EXPORT_STALE_MINUTES', 15)
+
+# Statement uploads larger than IMPORT_ASYNC_BYTES are stored under IMPORT_ROOT
+# and imported by a queued `run_import_jobs` run; RUNNING jobs idle for
+# IMPORT_STALE_MINUTES are assumed dead and resumed from their last committed
+# offset by the next run (the /api/cron/imports/ endpoint queues one).
+IMPORT_ROOT = Path(os.environ.get('IMPORT_ROOT', BASE_DIR / 'imports'))
+IMPORT_ASYNC_BYTES = _env_int('IMPORT_ASYNC_BYTES', 2 * 1024 * 1024)
+IMPORT_STALE_MINUTES = _env_int('IMPORT_STALE_MINUTES', 15)
+
+# Every committed write to a user's financial data bumps UserProfile.data_epoch;
+# caches key their entries on it (expenses.data_epoch) and keep them for
+# DATA_EPOCH_CACHE_SECONDS. The epoch is read from the database on every lookup,
+# so the default per-process cache stays correct with several web and worker
+# processes.
+DATA_EPOCH_CACHE_SECONDS = _env_int('DATA_EPOCH_CACHE_SECONDS', 3600)
+
+# Sidebar data is cached per user for PAGE_CHROME_CACHE_SECONDS under the
+# user's data epoch; notifications and web-push state are read on every request.
+PAGE_CHROME_CACHE_SECONDS = _env_int('PAGE_CHROME_CACHE_SECONDS', 300)
+
+# Per-user category model used by predict_category_ai. Predictions below the
+# confidence threshold fall through to the keyword rules; the exact-description
+# table stops growing after CATEGORY_MODEL_MAX_DESCRIPTIONS entries.
+CATEGORY_MODEL_MIN_CONFIDENCE = float(os.environ.get('CATEGORY_MODEL_MIN_CONFIDENCE', '0.6'))
+CATEGORY_MODEL_MAX_DESCRIPTIONS = _env_int('CATEGORY_MODEL_MAX_DESCRIPTIONS', 5000)
+
+# Generative categorization (finance_tracker/categorizers.py). The backend is
+# Gemini when GEMINI_API_KEY is set; 'stub' answers offline from keyword rules
+# and 'none' turns it off. Descriptions are sent GENAI_BATCH_SIZE per prompt,
+# answers are cached, and after GENAI_BREAKER_FAILURES consecutive errors the
+# provider is skipped for GENAI_BREAKER_COOLDOWN_SECONDS.
+GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY', '')
+GENAI_CATEGORIZER_BACKEND = os.environ.get('GENAI_CATEGORIZER_BACKEND', 'gemini')
+GENAI_TIMEOUT_SECONDS = _env_int('GENAI_TIMEOUT_SECONDS', 8)
+GENAI_BATCH_SIZE = _env_int('GENAI_BATCH_SIZE', 50)
+GENAI_CACHE_SECONDS = _env_int('GENAI_CACHE_SECONDS', 30 * 24 * 3600)
+GENAI_BREAKER_FAILURES = _env_int('GENAI_BREAKER_FAILURES', 3)
+GENAI_BREAKER_COOLDOWN_SECONDS = _env_int('GENAI_BREAKER_COOLDOWN_SECONDS', 300)
+
+# send_notifications works through users NOTIFICATION_CHUNK_SIZE at a time
+# (by user id), optionally across NOTIFICATION_WORKERS processes, and sends the
+# digests NOTIFICATION_EMAIL_BATCH_SIZE per send_messages() call.
+NOTIFICATION_CHUNK_SIZE = _env_int('NOTIFICATION_CHUNK_SIZE', 500)
+NOTIFICATION_WORKERS = _env_int('NOTIFICATION_WORKERS', 1)
+NOTIFICATION_EMAIL_BATCH_SIZE = _env_int('NOTIFICATION_EMAIL_BATCH_SIZE', 100)
+
+# Web-push delivery (expenses/push_service.py): subscriptions are resolved
+# PUSH_BATCH_SIZE users at a time and sent by PUSH_WORKERS threads with a
+# PUSH_TIMEOUT_SECONDS request timeout. 429/5xx and connection errors are
+# retried PUSH_RETRIES times with exponential backoff from
+# PUSH_RETRY_BACKOFF_SECONDS; 404/410 subscriptions are deleted.
+PUSH_BATCH_SIZE = _env_int('PUSH_BATCH_SIZE', 1000)
+PUSH_WORKERS = _env_int('PUSH_WORKERS', 32)
+PUSH_TIMEOUT_SECONDS = _env_int('PUSH_TIMEOUT_SECONDS', 10)
+PUSH_RETRIES = _env_int('PUSH_RETRIES', 2)
+PUSH_RETRY_BACKOFF_SECONDS = float(os.environ.get('PUSH_RETRY_BACKOFF_SECONDS', '0.5'))
+
+# send_monthly_report computes reports MONTHLY_REPORT_CHUNK_SIZE users at a
+# time and renders and sends each chunk across MONTHLY_REPORT_WORKERS threads.
+MONTHLY_REPORT_CHUNK_SIZE = _env_int('MONTHLY_REPORT_CHUNK_SIZE', 500)
+MONTHLY_REPORT_WORKERS = _env_int('MONTHLY_REPORT_WORKERS', 4)
+
+# send_lifecycle_emails selects due users LIFECYCLE_EMAIL_BATCH_SIZE at a time
+# and sends each batch with one send_messages() call.
+LIFECYCLE_EMAIL_BATCH_SIZE = _env_int('LIFECYCLE_EMAIL_BATCH_SIZE', 100)
+
+# Background jobs (expenses/job_queue.py, run by `manage.py run_worker`): a
+# failed job is retried up to BACKGROUND_JOB_MAX_ATTEMPTS times in total with
+# exponential backoff from BACKGROUND_JOB_RETRY_BACKOFF_SECONDS. The worker
+# refreshes a running job's heartbeat every BACKGROUND_JOB_HEARTBEAT_SECONDS;
+# a job whose heartbeat is older than BACKGROUND_JOB_STALE_MINUTES belongs to a
+# dead worker and is run again.
+BACKGROUND_JOB_MAX_ATTEMPTS = _env_int('BACKGROUND_JOB_MAX_ATTEMPTS', 3)
+BACKGROUND_JOB_RETRY_BACKOFF_SECONDS = _env_int('BACKGROUND_JOB_RETRY_BACKOFF_SECONDS', 60)
+BACKGROUND_JOB_HEARTBEAT_SECONDS = _env_int('BACKGROUND_JOB_HEARTBEAT_SECONDS', 30)
+BACKGROUND_JOB_STALE_MINUTES = _env_int('BACKGROUND_JOB_STALE_MINUTES', 5)
+
+# A base currency change queues renormalize_base_amounts, which rewrites base
+# amounts BASE_CURRENCY_CHUNK_SIZE rows per UPDATE.
+BASE_CURRENCY_CHUNK_SIZE = _env_int('BASE_CURRENCY_CHUNK_SIZE', 1000)